@@ -1,26 +1,68 @@
+from dataclasses import dataclass
 from typing import Annotated, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_session
-from app.core.security import decode_token
+from app.core.security import remember_token_state, token_revoked, token_state_stale, verify_access_token
+from app.models.user import User
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """Identity and workspace scope taken from the access token"""
+    id: int
+    workspace_id: Optional[int]
+    is_admin: bool
+
+
 async def get_db(session: AsyncSession = Depends(get_session)) -> AsyncSession:
     return session
 
 
-async def get_current_user_id(token: Annotated[str, Depends(oauth2_scheme)]) -> int:
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+async def _token_claims(token: str, db: AsyncSession) -> tuple[int, dict]:
+    payload = verify_access_token(token)
     try:
-        return int(payload["sub"])
-    except (KeyError, ValueError, TypeError, JWTError):
+        user_id = int(payload["sub"])
+    except (KeyError, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    if token_state_stale(user_id):
+        # Revocations are stored on the user row, so one made by another
+        # worker is seen here within TOKEN_STATE_TTL_SECONDS
+        row = (await db.execute(
+            select(User.is_active, User.tokens_valid_after).where(User.id == user_id)
+        )).first()
+        remember_token_state(user_id, row.tokens_valid_after if row else None, active=bool(row and row.is_active))
+    if token_revoked(payload):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return user_id, payload
+
+
+async def get_current_user_id(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: AsyncSession = Depends(get_db),
+) -> int:
+    return (await _token_claims(token, db))[0]
+
+
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: AsyncSession = Depends(get_db),
+) -> CurrentUser:
+    """The caller's id, workspace and role from the token claims; the user
+    row is only read to check revocation, once per TOKEN_STATE_TTL_SECONDS"""
+    user_id, payload = await _token_claims(token, db)
+    if "ws" not in payload:
+        # Token issued before claims were added: look the user up once and
+        # keep the result on the cached payload
+        user = await db.get(User, user_id)
+        if not user or not user.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        payload.update(ws=user.workspace_id, adm=user.is_admin)
+    return CurrentUser(id=user_id, workspace_id=payload["ws"], is_admin=bool(payload.get("adm")))
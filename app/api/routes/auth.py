@@ -4,7 +4,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
-from app.core.security import create_access_token, create_refresh_token, verify_password, get_password_hash
+from app.core.security import create_access_token, create_refresh_token, get_password_hash_async, verify_password_async
+from app.core.user_directory import invalidate_workspace_directory
 from app.models.user import User, UserCreate, UserRead
 from app.models.workspace import Workspace
 
@@ -26,11 +27,17 @@ class LoginRequest(BaseModel):
 async def login(data: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == data.email))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(data.password, user.hashed_password):
+    valid, new_hash = await verify_password_async(data.password, user.hashed_password) if user else (False, None)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Your account has been deactivated")
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
 
     return TokenResponse(
-        access_token=create_access_token(user.id),
+        access_token=create_access_token(user.id, user.workspace_id, user.is_admin),
         refresh_token=create_refresh_token(user.id),
     )
 
@@ -45,8 +52,9 @@ async def signup(data: UserCreate, db: AsyncSession = Depends(get_db)):
     db.add(ws)
     await db.flush()
 
-    user = User(email=data.email, full_name=data.full_name or "", hashed_password=get_password_hash(data.password), workspace_id=ws.id)
+    user = User(email=data.email, full_name=data.full_name or "", hashed_password=await get_password_hash_async(data.password), workspace_id=ws.id)
     db.add(user)
     await db.commit()
+    invalidate_workspace_directory(ws.id)
     await db.refresh(user)
     return UserRead(id=user.id, email=user.email, full_name=user.full_name, is_active=user.is_active, is_admin=user.is_admin)
@@ -1,14 +1,13 @@
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import asc, desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import col
 
-from app.api.deps import get_current_user_id, get_db
+from app.api.deps import CurrentUser, get_current_user, get_db
 from app.models.project import Project, ProjectCreate, ProjectRead, ProjectUpdate
-from app.models.user import User
 
 router = APIRouter(prefix="/projects", tags=["projects"]) 
 
@@ -16,14 +15,11 @@ router = APIRouter(prefix="/projects", tags=["projects"])
 @router.post("/", response_model=ProjectRead, status_code=201)
 async def create_project(
     data: ProjectCreate,
-    user_id: int = Depends(get_current_user_id),
+    user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     # Assign project to the user's workspace
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    project = Project(name=data.name, description=data.description, owner_id=user_id, workspace_id=user.workspace_id)
+    project = Project(name=data.name, description=data.description, owner_id=user.id, workspace_id=user.workspace_id)
     db.add(project)
     await db.commit()
     await db.refresh(project)
@@ -32,7 +28,7 @@ async def create_project(
 
 @router.get("/", response_model=list[ProjectRead])
 async def list_projects(
-    user_id: int = Depends(get_current_user_id),
+    user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     q: Optional[str] = Query(None),
     sort: Optional[str] = Query("-created_at"),
@@ -40,9 +36,6 @@ async def list_projects(
     offset: int = Query(0, ge=0),
 ):
     # Filter by user's workspace
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     stmt = select(Project).where(Project.workspace_id == user.workspace_id)
     if q:
         stmt = stmt.where(col(Project.name).ilike(f"%{q}%"))
@@ -62,10 +55,7 @@ async def list_projects(
 
 
 @router.get("/{project_id}", response_model=ProjectRead)
-async def get_project(project_id: int, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)):
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+async def get_project(project_id: int, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Project).where(Project.id == project_id, Project.workspace_id == user.workspace_id))
     project = result.scalar_one_or_none()
     if not project:
@@ -77,12 +67,9 @@ async def get_project(project_id: int, user_id: int = Depends(get_current_user_i
 async def update_project(
     project_id: int,
     data: ProjectUpdate,
-    user_id: int = Depends(get_current_user_id),
+    user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     result = await db.execute(select(Project).where(Project.id == project_id, Project.workspace_id == user.workspace_id))
     project = result.scalar_one_or_none()
     if not project:
@@ -96,8 +83,7 @@ async def update_project(
 
 
 @router.delete("/{project_id}", status_code=204)
-async def delete_project(project_id: int, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)):
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one()
+async def delete_project(project_id: int, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Project).where(Project.id == project_id, Project.workspace_id == user.workspace_id))
     project = result.scalar_one_or_none()
     if not project:
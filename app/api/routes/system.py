@@ -2,14 +2,12 @@
 System API endpoints for version and update management
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from typing import Dict, Any
 
-from app.api.deps import get_current_user_id, get_db
+from app.api.deps import CurrentUser, get_current_user
+from app.core.security import password_hasher_stats
 from app.core.updates import check_for_updates, get_current_version
 from app.core.version import VERSION, BUILD_DATE
-from app.models.user import User
 
 router = APIRouter(prefix="/system", tags=["system"])
 
@@ -29,22 +27,34 @@ async def get_version():
 
 @router.get("/updates/check")
 async def check_updates(
-    user_id: int = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db)
+    user: CurrentUser = Depends(get_current_user),
 ):
     """
     Check for available updates.
     Admin only endpoint.
     """
     # Verify user is admin
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user or not user.is_admin:
+    if not user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     
     update_info = await check_for_updates()
     return update_info
 
 
+@router.get("/password-hasher")
+async def get_password_hasher_stats(
+    user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Password hasher pool queue depth and timings.
+    Admin only endpoint.
+    """
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return password_hasher_stats()
+
+
 @router.get("/health")
 async def health_check():
     """
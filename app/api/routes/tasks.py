@@ -1,14 +1,13 @@
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import asc, desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import col
 
-from app.api.deps import get_current_user_id, get_db
+from app.api.deps import CurrentUser, get_current_user, get_db
 from app.models.project import Project
-from app.models.user import User
 from app.models.task import Task, TaskCreate, TaskRead, TaskUpdate
 
 router = APIRouter(prefix="/tasks", tags=["tasks"]) 
@@ -17,13 +16,10 @@ router = APIRouter(prefix="/tasks", tags=["tasks"])
 @router.post("/", response_model=TaskRead, status_code=201)
 async def create_task(
     data: TaskCreate,
-    user_id: int = Depends(get_current_user_id),
+    user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     # Ensure project belongs to user's workspace
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     result = await db.execute(select(Project).where(Project.id == data.project_id, Project.workspace_id == user.workspace_id))
     project = result.scalar_one_or_none()
     if not project:
@@ -36,7 +32,7 @@ async def create_task(
         priority=data.priority or Task.priority.default,
         due_date=data.due_date,
         project_id=data.project_id,
-        creator_id=user_id,
+        creator_id=user.id,
     )
     db.add(task)
     await db.commit()
@@ -45,7 +41,7 @@ async def create_task(
     # Auto-assign task to creator if they're not an admin
     if not user.is_admin:
         from app.models.assignment import Assignment
-        assignment = Assignment(task_id=task.id, assignee_id=user_id, assigner_id=user_id)
+        assignment = Assignment(task_id=task.id, assignee_id=user.id, assigner_id=user.id)
         db.add(assignment)
         await db.commit()
     
@@ -54,7 +50,7 @@ async def create_task(
 
 @router.get("/", response_model=list[TaskRead])
 async def list_tasks(
-    user_id: int = Depends(get_current_user_id),
+    user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     project_id: Optional[str] = Query(None),
     assignee_id: Optional[str] = Query(None),
@@ -70,9 +66,6 @@ async def list_tasks(
     assignee_id_int = int(assignee_id) if assignee_id and assignee_id.strip() else None
     
     # Limit tasks to projects in the user's workspace
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     stmt = select(Task).join(Project, Task.project_id == Project.id).where(Project.workspace_id == user.workspace_id)
     if project_id_int:
         stmt = stmt.where(Task.project_id == project_id_int)
@@ -101,10 +94,7 @@ async def list_tasks(
 
 
 @router.get("/{task_id}", response_model=TaskRead)
-async def get_task(task_id: int, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)):
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+async def get_task(task_id: int, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     stmt = (
         select(Task)
         .join(Project, Task.project_id == Project.id)
@@ -121,12 +111,9 @@ async def get_task(task_id: int, user_id: int = Depends(get_current_user_id), db
 async def update_task(
     task_id: int,
     data: TaskUpdate,
-    user_id: int = Depends(get_current_user_id),
+    user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     stmt = (
         select(Task)
         .join(Project, Task.project_id == Project.id)
@@ -143,7 +130,7 @@ async def update_task(
         assignment = (await db.execute(
             select(Assignment).where(
                 Assignment.task_id == task_id,
-                Assignment.assignee_id == user_id
+                Assignment.assignee_id == user.id
             )
         )).scalar_one_or_none()
         if not assignment:
@@ -157,9 +144,7 @@ async def update_task(
 
 
 @router.delete("/{task_id}", status_code=204)
-async def delete_task(task_id: int, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)):
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one()
-    
+async def delete_task(task_id: int, user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     # Only admins can delete tasks
     if not user.is_admin:
         raise HTTPException(status_code=403, detail="Only admins can delete tasks")
@@ -0,0 +1,281 @@
+"""
+User activity reports.
+
+Report data is gathered with one aggregate query for the summary counts plus
+one bounded, column-only query per section; the PDF is rendered by ReportLab
+in a worker process so a large report never blocks the event loop. Rendered
+reports are cached by (target user, date range, data version), where the
+data version is a digest of the collected rows: re-downloading an unchanged
+report costs only the collection queries. Reports for very active users can
+be rendered as a background job and downloaded once ready.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import pickle
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.report_pdf import render_user_activity_pdf, warm_up
+from app.models.activity import Activity
+from app.models.assignment import Assignment
+from app.models.comment import Comment
+from app.models.enums import TaskStatus
+from app.models.project import Project
+from app.models.project_member import ProjectMember
+from app.models.task import Task
+from app.models.task_history import TaskHistory
+from app.models.ticket import Ticket, TicketComment
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+REPORT_WORKERS = 2
+REPORT_CACHE_MAX_ENTRIES = 32
+# Reports covering more activity rows than this are rendered as a background job
+REPORT_BACKGROUND_THRESHOLD = 5000
+REPORT_JOB_TTL_SECONDS = 3600
+
+# Rows shown per section of the PDF
+SECTION_LIMITS = {
+    'overdue': 15,
+    'tasks_created': 25,
+    'assignments': 20,
+    'edits': 15,
+    'comments': 10,
+    'projects': 15,
+    'activities': 15,
+    'ticket_comments': 15,
+    'tickets_assigned': 15,
+    'tickets_closed': 20,
+}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_cache: OrderedDict[tuple, bytes] = OrderedDict()
+_jobs: dict[str, dict] = {}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(max_workers=REPORT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def warm_report_pool() -> None:
+    """Start a worker and load ReportLab into it ahead of the first report"""
+    if _pool is None:
+        _get_pool().submit(warm_up)
+
+
+def shutdown_report_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _value(value) -> str:
+    return getattr(value, 'value', value) or ''
+
+
+async def collect_user_activity(
+    db: AsyncSession, target_user: User, start_dt: datetime, end_dt: datetime
+) -> dict:
+    """Gather everything the report shows as plain, picklable data"""
+    uid = target_user.id
+    in_range = lambda column: (column >= start_dt) & (column < end_dt)  # noqa: E731
+    assigned_task_ids = select(Assignment.task_id).where(Assignment.assignee_id == uid)
+
+    def count(model, *conditions):
+        return select(func.count()).select_from(model).where(*conditions).scalar_subquery()
+
+    counts = (await db.execute(select(
+        count(Task, Task.creator_id == uid, in_range(Task.created_at)).label('tasks_created'),
+        select(func.count()).select_from(Task).join(Assignment, Task.id == Assignment.task_id)
+        .where(Assignment.assignee_id == uid, in_range(Task.created_at)).scalar_subquery().label('task_assignments'),
+        count(TaskHistory, TaskHistory.editor_id == uid, in_range(TaskHistory.created_at)).label('task_edits'),
+        count(Comment, Comment.author_id == uid, in_range(Comment.created_at)).label('comments'),
+        count(Project, Project.owner_id == uid, in_range(Project.created_at)).label('projects_created'),
+        count(Activity, Activity.created_by == uid, in_range(Activity.created_at)).label('activities'),
+        count(Ticket, Ticket.closed_by_id == uid, in_range(Ticket.closed_at)).label('tickets_closed'),
+        count(TicketComment, TicketComment.user_id == uid, in_range(TicketComment.created_at)).label('ticket_comments'),
+        count(Ticket, Ticket.assigned_to_id == uid, in_range(Ticket.created_at)).label('tickets_assigned'),
+    ))).one()._asdict()
+
+    async def rows(stmt, section):
+        return [tuple(r) for r in (await db.execute(stmt.limit(SECTION_LIMITS[section]))).all()]
+
+    today = datetime.now().date()
+    overdue = await rows(
+        select(Task.title, Task.due_date, Task.priority, Task.status)
+        .where(
+            or_(Task.creator_id == uid, Task.id.in_(assigned_task_ids)),
+            in_range(Task.created_at),
+            Task.due_date < today,
+            Task.status != TaskStatus.done,
+        )
+        .order_by(Task.due_date),
+        'overdue',
+    )
+    tasks_created = await rows(
+        select(Task.created_at, Task.title, Task.due_date, Task.priority, Task.status)
+        .where(Task.creator_id == uid, in_range(Task.created_at))
+        .order_by(Task.created_at.desc()),
+        'tasks_created',
+    )
+    # Task creator is the one who assigned it
+    assignments = await rows(
+        select(Task.created_at, Task.title, func.coalesce(func.nullif(User.full_name, ''), User.username),
+               Task.due_date, Task.status)
+        .join(Assignment, Task.id == Assignment.task_id)
+        .outerjoin(User, User.id == Task.creator_id)
+        .where(Assignment.assignee_id == uid, in_range(Task.created_at))
+        .order_by(Task.created_at.desc()),
+        'assignments',
+    )
+    edits = await rows(
+        select(TaskHistory.created_at, TaskHistory.task_id, TaskHistory.field,
+               func.substr(TaskHistory.old_value, 1, 20), func.substr(TaskHistory.new_value, 1, 20))
+        .where(TaskHistory.editor_id == uid, in_range(TaskHistory.created_at))
+        .order_by(TaskHistory.created_at.desc()),
+        'edits',
+    )
+    comments = await rows(
+        select(Comment.created_at, Comment.task_id, func.substr(Comment.content, 1, 60))
+        .where(Comment.author_id == uid, in_range(Comment.created_at))
+        .order_by(Comment.created_at.desc()),
+        'comments',
+    )
+    member_count = (
+        select(func.count()).select_from(ProjectMember)
+        .where(ProjectMember.project_id == Project.id).scalar_subquery()
+    )
+    projects = await rows(
+        select(Project.created_at, Project.name, Project.is_archived, member_count)
+        .where(Project.owner_id == uid, in_range(Project.created_at))
+        .order_by(Project.created_at.desc()),
+        'projects',
+    )
+    activities = await rows(
+        select(Activity.created_at, Activity.activity_type, Activity.subject, Activity.contact_id)
+        .where(Activity.created_by == uid, in_range(Activity.created_at))
+        .order_by(Activity.created_at.desc()),
+        'activities',
+    )
+    ticket_comments = await rows(
+        select(TicketComment.created_at, TicketComment.ticket_id,
+               func.substr(TicketComment.content, 1, 45), TicketComment.is_internal)
+        .where(TicketComment.user_id == uid, in_range(TicketComment.created_at))
+        .order_by(TicketComment.created_at.desc()),
+        'ticket_comments',
+    )
+    tickets_assigned = await rows(
+        select(Ticket.created_at, Ticket.ticket_number, Ticket.subject, Ticket.priority, Ticket.status)
+        .where(Ticket.assigned_to_id == uid, in_range(Ticket.created_at))
+        .order_by(Ticket.created_at.desc()),
+        'tickets_assigned',
+    )
+    tickets_closed = await rows(
+        select(Ticket.closed_at, Ticket.ticket_number, Ticket.subject, Ticket.priority)
+        .where(Ticket.closed_by_id == uid, in_range(Ticket.closed_at))
+        .order_by(Ticket.closed_at.desc()),
+        'tickets_closed',
+    )
+
+    return {
+        'user_name': target_user.full_name or target_user.username,
+        'start': start_dt,
+        'end': end_dt,
+        'today': today,
+        'counts': counts,
+        'overdue': [(t, d, _value(p), _value(s)) for t, d, p, s in overdue],
+        'tasks_created': [(c, t, d, _value(p), _value(s)) for c, t, d, p, s in tasks_created],
+        'assignments': [(c, t, a, d, _value(s)) for c, t, a, d, s in assignments],
+        'edits': edits,
+        'comments': comments,
+        'projects': projects,
+        'activities': [(c, _value(a), s, contact) for c, a, s, contact in activities],
+        'ticket_comments': ticket_comments,
+        'tickets_assigned': tickets_assigned,
+        'tickets_closed': tickets_closed,
+    }
+
+
+def report_cache_key(target_user_id: int, start_dt: datetime, end_dt: datetime, data: dict) -> tuple:
+    version = hashlib.sha1(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+    return (target_user_id, start_dt.date(), end_dt.date(), version)
+
+
+def is_large_report(data: dict) -> bool:
+    return sum(data['counts'].values()) > REPORT_BACKGROUND_THRESHOLD
+
+
+def get_cached_report(key: tuple) -> Optional[bytes]:
+    pdf = _cache.get(key)
+    if pdf is not None:
+        _cache.move_to_end(key)
+    return pdf
+
+
+async def render_report(key: tuple, data: dict) -> bytes:
+    """Render in the worker pool, storing the result in the report cache"""
+    # The generation time is not part of the data version
+    pdf = await asyncio.wrap_future(_get_pool().submit(
+        render_user_activity_pdf, {**data, 'generated_at': datetime.now()}
+    ))
+    _cache[key] = pdf
+    _cache.move_to_end(key)
+    while len(_cache) > REPORT_CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+    return pdf
+
+
+def _prune_jobs() -> None:
+    cutoff = time.monotonic() - REPORT_JOB_TTL_SECONDS
+    for job_id in [j for j, job in _jobs.items() if job['created'] < cutoff and job['status'] != 'running']:
+        del _jobs[job_id]
+
+
+async def _run_report_job(job_id: str, key: tuple, data: dict) -> None:
+    job = _jobs[job_id]
+    try:
+        job['pdf'] = await render_report(key, data)
+        job['status'] = 'done'
+    except Exception as e:
+        logger.error(f"Report job {job_id} failed: {e}")
+        job['status'] = 'failed'
+        job['error'] = str(e)
+
+
+def start_report_job(owner_id: int, key: tuple, data: dict, filename: str) -> str:
+    _prune_jobs()
+    job_id = uuid.uuid4().hex
+    _jobs[job_id] = {
+        'owner_id': owner_id,
+        'filename': filename,
+        'status': 'running',
+        'error': None,
+        'pdf': None,
+        'created': time.monotonic(),
+    }
+    _jobs[job_id]['task'] = asyncio.create_task(_run_report_job(job_id, key, data))
+    return job_id
+
+
+def get_report_job(job_id: str, owner_id: int) -> Optional[dict]:
+    job = _jobs.get(job_id)
+    if job is None or job['owner_id'] != owner_id:
+        return None
+    return job
@@ -0,0 +1,124 @@
+"""
+Attachment delivery.
+
+Each attachment view used to repeat a multi-join permission query and
+re-send the whole file. Once a user has been allowed to read an attachment,
+the resolved file and its validators are remembered for a short time, so
+repeat views (image previews in a busy comment list or chat feed) skip the
+database. Responses carry a strong ETag derived from the content hash
+(through a keyed HMAC, so the header does not reveal the hash), answer
+``If-None-Match`` with 304 and support byte ranges.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+from app.core.config import get_settings
+from app.core.file_streaming import ranged_file_response
+from app.core.thumbnails import THUMBNAIL_MEDIA_TYPE, get_thumbnail
+
+ATTACHMENT_GRANT_TTL_SECONDS = 60
+ATTACHMENT_GRANT_MAX_ENTRIES = 10_000
+# Attachment content never changes for a given id; the browser may reuse it
+# for an hour and then revalidate with the ETag
+ATTACHMENT_CACHE_CONTROL = "private, max-age=3600"
+
+
+class AttachmentGrant(NamedTuple):
+    """A permitted attachment, resolved to its file on disk"""
+    path: Path
+    filename: str
+    media_type: str
+    etag: Optional[str]  # Strong validator from the content hash, if known
+
+
+def content_etag(content_hash: str) -> str:
+    digest = hmac.new(get_settings().secret_key.encode(), content_hash.encode(), hashlib.sha256).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+_grants: dict[tuple[str, int, int], tuple[float, AttachmentGrant]] = {}
+
+
+def make_grant(file_path: str, filename: str, media_type: Optional[str], content_hash: Optional[str]) -> AttachmentGrant:
+    # Handle both absolute paths (old) and relative paths (new)
+    path = Path(file_path)
+    if not path.is_absolute():
+        path = Path.cwd() / path
+    return AttachmentGrant(
+        path=path,
+        filename=filename,
+        media_type=media_type or 'application/octet-stream',
+        etag=content_etag(content_hash) if content_hash else None,
+    )
+
+
+def get_grant(kind: str, user_id: int, attachment_id: int) -> Optional[AttachmentGrant]:
+    entry = _grants.get((kind, user_id, attachment_id))
+    if entry is None:
+        return None
+    expires_at, grant = entry
+    if expires_at < time.monotonic():
+        _grants.pop((kind, user_id, attachment_id), None)
+        return None
+    return grant
+
+
+def remember_grant(kind: str, user_id: int, attachment_id: int, grant: AttachmentGrant) -> None:
+    now = time.monotonic()
+    if len(_grants) >= ATTACHMENT_GRANT_MAX_ENTRIES:
+        for key in [k for k, (expires_at, _) in _grants.items() if expires_at < now]:
+            del _grants[key]
+        if len(_grants) >= ATTACHMENT_GRANT_MAX_ENTRIES:
+            _grants.clear()
+    _grants[(kind, user_id, attachment_id)] = (now + ATTACHMENT_GRANT_TTL_SECONDS, grant)
+
+
+def clear_attachment_grants(user_id: Optional[int] = None) -> None:
+    """Forget cached permissions (for one user, e.g. on logout or deactivation)"""
+    if user_id is None:
+        _grants.clear()
+        return
+    for key in [k for k in _grants if k[1] == user_id]:
+        del _grants[key]
+
+
+async def thumbnail_grant(grant: AttachmentGrant, size: str) -> AttachmentGrant:
+    """The ``size`` thumbnail of an image attachment, or the original when
+    the attachment cannot be scaled"""
+    path = await get_thumbnail(grant.path, size, grant.media_type)
+    if path is None:
+        return grant
+    return AttachmentGrant(
+        path=path,
+        filename=f"{Path(grant.filename).stem}.webp",
+        media_type=THUMBNAIL_MEDIA_TYPE,
+        etag=f'{grant.etag[:-1]}-{size}"' if grant.etag else None,
+    )
+
+
+def attachment_response(
+    request: Request,
+    grant: AttachmentGrant,
+    disposition: str = "attachment",
+    headers: Optional[dict] = None,
+) -> Response:
+    try:
+        return ranged_file_response(
+            request,
+            grant.path,
+            filename=grant.filename,
+            media_type=grant.media_type,
+            disposition=disposition,
+            etag=grant.etag,
+            headers={"Cache-Control": ATTACHMENT_CACHE_CONTROL, **(headers or {})},
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail='File not found on disk') from None
@@ -0,0 +1,180 @@
+"""
+Deduplicated attachment storage.
+
+Comment, chat and ticket attachments are stored once per distinct content
+under ``app/uploads/blobs/<aa>/<sha256>`` (not served by the public
+``/uploads`` mount, only through the attachment download routes); attachment rows keep their own
+filename and MIME type and point at the shared file through ``content_hash``.
+``AttachmentBlob.ref_count`` is bumped as rows are created but never
+decremented: rows mostly disappear through database cascades (deleting a
+task, chat or ticket), so garbage collection recounts references from the
+attachment tables before removing anything.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import aiofiles.os
+from fastapi import UploadFile
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import upsert_insert
+from app.core.uploads import UPLOADS_DIR, StoredUpload, save_upload
+from app.core.thumbnails import remove_thumbnails, schedule_thumbnails
+from app.models.attachment_blob import AttachmentBlob
+from app.models.chat import MessageAttachment
+from app.models.comment_attachment import CommentAttachment
+from app.models.ticket import TicketAttachment
+
+logger = logging.getLogger(__name__)
+
+BLOBS_DIR = UPLOADS_DIR / 'blobs'
+ATTACHMENT_GC_INTERVAL_SECONDS = 6 * 3600
+# Blobs younger than this are never collected, so a file written by a request
+# that has not committed its attachment row yet is left alone
+ATTACHMENT_GC_GRACE_SECONDS = 3600
+
+REFERENCING_MODELS = (CommentAttachment, MessageAttachment, TicketAttachment)
+
+_gc_task: asyncio.Task | None = None
+
+
+def blob_relative_path(digest: str) -> str:
+    return f"app/uploads/blobs/{digest[:2]}/{digest}"
+
+
+async def store_attachment(db: AsyncSession, upload: UploadFile, max_size: int) -> StoredUpload:
+    """Stream an upload into the blob store and take a reference to its content.
+
+    The returned metadata points at the shared blob; the reference is part of
+    the caller's transaction, so it is dropped if the request rolls back.
+    """
+    stored = await save_upload(upload, 'blobs/.incoming', max_size)
+    target = BLOBS_DIR / stored.sha256[:2] / stored.sha256
+    await aiofiles.os.makedirs(target.parent, exist_ok=True)
+    # Always move the fresh copy into place: identical content makes this a
+    # no-op for readers, and the new mtime keeps GC from racing this request
+    await aiofiles.os.replace(stored.path, target)
+
+    relative_path = blob_relative_path(stored.sha256)
+    await _add_reference(db, stored.sha256, relative_path, stored.size)
+    schedule_thumbnails(target, stored.content_type)
+    # Blobs have no public URL: they are downloaded through the attachment routes
+    return stored._replace(path=target, relative_path=relative_path, url='')
+
+
+async def _add_reference(db: AsyncSession, digest: str, relative_path: str, size: int) -> None:
+    stmt = upsert_insert(db, AttachmentBlob).values(sha256=digest, file_path=relative_path, size=size, ref_count=1)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[AttachmentBlob.sha256],
+        set_={"ref_count": AttachmentBlob.ref_count + 1},
+    ))
+
+
+def _blob_files() -> dict[str, tuple[str, float, int]]:
+    """{digest: (path, mtime, size)} for every blob file on disk"""
+    found = {}
+    if not BLOBS_DIR.exists():
+        return found
+    for bucket in os.scandir(BLOBS_DIR):
+        if not bucket.is_dir() or len(bucket.name) != 2:
+            continue
+        for entry in os.scandir(bucket.path):
+            if entry.is_file():
+                stat = entry.stat()
+                found[entry.name] = (entry.path, stat.st_mtime, stat.st_size)
+    return found
+
+
+def _remove_files(files: list[tuple[str, float, int]], cutoff: float) -> tuple[int, int]:
+    removed = freed = 0
+    for path, _, size in files:
+        try:
+            # An upload may have re-added this content since the scan
+            if os.stat(path).st_mtime >= cutoff:
+                continue
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        remove_thumbnails(Path(path))
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+async def collect_attachment_garbage(db: AsyncSession) -> tuple[int, int]:
+    """Recount blob references and delete unreferenced blobs.
+
+    Returns (files removed, bytes freed). Files on disk without an index row
+    (left by rolled-back requests) are collected as well.
+    """
+    references = [
+        select(func.count()).select_from(model).where(model.content_hash == AttachmentBlob.sha256).scalar_subquery()
+        for model in REFERENCING_MODELS
+    ]
+    ref_count = references[0]
+    for extra in references[1:]:
+        ref_count = ref_count + extra
+    await db.execute(update(AttachmentBlob).values(ref_count=ref_count))
+
+    cutoff = time.time() - ATTACHMENT_GC_GRACE_SECONDS
+    files = await asyncio.to_thread(_blob_files)
+    indexed = set((await db.execute(select(AttachmentBlob.sha256))).scalars())
+    unreferenced = set((await db.execute(
+        select(AttachmentBlob.sha256).where(
+            AttachmentBlob.ref_count <= 0,
+            AttachmentBlob.created_at < datetime.utcnow() - timedelta(seconds=ATTACHMENT_GC_GRACE_SECONDS),
+        )
+    )).scalars())
+
+    doomed = [
+        digest for digest, (_, mtime, _) in files.items()
+        if mtime < cutoff and (digest in unreferenced or digest not in indexed)
+    ]
+    # Index rows whose file is already gone are dropped too
+    stale_rows = list(unreferenced - files.keys()) + [d for d in doomed if d in indexed]
+    if stale_rows:
+        await db.execute(delete(AttachmentBlob).where(AttachmentBlob.sha256.in_(stale_rows)))
+    await db.commit()
+
+    removed, freed = await asyncio.to_thread(_remove_files, [files[d] for d in doomed], cutoff)
+    if removed:
+        logger.info(f"🗑️  Removed {removed} unreferenced attachment blobs ({freed} bytes)")
+    return removed, freed
+
+
+async def _gc_loop() -> None:
+    from app.core.database import async_session_factory
+
+    while True:
+        try:
+            await asyncio.sleep(ATTACHMENT_GC_INTERVAL_SECONDS)
+            async with async_session_factory() as db:
+                await collect_attachment_garbage(db)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"Error collecting attachment blobs: {e}")
+
+
+def start_attachment_gc() -> None:
+    global _gc_task
+    if _gc_task is None:
+        _gc_task = asyncio.create_task(_gc_loop())
+
+
+async def stop_attachment_gc() -> None:
+    global _gc_task
+    if _gc_task is not None:
+        _gc_task.cancel()
+        try:
+            await _gc_task
+        except asyncio.CancelledError:
+            pass
+        _gc_task = None
@@ -1,18 +1,43 @@
 """
 Database backup and restore functionality with automatic crash recovery
 Includes database + attachments (comments and chat messages)
+
+Full backups are zip files holding a database snapshot and a manifest of the
+uploads tree. Attachment contents live once in a content-addressed store
+(``backups/blobs``), so each run only writes files that are new or changed.
+Each backup this server creates holds references to its blobs in the store
+index under its file name; uploaded archives hold none.
 """
 import os
+import json
+import hashlib
+import uuid
 import shutil
 import asyncio
+import sqlite3
+import threading
+import time
 import zipfile
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, List
 import logging
 
+from app.core.blob_store import BlobStore, is_compressed_format
+
 logger = logging.getLogger(__name__)
 
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+
+# Uploaded backups arrive in chunks of at most this size
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Unfinished uploads older than this are discarded
+STALE_UPLOAD_SECONDS = 24 * 3600
+
+# Pages copied per sqlite3 backup step; between steps writers can make progress
+BACKUP_PAGES_PER_STEP = 256
+
 
 class DatabaseBackup:
     """Handles automatic database backup and restore operations with attachments"""
@@ -22,10 +47,55 @@ class DatabaseBackup:
         self.backup_dir = Path(backup_dir)
         self.backup_dir.mkdir(exist_ok=True)
         self.uploads_dir = Path("app/uploads")  # Attachments directory
+        self.blobs = BlobStore(self.backup_dir / "blobs", legacy_holders=self._legacy_holders)  # Attachment contents, stored once
+        self.exports_dir = self.backup_dir / "exports"  # Self-contained zips built for download
         self.max_backups = 10  # Keep last 10 automatic backups
         self.max_manual_backups = 20  # Keep last 20 manual backups
+        self.max_corrupted_manifests = 5  # Uploads manifests saved before a restore
         self.backup_interval = 43200  # Backup every 12 hours (43200 seconds)
         self._backup_task: Optional[asyncio.Task] = None
+        self._run_lock = threading.Lock()  # One backup at a time (auto, manual or update)
+        self._progress_lock = threading.Lock()
+        self._progress: dict = {"state": "idle"}
+        self._job_task: Optional[asyncio.Task] = None
+        self.incoming_dir = self.backup_dir / "incoming"  # Partial uploads
+        self._uploads: dict = {}
+        self._uploads_lock = threading.Lock()
+        self._restore_status: dict = {"state": "idle"}
+        self._restore_task: Optional[asyncio.Task] = None
+    
+    def _set_progress(self, **fields):
+        with self._progress_lock:
+            self._progress.update(fields)
+    
+    def get_progress(self) -> dict:
+        """Snapshot of the current/last backup run for the admin page"""
+        with self._progress_lock:
+            return dict(self._progress)
+    
+    def is_running(self) -> bool:
+        job_pending = self._job_task is not None and not self._job_task.done()
+        return job_pending or self._run_lock.locked()
+    
+    def snapshot_database(self, dest: Path) -> None:
+        """Copy the live database into ``dest`` using the SQLite online backup API.
+        
+        The copy is page-stepped so writers are only briefly blocked, and the
+        result is a consistent snapshot even if writes happen meanwhile.
+        """
+        def on_progress(status, remaining, total):
+            if total:
+                self._set_progress(percent=int((total - remaining) * 100 / total))
+        
+        src = sqlite3.connect(str(self.db_path))
+        try:
+            dst = sqlite3.connect(str(dest))
+            try:
+                src.backup(dst, pages=BACKUP_PAGES_PER_STEP, progress=on_progress)
+            finally:
+                dst.close()
+        finally:
+            src.close()
         
     def get_backup_filename(self, is_manual: bool = False, include_attachments: bool = True) -> str:
         """Generate timestamped backup filename"""
@@ -45,35 +115,47 @@ class DatabaseBackup:
             logger.warning(f"Database {self.db_path} does not exist, skipping backup")
             return None
         
+        if not self._run_lock.acquire(blocking=False):
+            logger.warning("Backup already in progress, skipping")
+            return None
+        
+        snapshot = None
         try:
             backup_file = self.backup_dir / self.get_backup_filename(is_manual=is_manual, include_attachments=include_attachments)
             backup_type = "MANUAL" if is_manual else "AUTO"
+            self._set_progress(
+                state="running", phase="database", percent=0, filename=backup_file.name,
+                started_at=time.time(), finished_at=None, error=None,
+            )
+            
+            # Consistent snapshot of the live database (never zip data.db directly)
+            snapshot = self.backup_dir / f".snapshot_{backup_file.stem}.db"
+            self.snapshot_database(snapshot)
             
             if include_attachments:
-                # Create ZIP archive with database + attachments
+                # Store new/changed attachments, then archive DB + manifest
+                self._set_progress(phase="attachments", percent=0)
+                files, written = self._store_uploads()
+                manifest = {
+                    "format": MANIFEST_FORMAT,
+                    "created_at": datetime.now().isoformat(),
+                    "files": files,
+                }
+                
                 with zipfile.ZipFile(backup_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    # Add database
-                    zipf.write(self.db_path, arcname='data.db')
-                    
-                    # Add all attachments
-                    if self.uploads_dir.exists():
-                        for file_path in self.uploads_dir.rglob('*'):
-                            if file_path.is_file():
-                                arcname = str(file_path.relative_to(self.uploads_dir.parent))
-                                zipf.write(file_path, arcname=arcname)
+                    zipf.write(snapshot, arcname='data.db')
+                    zipf.writestr(MANIFEST_NAME, json.dumps(manifest))
+                self.blobs.hold(backup_file.name, (entry["sha256"] for entry in files.values()))
                 
-                logger.info(f"✅ Full backup (DB + attachments) created: {backup_file} ({backup_type})")
+                logger.info(
+                    f"✅ Full backup (DB + attachments) created: {backup_file} ({backup_type}, "
+                    f"{len(files)} files, {written} new blobs)"
+                )
             else:
                 # Simple database-only backup
-                shutil.copy2(self.db_path, backup_file)
+                snapshot.replace(backup_file)
                 logger.info(f"✅ Database backup created: {backup_file} ({backup_type})")
             
-            # Create a "latest" backup link for easy restore
-            latest_backup = self.backup_dir / ("backup_latest.zip" if include_attachments else "data_latest.db")
-            if latest_backup.exists():
-                latest_backup.unlink()
-            shutil.copy2(backup_file, latest_backup)
-            
             # Cleanup old automatic backups
             if not is_manual:
                 self._cleanup_old_backups()
@@ -81,10 +163,157 @@ class DatabaseBackup:
                 # Also cleanup old manual backups (keep last 20)
                 self._cleanup_old_manual_backups()
             
+            self._set_progress(state="done", phase=None, percent=100, finished_at=time.time())
             return backup_file
         except Exception as e:
             logger.error(f"❌ Failed to create backup: {e}")
+            self._set_progress(state="failed", error=str(e), finished_at=time.time())
+            return None
+        finally:
+            if snapshot is not None and snapshot.exists():
+                snapshot.unlink()
+            self._run_lock.release()
+    
+    async def create_backup_async(self, is_manual: bool = False, include_attachments: bool = True) -> Optional[Path]:
+        """Run create_backup in a worker thread so the event loop keeps serving requests"""
+        return await asyncio.to_thread(self.create_backup, is_manual, include_attachments)
+    
+    def start_backup_job(self, is_manual: bool = True, include_attachments: bool = True) -> bool:
+        """Start a backup in the background; returns False if one is already running"""
+        if self.is_running():
+            return False
+        self._set_progress(state="queued", phase=None, percent=0, error=None)
+        self._job_task = asyncio.get_running_loop().create_task(
+            self.create_backup_async(is_manual=is_manual, include_attachments=include_attachments)
+        )
+        return True
+    
+    def _read_manifest(self, backup_file: Path) -> Optional[dict]:
+        """Manifest of a manifest-based full backup, or None for DB-only/self-contained archives"""
+        if backup_file.suffix != '.zip':
             return None
+        try:
+            with zipfile.ZipFile(backup_file) as zipf:
+                if MANIFEST_NAME not in zipf.namelist():
+                    return None
+                return json.loads(zipf.read(MANIFEST_NAME))
+        except (zipfile.BadZipFile, ValueError, OSError) as e:
+            logger.warning(f"Could not read manifest from {backup_file.name}: {e}")
+            return None
+    
+    def _latest_manifest_files(self) -> dict:
+        """File entries of the newest manifest-based backup (used to skip unchanged files)"""
+        for backup_file in self._list_backups():
+            manifest = self._read_manifest(backup_file)
+            if manifest is not None:
+                return manifest.get("files", {})
+        return {}
+    
+    def _store_uploads(self) -> tuple[dict, int]:
+        """Add the uploads tree to the blob store and return (manifest files, blobs written).
+        
+        Files whose size and mtime match the previous manifest reuse its hash
+        without being read again.
+        """
+        files = sorted(
+            f for f in self.uploads_dir.rglob('*')
+            # Skip thumbnails (rebuilt on demand) and in-progress upload files
+            if f.is_file() and not any(part.startswith('.') for part in f.relative_to(self.uploads_dir).parts)
+        ) if self.uploads_dir.exists() else []
+        previous = self._latest_manifest_files()
+        known = self.blobs.known_digests()
+        entries = {}
+        written = 0
+        for index, file_path in enumerate(files, 1):
+            rel = file_path.relative_to(self.uploads_dir).as_posix()
+            stat = file_path.stat()
+            prev = previous.get(rel)
+            if prev and prev["size"] == stat.st_size and prev["mtime_ns"] == stat.st_mtime_ns and prev["sha256"] in known:
+                digest = prev["sha256"]
+            else:
+                digest, was_written = self.blobs.add_file(file_path)
+                written += was_written
+                known.add(digest)
+            entries[rel] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            self._set_progress(percent=int(index * 100 / len(files)))
+        return entries, written
+    
+    def _list_backups(self) -> List[Path]:
+        """Timestamped backups, newest first"""
+        return sorted(
+            [f for f in self.backup_dir.glob("backup_*.*")
+             if f.suffix in ['.db', '.zip'] and 'latest' not in f.name],
+            key=lambda x: x.stat().st_mtime,
+            reverse=True
+        )
+    
+    def _legacy_holders(self) -> dict:
+        """Backups that took blob references before holders were recorded
+        (uploaded archives never took any)"""
+        holders = {}
+        for backup_file in self.backup_dir.glob("backup_*.zip"):
+            if "_UPLOADED_" in backup_file.name:
+                continue
+            manifest = self._read_manifest(backup_file)
+            if manifest is not None:
+                holders[backup_file.name] = [entry["sha256"] for entry in manifest.get("files", {}).values()]
+        for uploads_manifest in self.backup_dir.glob("corrupted_uploads_*.json"):
+            try:
+                files = json.loads(uploads_manifest.read_text()).get("files", {})
+            except (ValueError, OSError):
+                continue
+            holders[uploads_manifest.name] = [entry["sha256"] for entry in files.values()]
+        return holders
+    
+    def _remove_backup(self, backup_file: Path) -> None:
+        """Delete a backup file and release its references to stored attachments"""
+        backup_file.unlink()
+        export = self.exports_dir / backup_file.name
+        if export.exists():
+            export.unlink()
+        self.blobs.release(backup_file.name)
+    
+    def _release_missing_holders(self) -> None:
+        """Release references of backups and manifests deleted outside the app"""
+        for holder in self.blobs.holders():
+            if not (self.backup_dir / holder).exists():
+                self.blobs.release(holder)
+    
+    def _cleanup_corrupted_uploads(self) -> None:
+        """Keep the newest uploads manifests saved before restores"""
+        manifests = sorted(self.backup_dir.glob("corrupted_uploads_*.json"), key=lambda f: f.name, reverse=True)
+        for old_manifest in manifests[self.max_corrupted_manifests:]:
+            old_manifest.unlink()
+            self.blobs.release(old_manifest.name)
+            logger.info(f"🗑️  Removed old uploads manifest: {old_manifest.name}")
+    
+    def export_portable(self, backup_file: Path) -> Path:
+        """Self-contained zip (DB + attachment files) for a manifest-based backup.
+        
+        Used for downloads so a backup can be restored on another server.
+        Built once per backup; already-compressed formats are stored as-is.
+        """
+        manifest = self._read_manifest(backup_file)
+        if manifest is None:
+            return backup_file
+        export = self.exports_dir / backup_file.name
+        if export.exists() and export.stat().st_mtime >= backup_file.stat().st_mtime:
+            return export
+        
+        self.exports_dir.mkdir(exist_ok=True)
+        tmp = export.with_name(export.name + '.tmp')
+        prefix = self.uploads_dir.as_posix().rstrip('/')
+        with zipfile.ZipFile(backup_file) as src, zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            with src.open('data.db') as db_src, zipf.open('data.db', 'w', force_zip64=True) as db_dst:
+                shutil.copyfileobj(db_src, db_dst, 1024 * 1024)
+            for rel, entry in manifest.get("files", {}).items():
+                compress_type = zipfile.ZIP_STORED if is_compressed_format(rel) else zipfile.ZIP_DEFLATED
+                info = zipfile.ZipInfo(f"{prefix}/{rel}", date_time=time.localtime(entry["mtime_ns"] / 1e9)[:6])
+                info.compress_type = compress_type
+                with self.blobs.open(entry["sha256"]) as blob, zipf.open(info, 'w', force_zip64=True) as dst:
+                    shutil.copyfileobj(blob, dst, 1024 * 1024)
+        tmp.replace(export)
+        return export
     
     def _cleanup_old_backups(self):
         """Remove old AUTOMATIC backup files only, keeping manual backups forever"""
@@ -98,8 +327,10 @@ class DatabaseBackup:
             
             # Remove automatic backups beyond max_backups
             for old_backup in auto_backups[self.max_backups:]:
-                old_backup.unlink()
+                self._remove_backup(old_backup)
                 logger.info(f"🗑️  Removed old automatic backup: {old_backup.name}")
+            self._release_missing_holders()
+            self.blobs.collect_garbage()
         except Exception as e:
             logger.error(f"Error cleaning up old backups: {e}")
     
@@ -115,8 +346,10 @@ class DatabaseBackup:
             
             # Remove manual backups beyond max_manual_backups
             for old_backup in manual_backups[self.max_manual_backups:]:
-                old_backup.unlink()
+                self._remove_backup(old_backup)
                 logger.info(f"🗑️  Removed old manual backup: {old_backup.name}")
+            self._release_missing_holders()
+            self.blobs.collect_garbage()
         except Exception as e:
             logger.error(f"Error cleaning up old manual backups: {e}")
     
@@ -146,8 +379,16 @@ class DatabaseBackup:
                 logger.error(f"Invalid backup filename: {filename}")
                 return False
             
-            backup_path.unlink()
+            self._remove_backup(backup_path)
             logger.info(f"🗑️  Deleted backup: {filename}")
+            
+            # Unreferenced blobs are collected now unless a backup is running
+            # (it may be adding blobs not yet referenced; it collects when done)
+            if self._run_lock.acquire(blocking=False):
+                try:
+                    self.blobs.collect_garbage()
+                finally:
+                    self._run_lock.release()
             return True
             
         except Exception as e:
@@ -156,24 +397,16 @@ class DatabaseBackup:
     
     def get_latest_backup(self) -> Optional[Path]:
         """Get the most recent backup file (automatic or manual)"""
-        # Check for latest links
-        latest_zip = self.backup_dir / "backup_latest.zip"
-        latest_db = self.backup_dir / "data_latest.db"
-        
-        if latest_zip.exists():
-            return latest_zip
-        if latest_db.exists():
-            return latest_db
-        
-        # Fallback to finding most recent timestamped backup (both AUTO and MANUAL, both .db and .zip)
-        backups = sorted(
-            [f for f in self.backup_dir.glob("backup_*.*") 
-             if f.suffix in ['.db', '.zip'] and 'latest' not in f.name],
-            key=lambda x: x.stat().st_mtime,
-            reverse=True
-        )
+        # Most recent timestamped backup (both AUTO and MANUAL, both .db and .zip)
+        backups = self._list_backups()
+        if backups:
+            return backups[0]
         
-        return backups[0] if backups else None
+        # Fallback to "latest" copies written by older versions
+        for legacy in (self.backup_dir / "backup_latest.zip", self.backup_dir / "data_latest.db"):
+            if legacy.exists():
+                return legacy
+        return None
     
     def restore_from_backup(self, backup_file: Optional[Path] = None) -> bool:
         """Restore database from backup file (supports .db or .zip)"""
@@ -184,30 +417,46 @@ class DatabaseBackup:
             logger.error("❌ No backup file found for restore")
             return False
         
+        tmp_db = self.db_path.with_name(self.db_path.name + '.restoring')
         try:
+            manifest = self._read_manifest(backup_file)
+            if manifest is not None:
+                # Refuse before changing anything if attachments are missing
+                # (e.g. an archive uploaded from another server)
+                missing = self.blobs.missing(entry["sha256"] for entry in manifest.get("files", {}).values())
+                if missing:
+                    raise ValueError(f"{len(missing)} attachment(s) of this backup are not in the attachment store")
+            
             # Create a backup of the current (possibly corrupted) database
             if self.db_path.exists():
                 corrupted_backup = self.backup_dir / f"corrupted_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
                 shutil.copy2(self.db_path, corrupted_backup)
                 logger.info(f"💾 Saved corrupted database to {corrupted_backup}")
             
-            # Backup current uploads directory
+            # Record current uploads as a manifest (only new content is written)
             if self.uploads_dir.exists():
-                corrupted_uploads = self.backup_dir / f"corrupted_uploads_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                shutil.copytree(self.uploads_dir, corrupted_uploads)
-                logger.info(f"💾 Saved current uploads to {corrupted_uploads}")
+                files, _ = self._store_uploads()
+                corrupted_uploads = self.backup_dir / f"corrupted_uploads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                corrupted_uploads.write_text(json.dumps({"format": MANIFEST_FORMAT, "files": files}))
+                self.blobs.hold(corrupted_uploads.name, (entry["sha256"] for entry in files.values()))
+                logger.info(f"💾 Saved current uploads manifest to {corrupted_uploads}")
+                self._cleanup_corrupted_uploads()
             
-            # Restore based on file type
+            # Restore based on file type; the database is swapped in last, so
+            # a failure while writing attachments leaves it untouched
             if backup_file.suffix == '.zip':
-                # Extract ZIP archive (contains database + attachments)
                 with zipfile.ZipFile(backup_file, 'r') as zipf:
-                    # Extract database
-                    zipf.extract('data.db', path=self.db_path.parent)
+                    names = zipf.namelist()
+                    with zipf.open('data.db') as src, open(tmp_db, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
                     
-                    # Extract attachments
-                    for member in zipf.namelist():
-                        if member.startswith('app/uploads/'):
-                            zipf.extract(member, path='.')
+                    if manifest is not None:
+                        # Attachments come from the blob store
+                        self._restore_uploads(manifest.get("files", {}))
+                    else:
+                        # Self-contained archive (uploaded or from older versions)
+                        self._extract_uploads(zipf, names)
+                os.replace(tmp_db, self.db_path)
                 
                 logger.info(f"✅ Full backup restored (DB + attachments) from {backup_file}")
             else:
@@ -219,6 +468,44 @@ class DatabaseBackup:
         except Exception as e:
             logger.error(f"❌ Failed to restore database: {e}")
             return False
+        finally:
+            tmp_db.unlink(missing_ok=True)
+    
+    def _upload_target(self, rel: str) -> Optional[Path]:
+        """Destination inside the uploads dir for a relative path, rejecting traversal"""
+        target = (self.uploads_dir / rel).resolve()
+        root = self.uploads_dir.resolve()
+        if target == root or root not in target.parents:
+            logger.warning(f"Skipping unsafe attachment path in backup: {rel}")
+            return None
+        return target
+    
+    def _restore_uploads(self, files: dict) -> None:
+        """Write manifest entries back to the uploads tree, skipping unchanged files"""
+        for rel, entry in files.items():
+            target = self._upload_target(rel)
+            if target is None:
+                continue
+            if target.exists():
+                stat = target.stat()
+                if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+                    continue
+            self.blobs.copy_to(entry["sha256"], target)
+            os.utime(target, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+    
+    def _extract_uploads(self, zipf: zipfile.ZipFile, names: List[str]) -> None:
+        """Extract attachments from a self-contained archive (app/uploads/... or uploads/...)"""
+        for member in names:
+            if member.endswith('/'):
+                continue
+            for prefix in ('app/uploads/', 'uploads/'):
+                if member.startswith(prefix):
+                    target = self._upload_target(member[len(prefix):])
+                    if target is not None:
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        with zipf.open(member) as src, open(target, 'wb') as dst:
+                            shutil.copyfileobj(src, dst, 1024 * 1024)
+                    break
     
     def check_and_restore_on_startup(self) -> bool:
         """Check database integrity on startup and restore ONLY if corrupted or missing"""
@@ -290,46 +577,160 @@ class DatabaseBackup:
         while True:
             try:
                 await asyncio.sleep(self.backup_interval)
-                self.create_backup(include_attachments=True)  # Always include attachments in auto-backups
+                await self.create_backup_async(include_attachments=True)  # Always include attachments in auto-backups
             except asyncio.CancelledError:
                 logger.info("Backup loop cancelled")
                 break
             except Exception as e:
                 logger.error(f"Error in backup loop: {e}")
     
-    def save_uploaded_backup(self, file_content: bytes, filename: str) -> Optional[Path]:
-        """Save an uploaded backup file from local machine
+    def begin_upload(self, filename: str) -> str:
+        """Start receiving an uploaded backup file; returns an upload id
         
-        Args:
-            file_content: The backup file content
-            filename: Original filename (will be prefixed with timestamp)
+        The file is written to disk chunk by chunk (see append_upload_chunk)
+        and hashed as it arrives, so it is never held in memory.
+        """
+        if not filename.endswith(('.db', '.zip')):
+            raise ValueError(f"Invalid backup file extension: {filename}")
         
-        Returns:
-            Path to saved backup file or None if failed
+        self.incoming_dir.mkdir(exist_ok=True)
+        self._discard_stale_uploads()
+        upload_id = uuid.uuid4().hex
+        part = self.incoming_dir / f"{upload_id}.part"
+        part.touch()
+        with self._uploads_lock:
+            self._uploads[upload_id] = {
+                "filename": filename,
+                "path": part,
+                "hasher": hashlib.sha256(),
+                "received": 0,
+                "updated_at": time.time(),
+            }
+        return upload_id
+    
+    def append_upload_chunk(self, upload_id: str, offset: int, data: bytes, chunk_sha256: Optional[str] = None) -> int:
+        """Append one chunk at ``offset``; returns total bytes received so far"""
+        with self._uploads_lock:
+            upload = self._uploads.get(upload_id)
+            if upload is None:
+                raise KeyError(upload_id)
+            if offset != upload["received"]:
+                raise ValueError(f"Expected offset {upload['received']}, got {offset}")
+            if len(data) > UPLOAD_CHUNK_SIZE:
+                raise ValueError("Chunk too large")
+            if chunk_sha256 and hashlib.sha256(data).hexdigest() != chunk_sha256.lower():
+                raise ValueError("Chunk checksum mismatch")
+            
+            with open(upload["path"], 'ab') as f:
+                f.write(data)
+            upload["hasher"].update(data)
+            upload["received"] += len(data)
+            upload["updated_at"] = time.time()
+            return upload["received"]
+    
+    def finish_upload(self, upload_id: str, expected_sha256: Optional[str] = None) -> tuple[Path, str]:
+        """Verify a completed upload and move it into the backups folder
+        
+        Returns (backup path, sha256 of the received file).
         """
+        with self._uploads_lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is None:
+            raise KeyError(upload_id)
+        
+        part: Path = upload["path"]
+        digest = upload["hasher"].hexdigest()
         try:
-            # Validate file extension
-            if not filename.endswith(('.db', '.zip')):
-                logger.error(f"Invalid backup file extension: {filename}")
-                return None
-            
-            # Create unique filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            extension = '.zip' if filename.endswith('.zip') else '.db'
-            new_filename = f"backup_UPLOADED_{timestamp}{extension}"
-            
-            backup_path = self.backup_dir / new_filename
-            
-            # Save the file
-            with open(backup_path, 'wb') as f:
-                f.write(file_content)
-            
-            logger.info(f"✅ Uploaded backup saved: {backup_path}")
-            return backup_path
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to save uploaded backup: {e}")
-            return None
+            if expected_sha256 and digest != expected_sha256.lower():
+                raise ValueError("File checksum mismatch")
+            if upload["filename"].endswith('.zip'):
+                with zipfile.ZipFile(part) as zipf:
+                    if 'data.db' not in zipf.namelist():
+                        raise ValueError("Archive does not contain data.db")
+            else:
+                with open(part, 'rb') as f:
+                    if f.read(16) != b"SQLite format 3\x00":
+                        raise ValueError("Not a SQLite database")
+        except (ValueError, zipfile.BadZipFile) as e:
+            part.unlink(missing_ok=True)
+            logger.error(f"❌ Rejected uploaded backup {upload['filename']}: {e}")
+            raise ValueError(str(e))
+        
+        # Create unique filename with timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        extension = '.zip' if upload["filename"].endswith('.zip') else '.db'
+        backup_path = self.backup_dir / f"backup_UPLOADED_{timestamp}{extension}"
+        os.replace(part, backup_path)
+        
+        logger.info(f"✅ Uploaded backup saved: {backup_path} ({upload['received']} bytes, sha256 {digest})")
+        return backup_path, digest
+    
+    def abort_upload(self, upload_id: str) -> None:
+        with self._uploads_lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is not None:
+            upload["path"].unlink(missing_ok=True)
+    
+    def _discard_stale_uploads(self) -> None:
+        cutoff = time.time() - STALE_UPLOAD_SECONDS
+        with self._uploads_lock:
+            for upload_id, upload in list(self._uploads.items()):
+                if upload["updated_at"] < cutoff:
+                    upload["path"].unlink(missing_ok=True)
+                    del self._uploads[upload_id]
+            active = {upload["path"] for upload in self._uploads.values()}
+        for part in self.incoming_dir.glob("*.part"):
+            if part not in active and part.stat().st_mtime < cutoff:
+                part.unlink(missing_ok=True)
+    
+    def get_restore_status(self) -> dict:
+        with self._progress_lock:
+            return dict(self._restore_status)
+    
+    def _set_restore_status(self, **fields):
+        with self._progress_lock:
+            self._restore_status.update(fields)
+    
+    def is_restoring(self) -> bool:
+        return self._restore_task is not None and not self._restore_task.done()
+    
+    def start_restore_job(self, backup_file: Path) -> bool:
+        """Restore a backup in a worker thread; returns False if a backup or restore is running"""
+        if self.is_running() or self.is_restoring():
+            return False
+        self._set_restore_status(
+            state="queued", filename=backup_file.name, started_at=time.time(), finished_at=None, error=None,
+        )
+        self._restore_task = asyncio.get_running_loop().create_task(self._run_restore_job(backup_file))
+        return True
+    
+    async def _run_restore_job(self, backup_file: Path) -> None:
+        success = await asyncio.to_thread(self._restore_exclusive, backup_file)
+        if success:
+            # Pooled connections still point at the replaced database file
+            from app.core.database import engine
+            from app.core.user_directory import clear_workspace_directories
+            from app.core.page_cache import clear_page_cache
+            from app.core.workspace_context import clear_workspace_cache
+            await engine.dispose()
+            clear_workspace_directories()
+            clear_workspace_cache()
+            clear_page_cache()
+    
+    def _restore_exclusive(self, backup_file: Path) -> bool:
+        if not self._run_lock.acquire(blocking=False):
+            self._set_restore_status(state="failed", error="A backup is in progress", finished_at=time.time())
+            return False
+        try:
+            self._set_restore_status(state="running")
+            success = self.restore_from_backup(backup_file)
+            if success:
+                self._set_restore_status(state="done", finished_at=time.time())
+            else:
+                self._set_restore_status(state="failed", error="Restore failed, see server log", finished_at=time.time())
+            return success
+        finally:
+            self._run_lock.release()
     
     def get_backup_stats(self) -> dict:
         """Get statistics about backups (automatic and manual)"""
@@ -340,8 +741,15 @@ class DatabaseBackup:
         full_backups = [f for f in all_backups if f.suffix == '.zip']
         db_only_backups = [f for f in all_backups if f.suffix == '.db']
         
+        store = self.blobs.stats()
+        attachment_store = {
+            "attachment_blob_count": store["blob_count"],
+            "attachment_store_mb": round(store["stored_size"] / (1024 * 1024), 2),
+        }
+        
         if not all_backups:
             return {
+                **attachment_store,
                 "count": 0,
                 "auto_count": 0,
                 "manual_count": 0,
@@ -356,9 +764,10 @@ class DatabaseBackup:
             }
         
         backups_sorted = sorted(all_backups, key=lambda x: x.stat().st_mtime, reverse=True)
-        total_size = sum(b.stat().st_size for b in all_backups)
+        total_size = sum(b.stat().st_size for b in all_backups) + store["stored_size"]
         
         return {
+            **attachment_store,
             "count": len(all_backups),
             "auto_count": len(auto_backups),
             "manual_count": len(manual_backups),
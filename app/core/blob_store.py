@@ -0,0 +1,210 @@
+"""
+Content-addressed file storage.
+
+Files are stored once under ``<root>/<aa>/<sha256>`` no matter how many times
+they are referenced. A small SQLite index next to the blobs tracks size,
+whether the blob is gzip-compressed, its size on disk and a reference count; blobs whose count
+drops to zero are removed by ``collect_garbage``. References are taken on
+behalf of a named holder (a backup file) and recorded per holder, so only
+references this store handed out can be released.
+"""
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# Formats that are already compressed; gzip would only cost CPU
+ALREADY_COMPRESSED_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.pdf', '.zip', '.gz', '.tgz',
+    '.bz2', '.xz', '.7z', '.rar', '.mp3', '.mp4', '.m4a', '.mov', '.avi', '.mkv',
+    '.docx', '.xlsx', '.pptx', '.odt', '.ods',
+}
+
+
+def is_compressed_format(name: str) -> bool:
+    return Path(name).suffix.lower() in ALREADY_COMPRESSED_EXTENSIONS
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """Deduplicating store of files keyed by their SHA-256 digest"""
+
+    def __init__(self, root: Path, legacy_holders: Optional[Callable[[], dict]] = None):
+        """``legacy_holders`` returns {holder: digests} for references taken
+        before they were recorded per holder; it is called once, when the
+        holder table is created"""
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._ready = False
+        self._legacy_holders = legacy_holders
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.root.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.root / 'index.db'), timeout=30)
+        if not self._ready:
+            tracked = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'holder_blob'"
+            ).fetchone()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blob ("
+                " digest TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " compressed INTEGER NOT NULL,"
+                " stored_size INTEGER NOT NULL DEFAULT 0,"
+                " refcount INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS holder_blob ("
+                " holder TEXT NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " PRIMARY KEY (holder, digest))"
+            )
+            if not tracked and self._legacy_holders is not None:
+                # Index from before references were recorded: adopt the
+                # existing holders and recount from them
+                conn.executemany(
+                    "INSERT OR IGNORE INTO holder_blob (holder, digest) VALUES (?, ?)",
+                    [(holder, d) for holder, digests in self._legacy_holders().items() for d in set(digests)],
+                )
+                conn.execute(
+                    "UPDATE blob SET refcount = (SELECT COUNT(*) FROM holder_blob WHERE holder_blob.digest = blob.digest)"
+                )
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def blob_path(self, digest: str, compressed: bool) -> Path:
+        return self.root / digest[:2] / (digest + ('.gz' if compressed else ''))
+
+    def lookup(self, digest: str) -> Optional[tuple]:
+        """(size, compressed, refcount) for a stored blob, or None"""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT size, compressed, refcount FROM blob WHERE digest = ?", (digest,)
+            ).fetchone()
+
+    def add_file(self, path: Path, digest: Optional[str] = None) -> tuple[str, bool]:
+        """Store a file if its content is new. Returns (digest, written)."""
+        digest = digest or sha256_file(path)
+        with self._lock:
+            row = self.lookup(digest)
+            if row is not None and self.blob_path(digest, bool(row[1])).exists():
+                return digest, False
+
+            compress = not is_compressed_format(path.name)
+            target = self.blob_path(digest, compress)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(target.name + '.tmp')
+            with open(path, 'rb') as src:
+                if compress:
+                    with gzip.open(tmp, 'wb', compresslevel=6) as dst:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                else:
+                    with open(tmp, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            os.replace(tmp, target)
+
+            with closing(self._connect()) as conn:
+                conn.execute(
+                    "INSERT INTO blob (digest, size, compressed, stored_size, refcount) VALUES (?, ?, ?, ?, 0) "
+                    "ON CONFLICT(digest) DO UPDATE SET size = excluded.size, compressed = excluded.compressed, "
+                    "stored_size = excluded.stored_size",
+                    (digest, path.stat().st_size, int(compress), target.stat().st_size),
+                )
+                conn.commit()
+            return digest, True
+
+    def known_digests(self) -> set[str]:
+        with closing(self._connect()) as conn:
+            return {row[0] for row in conn.execute("SELECT digest FROM blob")}
+
+    def open(self, digest: str) -> BinaryIO:
+        """Open a blob for reading its original (uncompressed) bytes"""
+        row = self.lookup(digest)
+        if row is None:
+            raise FileNotFoundError(digest)
+        path = self.blob_path(digest, bool(row[1]))
+        return gzip.open(path, 'rb') if row[1] else open(path, 'rb')
+
+    def copy_to(self, digest: str, dest: Path) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + '.restoring')
+        with self.open(digest) as src, open(tmp, 'wb') as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.replace(tmp, dest)
+
+    def missing(self, digests: Iterable[str]) -> set[str]:
+        """Digests that are not in the store (no index row or no file)"""
+        missing = set()
+        with closing(self._connect()) as conn:
+            for digest in set(digests):
+                row = conn.execute("SELECT compressed FROM blob WHERE digest = ?", (digest,)).fetchone()
+                if row is None or not self.blob_path(digest, bool(row[0])).exists():
+                    missing.add(digest)
+        return missing
+
+    def _release(self, conn: sqlite3.Connection, holder: str) -> None:
+        digests = [row[0] for row in conn.execute("SELECT digest FROM holder_blob WHERE holder = ?", (holder,))]
+        conn.executemany("UPDATE blob SET refcount = refcount - 1 WHERE digest = ?", [(d,) for d in digests])
+        conn.execute("DELETE FROM holder_blob WHERE holder = ?", (holder,))
+
+    def hold(self, holder: str, digests: Iterable[str]) -> None:
+        """Reference ``digests`` on behalf of ``holder``, replacing what it held before"""
+        rows = [(holder, d) for d in set(digests)]
+        with self._lock, closing(self._connect()) as conn:
+            self._release(conn, holder)
+            conn.executemany("INSERT INTO holder_blob (holder, digest) VALUES (?, ?)", rows)
+            conn.executemany("UPDATE blob SET refcount = refcount + 1 WHERE digest = ?", [(d,) for _, d in rows])
+            conn.commit()
+
+    def release(self, holder: str) -> None:
+        """Drop the references ``holder`` took; a no-op for unknown holders"""
+        with self._lock, closing(self._connect()) as conn:
+            self._release(conn, holder)
+            conn.commit()
+
+    def holders(self) -> set[str]:
+        with closing(self._connect()) as conn:
+            return {row[0] for row in conn.execute("SELECT DISTINCT holder FROM holder_blob")}
+
+    def collect_garbage(self) -> tuple[int, int]:
+        """Delete unreferenced blobs. Returns (blobs removed, bytes freed)."""
+        removed = freed = 0
+        with self._lock, closing(self._connect()) as conn:
+            rows = conn.execute("SELECT digest, compressed FROM blob WHERE refcount <= 0").fetchall()
+            for digest, compressed in rows:
+                path = self.blob_path(digest, bool(compressed))
+                if path.exists():
+                    freed += path.stat().st_size
+                    path.unlink()
+                removed += 1
+            conn.executemany("DELETE FROM blob WHERE digest = ?", [(d,) for d, _ in rows])
+            conn.commit()
+        if removed:
+            logger.info(f"🗑️  Removed {removed} unreferenced blobs ({freed} bytes)")
+        return removed, freed
+
+    def stats(self) -> dict:
+        with closing(self._connect()) as conn:
+            count, size, stored = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blob"
+            ).fetchone()
+        return {"blob_count": count, "logical_size": size, "stored_size": stored}
@@ -0,0 +1,416 @@
+"""
+Workspace-wide data export.
+
+Streams whole workspace datasets (tasks, assignments, ticket timings, time
+logs, the activity feed) as CSV or Parquet for analysis outside the app.
+Only the requested columns are selected and the date range and user filter
+are part of the SQL statement; rows are read through a server-side cursor
+and written out one batch at a time, so memory use does not grow with the
+size of the export.
+
+Parquet needs the optional ``pyarrow`` package.
+"""
+from __future__ import annotations
+
+import csv
+import functools
+import importlib.util
+import io
+from datetime import date, datetime
+from typing import AsyncIterator, Callable, Literal, NamedTuple, Optional
+
+from sqlalchemy import Float, Select, String, and_, func, select, type_coerce
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.core.database import async_session_factory
+from app.models.assignment import Assignment
+from app.models.project import Project
+from app.models.task import Task
+from app.models.task_extensions import ActivityLog, TimeLog
+from app.models.ticket import Ticket, TicketComment
+from app.models.user import User
+
+EXPORT_BATCH_SIZE = 2000
+
+ExportFormat = Literal['csv', 'parquet']
+ColumnKind = Literal['int', 'float', 'str', 'bool', 'date', 'datetime']
+
+
+class ExportColumn(NamedTuple):
+    expr: object  # SQL column expression
+    kind: ColumnKind
+
+
+class ExportDataset(NamedTuple):
+    title: str
+    columns: dict[str, ExportColumn]
+    # Joins and the workspace condition, applied to a select of the columns
+    scope: Callable[[Select, int], Select]
+    date_column: object
+    user_column: object
+    order_by: object
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _text(enum_column):
+    # Enum columns are stored by name (equal to the value): read the raw text
+    # instead of building an enum member per row
+    return type_coerce(enum_column, String)
+
+
+class _MinutesBetween(FunctionElement):
+    """``_MinutesBetween(end, start)``: minutes between two timestamps, to one decimal.
+
+    SQLite has no interval arithmetic, so it goes through ``julianday``;
+    PostgreSQL (and the default) subtracts the timestamps and takes the epoch.
+    """
+
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(_MinutesBetween)
+def _minutes_between_default(element, compiler, **kw):
+    end, start = (compiler.process(arg, **kw) for arg in element.clauses)
+    return f"CAST(ROUND(CAST(EXTRACT(EPOCH FROM ({end}) - ({start})) / 60 AS NUMERIC), 1) AS FLOAT)"
+
+
+@compiles(_MinutesBetween, 'sqlite')
+def _minutes_between_sqlite(element, compiler, **kw):
+    end, start = (compiler.process(arg, **kw) for arg in element.clauses)
+    return f"ROUND((julianday({end}) - julianday({start})) * 1440, 1)"
+
+
+Creator = aliased(User)
+Assignee = aliased(User)
+
+
+def _tasks_scope(stmt: Select, workspace_id: int) -> Select:
+    return (
+        stmt.select_from(Task)
+        .join(Project, Project.id == Task.project_id)
+        .outerjoin(Creator, Creator.id == Task.creator_id)
+        .where(Project.workspace_id == workspace_id)
+    )
+
+
+def _assignments_scope(stmt: Select, workspace_id: int) -> Select:
+    return (
+        stmt.select_from(Assignment)
+        .join(Task, Task.id == Assignment.task_id)
+        .join(Project, Project.id == Task.project_id)
+        .outerjoin(Assignee, Assignee.id == Assignment.assignee_id)
+        .where(Project.workspace_id == workspace_id)
+    )
+
+
+def _tickets_scope(stmt: Select, workspace_id: int) -> Select:
+    return (
+        stmt.select_from(Ticket)
+        .outerjoin(Assignee, Assignee.id == Ticket.assigned_to_id)
+        .where(Ticket.workspace_id == workspace_id)
+    )
+
+
+def _time_logs_scope(stmt: Select, workspace_id: int) -> Select:
+    return (
+        stmt.select_from(TimeLog)
+        .join(Task, Task.id == TimeLog.task_id)
+        .join(Project, Project.id == Task.project_id)
+        .outerjoin(Creator, Creator.id == TimeLog.user_id)
+        .where(Project.workspace_id == workspace_id)
+    )
+
+
+def _activity_scope(stmt: Select, workspace_id: int) -> Select:
+    return (
+        stmt.select_from(ActivityLog)
+        .outerjoin(Creator, Creator.id == ActivityLog.user_id)
+        .where(ActivityLog.workspace_id == workspace_id)
+    )
+
+
+# First reply on a ticket by staff: a public comment from anyone but the
+# submitter, as counted by the ticket metrics
+_first_response = (
+    select(func.min(TicketComment.created_at))
+    .where(
+        TicketComment.ticket_id == Ticket.id,
+        TicketComment.is_internal == False,
+        TicketComment.user_id.is_not(None),
+        func.coalesce(Ticket.created_by_id, 0) != TicketComment.user_id,
+    )
+    .correlate(Ticket)
+    .scalar_subquery()
+)
+
+
+DATASETS: dict[str, ExportDataset] = {
+    'tasks': ExportDataset(
+        title='Tasks',
+        columns={
+            'id': ExportColumn(Task.id, 'int'),
+            'title': ExportColumn(Task.title, 'str'),
+            'project_id': ExportColumn(Task.project_id, 'int'),
+            'project': ExportColumn(Project.name, 'str'),
+            'status': ExportColumn(_text(Task.status), 'str'),
+            'priority': ExportColumn(_text(Task.priority), 'str'),
+            'creator_id': ExportColumn(Task.creator_id, 'int'),
+            'creator': ExportColumn(func.coalesce(func.nullif(Creator.full_name, ''), Creator.username), 'str'),
+            'parent_task_id': ExportColumn(Task.parent_task_id, 'int'),
+            'start_date': ExportColumn(Task.start_date, 'date'),
+            'due_date': ExportColumn(Task.due_date, 'date'),
+            'estimated_hours': ExportColumn(Task.estimated_hours, 'float'),
+            'time_spent_hours': ExportColumn(Task.time_spent_hours, 'float'),
+            'is_archived': ExportColumn(Task.is_archived, 'bool'),
+            'tags': ExportColumn(Task.tags, 'str'),
+            'created_at': ExportColumn(Task.created_at, 'datetime'),
+            'updated_at': ExportColumn(Task.updated_at, 'datetime'),
+        },
+        scope=_tasks_scope,
+        date_column=Task.created_at,
+        user_column=Task.creator_id,
+        order_by=Task.id,
+    ),
+    'assignments': ExportDataset(
+        title='Task assignments',
+        columns={
+            'id': ExportColumn(Assignment.id, 'int'),
+            'task_id': ExportColumn(Assignment.task_id, 'int'),
+            'task_title': ExportColumn(Task.title, 'str'),
+            'project': ExportColumn(Project.name, 'str'),
+            'assignee_id': ExportColumn(Assignment.assignee_id, 'int'),
+            'assignee': ExportColumn(func.coalesce(func.nullif(Assignee.full_name, ''), Assignee.username), 'str'),
+            'status': ExportColumn(_text(Task.status), 'str'),
+            'priority': ExportColumn(_text(Task.priority), 'str'),
+            'due_date': ExportColumn(Task.due_date, 'date'),
+            'task_created_at': ExportColumn(Task.created_at, 'datetime'),
+        },
+        scope=_assignments_scope,
+        date_column=Task.created_at,
+        user_column=Assignment.assignee_id,
+        order_by=Assignment.id,
+    ),
+    'tickets': ExportDataset(
+        title='Ticket timings',
+        columns={
+            'id': ExportColumn(Ticket.id, 'int'),
+            'ticket_number': ExportColumn(Ticket.ticket_number, 'str'),
+            'subject': ExportColumn(Ticket.subject, 'str'),
+            'category': ExportColumn(Ticket.category, 'str'),
+            'priority': ExportColumn(Ticket.priority, 'str'),
+            'status': ExportColumn(Ticket.status, 'str'),
+            'is_guest': ExportColumn(Ticket.is_guest, 'bool'),
+            'assigned_to_id': ExportColumn(Ticket.assigned_to_id, 'int'),
+            'assignee': ExportColumn(func.coalesce(func.nullif(Assignee.full_name, ''), Assignee.username), 'str'),
+            'created_at': ExportColumn(Ticket.created_at, 'datetime'),
+            'first_response_at': ExportColumn(_first_response, 'datetime'),
+            'first_response_minutes': ExportColumn(_MinutesBetween(_first_response, Ticket.created_at), 'float'),
+            'resolved_at': ExportColumn(Ticket.resolved_at, 'datetime'),
+            'resolution_minutes': ExportColumn(_MinutesBetween(Ticket.resolved_at, Ticket.created_at), 'float'),
+            'closed_at': ExportColumn(Ticket.closed_at, 'datetime'),
+            'closed_by_id': ExportColumn(Ticket.closed_by_id, 'int'),
+        },
+        scope=_tickets_scope,
+        date_column=Ticket.created_at,
+        user_column=Ticket.assigned_to_id,
+        order_by=Ticket.id,
+    ),
+    'time_logs': ExportDataset(
+        title='Time logs',
+        columns={
+            'id': ExportColumn(TimeLog.id, 'int'),
+            'task_id': ExportColumn(TimeLog.task_id, 'int'),
+            'task_title': ExportColumn(Task.title, 'str'),
+            'project': ExportColumn(Project.name, 'str'),
+            'user_id': ExportColumn(TimeLog.user_id, 'int'),
+            'user': ExportColumn(func.coalesce(func.nullif(Creator.full_name, ''), Creator.username), 'str'),
+            'hours': ExportColumn(TimeLog.hours, 'float'),
+            'description': ExportColumn(TimeLog.description, 'str'),
+            'logged_at': ExportColumn(TimeLog.logged_at, 'datetime'),
+        },
+        scope=_time_logs_scope,
+        date_column=TimeLog.logged_at,
+        user_column=TimeLog.user_id,
+        order_by=TimeLog.id,
+    ),
+    'activity': ExportDataset(
+        title='Activity feed',
+        columns={
+            'id': ExportColumn(ActivityLog.id, 'int'),
+            'user_id': ExportColumn(ActivityLog.user_id, 'int'),
+            'user': ExportColumn(func.coalesce(func.nullif(Creator.full_name, ''), Creator.username), 'str'),
+            'action_type': ExportColumn(ActivityLog.action_type, 'str'),
+            'entity_type': ExportColumn(ActivityLog.entity_type, 'str'),
+            'entity_id': ExportColumn(ActivityLog.entity_id, 'int'),
+            'details': ExportColumn(ActivityLog.details, 'str'),
+            'created_at': ExportColumn(ActivityLog.created_at, 'datetime'),
+        },
+        scope=_activity_scope,
+        date_column=ActivityLog.created_at,
+        user_column=ActivityLog.user_id,
+        order_by=ActivityLog.id,
+    ),
+}
+
+
+@functools.cache
+def parquet_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def build_export_query(
+    dataset: ExportDataset,
+    workspace_id: int,
+    columns: list[str],
+    start_dt: Optional[datetime] = None,
+    end_dt: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+) -> Select:
+    stmt = dataset.scope(select(*(dataset.columns[c].expr.label(c) for c in columns)), workspace_id)
+    conditions = []
+    if start_dt is not None:
+        conditions.append(dataset.date_column >= start_dt)
+    if end_dt is not None:
+        conditions.append(dataset.date_column < end_dt)
+    if user_id is not None:
+        conditions.append(dataset.user_column == user_id)
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+    return stmt.order_by(dataset.order_by)
+
+
+def resolve_columns(dataset: ExportDataset, requested: Optional[str]) -> list[str]:
+    """Column names from a comma-separated ``columns`` parameter (all if empty)"""
+    if not requested:
+        return list(dataset.columns)
+    columns = [c.strip() for c in requested.split(',') if c.strip()]
+    unknown = [c for c in columns if c not in dataset.columns]
+    if unknown:
+        raise ExportError(f"Unknown columns: {', '.join(unknown)}")
+    return columns
+
+
+async def _batches(stmt: Select) -> AsyncIterator[list]:
+    # The request's session is closed before a streaming body is sent, so the
+    # export reads through its own session and server-side cursor
+    async with async_session_factory() as session:
+        result = await session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield rows
+
+
+async def _csv_chunks(stmt: Select, columns: list[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so spreadsheet apps detect UTF-8
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    async for rows in _batches(stmt):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink:
+    """Write-only file object handing what ParquetWriter wrote to the stream"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_ARROW_TYPES = {
+    'int': lambda pa: pa.int64(),
+    'float': lambda pa: pa.float64(),
+    'str': lambda pa: pa.string(),
+    'bool': lambda pa: pa.bool_(),
+    'date': lambda pa: pa.date32(),
+    'datetime': lambda pa: pa.timestamp('us'),
+}
+
+
+def _arrow_value(value, kind: ColumnKind):
+    # SQLite hands back text for some computed expressions
+    if kind == 'datetime' and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if kind == 'date' and isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+async def _parquet_chunks(stmt: Select, dataset: ExportDataset, columns: list[str]) -> AsyncIterator[bytes]:
+    # Imported on first use: pyarrow takes longer to load than the rest of the app
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    kinds = [dataset.columns[c].kind for c in columns]
+    schema = pa.schema([(c, _ARROW_TYPES[k](pa)) for c, k in zip(columns, kinds)])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        # One row group per batch
+        async for rows in _batches(stmt):
+            arrays = [
+                pa.array([_arrow_value(row[i], kind) for row in rows], type=schema.field(i).type)
+                for i, kind in enumerate(kinds)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(
+    dataset_name: str,
+    workspace_id: int,
+    export_format: ExportFormat = 'csv',
+    columns: Optional[str] = None,
+    start_dt: Optional[datetime] = None,
+    end_dt: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """Body iterator for a dataset export; raises ExportError for bad input
+    before anything is streamed"""
+    dataset = DATASETS.get(dataset_name)
+    if dataset is None:
+        raise ExportError(f"Unknown dataset: {dataset_name}")
+    if export_format == 'parquet' and not parquet_available():
+        raise ExportError("Parquet export requires the pyarrow package")
+    if export_format not in ('csv', 'parquet'):
+        raise ExportError(f"Unsupported format: {export_format}")
+    selected = resolve_columns(dataset, columns)
+    stmt = build_export_query(dataset, workspace_id, selected, start_dt, end_dt, user_id)
+    if export_format == 'parquet':
+        return _parquet_chunks(stmt, dataset, selected)
+    return _csv_chunks(stmt, selected)
@@ -0,0 +1,56 @@
+"""
+Response compression for pages and API responses.
+
+Starlette's ``GZipMiddleware`` compresses every response, including images,
+downloads that are already compressed and ranged (206) file responses,
+whose byte offsets refer to the uncompressed file. This variant only
+compresses text responses and leaves everything else untouched. A strong
+ETag on a response it compresses is sent as a weak one: the gzipped bytes
+differ from the representation the strong validator was issued for.
+"""
+from __future__ import annotations
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+COMPRESSIBLE_MEDIA_TYPES = (
+    'text/html',
+    'text/plain',
+    'text/csv',
+    'application/json',
+)
+
+
+class _TextGZipResponder(GZipResponder):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def send_weak_etag(message: Message) -> None:
+            if message['type'] == 'http.response.start' and not self.content_encoding_set:
+                headers = MutableHeaders(raw=message['headers'])
+                etag = headers.get('etag')
+                if headers.get('content-encoding') == 'gzip' and etag and not etag.startswith('W/'):
+                    headers['ETag'] = f'W/{etag}'
+            await send(message)
+
+        await super().__call__(scope, receive, send_weak_etag)
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            await super().send_with_gzip(message)
+            headers = Headers(raw=message['headers'])
+            if message['status'] == 206 or not headers.get('content-type', '').startswith(COMPRESSIBLE_MEDIA_TYPES):
+                # Pass the body through as is, like an already encoded one
+                self.content_encoding_set = True
+            return
+        await super().send_with_gzip(message)
+
+
+class TextGZipMiddleware(GZipMiddleware):
+    """``GZipMiddleware`` limited to ``COMPRESSIBLE_MEDIA_TYPES``"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] == 'http' and 'gzip' in Headers(scope=scope).get('accept-encoding', ''):
+            responder = _TextGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
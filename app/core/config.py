@@ -23,6 +23,23 @@ class Settings(BaseSettings):
         "http://127.0.0.1:3000",
     ], alias="CORS_ORIGINS")
 
+    # Per-route timing and query profiling (/web/admin/perf)
+    profiling_enabled: bool = Field(False, alias="APP_PROFILING")
+    # Re-check templates on disk for changes on every render (development only)
+    template_auto_reload: bool = Field(False, alias="TEMPLATE_AUTO_RELOAD")
+    # Bearer token for Prometheus to scrape /web/admin/perf/metrics without a session
+    metrics_token: str = Field("", alias="METRICS_TOKEN")
+
+    # Event-loop lag monitor: stalls longer than this are logged with the blocking stack
+    loop_lag_threshold_ms: int = Field(100, alias="LOOP_LAG_THRESHOLD_MS")
+    # Collect stalls so tests can fail on blocking calls (see tests/conftest.py)
+    loop_monitor_strict: bool = Field(False, alias="LOOP_MONITOR_STRICT")
+
+    # Startup backup with attachments and attachment path scan, run in the
+    # background after startup (start_server.py turns this on)
+    startup_maintenance: bool = Field(False, alias="STARTUP_MAINTENANCE")
+    startup_maintenance_delay_seconds: float = Field(5.0, alias="STARTUP_MAINTENANCE_DELAY_SECONDS")
+
     # Update System Configuration
     update_check_enabled: bool = Field(True, alias="UPDATE_CHECK_ENABLED")
     update_check_url: str = Field("", alias="UPDATE_CHECK_URL")
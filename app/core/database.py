@@ -29,6 +29,16 @@ async_session_factory = sessionmaker(
 )
 
 
+def upsert_insert(db: AsyncSession, table):
+    """``INSERT`` for ``table`` supporting ``on_conflict_do_update`` on the
+    session's database (SQLite or PostgreSQL)"""
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
 async def init_models() -> None:
     # Import models to register tables
     from app import models  # noqa: F401
@@ -62,6 +72,9 @@ async def init_models() -> None:
             # Best-effort; continue to create_all
             pass
         await conn.run_sync(SQLModel.metadata.create_all)
+        # Full-text search index (FTS5 table + sync triggers on SQLite)
+        from app.core.search import ensure_search_index
+        await conn.run_sync(ensure_search_index)
 
 
 async def ensure_initialized() -> None:
@@ -73,8 +86,15 @@ async def ensure_initialized() -> None:
 
 @asynccontextmanager
 async def lifespan(app):  # FastAPI lifespan
+    from app.core.startup import startup_timer, start_startup_maintenance, stop_startup_maintenance
+    
     # Initialize database
-    await init_models()
+    with startup_timer.phase("create tables"):
+        await init_models()
+    
+    # Watch for handlers and background jobs that block the event loop
+    from app.core.loop_monitor import loop_monitor
+    loop_monitor.start()
     
     # Setup graceful shutdown handlers
     from app.core.shutdown import shutdown_handler
@@ -91,39 +111,24 @@ async def lifespan(app):  # FastAPI lifespan
     except Exception as e:
         logger.error(f"⚠️  Failed to start backup system: {e}")
     
+    # Periodically remove attachment blobs no longer referenced by any row
+    from app.core.attachment_store import start_attachment_gc, stop_attachment_gc
+    start_attachment_gc()
+    startup_timer.mark("background jobs")
+    
     # Start email-to-ticket scheduler (V2 - uses database settings)
     try:
-        from app.core.email_scheduler_v2 import start_email_scheduler
-        await start_email_scheduler()
+        with startup_timer.phase("email scheduler"):
+            from app.core.email_scheduler_v2 import start_email_scheduler
+            await start_email_scheduler()
         logger.info("✅ Email-to-Ticket scheduler started (V2 - database config)")
     except Exception as e:
         logger.warning(f"⚠️  Email-to-Ticket scheduler not started: {e}")
     
-    # Fix attachment paths from absolute to relative on startup
-    try:
-        import sqlite3
-        from pathlib import Path
-        
-        db_path = Path("data.db")
-        if db_path.exists():
-            conn = sqlite3.connect(str(db_path))
-            cursor = conn.cursor()
-            
-            # Quick fix for comment_attachment
-            cursor.execute("SELECT id, file_path FROM comment_attachment WHERE file_path LIKE '/%' OR file_path LIKE '_:%'")
-            rows = cursor.fetchall()
-            if rows:
-                logger.info(f"🔧 Fixing {len(rows)} comment attachment paths...")
-                for att_id, file_path in rows:
-                    uuid_filename = Path(file_path).name
-                    new_path = f"app/uploads/comments/{uuid_filename}"
-                    cursor.execute("UPDATE comment_attachment SET file_path = ? WHERE id = ?", (new_path, att_id))
-                conn.commit()
-                logger.info(f"✅ Fixed {len(rows)} comment attachment paths")
-            
-            conn.close()
-    except Exception as e:
-        logger.warning(f"⚠️  Could not fix attachment paths: {e}")
+    # Attachment path fixes (and, with STARTUP_MAINTENANCE, the startup backup)
+    # run in the background once the server is up
+    start_startup_maintenance()
+    startup_timer.ready()
     
     yield
     
@@ -131,6 +136,11 @@ async def lifespan(app):  # FastAPI lifespan
     try:
         logger.info("🛑 Application shutdown requested...")
         await shutdown_handler.shutdown_sequence()
+        await stop_attachment_gc()
+        await stop_startup_maintenance()
+        from app.core.activity_report import shutdown_report_pool
+        shutdown_report_pool()
+        await loop_monitor.stop()
         
         # Stop email scheduler
         from app.core.email_scheduler_v2 import stop_email_scheduler
@@ -3,18 +3,25 @@ Email-to-Ticket Service
 Automatically creates tickets from incoming emails
 """
 
-import imaplib
 import email
+import io
 from email.header import decode_header
 from email.utils import parseaddr
 import re
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, TYPE_CHECKING
 import os
 from sqlmodel import Session, select
+from starlette.datastructures import Headers, UploadFile
 from app.models.ticket import Ticket, TicketComment, TicketAttachment, TicketHistory
 from app.models.user import User
 from app.models.notification import Notification
+from app.core.attachment_store import store_attachment
+from app.core.ticket_metrics import record_ticket_created
+from app.core.uploads import EMAIL_ATTACHMENT_MAX_SIZE, UploadTooLarge
+
+if TYPE_CHECKING:
+    import imaplib
 
 
 class EmailTicketService:
@@ -34,8 +41,10 @@ class EmailTicketService:
         self.workspace_id = workspace_id
         self.default_assigned_to = default_assigned_to
         
-    def connect(self) -> imaplib.IMAP4_SSL:
+    def connect(self) -> "imaplib.IMAP4_SSL":
         """Connect to IMAP server"""
+        import imaplib
+
         try:
             mail = imaplib.IMAP4_SSL(self.imap_server)
             mail.login(self.email_address, self.email_password)
@@ -178,6 +187,7 @@ class EmailTicketService:
         )
         db.add(ticket)
         await db.flush()
+        record_ticket_created(db, ticket)
         
         # Create history
         history = TicketHistory(
@@ -188,17 +198,33 @@ class EmailTicketService:
         )
         db.add(history)
         
-        # Handle attachments
-        if attachments:
-            for attachment in attachments:
-                ticket_attachment = TicketAttachment(
-                    ticket_id=ticket.id,
-                    filename=attachment['filename'],
-                    file_path=attachment['file_path'],
-                    file_size=attachment['file_size'],
-                    content_type=attachment['content_type']
-                )
-                db.add(ticket_attachment)
+        # Handle attachments: stored once per content in the shared blob store.
+        # Attachment rows need an uploader, so mail from unknown senders keeps
+        # its attachments only when the ticket has a default assignee
+        uploaded_by_id = created_by_id or self.default_assigned_to
+        for attachment in attachments or []:
+            if uploaded_by_id is None:
+                print(f"Skipping attachment {attachment['filename']}: no user to attribute it to")
+                continue
+            upload = UploadFile(
+                io.BytesIO(attachment['content']),
+                filename=attachment['filename'],
+                headers=Headers({'content-type': attachment['content_type']}),
+            )
+            try:
+                stored = await store_attachment(db, upload, EMAIL_ATTACHMENT_MAX_SIZE)
+            except UploadTooLarge as e:
+                print(f"Skipping attachment: {e}")
+                continue
+            db.add(TicketAttachment(
+                ticket_id=ticket.id,
+                filename=stored.filename,
+                file_path=stored.relative_path,
+                file_size=stored.size,
+                mime_type=stored.content_type,
+                content_hash=stored.sha256,
+                uploaded_by_id=uploaded_by_id,
+            ))
         
         # Notify assigned user
         if self.default_assigned_to:
@@ -268,14 +294,14 @@ class EmailTicketService:
                                 except:
                                     pass
                             
-                            # Get attachments info (don't download yet)
+                            # Get attachments
                             elif "attachment" in content_disposition:
                                 filename = part.get_filename()
                                 if filename:
                                     attachments.append({
                                         'filename': self.decode_email_header(filename),
                                         'content_type': content_type,
-                                        'size': len(part.get_payload(decode=True) or b'')
+                                        'content': part.get_payload(decode=True) or b''
                                     })
                     else:
                         # Simple email
@@ -4,7 +4,6 @@ IMAP-based email processing, uses database settings, keeps emails on server
 """
 
 import asyncio
-import imaplib
 import email
 from email.header import decode_header
 from email.utils import parseaddr
@@ -23,6 +22,7 @@ from app.models.processed_mail import ProcessedMail
 from app.models.project import Project
 from app.models.task import Task
 from app.models.enums import TaskStatus, TaskPriority
+from app.core.ticket_metrics import record_ticket_created
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -44,6 +44,8 @@ class EmailToTicketService:
         
     def connect_imap(self):
         """Connect to IMAP server"""
+        import imaplib
+
         try:
             if self.settings.incoming_mail_use_ssl:
                 mail = imaplib.IMAP4_SSL(
@@ -556,6 +558,7 @@ Auto-created from email support request"""
         
         db.add(ticket)
         await db.flush()
+        record_ticket_created(db, ticket)
         
         # Add history entry
         history_comment = f'Ticket created automatically from email: {sender_email}'
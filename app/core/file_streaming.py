@@ -0,0 +1,140 @@
+"""
+Streaming file responses with HTTP Range support.
+
+Starlette's FileResponse (0.38) always sends the whole file. Large downloads
+(backups, video attachments) need single-range requests so browsers and
+download managers can resume and seek.
+"""
+from __future__ import annotations
+
+import os
+from email.utils import formatdate
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+import aiofiles
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive (start, end).
+
+    Returns None for headers we do not honour (multiple ranges, other units),
+    in which case the full file is sent. Raises ValueError for unsatisfiable
+    ranges.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if not start_text:
+            # Suffix range: last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError("empty suffix range")
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        raise ValueError(f"invalid range {header!r}")
+    if start >= size or end < start:
+        raise ValueError(f"unsatisfiable range {header!r}")
+    return start, min(end, size - 1)
+
+
+async def iter_file(path: Path, start: int, end: int, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield bytes ``start..end`` (inclusive) of a file without blocking the loop"""
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag``"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def ranged_file_response(
+    request: Request,
+    path: Path,
+    filename: Optional[str] = None,
+    media_type: str = "application/octet-stream",
+    disposition: str = "attachment",
+    headers: Optional[dict] = None,
+    etag: Optional[str] = None,
+) -> Response:
+    """Stream ``path``, answering ``Range`` requests with 206 Partial Content
+
+    ``etag`` overrides the mtime/size validator, e.g. with a content hash;
+    when given, a matching ``If-None-Match`` is answered with 304 without
+    touching the file. Raises FileNotFoundError if ``path`` is missing.
+    """
+    if etag is not None and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+    stat = path.stat()
+    size = stat.st_size
+    etag = etag or file_etag(stat)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+    response_headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Content-Disposition": content_disposition(filename or path.name, disposition),
+        **(headers or {}),
+    }
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and size and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**response_headers, "Content-Range": f"bytes */{size}"},
+            )
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response_headers["Content-Length"] = str(end - start + 1 if size else 0)
+
+    return StreamingResponse(
+        iter_file(path, start, end) if size else iter(()),
+        status_code=status_code,
+        media_type=media_type,
+        headers=response_headers,
+    )
@@ -0,0 +1,204 @@
+"""
+Event-loop lag monitor and blocking-call detector.
+
+A heartbeat task sleeps for ``interval`` and measures how late it wakes up:
+that delay is the time every other request on the loop had to wait. A
+watchdog thread watches the heartbeat, and when it is overdue by more than
+``threshold`` it captures the stack of the loop thread, which at that moment
+is the code blocking the loop (a sync SMTP call, a PDF build, a file write).
+When the loop recovers the stall is logged and kept in a ring buffer shown
+on ``/web/admin/perf``. Time the loop thread spent in cyclic garbage
+collection is measured through ``gc.callbacks`` and reported with the stall.
+
+In strict mode (``LOOP_MONITOR_STRICT=1``; see tests/conftest.py) stalls are
+also collected so ``check()`` can fail a test that blocked the loop; a stall
+that is only over the threshold because of garbage collection is not a
+blocking call and is exempt.
+"""
+from __future__ import annotations
+
+import asyncio
+import gc
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_INTERVAL_SECONDS = 0.05
+STALL_HISTORY = 50
+LAG_SAMPLES = 1200  # One minute of heartbeats
+STACK_DEPTH = 30
+
+APP_DIR = str(Path(__file__).resolve().parents[1])
+
+
+class BlockingCallDetected(AssertionError):
+    """Raised by ``LoopMonitor.check`` in strict mode"""
+
+
+def _task_label(task: Optional[asyncio.Task]) -> Optional[str]:
+    if task is None:
+        return None
+    coro = task.get_coro()
+    return f'{task.get_name()} ({getattr(coro, "__qualname__", coro)})'
+
+
+def _blocking_frame(stack: traceback.StackSummary) -> Optional[str]:
+    """The innermost frame in app code (else the innermost frame)"""
+    for frame in reversed(stack):
+        if frame.filename.startswith(APP_DIR) and frame.filename != __file__:
+            return f'{Path(frame.filename).relative_to(Path(APP_DIR).parent)}:{frame.lineno} in {frame.name}'
+    return f'{stack[-1].filename}:{stack[-1].lineno} in {stack[-1].name}' if stack else None
+
+
+class LoopMonitor:
+    """Measure scheduling delay on the running loop and capture what blocks it"""
+
+    def __init__(self, threshold: float = 0.1, interval: float = LOOP_LAG_INTERVAL_SECONDS, strict: bool = False):
+        self.threshold = threshold
+        self.interval = interval
+        self.strict = strict
+        self.stalls: deque[dict] = deque(maxlen=STALL_HISTORY)
+        self.violations: list[dict] = []
+        self._samples: deque[float] = deque(maxlen=LAG_SAMPLES)
+        self._max_lag = 0.0
+        self._stall_count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._beat = 0.0
+        self._beat_number = 0
+        self._captured: Optional[tuple[int, dict]] = None  # (beat number, stall)
+        self._gc_started: Optional[float] = None
+        self._gc_seconds = 0.0  # Loop-thread time spent in garbage collection
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start watching the running loop (call from a coroutine)"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stopped.clear()
+        gc.callbacks.append(self._on_gc)
+        self._task = self._loop.create_task(self._heartbeat(), name='loop-lag-monitor')
+        self._thread = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        if threading.get_ident() != self._loop_thread_id:
+            return
+        if phase == 'start':
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            self._gc_seconds += time.perf_counter() - self._gc_started
+            self._gc_started = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._beat = time.perf_counter()
+            self._beat_number += 1
+            gc_seconds = self._gc_seconds
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - self._beat - self.interval)
+            self._samples.append(lag)
+            self._max_lag = max(self._max_lag, lag)
+            if lag >= self.threshold:
+                self._record_stall(lag, self._gc_seconds - gc_seconds)
+
+    def _watch(self) -> None:
+        # Runs in its own thread: the loop cannot report on itself while
+        # blocked. Polling every threshold/4 and capturing at threshold/2
+        # catches the blocking code of any stall that reaches the threshold.
+        while not self._stopped.wait(self.threshold / 4):
+            beat_number = self._beat_number
+            overdue = time.perf_counter() - self._beat - self.interval
+            if overdue < self.threshold / 2 or (self._captured and self._captured[0] == beat_number):
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame, limit=STACK_DEPTH)
+            current_tasks = getattr(asyncio.tasks, '_current_tasks', {})
+            self._captured = (beat_number, {
+                'task': _task_label(current_tasks.get(self._loop)),
+                'where': _blocking_frame(stack),
+                'stack': ''.join(stack.format()),
+            })
+
+    def _record_stall(self, lag: float, gc_seconds: float = 0.0) -> None:
+        captured = self._captured
+        if captured is not None and captured[0] == self._beat_number:
+            stall = dict(captured[1])
+        else:
+            stall = {'task': None, 'where': None, 'stack': None}  # Recovered before the watchdog looked
+        stall.update(at=datetime.now(timezone.utc), lag_ms=round(lag * 1000, 1), gc_ms=round(gc_seconds * 1000, 1))
+        self._stall_count += 1
+        self.stalls.append(stall)
+        logger.warning('Event loop blocked for %.0f ms (%.0f ms garbage collection) at %s (%s)',
+                       lag * 1000, gc_seconds * 1000, stall['where'] or 'unknown', stall['task'] or 'no task')
+        if self.strict and lag - gc_seconds >= self.threshold:
+            self.violations.append(stall)
+
+    def check(self) -> None:
+        """In strict mode, raise for the stalls recorded since the last check"""
+        violations, self.violations = self.violations, []
+        if violations:
+            details = '\n\n'.join(
+                f'{v["lag_ms"]:.0f} ms at {v["where"] or "unknown"}\n{v["stack"] or "(no stack captured)"}'
+                for v in violations
+            )
+            raise BlockingCallDetected(f'Event loop blocked {len(violations)} time(s):\n{details}')
+
+    def stats(self) -> dict:
+        samples = sorted(self._samples)
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000, 1) if samples else 0.0
+
+        return {
+            'running': self.running,
+            'threshold_ms': round(self.threshold * 1000),
+            'p50_ms': percentile(50),
+            'p99_ms': percentile(99),
+            'max_ms': round(self._max_lag * 1000, 1),
+            'stalls': self._stall_count,
+        }
+
+
+def _default_monitor() -> LoopMonitor:
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    return LoopMonitor(threshold=settings.loop_lag_threshold_ms / 1000, strict=settings.loop_monitor_strict)
+
+
+loop_monitor = _default_monitor()
@@ -0,0 +1,204 @@
+"""
+Conditional GET and rendered-HTML caching for read-heavy pages.
+
+Each workspace has a data version that moves whenever a transaction that
+wrote to it commits (tracked with SQLAlchemy session events, so no route has
+to remember to bump it). Rows without a ``workspace_id`` column (tasks,
+comments, assignments, ...) and raw SQL writes move every workspace's
+version, since their workspace is not known without another query. Writes
+made outside a session (a bare connection) must call ``bump_data_version``.
+
+Versions are random tokens kept in small files under ``cache/page_versions``,
+so every worker process on the host sees a write made by any of them. If the
+directory cannot be written, pages are not cached at all.
+
+``@cached_page`` wraps a page handler: the ETag is derived from the user,
+the URL, the workspace data and settings versions and a five-minute time
+bucket (for "due today" and relative times), so a browser revalidating an
+unchanged page gets a 304 without the handler running, and other requests
+for it are answered from an LRU of rendered HTML.
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from sqlalchemy import TextClause, event
+from sqlalchemy.orm import Session
+
+from app.core.workspace_context import workspace_settings_version
+
+logger = logging.getLogger(__name__)
+
+PAGE_CACHE_SIZE = 512
+PAGE_VERSIONS_DIR = Path('cache') / 'page_versions'
+PAGE_CACHE_MAX_AGE_SECONDS = 300
+# Tables never shown on cached pages; writing them does not change a version
+IGNORED_TABLES = {'notification', 'processedmail', 'attachment_blob', 'ticket_metric_bucket'}
+# Raw SQL starting with these does not write
+READ_ONLY_SQL = re.compile(r'\s*(SELECT|PRAGMA|EXPLAIN)\b', re.IGNORECASE)
+# Session keys holding one-off messages a page pops while rendering
+FLASH_SESSION_KEYS = ('success_message', 'error_message', 'info_message', 'flash_message')
+
+_ALL_WORKSPACES = None
+_PENDING_KEY = 'page_cache_workspaces'
+# Rendered pages and ETags from an earlier process (older templates) never match
+_process_token = uuid.uuid4().hex
+
+_versions_available = True
+_pages: OrderedDict[str, bytes] = OrderedDict()
+_stats = {'hits': 0, 'not_modified': 0, 'misses': 0}
+
+
+def _version_file(workspace_id: Optional[int]) -> Path:
+    return PAGE_VERSIONS_DIR / ('all' if workspace_id is _ALL_WORKSPACES else f'workspace-{workspace_id}')
+
+
+def _read_version(workspace_id: Optional[int]) -> str:
+    global _versions_available
+    try:
+        return _version_file(workspace_id).read_text()
+    except FileNotFoundError:
+        return '0'
+    except OSError:
+        logger.exception('Page cache versions unreadable; pages are no longer cached')
+        _versions_available = False
+        return '0'
+
+
+def data_version(workspace_id: int) -> str:
+    return f'{_read_version(_ALL_WORKSPACES)}.{_read_version(workspace_id)}'
+
+
+def bump_data_version(workspace_id: Optional[int] = _ALL_WORKSPACES) -> None:
+    """Mark the cached pages of a workspace (or of every workspace) stale in
+    every worker process"""
+    global _versions_available
+    path = _version_file(workspace_id)
+    tmp = path.with_name(f'.{path.name}.{uuid.uuid4().hex}')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(uuid.uuid4().hex[:16])
+        os.replace(tmp, path)
+    except OSError:
+        # Other workers would keep serving pages this write made stale
+        logger.exception('Could not update page cache versions; pages are no longer cached')
+        _versions_available = False
+        with contextlib.suppress(OSError):
+            tmp.unlink()
+
+
+def clear_page_cache() -> None:
+    """Drop every rendered page (e.g. after a database restore)"""
+    bump_data_version()
+    _pages.clear()
+
+
+def page_cache_stats() -> dict:
+    return {**_stats, 'entries': len(_pages)}
+
+
+def _workspace_of(instance) -> Optional[int]:
+    if instance.__tablename__ == 'workspace':
+        return instance.id
+    return getattr(instance, 'workspace_id', _ALL_WORKSPACES)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_written_workspaces(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if getattr(instance, '__tablename__', None) not in IGNORED_TABLES:
+            pending.add(_workspace_of(instance))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_writes(orm_execute_state):
+    statement = orm_execute_state.statement
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        written = getattr(getattr(statement, 'table', None), 'name', None) not in IGNORED_TABLES
+    else:
+        written = isinstance(statement, TextClause) and not READ_ONLY_SQL.match(statement.text)
+    if written:
+        orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(_ALL_WORKSPACES)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_written_workspaces(session):
+    # Bumped only once the data is visible, so a page rendered under the new
+    # version can never show the old data
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL_WORKSPACES in pending:
+        bump_data_version()
+    else:
+        for workspace_id in pending:
+            bump_data_version(workspace_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_written_workspaces(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _page_key(request: Request, user_id: int, workspace_id: int) -> str:
+    raw = '|'.join(map(str, (
+        _process_token, user_id, request.url.path, request.url.query,
+        data_version(workspace_id), workspace_settings_version(workspace_id),
+        int(time.time() // PAGE_CACHE_MAX_AGE_SECONDS),
+    )))
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def cached_page(handler):
+    """Answer repeat GETs of a signed-in page with 304 or cached HTML"""
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        request: Request = kwargs['request']
+        user_id = request.session.get('user_id')
+        workspace = getattr(request.state, 'workspace', None)
+        if not user_id or workspace is None or any(k in request.session for k in FLASH_SESSION_KEYS):
+            return await handler(*args, **kwargs)
+
+        key = _page_key(request, user_id, workspace.id)
+        if not _versions_available:
+            return await handler(*args, **kwargs)
+        etag = f'W/"{key}"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in request.headers.get('if-none-match', ''):
+            _stats['not_modified'] += 1
+            return Response(status_code=304, headers=headers)
+        body = _pages.get(key)
+        if body is not None:
+            _pages.move_to_end(key)
+            _stats['hits'] += 1
+            return HTMLResponse(body, headers=headers)
+
+        _stats['misses'] += 1
+        response = await handler(*args, **kwargs)
+        if (
+            response.status_code == 200
+            and response.background is None
+            and response.media_type == 'text/html'
+            and 'set-cookie' not in response.headers
+        ):
+            _pages[key] = response.body
+            if len(_pages) > PAGE_CACHE_SIZE:
+                _pages.popitem(last=False)
+            response.headers.update(headers)
+        return response
+
+    return wrapper
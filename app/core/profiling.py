@@ -0,0 +1,266 @@
+"""
+Opt-in request profiling and slow-query instrumentation.
+
+Enabled with ``APP_PROFILING=1``. ``ProfilingMiddleware`` times every
+request and SQLAlchemy cursor events attribute each statement to the request
+that ran it, so per route we keep a latency histogram, query counts, total
+database time and the slowest statements. A statement shape (the SQL with
+literals and ``IN`` lists folded) repeated more than ``NPLUS1_THRESHOLD``
+times in one request is recorded as a likely N+1 and logged.
+
+Results are shown on ``/web/admin/perf`` and exported in the Prometheus text
+format by ``render_prometheus``.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_STATEMENTS_PER_ROUTE = 5
+SLOW_QUERY_SECONDS = 0.1
+NPLUS1_THRESHOLD = 10
+SHAPE_MAX_LENGTH = 400
+
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with literals and ``IN (?, ?, ...)`` lists folded, so
+    the same query with different values has one shape"""
+    shape = _STRING_RE.sub('?', statement)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = _IN_LIST_RE.sub('(?)', shape)
+    return _SPACE_RE.sub(' ', shape).strip()[:SHAPE_MAX_LENGTH]
+
+
+@dataclass
+class RequestProfile:
+    queries: int = 0
+    db_seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    slowest: list = field(default_factory=list)  # min-heap of (seconds, shape)
+
+
+@dataclass
+class RouteStats:
+    requests: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    queries: int = 0
+    max_queries: int = 0
+    db_seconds: float = 0.0
+    buckets: list = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+    slowest: list = field(default_factory=list)  # min-heap of (seconds, shape)
+    # shape -> [requests it repeated in, most repeats in one request]
+    nplus1: dict = field(default_factory=dict)
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar('request_profile', default=None)
+_routes: dict[tuple[str, str], RouteStats] = {}
+_started_at = time.time()
+_enabled = False
+
+
+def profiling_enabled() -> bool:
+    return _enabled
+
+
+def _keep_slowest(heap: list, seconds: float, shape: str) -> None:
+    if len(heap) < SLOW_STATEMENTS_PER_ROUTE:
+        heapq.heappush(heap, (seconds, shape))
+    elif seconds > heap[0][0]:
+        heapq.heapreplace(heap, (seconds, shape))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._profiling_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_profiling_started_at', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if elapsed >= SLOW_QUERY_SECONDS:
+        logger.warning('Slow query (%.0f ms): %s', elapsed * 1000, statement_shape(statement))
+    profile = _current.get()
+    if profile is None:
+        return  # Background task or startup
+    shape = statement_shape(statement)
+    profile.queries += 1
+    profile.db_seconds += elapsed
+    profile.shapes[shape] += 1
+    _keep_slowest(profile.slowest, elapsed, shape)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the query timers to an engine (``AsyncEngine.sync_engine``)"""
+    global _enabled
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    _enabled = True
+
+
+def _record(method: str, route: str, status: int, seconds: float, profile: RequestProfile) -> None:
+    stats = _routes.get((method, route))
+    if stats is None:
+        stats = _routes[(method, route)] = RouteStats()
+    stats.requests += 1
+    stats.errors += status >= 500
+    stats.seconds += seconds
+    stats.queries += profile.queries
+    stats.max_queries = max(stats.max_queries, profile.queries)
+    stats.db_seconds += profile.db_seconds
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            stats.buckets[i] += 1
+            break
+    for elapsed, shape in profile.slowest:
+        _keep_slowest(stats.slowest, elapsed, shape)
+    for shape, count in profile.shapes.items():
+        if count > NPLUS1_THRESHOLD:
+            seen = stats.nplus1.setdefault(shape, [0, 0])
+            seen[0] += 1
+            seen[1] = max(seen[1], count)
+            logger.warning('Possible N+1 in %s %s: %d x %s', method, route, count, shape)
+
+
+class ProfilingMiddleware:
+    """Time each HTTP request and collect the queries it ran"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            route = scope.get('route')
+            if route is not None:
+                label = getattr(route, 'path', '(unknown)')
+            elif scope.get('root_path'):
+                label = scope['root_path'] + '/*'  # Mounted static files
+            else:
+                label = '(unmatched)'
+            _record(scope['method'], label, status, time.perf_counter() - started, profile)
+
+
+def reset_profiles() -> None:
+    global _started_at
+    _routes.clear()
+    _started_at = time.time()
+
+
+def route_profiles() -> list[dict]:
+    """Per-route summaries, slowest total time first"""
+    rows = []
+    for (method, route), stats in _routes.items():
+        cumulative, percentiles = 0, {}
+        for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+            cumulative += count
+            for p in (50, 95, 99):
+                if p not in percentiles and cumulative >= stats.requests * p / 100:
+                    percentiles[p] = bound
+        rows.append({
+            'method': method,
+            'route': route,
+            'requests': stats.requests,
+            'errors': stats.errors,
+            'avg_ms': stats.seconds / stats.requests * 1000,
+            # Bucket upper bounds; None past the last bucket
+            'p50_ms': percentiles[50] * 1000 if 50 in percentiles else None,
+            'p95_ms': percentiles[95] * 1000 if 95 in percentiles else None,
+            'p99_ms': percentiles[99] * 1000 if 99 in percentiles else None,
+            'avg_queries': stats.queries / stats.requests,
+            'max_queries': stats.max_queries,
+            'avg_db_ms': stats.db_seconds / stats.requests * 1000,
+            'total_seconds': stats.seconds,
+            'slowest': [
+                {'ms': seconds * 1000, 'statement': shape}
+                for seconds, shape in sorted(stats.slowest, reverse=True)
+            ],
+            'nplus1': [
+                {'statement': shape, 'requests': seen[0], 'max_repeats': seen[1]}
+                for shape, seen in sorted(stats.nplus1.items(), key=lambda item: -item[1][1])
+            ],
+        })
+    return sorted(rows, key=lambda row: -row['total_seconds'])
+
+
+def profiling_summary() -> dict:
+    return {
+        'enabled': _enabled,
+        'since': _started_at,
+        'nplus1_threshold': NPLUS1_THRESHOLD,
+        'routes': route_profiles(),
+    }
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(extra_gauges: Optional[dict[str, float]] = None) -> str:
+    """Route metrics (and any ``extra_gauges``) in the Prometheus text format"""
+    lines = [
+        '# HELP crm_request_duration_seconds Request latency by route',
+        '# TYPE crm_request_duration_seconds histogram',
+    ]
+    for (method, route), stats in sorted(_routes.items()):
+        labels = f'method="{method}",route="{_label(route)}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+            cumulative += count
+            lines.append(f'crm_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'crm_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.requests}')
+        lines.append(f'crm_request_duration_seconds_sum{{{labels}}} {stats.seconds:.6f}')
+        lines.append(f'crm_request_duration_seconds_count{{{labels}}} {stats.requests}')
+
+    counters = (
+        ('crm_request_errors_total', 'Requests answered with a 5xx status', lambda s: s.errors),
+        ('crm_db_queries_total', 'Database statements run by requests', lambda s: s.queries),
+        ('crm_db_seconds_total', 'Time spent in database statements', lambda s: round(s.db_seconds, 6)),
+        ('crm_nplus1_requests_total', 'Requests repeating one statement shape past the N+1 threshold',
+         lambda s: sum(seen[0] for seen in s.nplus1.values())),
+    )
+    for name, help_text, value in counters:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (method, route), stats in sorted(_routes.items()):
+            lines.append(f'{name}{{method="{method}",route="{_label(route)}"}} {value(stats)}')
+
+    for name, value in (extra_gauges or {}).items():
+        lines += [f'# TYPE {name} gauge', f'{name} {value}']
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,233 @@
+"""
+PDF rendering for user activity reports.
+
+Runs in a worker process (see ``app.core.activity_report``), so it only
+depends on ReportLab and the plain data collected by the web process: no
+database access, no models.
+"""
+from __future__ import annotations
+
+import io
+from datetime import date, datetime
+
+
+def _fmt(value, fmt: str) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.strftime(fmt)
+    return str(value or '')[:16]
+
+
+def _label(value: str) -> str:
+    return (value or '').replace('_', ' ').title()
+
+
+def warm_up() -> None:
+    """Import ReportLab in a fresh worker process"""
+    import reportlab.platypus  # noqa: F401
+
+
+def render_user_activity_pdf(data: dict) -> bytes:
+    """Build the activity report PDF from ``collect_user_activity`` output"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+
+    # Container for PDF elements
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # Custom styles
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1F2937'),
+        spaceAfter=30,
+        alignment=TA_CENTER,
+    )
+
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#374151'),
+        spaceAfter=12,
+        spaceBefore=20,
+    )
+
+    subheading_style = ParagraphStyle(
+        'CustomSubheading',
+        parent=styles['Heading3'],
+        fontSize=12,
+        textColor=colors.HexColor('#6B7280'),
+        spaceAfter=8,
+    )
+
+    def table(rows, widths, header_color, font_size=8, stripes=(colors.white, colors.lightgrey)):
+        t = Table(rows, colWidths=[w*inch for w in widths])
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header_color)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), font_size),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), list(stripes)),
+        ]))
+        return t
+
+    def section(title, rows, widths, header_color, empty_text, **kwargs):
+        elements.append(Paragraph(title, heading_style))
+        if len(rows) > 1:
+            elements.append(table(rows, widths, header_color, **kwargs))
+        else:
+            elements.append(Paragraph(empty_text, styles['Normal']))
+        elements.append(Spacer(1, 0.2*inch))
+
+    today = data['today']
+    counts = data['counts']
+
+    # Title
+    elements.append(Paragraph("User Activity Report", title_style))
+    elements.append(Paragraph(data['user_name'], heading_style))
+    elements.append(Paragraph(
+        f"Period: {data['start'].strftime('%B %d, %Y')} - {data['end'].strftime('%B %d, %Y')}",
+        subheading_style
+    ))
+    elements.append(Paragraph(
+        f"Generated: {data['generated_at'].strftime('%B %d, %Y at %I:%M %p')}",
+        subheading_style
+    ))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Summary section with enhanced metrics
+    elements.append(Paragraph("Activity Summary", heading_style))
+    summary_data = [
+        ['Activity Type', 'Count'],
+        ['Tasks Created', str(counts['tasks_created'])],
+        ['Task Assignments Received', str(counts['task_assignments'])],
+        ['Task Edits Made', str(counts['task_edits'])],
+        ['Task Comments Posted', str(counts['comments'])],
+        ['Projects Created', str(counts['projects_created'])],
+        ['Activities Logged (Calls/Emails/Meetings)', str(counts['activities'])],
+        ['Tickets Assigned', str(counts['tickets_assigned'])],
+        ['Ticket Comments Posted', str(counts['ticket_comments'])],
+        ['Tickets Closed', str(counts['tickets_closed'])],
+    ]
+    summary_table = Table(summary_data, colWidths=[4*inch, 2*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # OVERDUE TASKS SECTION (Critical!)
+    if data['overdue']:
+        elements.append(Paragraph("⚠️ OVERDUE TASKS", heading_style))
+        overdue_data = [['Task Title', 'Due Date', 'Days Overdue', 'Priority', 'Status']]
+        for title, due, priority, status in data['overdue']:
+            overdue_data.append([
+                title[:40], due.strftime('%Y-%m-%d'), str((today - due).days), _label(priority), _label(status),
+            ])
+        elements.append(table(
+            overdue_data, [2.3, 1, 1.2, 0.9, 1], '#DC2626', stripes=(colors.lightpink, colors.mistyrose),
+        ))
+        elements.append(Spacer(1, 0.3*inch))
+
+    def due_label(due, status, late_text):
+        if not due:
+            return None
+        text = due.strftime('%Y-%m-%d')
+        if due < today and status != 'done':
+            text += late_text
+        return text
+
+    # Tasks Created with enhanced details
+    rows = [['Date Created', 'Title', 'Due Date', 'Priority', 'Status']]
+    for created_at, title, due, priority, status in data['tasks_created']:
+        rows.append([
+            created_at.strftime('%Y-%m-%d'), title[:35], due_label(due, status, ' (OVERDUE)') or 'No due date',
+            _label(priority), _label(status),
+        ])
+    section("Tasks Created", rows, [1.1, 2, 1.3, 0.9, 1.1], '#10B981', "No tasks created during this period.")
+
+    # Task Assignments Received
+    rows = [['Date', 'Title', 'Assigned By', 'Due Date', 'Status']]
+    for created_at, title, assigner, due, status in data['assignments']:
+        rows.append([
+            created_at.strftime('%Y-%m-%d'), title[:30], (assigner or 'Unknown')[:15],
+            due_label(due, status, ' (LATE)') or 'None', _label(status),
+        ])
+    section("Task Assignments Received", rows, [1, 1.8, 1.2, 1.2, 1.2], '#6366F1',
+            "No task assignments received during this period.")
+
+    # Task Edits
+    rows = [['Date', 'Task ID', 'Field Changed', 'Old Value', 'New Value']]
+    for created_at, task_id, field, old_value, new_value in data['edits']:
+        rows.append([
+            created_at.strftime('%Y-%m-%d %H:%M'), str(task_id), _label(field),
+            (old_value or 'None')[:20], (new_value or 'None')[:20],
+        ])
+    section("Recent Task Edits", rows, [1.3, 0.7, 1.2, 1.5, 1.5], '#F59E0B', "No task edits made during this period.")
+
+    # Comments
+    rows = [['Date', 'Task ID', 'Comment']]
+    for created_at, task_id, content in data['comments']:
+        rows.append([_fmt(created_at, '%Y-%m-%d %H:%M'), str(task_id), (content or '')[:60]])
+    section("Recent Comments", rows, [1.5, 0.8, 4], '#8B5CF6', "No comments posted during this period.", font_size=9)
+
+    # Projects Created
+    rows = [['Date', 'Project Name', 'Status', 'Members']]
+    for created_at, name, is_archived, members in data['projects']:
+        rows.append([
+            created_at.strftime('%Y-%m-%d'), name[:40], 'Archived' if is_archived else 'Active', str(members),
+        ])
+    section("Projects Created", rows, [1.1, 3, 1.1, 1.1], '#8B5CF6', "No projects created during this period.",
+            font_size=9, stripes=(colors.white, colors.lavender))
+
+    # Activities Logged (Calls, Emails, Meetings, Notes)
+    rows = [['Date', 'Type', 'Subject', 'Related To']]
+    for created_at, activity_type, subject, contact_id in data['activities']:
+        rows.append([
+            created_at.strftime('%Y-%m-%d'), _label(activity_type), (subject or '')[:35],
+            f'Contact ID: {contact_id}' if contact_id else '',
+        ])
+    section("Activities Logged (Calls, Emails, Meetings, Notes)", rows, [1, 1.1, 2.5, 1.7], '#F59E0B',
+            "No activities logged during this period.", stripes=(colors.white, colors.lightgoldenrodyellow))
+
+    # Ticket Comments Posted
+    rows = [['Date', 'Ticket ID', 'Comment Preview', 'Internal']]
+    for created_at, ticket_id, content, is_internal in data['ticket_comments']:
+        rows.append([_fmt(created_at, '%Y-%m-%d'), str(ticket_id), (content or '')[:45], 'Yes' if is_internal else 'No'])
+    section("Ticket Comments Posted", rows, [1.1, 1, 3, 1.2], '#06B6D4', "No ticket comments posted during this period.",
+            stripes=(colors.white, colors.lightblue))
+
+    # Tickets Assigned to User
+    rows = [['Date Assigned', 'Ticket #', 'Subject', 'Priority', 'Status']]
+    for created_at, number, subject, priority, status in data['tickets_assigned']:
+        rows.append([created_at.strftime('%Y-%m-%d'), number, subject[:35], priority.title(), status.title()])
+    section("Tickets Assigned to User", rows, [1.2, 1.1, 2.2, 0.9, 0.9], '#14B8A6',
+            "No tickets assigned to this user during this period.")
+
+    # Tickets Closed
+    rows = [['Date Closed', 'Ticket #', 'Subject', 'Priority']]
+    for closed_at, number, subject, priority in data['tickets_closed']:
+        rows.append([closed_at.strftime('%Y-%m-%d %H:%M'), number, subject[:40], priority.title()])
+    section("Tickets Closed", rows, [1.5, 1.3, 2.5, 1], '#EF4444', "No tickets closed during this period.", font_size=9)
+
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,477 @@
+"""
+Full-text search across tasks, projects, comments, tickets and chat messages.
+
+SQLite: a single FTS5 table (``search_index``) kept in sync by triggers on the
+source tables, so every write path (web UI, REST API, email ingest, scripts)
+updates the index without any application hooks.
+
+PostgreSQL: the same documents are matched with ``to_tsvector`` expressions
+backed by GIN expression indexes created on startup.
+
+Both back ends return ranked hits with highlighted snippets, support prefix
+matching for search-as-you-type, and apply the same workspace / project
+membership / chat membership visibility rules as the page handlers.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, NamedTuple, Optional
+
+from markupsafe import Markup, escape
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "search_index"
+MIN_QUERY_LENGTH = 2
+MAX_TERMS = 8
+
+# Private-use code points mark highlighted terms inside snippets; they survive
+# HTML escaping and are swapped for <mark> tags afterwards.
+_MARK_OPEN = "\ue000"
+_MARK_CLOSE = "\ue001"
+_ELLIPSIS = "…"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class _Source(NamedTuple):
+    kind: str
+    code: int  # rowid = source id * 8 + code, so index rows are addressable by PK
+    table: str
+    watch: tuple[str, ...]  # columns whose update re-indexes the row
+    title: str
+    body: str
+    workspace: str
+    project: str
+    parent: str
+    joins: str = ""
+
+
+_SOURCES: tuple[_Source, ...] = (
+    _Source(
+        "project", 1, "project", ("name", "description", "workspace_id"),
+        title="src.name",
+        body="COALESCE(src.description, '')",
+        workspace="src.workspace_id", project="src.id", parent="src.id",
+    ),
+    _Source(
+        "task", 2, "task", ("title", "description", "project_id"),
+        title="src.title",
+        body="COALESCE(src.description, '')",
+        workspace="p.workspace_id", project="src.project_id", parent="src.id",
+        joins="JOIN project AS p ON p.id = src.project_id",
+    ),
+    _Source(
+        "comment", 3, "comment", ("content", "task_id"),
+        title="''",
+        body="src.content",
+        workspace="p.workspace_id", project="t.project_id", parent="src.task_id",
+        joins="JOIN task AS t ON t.id = src.task_id JOIN project AS p ON p.id = t.project_id",
+    ),
+    _Source(
+        "ticket", 4, "ticket",
+        ("ticket_number", "subject", "description", "guest_name", "guest_surname",
+         "guest_email", "guest_company", "related_project_id", "workspace_id"),
+        title="src.ticket_number || ' ' || src.subject",
+        body=(
+            "COALESCE(src.description, '') || ' ' || COALESCE(src.guest_name, '') || ' ' || "
+            "COALESCE(src.guest_surname, '') || ' ' || COALESCE(src.guest_email, '') || ' ' || "
+            "COALESCE(src.guest_company, '')"
+        ),
+        workspace="src.workspace_id", project="src.related_project_id", parent="src.id",
+    ),
+    _Source(
+        "ticket_comment", 5, "ticketcomment", ("content", "ticket_id"),
+        title="''",
+        body="src.content",
+        workspace="t.workspace_id", project="t.related_project_id", parent="src.ticket_id",
+        joins="JOIN ticket AS t ON t.id = src.ticket_id",
+    ),
+    _Source(
+        "message", 6, "message", ("content", "chat_id"),
+        title="''",
+        body="src.content",
+        workspace="c.workspace_id", project="NULL", parent="src.chat_id",
+        joins="JOIN chat AS c ON c.id = src.chat_id",
+    ),
+)
+
+_KIND_CODES = {source.kind: source.code for source in _SOURCES}
+
+
+# --------------------------
+# Index maintenance
+# --------------------------
+def _source_select(source: _Source) -> str:
+    return (
+        f"SELECT src.id * 8 + {source.code}, {source.title}, {source.body}, '{source.kind}', "
+        f"src.id, {source.workspace}, {source.project}, {source.parent} "
+        f"FROM \"{source.table}\" AS src {source.joins}"
+    )
+
+
+_INSERT_COLUMNS = "rowid, title, body, kind, ref_id, workspace_id, project_id, parent_id"
+
+
+def _sqlite_trigger_ddl(source: _Source) -> list[str]:
+    name = f"search_{source.table}"
+    insert = f"INSERT INTO {SEARCH_TABLE}({_INSERT_COLUMNS}) {_source_select(source)} WHERE src.id = NEW.id;"
+    delete = f"DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id * 8 + {source.code};"
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON "{source.table}" BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {", ".join(source.watch)} '
+        f'ON "{source.table}" BEGIN {delete} {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON "{source.table}" BEGIN {delete} END',
+    ]
+
+
+# Children inherit their parent's project; keep them in step when it moves.
+_SQLITE_CASCADE_DDL = [
+    f"CREATE TRIGGER IF NOT EXISTS search_task_moved AFTER UPDATE OF project_id ON task "
+    f"WHEN OLD.project_id IS NOT NEW.project_id BEGIN "
+    f"UPDATE {SEARCH_TABLE} SET project_id = NEW.project_id "
+    f"WHERE rowid IN (SELECT id * 8 + {_KIND_CODES['comment']} FROM comment WHERE task_id = NEW.id); END",
+    f"CREATE TRIGGER IF NOT EXISTS search_ticket_moved AFTER UPDATE OF related_project_id ON ticket "
+    f"WHEN OLD.related_project_id IS NOT NEW.related_project_id BEGIN "
+    f"UPDATE {SEARCH_TABLE} SET project_id = NEW.related_project_id "
+    f"WHERE rowid IN (SELECT id * 8 + {_KIND_CODES['ticket_comment']} FROM ticketcomment WHERE ticket_id = NEW.id); END",
+]
+
+_SQLITE_TRIGGER_COUNT = len(_SOURCES) * 3 + len(_SQLITE_CASCADE_DDL)
+
+
+def _pg_document(source: _Source) -> str:
+    return f"to_tsvector('simple', COALESCE({source.title}, '') || ' ' || COALESCE({source.body}, ''))"
+
+
+def ensure_search_index(connection) -> None:
+    """Create the search index structures if missing (run via ``conn.run_sync``)."""
+    dialect = connection.dialect.name
+    try:
+        if dialect == "sqlite":
+            _ensure_sqlite(connection)
+        elif dialect == "postgresql":
+            _ensure_postgres(connection)
+    except Exception as e:
+        logger.warning(f"⚠️  Search index unavailable: {e}")
+
+
+def _ensure_sqlite(connection) -> None:
+    has_table = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+    ).first() is not None
+    trigger_count = connection.exec_driver_sql(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'search\\_%' ESCAPE '\\'"
+    ).scalar()
+
+    if has_table and trigger_count >= _SQLITE_TRIGGER_COUNT:
+        return
+
+    if not has_table:
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "title, body, kind UNINDEXED, ref_id UNINDEXED, workspace_id UNINDEXED, "
+            "project_id UNINDEXED, parent_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        # Title matches weigh more than body matches
+        connection.exec_driver_sql(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(4.0, 1.0)')"
+        )
+
+    for source in _SOURCES:
+        for ddl in _sqlite_trigger_ddl(source):
+            connection.exec_driver_sql(ddl)
+    for ddl in _SQLITE_CASCADE_DDL:
+        connection.exec_driver_sql(ddl)
+
+    # Triggers were missing, so rows written in the meantime are not indexed
+    rebuild_search_index(connection)
+
+
+def _ensure_postgres(connection) -> None:
+    # Documents only reference the source row itself, so a plain expression
+    # index on each table serves the query-time ``@@`` match.
+    for source in _SOURCES:
+        document = _pg_document(source).replace("src.", "")
+        connection.exec_driver_sql(
+            f'CREATE INDEX IF NOT EXISTS ix_search_{source.table} ON "{source.table}" USING GIN ({document})'
+        )
+
+
+def rebuild_search_index(connection) -> int:
+    """Repopulate the SQLite FTS table from the source tables. Returns row count."""
+    if connection.dialect.name != "sqlite":
+        return 0
+    connection.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE}")
+    for source in _SOURCES:
+        connection.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({_INSERT_COLUMNS}) {_source_select(source)}")
+    count = connection.exec_driver_sql(f"SELECT COUNT(*) FROM {SEARCH_TABLE}").scalar() or 0
+    logger.info(f"🔎 Search index rebuilt ({count} documents)")
+    return count
+
+
+# --------------------------
+# Querying
+# --------------------------
+def parse_terms(query: str) -> list[str]:
+    """Split user input into lowercase word terms (punctuation is ignored)."""
+    return _TOKEN_RE.findall((query or "").lower())[:MAX_TERMS]
+
+
+def _visibility_clause(project: str, parent: str, kind: str) -> str:
+    """Row filter mirroring the handlers' access rules.
+
+    Projects, tasks and comments: admins see the whole workspace, others only
+    projects they are members of. Tickets follow ``web_tickets_list``
+    (archived tickets are left out). Chat messages are visible to chat
+    members only.
+    """
+    member_projects = "SELECT project_id FROM project_member WHERE user_id = :user_id"
+    return (
+        f"(({kind} IN ('project', 'task', 'comment') AND (:is_admin OR {project} IN ({member_projects}))) "
+        f"OR ({kind} IN ('ticket', 'ticket_comment') "
+        f"AND {parent} NOT IN (SELECT id FROM ticket WHERE is_archived) "
+        f"AND (:all_tickets OR {project} IN ({member_projects}) "
+        f"OR {parent} IN (SELECT id FROM ticket WHERE assigned_to_id = :user_id))) "
+        f"OR ({kind} = 'message' AND {parent} IN (SELECT chat_id FROM chatmember WHERE user_id = :user_id)))"
+    )
+
+
+_SQLITE_SEARCH_SQL = f"""
+SELECT kind, ref_id, parent_id,
+       snippet({SEARCH_TABLE}, 0, :mark_open, :mark_close, :ellipsis, 12) AS title_snippet,
+       snippet({SEARCH_TABLE}, 1, :mark_open, :mark_close, :ellipsis, 24) AS body_snippet,
+       rank
+FROM {SEARCH_TABLE}
+WHERE {SEARCH_TABLE} MATCH :query
+  AND rowid IN (
+    SELECT rowid FROM (
+      SELECT rowid, row_number() OVER (PARTITION BY kind ORDER BY rank) AS rn
+      FROM {SEARCH_TABLE}
+      WHERE {SEARCH_TABLE} MATCH :query
+        AND workspace_id = :workspace_id
+        AND {_visibility_clause('project_id', 'parent_id', 'kind')}
+    ) WHERE rn <= :per_kind
+  )
+ORDER BY rank
+"""
+
+
+def _pg_search_sql() -> str:
+    arms = []
+    for source in _SOURCES:
+        kind = f"'{source.kind}'"
+        arms.append(
+            f"SELECT {kind} AS kind, src.id AS ref_id, {source.parent} AS parent_id, "
+            f"{source.title} AS title, {source.body} AS body, "
+            f"-ts_rank({_pg_document(source)}, q) AS rank "
+            f"FROM \"{source.table}\" AS src {source.joins} "
+            f"CROSS JOIN to_tsquery('simple', :query) AS q "
+            f"WHERE {_pg_document(source)} @@ q AND {source.workspace} = :workspace_id "
+            f"AND {_visibility_clause(source.project, source.parent, kind)}"
+        )
+    union = " UNION ALL ".join(arms)
+    return (
+        f"WITH hits AS ({union}), "
+        "ranked AS (SELECT *, row_number() OVER (PARTITION BY kind ORDER BY rank) AS rn FROM hits) "
+        "SELECT kind, ref_id, parent_id, "
+        "ts_headline('simple', title, to_tsquery('simple', :query), :title_options) AS title_snippet, "
+        "ts_headline('simple', body, to_tsquery('simple', :query), :body_options) AS body_snippet, "
+        "rank FROM ranked WHERE rn <= :per_kind ORDER BY rank"
+    )
+
+
+def render_snippet(raw: Optional[str]) -> Markup:
+    """HTML-escape a snippet and turn the match markers into <mark> tags."""
+    if not raw or not raw.strip():
+        return Markup("")
+    escaped = str(escape(raw.strip()))
+    return Markup(escaped.replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>"))
+
+
+async def _search_hits(db: AsyncSession, user, terms: list[str], per_kind: int) -> list[Any]:
+    params: dict[str, Any] = {
+        "workspace_id": user.workspace_id,
+        "user_id": user.id,
+        "is_admin": bool(user.is_admin),
+        "all_tickets": bool(user.is_admin or user.can_see_all_tickets),
+        "per_kind": per_kind,
+    }
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        params.update(
+            query=" ".join(f'"{term}"*' for term in terms),
+            mark_open=_MARK_OPEN,
+            mark_close=_MARK_CLOSE,
+            ellipsis=_ELLIPSIS,
+        )
+        sql = _SQLITE_SEARCH_SQL
+    elif dialect == "postgresql":
+        selectors = f"StartSel={_MARK_OPEN}, StopSel={_MARK_CLOSE}, FragmentDelimiter={_ELLIPSIS}"
+        params.update(
+            query=" & ".join(f"{term}:*" for term in terms),
+            title_options=f"{selectors}, HighlightAll=TRUE",
+            body_options=f"{selectors}, MaxWords=24, MinWords=8, MaxFragments=2",
+        )
+        sql = _pg_search_sql()
+    else:
+        return []
+    return (await db.execute(text(sql), params)).all()
+
+
+async def search_workspace(db: AsyncSession, user, query: str, per_kind: int = 20) -> dict[str, list[dict]]:
+    """Run a ranked search for ``user`` and return display-ready results grouped by type."""
+    from app.models.chat import Chat, Message
+    from app.models.comment import Comment
+    from app.models.project import Project
+    from app.models.task import Task
+    from app.models.ticket import Ticket
+    from app.models.user import User
+
+    results: dict[str, list[dict]] = {
+        'tasks': [], 'projects': [], 'comments': [], 'tickets': [], 'messages': []
+    }
+    terms = parse_terms(query)
+    if not terms or len("".join(terms)) < MIN_QUERY_LENGTH:
+        return results
+
+    try:
+        hits = await _search_hits(db, user, terms, per_kind)
+    except Exception as e:
+        logger.error(f"Search failed for query {query!r}: {e}")
+        return results
+    if not hits:
+        return results
+
+    ids: dict[str, set[int]] = {}
+    for hit in hits:
+        ids.setdefault(hit.kind, set()).add(hit.ref_id)
+        if hit.kind == 'ticket_comment':
+            ids.setdefault('ticket', set()).add(hit.parent_id)
+
+    # Hydrate display fields with one primary-key lookup per result type
+    tasks = {}
+    if ids.get('task'):
+        rows = (await db.execute(
+            select(Task.id, Task.title, Task.status, Task.priority, Task.project_id, Project.name)
+            .join(Project, Task.project_id == Project.id)
+            .where(Task.id.in_(ids['task']))
+        )).all()
+        tasks = {row[0]: row for row in rows}
+
+    projects = {}
+    if ids.get('project'):
+        task_count = (
+            select(func.count(Task.id)).where(Task.project_id == Project.id)
+            .correlate(Project).scalar_subquery()
+        )
+        rows = (await db.execute(
+            select(Project.id, Project.name, task_count).where(Project.id.in_(ids['project']))
+        )).all()
+        projects = {row[0]: row for row in rows}
+
+    comments = {}
+    if ids.get('comment'):
+        rows = (await db.execute(
+            select(Comment.id, Comment.created_at, Comment.task_id, Task.title,
+                   User.full_name, User.username, Project.id, Project.name)
+            .join(Task, Comment.task_id == Task.id)
+            .join(Project, Task.project_id == Project.id)
+            .outerjoin(User, Comment.author_id == User.id)
+            .where(Comment.id.in_(ids['comment']))
+        )).all()
+        comments = {row[0]: row for row in rows}
+
+    tickets = {}
+    if ids.get('ticket'):
+        rows = (await db.execute(
+            select(Ticket.id, Ticket.ticket_number, Ticket.subject, Ticket.status, Ticket.priority)
+            .where(Ticket.id.in_(ids['ticket']))
+        )).all()
+        tickets = {row[0]: row for row in rows}
+
+    messages = {}
+    if ids.get('message'):
+        rows = (await db.execute(
+            select(Message.id, Message.created_at, Message.chat_id, Chat.name,
+                   User.full_name, User.username)
+            .join(Chat, Message.chat_id == Chat.id)
+            .outerjoin(User, Message.author_id == User.id)
+            .where(Message.id.in_(ids['message']))
+        )).all()
+        messages = {row[0]: row for row in rows}
+
+    seen_tickets: set[int] = set()
+    for hit in hits:
+        title_snippet = render_snippet(hit.title_snippet)
+        snippet = render_snippet(hit.body_snippet)
+        if hit.kind == 'task' and hit.ref_id in tasks:
+            _, title, status, priority, project_id, project_name = tasks[hit.ref_id]
+            results['tasks'].append({
+                'id': hit.ref_id,
+                'title': title,
+                'title_snippet': title_snippet,
+                'snippet': snippet,
+                'status': status.value if status else 'todo',
+                'priority': priority.value if priority else 'medium',
+                'project_name': project_name or 'Unknown',
+                'project_id': project_id,
+                'url': f'/web/tasks/{hit.ref_id}',
+            })
+        elif hit.kind == 'project' and hit.ref_id in projects:
+            _, name, task_count = projects[hit.ref_id]
+            results['projects'].append({
+                'id': hit.ref_id,
+                'name': name,
+                'title_snippet': title_snippet,
+                'snippet': snippet,
+                'task_count': task_count or 0,
+                'url': f'/web/projects/{hit.ref_id}',
+            })
+        elif hit.kind == 'comment' and hit.ref_id in comments:
+            _, created_at, task_id, task_title, full_name, username, project_id, project_name = comments[hit.ref_id]
+            results['comments'].append({
+                'id': hit.ref_id,
+                'snippet': snippet,
+                'created_at': created_at,
+                'task_id': task_id,
+                'task_title': task_title or 'Unknown Task',
+                'author_name': full_name or username or 'Unknown',
+                'project_name': project_name or 'Unknown',
+                'project_id': project_id,
+                'url': f'/web/tasks/{task_id}',
+            })
+        elif hit.kind in ('ticket', 'ticket_comment') and hit.parent_id in tickets:
+            # A ticket can match in its own text and in several comments:
+            # hits are ordered by rank, so keep the first one only
+            if hit.parent_id in seen_tickets:
+                continue
+            seen_tickets.add(hit.parent_id)
+            _, ticket_number, subject, status, priority = tickets[hit.parent_id]
+            results['tickets'].append({
+                'id': hit.parent_id,
+                'ticket_number': ticket_number,
+                'subject': subject,
+                'title_snippet': title_snippet if hit.kind == 'ticket' else Markup(''),
+                'snippet': snippet,
+                'status': status,
+                'priority': priority,
+                'matched_comment': hit.kind == 'ticket_comment',
+                'url': f'/web/tickets/{hit.parent_id}',
+            })
+        elif hit.kind == 'message' and hit.ref_id in messages:
+            _, created_at, chat_id, chat_name, full_name, username = messages[hit.ref_id]
+            results['messages'].append({
+                'id': hit.ref_id,
+                'snippet': snippet,
+                'created_at': created_at,
+                'chat_id': chat_id,
+                'chat_name': chat_name or 'Direct message',
+                'author_name': full_name or username or 'Unknown',
+                'url': f'/web/chats/{chat_id}',
+            })
+
+    return results
@@ -1,13 +1,67 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Callable, Optional, TypeVar
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from .config import get_settings
 
+T = TypeVar("T")
+
+# Raising this upgrades each stored hash the next time its user signs in
+PBKDF2_ROUNDS = 29000
+
 # Use a widely supported built-in scheme to avoid external bcrypt backend issues.
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PBKDF2_ROUNDS,
+    pbkdf2_sha256__min_rounds=PBKDF2_ROUNDS,
+)
+
+# Hashing runs in its own threads so a burst of sign-ins does not stall the
+# event loop; PBKDF2 runs inside OpenSSL with the GIL released, so the
+# threads hash in parallel
+PASSWORD_HASH_WORKERS = min(4, os.cpu_count() or 1)
+# Requests beyond this many waiting hashes are turned away (503) rather than
+# queueing indefinitely (at ~30 ms per hash, 256 is a few seconds per worker)
+PASSWORD_HASH_MAX_PENDING = 256
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_stats = {
+    "pending": 0,
+    "max_pending": 0,
+    "completed": 0,
+    "rejected": 0,
+    "rehashed": 0,
+    "wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+    "hash_seconds": 0.0,
+}
+
+
+# Access tokens already verified by this process: API clients send the same
+# bearer token on every request, so the signature is checked once per token
+ACCESS_TOKEN_CACHE_SIZE = 1024
+_verified_tokens: OrderedDict[str, dict[str, Any]] = OrderedDict()
+# Revocations live on the user row (``tokens_valid_after``) so every worker
+# sees them. Each worker re-reads a user's row at most this often, so a
+# revocation made on another worker takes effect within this many seconds
+TOKEN_STATE_TTL_SECONDS = 30
+# User id (the token subject) -> (monotonic time read, tokens_valid_after);
+# tokens issued (``iat``, whole seconds) before that are refused even though
+# their signature is valid. Deleted and deactivated users map to infinity
+_token_states: dict[str, tuple[float, float]] = {}
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Too many password hashes are already queued"""
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -18,6 +72,58 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_hasher(func: Callable[..., T], *args) -> T:
+    if _hash_stats["pending"] >= PASSWORD_HASH_MAX_PENDING:
+        _hash_stats["rejected"] += 1
+        raise PasswordHasherBusy("Too many sign-in attempts in progress, please try again shortly")
+
+    queued_at = time.perf_counter()
+
+    def timed():
+        started_at = time.perf_counter()
+        return func(*args), started_at - queued_at, time.perf_counter() - started_at
+
+    _hash_stats["pending"] += 1
+    _hash_stats["max_pending"] = max(_hash_stats["max_pending"], _hash_stats["pending"])
+    try:
+        result, waited, took = await asyncio.get_running_loop().run_in_executor(_hash_executor, timed)
+    finally:
+        _hash_stats["pending"] -= 1
+    _hash_stats["completed"] += 1
+    _hash_stats["wait_seconds"] += waited
+    _hash_stats["max_wait_seconds"] = max(_hash_stats["max_wait_seconds"], waited)
+    _hash_stats["hash_seconds"] += took
+    return result
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Check a password in the hasher pool.
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the password is
+    valid but stored with outdated parameters, and should replace the stored
+    hash.
+    """
+    valid, new_hash = await _run_hasher(pwd_context.verify_and_update, plain_password, hashed_password)
+    if new_hash:
+        _hash_stats["rehashed"] += 1
+    return valid, new_hash
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hasher(pwd_context.hash, password)
+
+
+def password_hasher_stats() -> dict:
+    completed = _hash_stats["completed"]
+    return {
+        **{k: round(v, 3) if isinstance(v, float) else v for k, v in _hash_stats.items()},
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_pending_allowed": PASSWORD_HASH_MAX_PENDING,
+        "avg_wait_ms": round(_hash_stats["wait_seconds"] / completed * 1000, 1) if completed else 0.0,
+        "avg_hash_ms": round(_hash_stats["hash_seconds"] / completed * 1000, 1) if completed else 0.0,
+    }
+
+
 def validate_password(password: str) -> tuple[bool, str]:
     """
     Validate password meets security requirements.
@@ -36,10 +142,13 @@ def validate_password(password: str) -> tuple[bool, str]:
     return True, ""
 
 
-def create_token(subject: str | int, expires_delta: timedelta, token_type: str = "access") -> str:
+def create_token(
+    subject: str | int, expires_delta: timedelta, token_type: str = "access", claims: Optional[dict[str, Any]] = None
+) -> str:
     settings = get_settings()
     now = datetime.now(timezone.utc)
     to_encode = {
+        **(claims or {}),
         "sub": str(subject),
         "type": token_type,
         "iat": int(now.timestamp()),
@@ -48,9 +157,16 @@ def create_token(subject: str | int, expires_delta: timedelta, token_type: str =
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
-def create_access_token(subject: str | int) -> str:
+def create_access_token(subject: str | int, workspace_id: Optional[int] = None, is_admin: bool = False) -> str:
+    """Access token carrying the user's workspace and role, so API requests
+    can be scoped without loading the user"""
     settings = get_settings()
-    return create_token(subject, timedelta(minutes=settings.access_token_expire_minutes), "access")
+    return create_token(
+        subject,
+        timedelta(minutes=settings.access_token_expire_minutes),
+        "access",
+        {"ws": workspace_id, "adm": is_admin},
+    )
 
 
 def create_refresh_token(subject: str | int) -> str:
@@ -64,3 +180,52 @@ def decode_token(token: str) -> Optional[dict[str, Any]]:
         return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
         return None
+
+
+def verify_access_token(token: str) -> Optional[dict[str, Any]]:
+    """Claims of a validly signed, unexpired access token, or None; see
+    ``token_revoked`` for revocation"""
+    payload = _verified_tokens.get(token)
+    if payload is not None:
+        _verified_tokens.move_to_end(token)
+        if payload.get("exp") is not None and payload["exp"] <= time.time():
+            del _verified_tokens[token]
+            return None
+    else:
+        payload = decode_token(token)
+        if not payload or payload.get("type") != "access":
+            return None
+        _verified_tokens[token] = payload
+        if len(_verified_tokens) > ACCESS_TOKEN_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+    return payload
+
+
+def token_state_stale(user_id: int) -> bool:
+    """Whether the user's revocation state has to be read from the database"""
+    state = _token_states.get(str(user_id))
+    return state is None or time.monotonic() - state[0] > TOKEN_STATE_TTL_SECONDS
+
+
+def remember_token_state(user_id: int, tokens_valid_after: Optional[int], active: bool = True) -> None:
+    """Record the revocation state read from (or just written to) the user row"""
+    now = time.monotonic()
+    _token_states[str(user_id)] = (now, (tokens_valid_after or 0) if active else math.inf)
+    if len(_token_states) > ACCESS_TOKEN_CACHE_SIZE:
+        for subject in [s for s, (read_at, _) in _token_states.items() if now - read_at > TOKEN_STATE_TTL_SECONDS]:
+            del _token_states[subject]
+
+
+def token_revoked(payload: dict[str, Any]) -> bool:
+    """Whether a token was issued before its user's tokens were revoked
+    (call ``remember_token_state`` first when the state is stale)"""
+    state = _token_states.get(payload.get("sub"))
+    return state is not None and payload.get("iat", 0) < state[1]
+
+
+def revoke_user_tokens(user) -> None:
+    """Refuse every token issued to a user before this second (on
+    deactivation, deletion or a role change); they have to sign in again for
+    a new one. Commit the user afterwards so other workers see it."""
+    user.tokens_valid_after = int(time.time())
+    remember_token_state(user.id, user.tokens_valid_after, user.is_active)
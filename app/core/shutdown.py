@@ -40,7 +40,7 @@ class GracefulShutdown:
             # Step 1: Create final backup with attachments
             logger.info("Step 1: Creating final database backup...")
             from app.core.backup import backup_manager
-            backup_file = backup_manager.create_backup(is_manual=False, include_attachments=True)
+            backup_file = await backup_manager.create_backup_async(is_manual=False, include_attachments=True)
             if backup_file:
                 logger.info(f"✅ Final backup created: {backup_file}")
             else:
@@ -0,0 +1,149 @@
+"""
+Startup timing and deferred startup maintenance.
+
+``startup_timer`` records how long each startup phase takes (importing the
+app, creating tables, starting background jobs, ...) and logs the breakdown
+once the server is ready to accept requests, so a slow cold start shows
+where the time went.
+
+Maintenance that used to run before the server could bind (the startup
+backup with attachments, the attachment path scan) runs in a background
+task a few seconds after startup instead, in worker threads so requests are
+served meanwhile.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _process_started_at() -> Optional[float]:
+    """``time.perf_counter()`` value at which this process started (Linux only)"""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    age = uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    return time.perf_counter() - age
+
+
+class StartupTimer:
+    """Durations of named startup phases, in the order they ran"""
+
+    def __init__(self):
+        self.started_at = _process_started_at() or time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+        self._last = self.started_at
+        self.ready_at: Optional[float] = None
+
+    def mark(self, name: str) -> None:
+        """Record the time since the previous mark (or process start) as ``name``"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self.phases.append((name, now - started))
+            self._last = now
+
+    def ready(self) -> None:
+        self.ready_at = time.perf_counter()
+        logger.info('Startup complete in %.2fs: %s', self.ready_at - self.started_at, self.summary())
+
+    def summary(self) -> str:
+        return ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in self.phases)
+
+
+startup_timer = StartupTimer()
+
+_maintenance_task: Optional[asyncio.Task] = None
+
+
+def _fix_absolute_comment_paths(db_path: Path) -> None:
+    """Rewrite absolute comment attachment paths (from older versions) to relative ones"""
+    if not db_path.exists():
+        return
+    conn = sqlite3.connect(str(db_path))
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, file_path FROM comment_attachment WHERE file_path LIKE '/%' OR file_path LIKE '_:%'")
+        rows = cursor.fetchall()
+        if rows:
+            logger.info(f"🔧 Fixing {len(rows)} comment attachment paths...")
+            for att_id, file_path in rows:
+                new_path = f"app/uploads/comments/{Path(file_path).name}"
+                cursor.execute("UPDATE comment_attachment SET file_path = ? WHERE id = ?", (new_path, att_id))
+            conn.commit()
+            logger.info(f"✅ Fixed {len(rows)} comment attachment paths")
+    finally:
+        conn.close()
+
+
+async def _run_maintenance(delay: float, full: bool) -> None:
+    # Let the server finish starting and answer its first requests
+    await asyncio.sleep(delay)
+    db_path = Path("data.db")
+    try:
+        await asyncio.to_thread(_fix_absolute_comment_paths, db_path)
+    except Exception as e:
+        logger.warning(f"⚠️  Could not fix attachment paths: {e}")
+    if not full:
+        return
+
+    from app.core.backup import backup_manager
+    from app.core.attachment_scanner import run_attachment_scan
+
+    started = time.perf_counter()
+    try:
+        await backup_manager.create_backup_async(include_attachments=True)
+    except Exception as e:
+        logger.error(f"⚠️  Startup backup failed: {e}")
+    if db_path.exists():
+        try:
+            results = await asyncio.to_thread(run_attachment_scan, str(db_path), True)
+            if results['missing'] > 0:
+                logger.warning(f"⚠️  {results['missing']} attachments have missing files")
+        except Exception as e:
+            logger.warning(f"⚠️  Attachment scan failed: {e}")
+    logger.info('Startup maintenance finished in %.1fs', time.perf_counter() - started)
+
+
+def start_startup_maintenance() -> None:
+    """Schedule the deferred startup maintenance (see STARTUP_MAINTENANCE)"""
+    global _maintenance_task
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    if _maintenance_task is None:
+        _maintenance_task = asyncio.create_task(
+            _run_maintenance(settings.startup_maintenance_delay_seconds, settings.startup_maintenance),
+            name='startup-maintenance',
+        )
+
+
+async def stop_startup_maintenance() -> None:
+    global _maintenance_task
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        try:
+            await _maintenance_task
+        except asyncio.CancelledError:
+            pass
+        _maintenance_task = None
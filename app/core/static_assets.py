@@ -0,0 +1,175 @@
+"""
+Fingerprinted, precompressed static assets.
+
+Pages link to assets through ``static_url('js/calls.js')``, which returns
+``/static/js/calls.<hash>.js`` with a hash of the file contents. A request
+carrying the current hash is served with a one-year immutable
+``Cache-Control``, so browsers keep the file until it changes, at which point
+pages link to a new URL. Text assets are compressed once when first loaded
+(gzip, plus brotli when the ``brotli`` package is installed) and served in
+the best encoding the client accepts.
+
+Files are re-read when their size or modification time changes, so editing
+an asset in development needs no restart.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parents[1] / 'static'
+STATIC_URL_PREFIX = '/static'
+FINGERPRINT_LENGTH = 10
+COMPRESSIBLE_SUFFIXES = {'.js', '.css', '.svg', '.json', '.map', '.txt'}
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Unversioned URLs (old pages, hard-coded links) are revalidated every time
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+_FINGERPRINT_RE = re.compile(r'\.([0-9a-f]{%d})(?=\.[^./]+$)' % FINGERPRINT_LENGTH)
+
+
+class StaticAsset(NamedTuple):
+    mtime_ns: int
+    size: int
+    fingerprint: str
+    media_type: str
+    body: bytes
+    gzip: Optional[bytes]
+    brotli: Optional[bytes]
+
+
+_assets: dict[str, StaticAsset] = {}
+
+
+def _media_type(path: Path) -> str:
+    media_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+    if media_type.startswith('text/') or media_type in ('application/javascript', 'application/json'):
+        media_type += '; charset=utf-8'
+    return media_type
+
+
+def get_asset(relative_path: str) -> Optional[StaticAsset]:
+    """The asset at ``relative_path`` under app/static, loading it when it is
+    new or changed on disk"""
+    path = (STATIC_DIR / relative_path).resolve()
+    if not path.is_relative_to(STATIC_DIR):
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if not path.is_file():
+        return None
+    cached = _assets.get(relative_path)
+    if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+        return cached
+
+    body = path.read_bytes()
+    gzipped = compressed = None
+    if path.suffix in COMPRESSIBLE_SUFFIXES:
+        gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11)
+    asset = StaticAsset(
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        fingerprint=hashlib.sha256(body).hexdigest()[:FINGERPRINT_LENGTH],
+        media_type=_media_type(path),
+        body=body,
+        gzip=gzipped if gzipped is not None and len(gzipped) < len(body) else None,
+        brotli=compressed if compressed is not None and len(compressed) < len(body) else None,
+    )
+    _assets[relative_path] = asset
+    return asset
+
+
+def static_url(relative_path: str) -> str:
+    """Fingerprinted URL of a static asset (plain URL if the file is missing)"""
+    asset = get_asset(relative_path)
+    if asset is None:
+        return f'{STATIC_URL_PREFIX}/{relative_path}'
+    stem, dot, suffix = relative_path.rpartition('.')
+    if not dot:
+        return f'{STATIC_URL_PREFIX}/{relative_path}.{asset.fingerprint}'
+    return f'{STATIC_URL_PREFIX}/{stem}.{asset.fingerprint}.{suffix}'
+
+
+class StaticAssets(StaticFiles):
+    """``StaticFiles`` for app/static that understands fingerprinted names
+    and serves precompressed bodies"""
+
+    def __init__(self) -> None:
+        super().__init__(directory=STATIC_DIR)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope['method'] not in ('GET', 'HEAD'):
+            raise HTTPException(status_code=405)
+        relative_path = path.replace(os.sep, '/')
+        match = _FINGERPRINT_RE.search(relative_path)
+        requested = match.group(1) if match else None
+        if match:
+            relative_path = relative_path[:match.start()] + relative_path[match.end():]
+        asset = get_asset(relative_path)
+        if asset is None:
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        accepted = {e.split(';')[0].strip() for e in request_headers.get('accept-encoding', '').split(',')}
+        body, encoding = asset.body, None
+        if asset.brotli is not None and 'br' in accepted:
+            body, encoding = asset.brotli, 'br'
+        elif asset.gzip is not None and 'gzip' in accepted:
+            body, encoding = asset.gzip, 'gzip'
+
+        # Each encoding is a different byte sequence, so it gets its own
+        # strong validator
+        etag = f'"{asset.fingerprint}-{encoding}"' if encoding else f'"{asset.fingerprint}"'
+        headers = {
+            'ETag': etag,
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL if requested == asset.fingerprint else REVALIDATE_CACHE_CONTROL,
+        }
+        if asset.gzip is not None:
+            headers['Vary'] = 'Accept-Encoding'
+        if etag in request_headers.get('if-none-match', ''):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return Response(body, media_type=asset.media_type, headers=headers)
+
+
+class UploadedFiles(StaticFiles):
+    """``StaticFiles`` for app/uploads. Uploads are stored under unique
+    random names and never rewritten, so browsers may keep them.
+
+    Directories in ``PRIVATE_DIRS`` hold attachment content that is only
+    served through the permission-checked attachment routes.
+    """
+
+    PRIVATE_DIRS = ('blobs',)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        # path is normalised by get_path; compare case-insensitively for Windows
+        if path.split(os.sep, 1)[0].lower() in self.PRIVATE_DIRS:
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
@@ -0,0 +1,119 @@
+"""
+Downscaled image derivatives.
+
+Image attachments, profile pictures and logos are shown in chat feeds,
+comment lists and avatar spots at a fraction of their original size. When an
+image is uploaded its thumbnails are rendered in a small worker pool and
+stored next to the original under ``.thumbs/``; a request for a size that is
+not on disk yet renders it on demand. Pillow releases the GIL while decoding,
+resizing and encoding, so the threads run in parallel with the event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib.util
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+ThumbnailSize = Literal['sm', 'md', 'lg']
+THUMBNAIL_SIZES = {'sm': 96, 'md': 320, 'lg': 1280}  # Longest edge in pixels
+THUMBNAIL_MEDIA_TYPE = 'image/webp'
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_SOURCE_TYPES = {'image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp'}
+
+_executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+_pending: dict[Path, Future] = {}
+_pending_lock = threading.Lock()
+
+
+@functools.cache
+def _pillow_available() -> bool:
+    # Pillow is optional; originals are served instead
+    return importlib.util.find_spec('PIL') is not None
+
+
+def can_thumbnail(media_type: Optional[str]) -> bool:
+    return (media_type or '').lower() in THUMBNAIL_SOURCE_TYPES and _pillow_available()
+
+
+def thumbnail_path(original: Path, size: str) -> Path:
+    return original.parent / '.thumbs' / f"{original.name}.{size}.webp"
+
+
+def remove_thumbnails(original: Path) -> None:
+    """Delete every derivative of ``original`` (when the original is removed)"""
+    for size in THUMBNAIL_SIZES:
+        try:
+            os.remove(thumbnail_path(original, size))
+        except FileNotFoundError:
+            pass
+
+
+def _render(original: Path, size: str) -> Path:
+    target = thumbnail_path(original, size)
+    if target.exists():
+        return target
+    from PIL import Image, ImageOps  # Imported on first use, in the worker thread
+
+    edge = THUMBNAIL_SIZES[size]
+    with Image.open(original) as img:
+        # Let the JPEG decoder skip detail we are about to throw away
+        img.draft('RGB', (edge, edge))
+        thumb = ImageOps.exif_transpose(img)
+        thumb.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        if thumb.mode not in ('RGB', 'RGBA'):
+            has_alpha = 'A' in thumb.getbands() or 'transparency' in thumb.info
+            thumb = thumb.convert('RGBA' if has_alpha else 'RGB')
+        target.parent.mkdir(exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{threading.get_ident()}.tmp")
+        thumb.save(tmp, 'WEBP', quality=THUMBNAIL_QUALITY, method=4)
+    os.replace(tmp, target)
+    return target
+
+
+def _submit(original: Path, size: str) -> Future:
+    """Render one derivative in the pool, sharing work with identical requests"""
+    key = thumbnail_path(original, size)
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _executor.submit(_render, original, size)
+            _pending[key] = future
+            future.add_done_callback(lambda _: _pending.pop(key, None))
+    return future
+
+
+def _log_failure(future: Future) -> None:
+    if future.exception() is not None:
+        logger.warning(f"Could not create thumbnail: {future.exception()}")
+
+
+def schedule_thumbnails(original: Path, media_type: Optional[str]) -> None:
+    """Queue every thumbnail size for a freshly uploaded image"""
+    if not can_thumbnail(media_type):
+        return
+    for size in THUMBNAIL_SIZES:
+        _submit(original, size).add_done_callback(_log_failure)
+
+
+async def get_thumbnail(original: Path, size: str, media_type: Optional[str]) -> Optional[Path]:
+    """Path of the ``size`` derivative, rendering it if needed; None if the
+    original is not an image we can scale"""
+    if size not in THUMBNAIL_SIZES or not can_thumbnail(media_type):
+        return None
+    target = thumbnail_path(original, size)
+    if target.exists():
+        return target
+    try:
+        return await asyncio.wrap_future(_submit(original, size))
+    except Exception as e:
+        logger.warning(f"Could not create thumbnail for {original.name}: {e}")
+        return None
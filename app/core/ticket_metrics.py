@@ -0,0 +1,207 @@
+"""
+Ticket response and resolution metrics.
+
+Timings are updated as tickets change (created, status changed, reassigned,
+answered by staff) instead of being derived from ticket history on demand:
+``TicketMetrics`` holds first response time, resolution time and the time
+spent in each status for every ticket. First response and resolution times
+are also counted into log-scaled histogram buckets per assignee and
+category, so percentile dashboards read a few hundred bucket rows rather
+than every ticket.
+
+The recording functions only add to the caller's session; they are
+committed (or rolled back) with the change that triggered them.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from typing import Literal, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import upsert_insert
+from app.models.ticket import Ticket
+from app.models.ticket_metrics import TicketMetricBucket, TicketMetrics
+
+# Upper bound (inclusive) of each histogram bucket; one more bucket holds
+# everything slower than the last bound
+BUCKET_BOUNDS_SECONDS = (
+    60, 5 * 60, 15 * 60, 30 * 60,
+    3600, 2 * 3600, 4 * 3600, 8 * 3600, 12 * 3600,
+    86400, 2 * 86400, 3 * 86400, 5 * 86400, 7 * 86400, 14 * 86400, 30 * 86400,
+)
+STATUS_COLUMNS = {
+    'open': 'open_seconds',
+    'in_progress': 'in_progress_seconds',
+    'waiting': 'waiting_seconds',
+    'resolved': 'resolved_seconds',
+}
+RESOLVED_STATUSES = ('resolved', 'closed')
+
+Metric = Literal['first_response', 'resolution']
+GroupBy = Literal['assignee', 'category']
+
+
+def bucket_for(seconds: float) -> int:
+    return bisect_left(BUCKET_BOUNDS_SECONDS, seconds)
+
+
+def _elapsed(start: datetime, end: datetime) -> float:
+    return max(0.0, (end - start).total_seconds())
+
+
+async def _metrics_for(db: AsyncSession, ticket: Ticket, at: datetime) -> TicketMetrics:
+    metrics = await db.get(TicketMetrics, ticket.id)
+    if metrics is None:
+        # Ticket from before metrics were recorded and not backfilled by
+        # migrations/migrate_ticket_metrics.py: start counting from now on
+        metrics = TicketMetrics(
+            ticket_id=ticket.id,
+            workspace_id=ticket.workspace_id,
+            assigned_to_id=ticket.assigned_to_id,
+            category=ticket.category or 'general',
+            created_at=ticket.created_at or at,
+            status=ticket.status or 'open',
+            status_since=at,
+        )
+        db.add(metrics)
+    return metrics
+
+
+async def _count(db: AsyncSession, metrics: TicketMetrics, metric: Metric, seconds: float) -> None:
+    stmt = upsert_insert(db, TicketMetricBucket).values(
+        workspace_id=metrics.workspace_id,
+        metric=metric,
+        assigned_to_id=metrics.assigned_to_id or 0,
+        category=metrics.category,
+        bucket=bucket_for(seconds),
+        count=1,
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[
+            TicketMetricBucket.workspace_id, TicketMetricBucket.metric, TicketMetricBucket.assigned_to_id,
+            TicketMetricBucket.category, TicketMetricBucket.bucket,
+        ],
+        set_={'count': TicketMetricBucket.count + 1},
+    ))
+
+
+def record_ticket_created(db: AsyncSession, ticket: Ticket, at: Optional[datetime] = None) -> None:
+    """Start the metrics of a new ticket (after it has been flushed and has an id)"""
+    at = at or datetime.utcnow()
+    db.add(TicketMetrics(
+        ticket_id=ticket.id,
+        workspace_id=ticket.workspace_id,
+        assigned_to_id=ticket.assigned_to_id,
+        category=ticket.category or 'general',
+        created_at=at,
+        status=ticket.status or 'open',
+        status_since=at,
+    ))
+
+
+async def record_ticket_status(db: AsyncSession, ticket: Ticket, at: Optional[datetime] = None) -> None:
+    """Close the time spent in the previous status after ``ticket.status`` changed"""
+    at = at or datetime.utcnow()
+    metrics = await _metrics_for(db, ticket, at)
+    if metrics.status == ticket.status:
+        return
+    column = STATUS_COLUMNS.get(metrics.status)
+    if column:
+        setattr(metrics, column, getattr(metrics, column) + _elapsed(metrics.status_since, at))
+    metrics.status = ticket.status
+    metrics.status_since = at
+    if ticket.status in RESOLVED_STATUSES and metrics.resolved_at is None:
+        metrics.resolved_at = at
+        metrics.resolution_seconds = _elapsed(metrics.created_at, at)
+        await _count(db, metrics, 'resolution', metrics.resolution_seconds)
+
+
+async def record_ticket_reply(
+    db: AsyncSession, ticket: Ticket, user_id: Optional[int], is_internal: bool, at: Optional[datetime] = None
+) -> None:
+    """Record the first response when staff post a public comment"""
+    # Guest replies, internal notes and the submitter's own follow-ups do not count
+    if user_id is None or is_internal or user_id == ticket.created_by_id:
+        return
+    at = at or datetime.utcnow()
+    metrics = await _metrics_for(db, ticket, at)
+    if metrics.first_response_at is not None:
+        return
+    metrics.first_response_at = at
+    metrics.first_response_seconds = _elapsed(metrics.created_at, at)
+    await _count(db, metrics, 'first_response', metrics.first_response_seconds)
+
+
+async def record_ticket_assignment(db: AsyncSession, ticket: Ticket) -> None:
+    """Attribute timings recorded from now on to the new assignee"""
+    metrics = await _metrics_for(db, ticket, datetime.utcnow())
+    metrics.assigned_to_id = ticket.assigned_to_id
+
+
+def _percentile(histogram: list[tuple[int, int]], total: int, p: float) -> float:
+    """Estimate the p-th percentile from (bucket, count) pairs sorted by bucket,
+    interpolating linearly inside the bucket it falls in"""
+    rank = p / 100 * total
+    seen = 0
+    for bucket, count in histogram:
+        if seen + count >= rank:
+            lower = BUCKET_BOUNDS_SECONDS[bucket - 1] if bucket > 0 else 0
+            if bucket >= len(BUCKET_BOUNDS_SECONDS):
+                return float(lower)  # Open-ended bucket: report its lower bound
+            upper = BUCKET_BOUNDS_SECONDS[bucket]
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return float(BUCKET_BOUNDS_SECONDS[-1])
+
+
+async def ticket_sla_percentiles(
+    db: AsyncSession,
+    workspace_id: int,
+    metric: Metric,
+    group_by: GroupBy = 'assignee',
+    percentiles: tuple[float, ...] = (50, 90, 95),
+) -> list[dict]:
+    """Percentiles of a ticket timing per assignee id or category, from the
+    pre-aggregated buckets"""
+    column = TicketMetricBucket.assigned_to_id if group_by == 'assignee' else TicketMetricBucket.category
+    rows = (await db.execute(
+        select(column, TicketMetricBucket.bucket, func.sum(TicketMetricBucket.count))
+        .where(TicketMetricBucket.workspace_id == workspace_id, TicketMetricBucket.metric == metric)
+        .group_by(column, TicketMetricBucket.bucket)
+        .order_by(column, TicketMetricBucket.bucket)
+    )).all()
+    histograms: dict = defaultdict(list)
+    for group, bucket, count in rows:
+        histograms[group].append((bucket, count))
+
+    results = []
+    for group, histogram in histograms.items():
+        total = sum(count for _, count in histogram)
+        if not total:
+            continue
+        results.append({
+            'group': group,
+            'count': total,
+            **{f'p{p:g}': _percentile(histogram, total, p) for p in percentiles},
+        })
+    return results
+
+
+async def ticket_status_durations(db: AsyncSession, workspace_id: int, group_by: GroupBy = 'category') -> list[dict]:
+    """Average seconds tickets spent in each status, per assignee id or category"""
+    column = TicketMetrics.assigned_to_id if group_by == 'assignee' else TicketMetrics.category
+    averages = [func.avg(getattr(TicketMetrics, c)) for c in STATUS_COLUMNS.values()]
+    rows = (await db.execute(
+        select(column, func.count(), *averages)
+        .where(TicketMetrics.workspace_id == workspace_id)
+        .group_by(column)
+        .order_by(column)
+    )).all()
+    return [
+        {'group': group, 'count': count, **dict(zip(STATUS_COLUMNS, seconds, strict=True))}
+        for group, count, *seconds in rows
+    ]
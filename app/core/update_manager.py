@@ -7,7 +7,6 @@ import logging
 import subprocess
 from pathlib import Path
 from typing import Optional, List, Dict
-import httpx
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -82,6 +81,8 @@ class UpdateManager:
     
     async def get_commit_history(self, limit: int = 20) -> List[Dict[str, str]]:
         """Get recent commit history from GitHub"""
+        import httpx  # Only needed when an admin opens the update page
+
         try:
             async with httpx.AsyncClient() as client:
                 response = await client.get(
@@ -117,7 +118,7 @@ class UpdateManager:
         try:
             # Backup current state
             from app.core.backup import backup_manager
-            backup_file = backup_manager.create_backup(is_manual=True, include_attachments=True)
+            backup_file = await backup_manager.create_backup_async(is_manual=True, include_attachments=True)
             
             if not backup_file:
                 return {"success": False, "error": "Failed to create backup before update"}
@@ -293,7 +294,7 @@ class UpdateManager:
         try:
             # Backup current state
             from app.core.backup import backup_manager
-            backup_file = backup_manager.create_backup(is_manual=True, include_attachments=True)
+            backup_file = await backup_manager.create_backup_async(is_manual=True, include_attachments=True)
             
             if not backup_file:
                 return {"success": False, "error": "Failed to create backup before rollback"}
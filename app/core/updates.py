@@ -7,7 +7,6 @@ import json
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, Any
-import httpx
 from app.core.version import VERSION, UPDATE_CHECK_URL, ENABLE_AUTO_UPDATE_CHECK, UPDATE_CHECK_INTERVAL_HOURS
 
 # Store update check results
@@ -46,6 +45,8 @@ async def check_for_updates() -> Dict[str, Any]:
                 **_update_cache
             }
     
+    import httpx  # Only needed when an update check actually runs
+
     try:
         async with httpx.AsyncClient(timeout=10.0) as client:
             response = await client.get(
@@ -104,6 +105,8 @@ async def register_server(server_id: str, callback_url: Optional[str] = None):
         server_id: Unique identifier for this server
         callback_url: Optional webhook URL for update notifications
     """
+    import httpx
+
     try:
         async with httpx.AsyncClient(timeout=10.0) as client:
             await client.post(
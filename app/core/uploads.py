@@ -0,0 +1,98 @@
+"""
+Streaming storage for user uploads.
+
+Handlers used to ``await file.read()`` the whole upload and then write it with
+a blocking ``open()``. ``save_upload`` copies the upload to disk in chunks
+through aiofiles instead, rejecting it as soon as it passes the size limit and
+hashing it on the way, so large or concurrent uploads neither hold the whole
+file in memory nor stall the event loop.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import aiofiles
+import aiofiles.os
+from fastapi import UploadFile
+
+UPLOADS_DIR = Path(__file__).resolve().parents[1] / 'uploads'
+UPLOAD_READ_CHUNK_SIZE = 1024 * 1024
+
+PROFILE_PICTURE_MAX_SIZE = 5 * 1024 * 1024
+BRANDING_LOGO_MAX_SIZE = 5 * 1024 * 1024
+COMMENT_ATTACHMENT_MAX_SIZE = 10 * 1024 * 1024
+CHAT_ATTACHMENT_MAX_SIZE = 25 * 1024 * 1024
+EMAIL_ATTACHMENT_MAX_SIZE = 25 * 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds its size limit while being streamed"""
+
+    def __init__(self, filename: str, max_size: int):
+        self.filename = filename
+        self.max_size = max_size
+        super().__init__(f"File {filename} is too large. Maximum size is {max_size // (1024 * 1024)}MB.")
+
+
+class StoredUpload(NamedTuple):
+    """Metadata for an upload written under ``app/uploads``"""
+    filename: str  # Original filename from the client
+    path: Path  # Absolute path on disk
+    relative_path: str  # e.g. "app/uploads/comments/<name>", as stored on attachment rows
+    url: str  # e.g. "/uploads/comments/<name>"
+    size: int
+    sha256: str
+    content_type: str
+
+
+async def save_upload(
+    upload: UploadFile,
+    subdir: str,
+    max_size: int,
+    stored_name: Optional[str] = None,
+) -> StoredUpload:
+    """Stream ``upload`` into ``app/uploads/<subdir>``.
+
+    The file is written to a temporary name and only moved into place once it
+    is complete, so a rejected or interrupted upload never leaves a partial
+    file behind. ``stored_name`` defaults to a random uuid keeping the
+    original extension.
+    """
+    filename = upload.filename or 'upload'
+    if stored_name is None:
+        stored_name = f"{uuid.uuid4()}{os.path.splitext(filename)[1].lower()}"
+    directory = UPLOADS_DIR / subdir
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    target = directory / stored_name
+    tmp = directory / f".{stored_name}.part"
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp, 'wb') as out:
+            while chunk := await upload.read(UPLOAD_READ_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(filename, max_size)
+                digest.update(chunk)
+                await out.write(chunk)
+        await aiofiles.os.replace(tmp, target)
+    except BaseException:
+        if await aiofiles.os.path.exists(tmp):
+            await aiofiles.os.remove(tmp)
+        raise
+
+    return StoredUpload(
+        filename=filename,
+        path=target,
+        relative_path=f"app/uploads/{subdir}/{stored_name}",
+        url=f"/uploads/{subdir}/{stored_name}",
+        size=size,
+        sha256=digest.hexdigest(),
+        content_type=upload.content_type or 'application/octet-stream',
+    )
+
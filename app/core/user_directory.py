@@ -0,0 +1,126 @@
+"""
+Per-workspace user directory cache.
+
+Page handlers need workspace users for assignee dropdowns and name labels, but
+not the full ``User`` rows (password hashes, OAuth tokens, verification codes).
+The directory keeps a compact, read-only snapshot per workspace that is
+invalidated by the routes that change users, with a TTL as a safety net for
+writes made outside the web process (scripts, migrations).
+"""
+from __future__ import annotations
+
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+
+DIRECTORY_TTL_SECONDS = 300
+
+
+class DirectoryUser:
+    """Lightweight user entry exposing the attributes templates use."""
+
+    __slots__ = (
+        "id", "username", "full_name", "email", "calendar_color",
+        "profile_picture", "is_active", "is_admin", "display_name",
+    )
+
+    def __init__(self, id, username, full_name, email, calendar_color, profile_picture, is_active, is_admin):
+        self.id = id
+        self.username = username
+        self.full_name = full_name
+        self.email = email
+        self.calendar_color = calendar_color
+        self.profile_picture = profile_picture
+        self.is_active = is_active
+        self.is_admin = is_admin
+        self.display_name = (full_name or "").strip() or username or email or f"User {id}"
+
+    @property
+    def color(self) -> Optional[str]:
+        return self.calendar_color
+
+    def __repr__(self):
+        return f"<DirectoryUser(id={self.id}, name='{self.display_name}')>"
+
+
+_COLUMNS = (
+    User.id, User.username, User.full_name, User.email, User.calendar_color,
+    User.profile_picture, User.is_active, User.is_admin,
+)
+
+
+class WorkspaceDirectory:
+    """Immutable snapshot of one workspace's users, sorted by display name."""
+
+    __slots__ = ("workspace_id", "version", "loaded_at", "users", "by_id")
+
+    def __init__(self, workspace_id: int, version: int, users: list[DirectoryUser]):
+        self.workspace_id = workspace_id
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.users = sorted(users, key=lambda u: (u.display_name.lower(), u.email or ""))
+        self.by_id = {u.id: u for u in self.users}
+
+    def get(self, user_id: Optional[int]) -> Optional[DirectoryUser]:
+        return self.by_id.get(user_id) if user_id is not None else None
+
+    def active(self, exclude_id: Optional[int] = None) -> list[DirectoryUser]:
+        return [u for u in self.users if u.is_active and u.id != exclude_id]
+
+    def label(self, user_id: Optional[int], default: str = "Unknown") -> str:
+        entry = self.get(user_id)
+        return entry.display_name if entry else default
+
+
+_directories: dict[int, WorkspaceDirectory] = {}
+_versions: dict[int, int] = {}
+
+
+def directory_version(workspace_id: int) -> int:
+    return _versions.get(workspace_id, 0)
+
+
+def invalidate_workspace_directory(workspace_id: Optional[int]) -> None:
+    """Drop the cached directory for a workspace after its users change."""
+    if workspace_id is None:
+        return
+    _versions[workspace_id] = _versions.get(workspace_id, 0) + 1
+    _directories.pop(workspace_id, None)
+
+
+def clear_workspace_directories() -> None:
+    """Drop every cached directory (e.g. after a database restore)."""
+    for workspace_id in set(_directories) | set(_versions):
+        invalidate_workspace_directory(workspace_id)
+
+
+async def get_workspace_directory(db: AsyncSession, workspace_id: int) -> WorkspaceDirectory:
+    """Return the cached directory for a workspace, loading it if needed."""
+    cached = _directories.get(workspace_id)
+    version = directory_version(workspace_id)
+    if cached is not None and cached.version == version and time.monotonic() - cached.loaded_at < DIRECTORY_TTL_SECONDS:
+        return cached
+
+    rows = (await db.execute(select(*_COLUMNS).where(User.workspace_id == workspace_id))).all()
+    directory = WorkspaceDirectory(workspace_id, version, [DirectoryUser(*row) for row in rows])
+    # Only publish if nothing invalidated the workspace while we were loading
+    if directory_version(workspace_id) == version:
+        _directories[workspace_id] = directory
+    return directory
+
+
+async def resolve_users(
+    db: AsyncSession, directory: WorkspaceDirectory, user_ids: Iterable[Optional[int]]
+) -> dict[int, DirectoryUser]:
+    """Map user ids to directory entries, batching any misses into one query."""
+    wanted = {uid for uid in user_ids if uid is not None}
+    found = {uid: directory.by_id[uid] for uid in wanted if uid in directory.by_id}
+    missing = wanted - found.keys()
+    if missing:
+        rows = (await db.execute(select(*_COLUMNS).where(User.id.in_(missing)))).all()
+        found.update({row[0]: DirectoryUser(*row) for row in rows})
+    return found
@@ -0,0 +1,77 @@
+"""
+Cached workspace lookup for the web UI.
+
+Every page shows the workspace branding (name, site title, logo, colour), so
+the signed-in user's workspace is resolved on each request. A user belongs
+to one workspace for good and workspace rows change only from the site
+settings page, so both are kept in memory: the settings routes invalidate a
+workspace when they save it, with a TTL as a safety net for writes made
+outside the web process (scripts, migrations).
+
+The cached ``Workspace`` is detached from any session and shared between
+requests; treat it as read-only and load the row again to change it.
+"""
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.models.user import User
+from app.models.workspace import Workspace
+
+WORKSPACE_TTL_SECONDS = 300
+
+_user_workspaces: dict[int, int] = {}
+_workspaces: dict[int, tuple[Workspace, float]] = {}
+_settings_versions: dict[int, int] = {}
+
+
+def workspace_settings_version(workspace_id: int) -> int:
+    """Bumped whenever the workspace settings are saved (for cache keys)"""
+    return _settings_versions.get(workspace_id, 0)
+
+
+def invalidate_workspace(workspace_id: Optional[int]) -> None:
+    """Drop the cached workspace after its settings change."""
+    if workspace_id is None:
+        return
+    _settings_versions[workspace_id] = _settings_versions.get(workspace_id, 0) + 1
+    _workspaces.pop(workspace_id, None)
+
+
+def clear_workspace_cache() -> None:
+    """Forget every cached workspace (e.g. after a database restore)."""
+    _user_workspaces.clear()
+    for workspace_id in set(_workspaces) | set(_settings_versions):
+        invalidate_workspace(workspace_id)
+
+
+async def get_user_workspace(user_id: int) -> Optional[Workspace]:
+    """The workspace of a user, from memory when possible."""
+    workspace_id = _user_workspaces.get(user_id)
+    if workspace_id is not None:
+        cached = _workspaces.get(workspace_id)
+        if cached is not None and time.monotonic() - cached[1] < WORKSPACE_TTL_SECONDS:
+            return cached[0]
+
+    from app.core.database import async_session_factory
+
+    version = workspace_settings_version(workspace_id) if workspace_id is not None else None
+    async with async_session_factory() as db:
+        workspace = (await db.execute(
+            select(Workspace).join(User, User.workspace_id == Workspace.id).where(User.id == user_id)
+        )).scalar_one_or_none()
+    if workspace is None:
+        return None
+    _user_workspaces[user_id] = workspace.id
+    # Only publish if the settings were not saved while we were loading
+    if version is None or workspace_settings_version(workspace.id) == version:
+        previous = _workspaces.get(workspace.id)
+        if previous is not None and previous[0].model_dump() != workspace.model_dump():
+            # Changed outside the settings routes: give caches keyed by the
+            # settings version a new key
+            invalidate_workspace(workspace.id)
+        _workspaces[workspace.id] = (workspace, time.monotonic())
+    return workspace
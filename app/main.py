@@ -1,24 +1,30 @@
-from fastapi import FastAPI, Request, Depends, HTTPException
+from app.core.startup import startup_timer
+
+# Interpreter start plus whatever the launcher (uvicorn, start_server.py) imported
+startup_timer.mark("interpreter")
+
+from fastapi import FastAPI, Request
 # restart trigger: updated timestamp
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from starlette.middleware.sessions import SessionMiddleware
-from sqlmodel import select
-from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
 import os
 
+from app.core.compression import TextGZipMiddleware
 from app.core.config import get_settings
-from app.core.database import lifespan, get_session
+from app.core.database import lifespan
+from app.core.security import PasswordHasherBusy
+from app.core.static_assets import StaticAssets, UploadedFiles
+from app.core.workspace_context import get_user_workspace
 from app.api.routes import auth as auth_routes
 from app.api.routes import users as users_routes
 from app.api.routes import projects as projects_routes
 from app.api.routes import tasks as tasks_routes
-from app.models.user import User
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Disable default API docs - we'll add custom protected ones
 app = FastAPI(
@@ -38,76 +44,73 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Workspace injection middleware - adds workspace to all requests
+# Workspace injection middleware - adds workspace to page requests
 # MUST be added BEFORE SessionMiddleware so it runs AFTER (middleware order is reversed)
-from starlette.middleware.base import BaseHTTPMiddleware
-
-class WorkspaceMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Add workspace to request state for templates
-        print(f"[DEBUG] WorkspaceMiddleware called for: {request.url.path}")
-        user_id = None
-        
-        # Safely check for session - MUST check in request.scope, not hasattr
-        try:
-            # SessionMiddleware stores session in request.scope, not as attribute
-            if "session" in request.scope:
-                user_id = request.scope["session"].get('user_id')
-                print(f"[DEBUG] Found user_id in session: {user_id}")
-            else:
-                print(f"[DEBUG] No session in request.scope")
-        except Exception as e:
-            print(f"[DEBUG] Session access error: {e}")
-            pass
-        
-        if user_id:
-            try:
-                from app.core.database import get_session
-                from app.models.workspace import Workspace
-                async for db in get_session():
-                    # Get user first to find workspace_id
-                    user = (await db.execute(
-                        select(User).where(User.id == user_id)
-                    )).scalar_one_or_none()
-                    
-                    if user and user.workspace_id:
-                        # Fetch workspace
-                        workspace = (await db.execute(
-                            select(Workspace).where(Workspace.id == user.workspace_id)
-                        )).scalar_one_or_none()
-                        
-                        if workspace:
-                            request.state.workspace = workspace
-                            print(f"[DEBUG] Workspace SET: name={workspace.name}, logo={workspace.logo_url}, title={workspace.site_title}")
-                        else:
-                            print(f"[DEBUG] No workspace found for workspace_id={user.workspace_id}")
-                        break
+class WorkspaceMiddleware:
+    """Put the signed-in user's workspace on ``request.state`` for templates.
+
+    A plain ASGI middleware: requests that never render a page (static files,
+    health checks, the JSON API) pass straight through.
+    """
+
+    SKIP_PREFIXES = ("/uploads/", "/static/", "/health", "/api/")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].startswith(self.SKIP_PREFIXES):
+            user_id = scope.get("session", {}).get("user_id")
+            if user_id:
+                try:
+                    workspace = await get_user_workspace(user_id)
+                except Exception:
+                    logger.exception("Workspace lookup failed for user %s", user_id)
+                else:
+                    if workspace is not None:
+                        scope.setdefault("state", {})["workspace"] = workspace
                     else:
-                        print(f"[DEBUG] User found but no workspace_id: user={user}")
-            except Exception as e:
-                # Log error but continue
-                print(f"[DEBUG] WorkspaceMiddleware exception: {e}")
-                import traceback
-                traceback.print_exc()
-        else:
-            print(f"[DEBUG] No user_id in session")
-        
-        response = await call_next(request)
-        return response
+                        logger.debug("No workspace for user %s", user_id)
+        await self.app(scope, receive, send)
 
 app.add_middleware(WorkspaceMiddleware)
 
 # Session middleware for server-rendered web UI
 app.add_middleware(SessionMiddleware, secret_key=settings.secret_key)
 
-# Import templates from web routes to get the enhanced version with workspace injection
-from app.web.routes import templates
+# Compress pages and JSON; static assets are served precompressed
+app.add_middleware(TextGZipMiddleware, minimum_size=1000, compresslevel=6)
+
+# Opt-in per-route timing and query counts (APP_PROFILING=1); added last so
+# it times the whole middleware stack
+if settings.profiling_enabled:
+    from app.core.database import engine
+    from app.core.profiling import ProfilingMiddleware, instrument_engine
+    instrument_engine(engine.sync_engine)
+    app.add_middleware(ProfilingMiddleware)
+
+# Shared web UI templates (workspace is added to every page context)
+from app.web.templating import templates
 
 # Mount uploads directory for serving uploaded files (logos, attachments, etc.)
 BASE_DIR = Path(__file__).resolve().parent
 uploads_path = os.path.join(BASE_DIR, "uploads")
 os.makedirs(uploads_path, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=uploads_path), name="uploads")
+app.mount("/uploads", UploadedFiles(directory=uploads_path), name="uploads")
+
+# Scripts and styles shared by every page, linked through static_url() with a
+# content hash so browsers can cache them for good
+app.mount("/static", StaticAssets(), name="static")
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    headers = {"Retry-After": "2"}
+    if request.url.path.startswith("/api"):
+        return JSONResponse({"detail": str(exc)}, status_code=503, headers=headers)
+    return templates.TemplateResponse(
+        'auth/login.html', {'request': request, 'error': str(exc)}, status_code=503, headers=headers
+    )
 
 
 @app.get("/health")
@@ -158,3 +161,6 @@ async def index(request: Request):
         "request": request,
         "workspace": workspace
     })
+
+
+startup_timer.mark("import app")
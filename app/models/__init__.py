@@ -6,6 +6,7 @@ from .task import Task
 from .subtask import Subtask
 from .comment import Comment
 from .comment_attachment import CommentAttachment
+from .attachment_blob import AttachmentBlob
 from .assignment import Assignment
 from .enums import TaskStatus, TaskPriority, MeetingPlatform
 from .task_history import TaskHistory
@@ -18,6 +19,7 @@ from .lead import Lead, LeadStatus, LeadSource
 from .deal import Deal, DealStage
 from .activity import Activity, ActivityType
 from .ticket import Ticket, TicketComment, TicketAttachment, TicketHistory
+from .ticket_metrics import TicketMetrics, TicketMetricBucket
 from .email_settings import EmailSettings
 from .processed_mail import ProcessedMail
 from .task_extensions import (
@@ -39,6 +41,7 @@ __all__ = [
     "Subtask",
     "Comment",
     "CommentAttachment",
+    "AttachmentBlob",
     "Assignment",
     "TaskStatus",
     "TaskPriority",
@@ -64,6 +67,8 @@ __all__ = [
     "TicketComment",
     "TicketAttachment",
     "TicketHistory",
+    "TicketMetrics",
+    "TicketMetricBucket",
     "EmailSettings",
     "ProcessedMail",
     "TaskDependency",
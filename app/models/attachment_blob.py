@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class AttachmentBlob(SQLModel, table=True):
+    """Attachment content stored once on disk, shared by every attachment row with the same hash"""
+    __tablename__ = "attachment_blob"
+
+    sha256: str = Field(primary_key=True, max_length=64)
+    file_path: str  # app/uploads/blobs/<aa>/<sha256>
+    size: int  # Size in bytes
+    ref_count: int = 0  # Attachment rows pointing at this blob
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -38,4 +38,5 @@ class MessageAttachment(SQLModel, table=True):
     file_path: str
     file_size: int  # in bytes
     mime_type: Optional[str] = None
+    content_hash: Optional[str] = Field(default=None, index=True)  # SHA-256, see AttachmentBlob
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
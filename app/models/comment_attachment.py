@@ -16,5 +16,6 @@ class CommentAttachment(SQLModel, table=True):
     file_path: str  # Path where file is stored on disk
     file_size: int  # Size in bytes
     content_type: str  # MIME type
+    content_hash: Optional[str] = Field(default=None, index=True)  # SHA-256, see AttachmentBlob
     uploaded_by_id: int = Field(foreign_key="user.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from datetime import datetime, date, time
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from .enums import TaskPriority, TaskStatus
@@ -33,6 +34,11 @@ class TaskBase(SQLModel):
 
 
 class Task(TaskBase, table=True):
+    # Kanban columns page by (project, archived, status) in id order
+    __table_args__ = (
+        Index("ix_task_project_board", "project_id", "is_archived", "status", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     project_id: int = Field(foreign_key="project.id")
     creator_id: int = Field(foreign_key="user.id")
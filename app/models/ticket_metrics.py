@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class TicketMetrics(SQLModel, table=True):
+    """Response and resolution timings of one ticket, kept up to date as it changes"""
+    __tablename__ = "ticket_metrics"
+
+    ticket_id: int = Field(primary_key=True, foreign_key="ticket.id", ondelete="CASCADE")
+    workspace_id: int = Field(foreign_key="workspace.id", index=True)
+    assigned_to_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
+    category: str = "general"
+    created_at: datetime
+    # Current status and when the ticket entered it
+    status: str = "open"
+    status_since: datetime
+    # Seconds spent in each status so far (the current one is not included yet)
+    open_seconds: float = 0
+    in_progress_seconds: float = 0
+    waiting_seconds: float = 0
+    resolved_seconds: float = 0
+    # First public reply from staff
+    first_response_at: Optional[datetime] = None
+    first_response_seconds: Optional[float] = None
+    # First time the ticket was resolved or closed
+    resolved_at: Optional[datetime] = None
+    resolution_seconds: Optional[float] = None
+
+
+class TicketMetricBucket(SQLModel, table=True):
+    """Histogram of a ticket timing per assignee and category, for percentiles"""
+    __tablename__ = "ticket_metric_bucket"
+    __table_args__ = (
+        UniqueConstraint("workspace_id", "metric", "assigned_to_id", "category", "bucket"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    workspace_id: int = Field(foreign_key="workspace.id", index=True)
+    metric: str  # first_response, resolution
+    assigned_to_id: int = 0  # 0 for unassigned tickets
+    category: str
+    bucket: int  # Index into ticket_metrics.BUCKET_BOUNDS_SECONDS
+    count: int = 0
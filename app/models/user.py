@@ -51,6 +51,8 @@ class User(UserBase, table=True):
     email_verified: bool = False
     verification_code: Optional[str] = None
     verification_expires_at: Optional[datetime] = None
+    # API tokens issued (iat, epoch seconds) before this are refused
+    tokens_valid_after: Optional[int] = None
     # Google OAuth fields
     google_id: Optional[str] = Field(default=None, index=True)
     google_access_token: Optional[str] = None
@@ -0,0 +1,410 @@
+// Global Call Manager - maintains call state across page navigation
+function globalCallManager() {
+  return {
+    incomingCall: null,
+    activeCall: null,
+    localStream: null,
+    peerConnection: null,
+    isMuted: false,
+    isVideoOff: false,
+    isMinimized: false,
+    callDuration: '00:00',
+    callStartTime: null,
+    durationInterval: null,
+    pollingInterval: null,
+    statusPollingInterval: null,
+    lastIceCandidateId: 0,
+
+    rtcConfig: {
+      iceServers: [
+        { urls: 'stun:stun.l.google.com:19302' },
+        { urls: 'stun:stun1.l.google.com:19302' }
+      ]
+    },
+
+    init() {
+      // Store reference globally so startCall can access it
+      window.callManager = this;
+
+      // Restore active call state from sessionStorage
+      const savedCall = sessionStorage.getItem('activeCall');
+      if (savedCall) {
+        const callData = JSON.parse(savedCall);
+        // Check if call is still active on server
+        this.checkAndRestoreCall(callData);
+      }
+
+      // Start polling for incoming calls
+      this.startIncomingCallPolling();
+
+      // Listen for call initiation from other pages
+      window.addEventListener('storage', (e) => {
+        if (e.key === 'initiateCall') {
+          const data = JSON.parse(e.newValue);
+          this.initiateCall(data.userId, data.userName, data.callType);
+          localStorage.removeItem('initiateCall');
+        }
+      });
+
+      // Handle page unload
+      window.addEventListener('beforeunload', () => {
+        if (this.activeCall) {
+          sessionStorage.setItem('activeCall', JSON.stringify(this.activeCall));
+        }
+      });
+    },
+
+    async checkAndRestoreCall(callData) {
+      try {
+        const response = await fetch(`/web/calls/${callData.id}/status`);
+        if (response.ok) {
+          const data = await response.json();
+          if (data.status === 'active') {
+            // Call is still active, restore it
+            this.activeCall = callData;
+            await this.reconnectToCall(callData);
+          } else {
+            // Call ended, clear storage
+            sessionStorage.removeItem('activeCall');
+          }
+        }
+      } catch (e) {
+        sessionStorage.removeItem('activeCall');
+      }
+    },
+
+    async reconnectToCall(callData) {
+      try {
+        const constraints = { audio: true, video: callData.call_type === 'video' };
+        this.localStream = await navigator.mediaDevices.getUserMedia(constraints);
+
+        this.peerConnection = new RTCPeerConnection(this.rtcConfig);
+        this.localStream.getTracks().forEach(track => {
+          this.peerConnection.addTrack(track, this.localStream);
+        });
+
+        this.peerConnection.onicecandidate = async (event) => {
+          if (event.candidate) {
+            await this.sendIceCandidate(callData.id, event.candidate);
+          }
+        };
+
+        this.peerConnection.ontrack = (event) => {
+          if (this.$refs.remoteVideo) {
+            this.$refs.remoteVideo.srcObject = event.streams[0];
+          }
+        };
+
+        if (this.$refs.localVideo) {
+          this.$refs.localVideo.srcObject = this.localStream;
+        }
+
+        // Renegotiate connection
+        if (callData.isCaller) {
+          const offer = await this.peerConnection.createOffer();
+          await this.peerConnection.setLocalDescription(offer);
+          await fetch(`/web/calls/${callData.id}/offer`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ offer: JSON.stringify(offer) })
+          });
+        }
+
+        this.startCallTimer();
+        this.startStatusPolling();
+
+      } catch (e) {
+        console.error('Failed to reconnect call:', e);
+        this.cleanup();
+      }
+    },
+
+    startIncomingCallPolling() {
+      this.pollingInterval = setInterval(async () => {
+        if (this.activeCall) return;
+
+        try {
+          const response = await fetch('/web/calls/check-incoming');
+          if (response.ok) {
+            const data = await response.json();
+            if (data.incoming && !this.incomingCall) {
+              this.incomingCall = {
+                id: data.call_id,
+                call_type: data.call_type,
+                caller_name: data.caller?.name || 'Unknown',
+                caller_id: data.caller?.id
+              };
+              this.playRingtone();
+            }
+          }
+        } catch (e) {
+          console.error('Poll error:', e);
+        }
+      }, 2000);
+    },
+
+    playRingtone() {
+      if ('Notification' in window && Notification.permission === 'granted') {
+        new Notification('Incoming Call', {
+          body: `${this.incomingCall?.caller_name} is calling`,
+          requireInteraction: true
+        });
+      }
+    },
+
+    async initiateCall(userId, userName, callType) {
+      // Check if mediaDevices is available (requires HTTPS or localhost)
+      if (!navigator.mediaDevices || !navigator.mediaDevices.getUserMedia) {
+        alert('Calling requires a secure connection (HTTPS). Please contact your administrator to enable HTTPS on this server.');
+        return;
+      }
+
+      try {
+        const initResponse = await fetch('/web/calls/initiate', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ recipient_id: userId, call_type: callType })
+        });
+
+        if (!initResponse.ok) {
+          const error = await initResponse.json();
+          alert(error.error || 'Failed to initiate call');
+          return;
+        }
+
+        const initData = await initResponse.json();
+        const callId = initData.call_id;
+
+        const constraints = { audio: true, video: callType === 'video' };
+        this.localStream = await navigator.mediaDevices.getUserMedia(constraints);
+
+        this.peerConnection = new RTCPeerConnection(this.rtcConfig);
+        this.localStream.getTracks().forEach(track => {
+          this.peerConnection.addTrack(track, this.localStream);
+        });
+
+        this.peerConnection.onicecandidate = async (event) => {
+          if (event.candidate) await this.sendIceCandidate(callId, event.candidate);
+        };
+
+        this.peerConnection.ontrack = (event) => {
+          if (this.$refs.remoteVideo) this.$refs.remoteVideo.srcObject = event.streams[0];
+        };
+
+        const offer = await this.peerConnection.createOffer();
+        await this.peerConnection.setLocalDescription(offer);
+
+        await fetch(`/web/calls/${callId}/offer`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ offer: JSON.stringify(offer) })
+        });
+
+        this.activeCall = { id: callId, call_type: callType, remote_name: userName, status: 'ringing', isCaller: true };
+        this.isMinimized = false;
+
+        if (this.$refs.localVideo) this.$refs.localVideo.srcObject = this.localStream;
+
+        this.startStatusPolling();
+
+      } catch (error) {
+        console.error('Call error:', error);
+        if (error.name === 'NotAllowedError') {
+          alert('Please allow camera/microphone access');
+        } else {
+          alert('Failed to start call: ' + error.message);
+        }
+        this.cleanup();
+      }
+    },
+
+    async acceptIncomingCall() {
+      if (!this.incomingCall) return;
+
+      // Check if mediaDevices is available (requires HTTPS or localhost)
+      if (!navigator.mediaDevices || !navigator.mediaDevices.getUserMedia) {
+        alert('Calling requires a secure connection (HTTPS). Please contact your administrator to enable HTTPS on this server.');
+        this.declineIncomingCall();
+        return;
+      }
+
+      try {
+        const callId = this.incomingCall.id;
+        const callType = this.incomingCall.call_type;
+
+        const offerResponse = await fetch(`/web/calls/${callId}/offer`);
+        const offerData = await offerResponse.json();
+
+        const constraints = { audio: true, video: callType === 'video' };
+        this.localStream = await navigator.mediaDevices.getUserMedia(constraints);
+
+        this.peerConnection = new RTCPeerConnection(this.rtcConfig);
+        this.localStream.getTracks().forEach(track => {
+          this.peerConnection.addTrack(track, this.localStream);
+        });
+
+        this.peerConnection.onicecandidate = async (event) => {
+          if (event.candidate) await this.sendIceCandidate(callId, event.candidate);
+        };
+
+        this.peerConnection.ontrack = (event) => {
+          if (this.$refs.remoteVideo) this.$refs.remoteVideo.srcObject = event.streams[0];
+        };
+
+        const offer = JSON.parse(offerData.offer);
+        await this.peerConnection.setRemoteDescription(new RTCSessionDescription(offer));
+
+        const answer = await this.peerConnection.createAnswer();
+        await this.peerConnection.setLocalDescription(answer);
+
+        await fetch(`/web/calls/${callId}/answer`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ answer: JSON.stringify(answer) })
+        });
+
+        this.activeCall = { id: callId, call_type: callType, remote_name: this.incomingCall.caller_name, status: 'active', isCaller: false };
+        this.incomingCall = null;
+        this.isMinimized = false;
+
+        if (this.$refs.localVideo) this.$refs.localVideo.srcObject = this.localStream;
+
+        this.startCallTimer();
+        this.startStatusPolling();
+
+      } catch (error) {
+        console.error('Answer error:', error);
+        alert('Failed to answer: ' + error.message);
+        this.cleanup();
+      }
+    },
+
+    async declineIncomingCall() {
+      if (!this.incomingCall) return;
+      try {
+        await fetch(`/web/calls/${this.incomingCall.id}/decline`, { method: 'POST' });
+      } catch (e) {}
+      this.incomingCall = null;
+    },
+
+    async endCall() {
+      if (!this.activeCall) return;
+      try {
+        const formData = new FormData();
+        formData.append('reason', 'ended');
+        await fetch(`/web/calls/${this.activeCall.id}/end`, { method: 'POST', body: formData });
+      } catch (e) {}
+      this.cleanup();
+    },
+
+    async sendIceCandidate(callId, candidate) {
+      try {
+        await fetch(`/web/calls/${callId}/ice`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ candidate })
+        });
+      } catch (e) {}
+    },
+
+    startStatusPolling() {
+      this.statusPollingInterval = setInterval(async () => {
+        if (!this.activeCall?.id) return;
+
+        try {
+          const statusResponse = await fetch(`/web/calls/${this.activeCall.id}/status`);
+          if (statusResponse.ok) {
+            const data = await statusResponse.json();
+
+            if (this.activeCall.status !== data.status) {
+              this.activeCall.status = data.status;
+              if (data.status === 'active' && !this.callStartTime) this.startCallTimer();
+            }
+
+            if (this.activeCall.isCaller && data.has_answer && this.peerConnection?.signalingState === 'have-local-offer') {
+              const answerResponse = await fetch(`/web/calls/${this.activeCall.id}/answer`);
+              if (answerResponse.ok) {
+                const answerData = await answerResponse.json();
+                if (answerData.answer) {
+                  const answer = JSON.parse(answerData.answer);
+                  await this.peerConnection.setRemoteDescription(new RTCSessionDescription(answer));
+                }
+              }
+            }
+
+            if (['ended', 'declined', 'missed'].includes(data.status)) {
+              this.cleanup();
+              return;
+            }
+          }
+
+          const iceResponse = await fetch(`/web/calls/${this.activeCall.id}/ice?since_id=${this.lastIceCandidateId}`);
+          if (iceResponse.ok) {
+            const iceData = await iceResponse.json();
+            for (const item of iceData.candidates) {
+              try {
+                const candidate = typeof item.candidate === 'string' ? JSON.parse(item.candidate) : item.candidate;
+                await this.peerConnection.addIceCandidate(new RTCIceCandidate(candidate));
+                this.lastIceCandidateId = Math.max(this.lastIceCandidateId, item.id);
+              } catch (e) {}
+            }
+          }
+        } catch (e) {}
+      }, 1000);
+    },
+
+    startCallTimer() {
+      this.callStartTime = Date.now();
+      this.durationInterval = setInterval(() => {
+        const elapsed = Math.floor((Date.now() - this.callStartTime) / 1000);
+        this.callDuration = `${Math.floor(elapsed / 60).toString().padStart(2, '0')}:${(elapsed % 60).toString().padStart(2, '0')}`;
+      }, 1000);
+    },
+
+    toggleMute() {
+      if (this.localStream) {
+        const track = this.localStream.getAudioTracks()[0];
+        if (track) { track.enabled = !track.enabled; this.isMuted = !track.enabled; }
+      }
+    },
+
+    toggleVideo() {
+      if (this.localStream) {
+        const track = this.localStream.getVideoTracks()[0];
+        if (track) { track.enabled = !track.enabled; this.isVideoOff = !track.enabled; }
+      }
+    },
+
+    minimizeCall() { this.isMinimized = true; },
+    maximizeCall() { this.isMinimized = false; },
+
+    cleanup() {
+      if (this.localStream) { this.localStream.getTracks().forEach(t => t.stop()); this.localStream = null; }
+      if (this.peerConnection) { this.peerConnection.close(); this.peerConnection = null; }
+      if (this.durationInterval) { clearInterval(this.durationInterval); this.durationInterval = null; }
+      if (this.statusPollingInterval) { clearInterval(this.statusPollingInterval); this.statusPollingInterval = null; }
+      this.activeCall = null;
+      this.isMinimized = false;
+      this.isMuted = false;
+      this.isVideoOff = false;
+      this.callDuration = '00:00';
+      this.callStartTime = null;
+      this.lastIceCandidateId = 0;
+      sessionStorage.removeItem('activeCall');
+    }
+  };
+}
+
+// Store reference to call manager globally
+window.callManager = null;
+
+// Global function to initiate calls from any page
+window.startCall = function(userId, userName, callType) {
+  console.log('startCall called:', userId, userName, callType);
+  if (window.callManager) {
+    window.callManager.initiateCall(userId, userName, callType);
+  } else {
+    console.error('Call manager not initialized');
+    alert('Call system is initializing, please try again in a moment.');
+  }
+};
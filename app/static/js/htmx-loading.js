@@ -0,0 +1,7 @@
+// Make loading bar show on HTMX requests
+document.body.addEventListener('htmx:beforeRequest', function() {
+  document.getElementById('htmx-loading').style.opacity = '1';
+});
+document.body.addEventListener('htmx:afterRequest', function() {
+  document.getElementById('htmx-loading').style.opacity = '0';
+});
@@ -0,0 +1,251 @@
+// Track dismissed notifications to avoid re-showing
+let dismissedNotifications = new Set();
+
+// Request browser notification permission
+async function requestNotificationPermission() {
+  if ('Notification' in window) {
+    // Update status indicator
+    updateNotificationStatus();
+
+    if (Notification.permission === 'default') {
+      try {
+        const permission = await Notification.requestPermission();
+        if (permission === 'granted') {
+          console.log('Browser notifications enabled');
+          updateNotificationStatus();
+        }
+      } catch (error) {
+        console.error('Error requesting notification permission:', error);
+      }
+    }
+  }
+}
+
+// Update notification status indicator
+function updateNotificationStatus() {
+  const statusIndicator = document.getElementById('browser-notification-status');
+  if (statusIndicator && 'Notification' in window) {
+    if (Notification.permission === 'granted') {
+      statusIndicator.classList.remove('hidden');
+      statusIndicator.classList.add('bg-green-500');
+      statusIndicator.title = 'Browser notifications enabled';
+    } else if (Notification.permission === 'denied') {
+      statusIndicator.classList.remove('hidden');
+      statusIndicator.classList.remove('bg-green-500');
+      statusIndicator.classList.add('bg-red-500');
+      statusIndicator.title = 'Browser notifications blocked';
+    } else {
+      statusIndicator.classList.add('hidden');
+    }
+  }
+}
+
+// Show browser notification (works even when tab is not focused)
+function showBrowserNotification(notification) {
+  if ('Notification' in window && Notification.permission === 'granted') {
+    // Get notification icon based on type
+    let icon = '/static/notification-icon.png'; // Default icon
+    let badge = '/static/badge-icon.png'; // Small badge icon
+
+    const browserNotif = new Notification(notification.message, {
+      body: 'Click to view',
+      icon: icon,
+      badge: badge,
+      tag: `notification-${notification.id}`, // Prevents duplicate notifications
+      requireInteraction: false, // Auto-dismiss after a few seconds
+      silent: false
+    });
+
+    // Handle notification click
+    browserNotif.onclick = function(event) {
+      event.preventDefault();
+      window.focus(); // Focus the browser window
+
+      // Navigate to the notification URL
+      if (notification.url) {
+        window.location.href = notification.url;
+      } else if (notification.type === 'meeting') {
+        window.location.href = '/web/meetings';
+      } else if (notification.type === 'task' || notification.type === 'assignment') {
+        window.location.href = '/web/tasks/my';
+      } else if (notification.type === 'message') {
+        window.location.href = notification.url || '/web/chats';
+      }
+
+      browserNotif.close();
+    };
+
+    // Auto-close after 5 seconds
+    setTimeout(() => {
+      browserNotif.close();
+    }, 5000);
+  }
+}
+
+// Check for new notifications every 10 seconds
+async function checkNotifications() {
+  try {
+    const response = await fetch('/web/notifications/unread');
+    const notifications = await response.json();
+
+    notifications.forEach(notification => {
+      if (!dismissedNotifications.has(notification.id)) {
+        showNotificationPopup(notification);
+        showBrowserNotification(notification); // Also show browser notification
+        dismissedNotifications.add(notification.id);
+      }
+    });
+  } catch (error) {
+    console.error('Error fetching notifications:', error);
+  }
+}
+
+// Request permission on page load
+requestNotificationPermission();
+
+function showNotificationPopup(notification) {
+  const container = document.getElementById('notification-popup-container');
+
+  // Create popup element
+  const popup = document.createElement('div');
+  popup.id = `notification-${notification.id}`;
+  popup.className = 'bg-white border-l-4 border-red-600 rounded-lg shadow-2xl p-4 transform transition-all duration-300 ease-out translate-x-0 opacity-100';
+  popup.style.animation = 'slideIn 0.3s ease-out';
+
+  // Get notification icon based on type
+  let icon = '';
+  if (notification.type === 'meeting') {
+    icon = '<svg class="w-6 h-6 text-red-600" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M15 10l4.553-2.276A1 1 0 0121 8.618v6.764a1 1 0 01-1.447.894L15 14M5 18h8a2 2 0 002-2V8a2 2 0 00-2-2H5a2 2 0 00-2 2v8a2 2 0 002 2z"/></svg>';
+  } else if (notification.type === 'task' || notification.type === 'assignment') {
+    icon = '<svg class="w-6 h-6 text-red-600" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 5H7a2 2 0 00-2 2v12a2 2 0 002 2h10a2 2 0 002-2V7a2 2 0 00-2-2h-2M9 5a2 2 0 002 2h2a2 2 0 002-2M9 5a2 2 0 012-2h2a2 2 0 012 2"/></svg>';
+  } else if (notification.type === 'message') {
+    icon = '<svg class="w-6 h-6 text-red-600" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M8 12h.01M12 12h.01M16 12h.01M21 12c0 4.418-4.03 8-9 8a9.863 9.863 0 01-4.255-.949L3 20l1.395-3.72C3.512 15.042 3 13.574 3 12c0-4.418 4.03-8 9-8s9 3.582 9 8z"/></svg>';
+  } else {
+    icon = '<svg class="w-6 h-6 text-red-600" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M15 17h5l-1.405-1.405A2.032 2.032 0 0118 14.158V11a6.002 6.002 0 00-4-5.659V5a2 2 0 10-4 0v.341C7.67 6.165 6 8.388 6 11v3.159c0 .538-.214 1.055-.595 1.436L4 17h5m6 0v1a3 3 0 11-6 0v-1m6 0H9"/></svg>';
+  }
+
+  popup.innerHTML = `
+    <div class="flex items-start gap-3">
+      <div class="flex-shrink-0">${icon}</div>
+      <div class="flex-1 min-w-0">
+        <p class="text-sm font-medium text-gray-900 mb-1">${escapeHtml(notification.message)}</p>
+        <div class="flex items-center gap-2 mt-2">
+          <button onclick="acknowledgeNotification(${notification.id})" 
+                  class="text-xs px-3 py-1.5 bg-red-600 text-white rounded-lg hover:bg-red-700 transition-colors font-medium">
+            I saw it
+          </button>
+          <button onclick="dismissNotification(${notification.id})" 
+                  class="text-xs px-3 py-1.5 bg-gray-200 text-gray-700 rounded-lg hover:bg-gray-300 transition-colors">
+            Dismiss
+          </button>
+        </div>
+        <div class="mt-2">
+          <div class="h-1 bg-gray-200 rounded-full overflow-hidden">
+            <div id="progress-${notification.id}" class="h-full bg-red-600 transition-all duration-1000" style="width: 100%"></div>
+          </div>
+        </div>
+      </div>
+      <button onclick="dismissNotification(${notification.id})" class="flex-shrink-0 text-gray-400 hover:text-gray-600">
+        <svg class="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+          <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M6 18L18 6M6 6l12 12"/>
+        </svg>
+      </button>
+    </div>
+  `;
+
+  container.appendChild(popup);
+
+  // Start progress bar animation (1 minute = 60 seconds)
+  setTimeout(() => {
+    const progressBar = document.getElementById(`progress-${notification.id}`);
+    if (progressBar) {
+      progressBar.style.width = '0%';
+      progressBar.style.transitionDuration = '60000ms'; // 60 seconds
+    }
+  }, 100);
+
+  // Auto-dismiss after 1 minute
+  setTimeout(() => {
+    autoDismissNotification(notification.id);
+  }, 60000); // 60 seconds
+}
+
+async function acknowledgeNotification(notificationId) {
+  try {
+    // Mark as read - this will navigate to the appropriate page
+    const form = document.createElement('form');
+    form.method = 'POST';
+    form.action = `/web/notifications/${notificationId}/read`;
+    document.body.appendChild(form);
+    form.submit();
+  } catch (error) {
+    console.error('Error acknowledging notification:', error);
+  }
+}
+
+async function dismissNotification(notificationId) {
+  const popup = document.getElementById(`notification-${notificationId}`);
+  if (popup) {
+    popup.style.animation = 'slideOut 0.3s ease-in';
+    setTimeout(() => popup.remove(), 300);
+  }
+
+  try {
+    await fetch(`/web/notifications/${notificationId}/dismiss`, { method: 'POST' });
+  } catch (error) {
+    console.error('Error dismissing notification:', error);
+  }
+}
+
+async function autoDismissNotification(notificationId) {
+  const popup = document.getElementById(`notification-${notificationId}`);
+  if (popup) {
+    // Fade out animation
+    popup.style.animation = 'slideOut 0.3s ease-in';
+    setTimeout(() => popup.remove(), 300);
+
+    // Mark as dismissed in backend
+    try {
+      await fetch(`/web/notifications/${notificationId}/dismiss`, { method: 'POST' });
+    } catch (error) {
+      console.error('Error auto-dismissing notification:', error);
+    }
+  }
+}
+
+function escapeHtml(text) {
+  const div = document.createElement('div');
+  div.textContent = text;
+  return div.innerHTML;
+}
+
+// Add CSS animations
+const style = document.createElement('style');
+style.textContent = `
+  @keyframes slideIn {
+    from {
+      transform: translateX(100%);
+      opacity: 0;
+    }
+    to {
+      transform: translateX(0);
+      opacity: 1;
+    }
+  }
+
+  @keyframes slideOut {
+    from {
+      transform: translateX(0);
+      opacity: 1;
+    }
+    to {
+      transform: translateX(100%);
+      opacity: 0;
+    }
+  }
+`;
+document.head.appendChild(style);
+
+// Start checking for notifications
+checkNotifications();
+setInterval(checkNotifications, 10000); // Check every 10 seconds
@@ -0,0 +1,37 @@
+// Search-as-you-type suggestions for the header search box
+(function() {
+  const input = document.getElementById('header-search-input');
+  const box = document.getElementById('header-search-suggestions');
+  if (!input || !box) return;
+  let timer = null;
+  let lastQuery = '';
+  const esc = (value) => String(value).replace(/[&<>"']/g, (c) => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+  input.addEventListener('input', function() {
+    clearTimeout(timer);
+    const q = input.value.trim();
+    if (q.length < 2) { box.classList.add('hidden'); return; }
+    timer = setTimeout(async function() {
+      lastQuery = q;
+      try {
+        const resp = await fetch('/web/search/suggest?q=' + encodeURIComponent(q));
+        if (!resp.ok || q !== lastQuery) return;
+        const data = await resp.json();
+        if (!data.results.length) { box.classList.add('hidden'); return; }
+        // Snippets are escaped server-side; only <mark> tags are injected
+        box.innerHTML = data.results.map((r) =>
+          '<a href="' + esc(r.url) + '" class="block px-3 py-2 hover:bg-gray-50 border-b border-gray-100 last:border-0">' +
+          '<span class="text-xs uppercase text-gray-400 mr-2">' + esc(r.type) + '</span>' +
+          '<span class="font-medium text-gray-800">' + esc(r.label) + '</span>' +
+          (r.snippet ? '<div class="text-xs text-gray-500 truncate">' + r.snippet + '</div>' : '') +
+          '</a>'
+        ).join('');
+        box.classList.remove('hidden');
+      } catch (e) {
+        box.classList.add('hidden');
+      }
+    }, 150);
+  });
+  document.addEventListener('click', function(e) {
+    if (!box.contains(e.target) && e.target !== input) box.classList.add('hidden');
+  });
+})();
@@ -0,0 +1,54 @@
+function toggleMobileSidebar() {
+  const sidebar = document.getElementById('mobile-sidebar');
+  const overlay = document.getElementById('mobile-sidebar-overlay');
+  const menuButton = document.getElementById('mobile-menu-button');
+
+  if (sidebar.classList.contains('closed')) {
+    // Open sidebar
+    sidebar.classList.remove('closed');
+    overlay.classList.remove('hidden');
+    menuButton.style.opacity = '0';
+    menuButton.style.pointerEvents = 'none';
+    document.body.style.overflow = 'hidden'; // Prevent scrolling when menu is open
+  } else {
+    // Close sidebar
+    sidebar.classList.add('closed');
+    overlay.classList.add('hidden');
+    menuButton.style.opacity = '1';
+    menuButton.style.pointerEvents = 'auto';
+    document.body.style.overflow = ''; // Restore scrolling
+  }
+}
+
+// Initialize sidebar state based on screen size
+function initSidebar() {
+  const sidebar = document.getElementById('mobile-sidebar');
+  const menuButton = document.getElementById('mobile-menu-button');
+  if (window.innerWidth < 1024) {
+    // Mobile: start closed, button visible
+    sidebar.classList.add('closed');
+    menuButton.style.opacity = '1';
+    menuButton.style.pointerEvents = 'auto';
+  } else {
+    // Desktop: start open, button hidden by CSS
+    sidebar.classList.remove('closed');
+  }
+}
+
+// Close sidebar when clicking on navigation links on mobile
+document.addEventListener('DOMContentLoaded', function() {
+  // Initialize sidebar state
+  initSidebar();
+
+  // Handle window resize
+  window.addEventListener('resize', initSidebar);
+
+  const navLinks = document.querySelectorAll('#mobile-sidebar a');
+  navLinks.forEach(link => {
+    link.addEventListener('click', function() {
+      if (window.innerWidth < 1024) { // Only on mobile/tablet
+        toggleMobileSidebar();
+      }
+    });
+  });
+});
@@ -13,13 +13,38 @@ import logging
 logger = logging.getLogger(__name__)
 
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, File, UploadFile, Query, BackgroundTasks
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse, JSONResponse, Response, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_session
-from app.core.security import verify_password, get_password_hash
+from app.core.user_directory import get_workspace_directory, invalidate_workspace_directory, resolve_users
+from app.core.page_cache import cached_page, page_cache_stats
+from app.core.loop_monitor import loop_monitor
+from app.core.profiling import profiling_summary, render_prometheus
+from app.core.workspace_context import invalidate_workspace
+from app.web.templating import templates
+from app.core.uploads import (
+    BRANDING_LOGO_MAX_SIZE, CHAT_ATTACHMENT_MAX_SIZE, COMMENT_ATTACHMENT_MAX_SIZE, PROFILE_PICTURE_MAX_SIZE,
+    UploadTooLarge, save_upload,
+)
+from app.core.attachment_store import store_attachment
+from app.core.attachment_access import (
+    attachment_response, clear_attachment_grants, get_grant, make_grant, remember_grant, thumbnail_grant,
+)
+from app.core.activity_report import (
+    collect_user_activity, get_cached_report, get_report_job, is_large_report, render_report, report_cache_key,
+    start_report_job, warm_report_pool,
+)
+from app.core.ticket_metrics import (
+    record_ticket_assignment, record_ticket_created, record_ticket_reply, record_ticket_status,
+    ticket_sla_percentiles, ticket_status_durations,
+)
+from app.core.bulk_export import DATASETS as EXPORT_DATASETS, ExportError, parquet_available, stream_export
+from app.core.thumbnails import (
+    THUMBNAIL_MEDIA_TYPE, ThumbnailSize, get_thumbnail, remove_thumbnails, schedule_thumbnails,
+)
+from app.core.security import get_password_hash_async, password_hasher_stats, revoke_user_tokens, verify_password_async
 from app.core.email import send_email
 from app.core.email_to_ticket_v2 import get_local_time
 from app.models.project import Project
@@ -38,30 +63,9 @@ from app.models.company import Company
 from app.models.contact import Contact
 from app.models.lead import Lead, LeadStatus, LeadSource
 from app.models.deal import Deal, DealStage
-from app.models.activity import Activity, ActivityType
+from app.models.activity import ActivityType
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-templates = Jinja2Templates(directory=str(BASE_DIR / 'templates'))
-
-# Store original TemplateResponse
-_original_template_response = templates.TemplateResponse
-
-def enhanced_template_response(name: str, context: dict, *args, **kwargs):
-    """Enhanced TemplateResponse that adds workspace from request state"""
-    # ALWAYS add workspace to context if request is present
-    if 'request' in context:
-        request = context['request']
-        # Check if workspace exists in request.state
-        if hasattr(request, 'state') and hasattr(request.state, 'workspace'):
-            context['workspace'] = request.state.workspace
-        # If not in state, try to get it from context (already passed)
-        elif 'workspace' not in context:
-            context['workspace'] = None
-    
-    return _original_template_response(name, context, *args, **kwargs)
-
-# Replace the TemplateResponse method - this affects ALL template calls
-templates.TemplateResponse = enhanced_template_response
 
 # Convert UTC datetime to local time for display
 def utc_to_local(utc_dt):
@@ -173,13 +177,19 @@ async def web_login_post(
 ):
     result = await db.execute(select(User).where(User.username == username))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_password_async(password, user.hashed_password) if user else (False, None)
+    if not valid:
         return templates.TemplateResponse('auth/login.html', {'request': request, 'error': 'Invalid username or password'}, status_code=400)
     
     # Check if user is active
     if not user.is_active:
         return templates.TemplateResponse('auth/login.html', {'request': request, 'error': 'Your account has been deactivated. Please contact your administrator.'}, status_code=403)
     
+    # Stored with outdated hashing parameters: upgrade it now we have the password
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     request.session['user_id'] = user.id
     request.session['workspace_id'] = user.workspace_id
     # Redirect to profile completion if not completed
@@ -222,7 +232,7 @@ async def web_signup_post(
     await db.flush()
     user = User(
         username=username, 
-        hashed_password=get_password_hash(password), 
+        hashed_password=await get_password_hash_async(password), 
         workspace_id=ws.id,
         profile_completed=False,
         email_verified=True,
@@ -230,6 +240,7 @@ async def web_signup_post(
     )
     db.add(user)
     await db.commit()
+    invalidate_workspace_directory(ws.id)
     await db.refresh(user)
     request.session['user_id'] = user.id
     return RedirectResponse('/web/profile/complete', status_code=303)
@@ -237,6 +248,9 @@ async def web_signup_post(
 
 @router.post('/logout')
 async def web_logout(request: Request):
+    user_id = request.session.get('user_id')
+    if user_id:
+        clear_attachment_grants(user_id)
     request.session.clear()
     return RedirectResponse('/', status_code=303)
 
@@ -287,6 +301,7 @@ async def web_profile_complete_post(
             pass
     user.profile_completed = True
     await db.commit()
+    invalidate_workspace_directory(user.workspace_id)
     return RedirectResponse('/web/projects', status_code=303)
 
 
@@ -342,6 +357,7 @@ async def web_profile_post(
         user.calendar_color = calendar_color
     
     await db.commit()
+    invalidate_workspace_directory(user.workspace_id)
     return templates.TemplateResponse('auth/profile.html', {
         'request': request, 
         'user': user, 
@@ -373,64 +389,76 @@ async def web_profile_picture_upload(
             'error': 'Invalid file type. Please upload a JPEG, PNG, GIF, or WebP image.'
         }, status_code=400)
     
-    # Validate file size (max 5MB)
-    content = await profile_picture.read()
-    if len(content) > 5 * 1024 * 1024:
+    # Generate unique filename
+    file_extension = profile_picture.filename.split('.')[-1] if '.' in profile_picture.filename else 'jpg'
+    filename = f"{user_id}_{uuid.uuid4().hex[:8]}.{file_extension}"
+    
+    # Stream to disk, enforcing the 5MB limit as we go
+    try:
+        stored = await save_upload(profile_picture, 'profile_pictures', PROFILE_PICTURE_MAX_SIZE, stored_name=filename)
+    except UploadTooLarge:
         return templates.TemplateResponse('auth/profile.html', {
             'request': request,
             'user': user,
             'error': 'File too large. Maximum size is 5MB.'
         }, status_code=400)
     
-    # Create uploads directory if it doesn't exist
-    upload_dir = BASE_DIR / 'uploads' / 'profile_pictures'
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    schedule_thumbnails(stored.path, stored.content_type)
     
     # Delete old profile picture if it exists
     if user.profile_picture:
         old_file = BASE_DIR / user.profile_picture.lstrip('/')
         if old_file.exists():
             old_file.unlink()
-    
-    # Generate unique filename
-    file_extension = profile_picture.filename.split('.')[-1] if '.' in profile_picture.filename else 'jpg'
-    filename = f"{user_id}_{uuid.uuid4().hex[:8]}.{file_extension}"
-    file_path = upload_dir / filename
-    
-    # Save file
-    with open(file_path, 'wb') as f:
-        f.write(content)
+        remove_thumbnails(old_file)
     
     # Update user profile picture path (relative to BASE_DIR)
-    user.profile_picture = f"/uploads/profile_pictures/{filename}"
+    user.profile_picture = stored.url
     await db.commit()
+    invalidate_workspace_directory(user.workspace_id)
     
     return RedirectResponse('/web/profile?success=picture', status_code=303)
 
 
-@router.get('/uploads/profile_pictures/{filename}')
-async def serve_profile_picture(filename: str):
-    """Serve profile picture files"""
+async def _uploaded_image_response(subdir: str, filename: str, size: Optional[str], not_found: str):
+    """Serve an image from app/uploads/<subdir>, or its ``size`` thumbnail"""
     # Prevent path traversal attacks
     if '..' in filename or '/' in filename or '\\' in filename:
         raise HTTPException(status_code=400, detail="Invalid filename")
     
-    file_path = BASE_DIR / 'uploads' / 'profile_pictures' / filename
+    file_path = BASE_DIR / 'uploads' / subdir / filename
     
     # Ensure the resolved path is within the uploads directory
     try:
         file_path = file_path.resolve()
-        upload_base = (BASE_DIR / 'uploads' / 'profile_pictures').resolve()
+        upload_base = (BASE_DIR / 'uploads' / subdir).resolve()
         if not str(file_path).startswith(str(upload_base)):
             raise HTTPException(status_code=403, detail="Access denied")
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid file path")
     
     if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Profile picture not found")
+        raise HTTPException(status_code=404, detail=not_found)
+    if size:
+        import mimetypes
+        thumb = await get_thumbnail(file_path, size, mimetypes.guess_type(filename)[0])
+        if thumb is not None:
+            return FileResponse(thumb, media_type=THUMBNAIL_MEDIA_TYPE)
     return FileResponse(file_path)
 
 
+@router.get('/uploads/profile_pictures/{filename}')
+async def serve_profile_picture(filename: str, size: Optional[ThumbnailSize] = None):
+    """Serve profile picture files"""
+    return await _uploaded_image_response('profile_pictures', filename, size, "Profile picture not found")
+
+
+@router.get('/uploads/branding/{filename}')
+async def serve_branding_image(filename: str, size: Optional[ThumbnailSize] = None):
+    """Serve workspace logos, optionally downscaled"""
+    return await _uploaded_image_response('branding', filename, size, "Logo not found")
+
+
 # --------------------------
 # Google OAuth Integration
 # --------------------------
@@ -760,7 +788,7 @@ async def web_search(
     q: str = Query(""),
     db: AsyncSession = Depends(get_session)
 ):
-    """Search across tasks and projects"""
+    """Search across tasks, projects, comments, tickets and chat messages"""
     user_id = request.session.get('user_id')
     if not user_id:
         return RedirectResponse('/web/login', status_code=303)
@@ -770,94 +798,8 @@ async def web_search(
         request.session.clear()
         return RedirectResponse('/web/login', status_code=303)
     
-    results = {'tasks': [], 'projects': [], 'comments': []}
-    
-    if q and len(q.strip()) >= 2:
-        search_term = f"%{q.strip()}%"
-        
-        # Search tasks - include project info in query to avoid N+1
-        from sqlalchemy.orm import selectinload
-        task_query = (
-            select(Task, Project.name.label('project_name'))
-            .join(Project, Task.project_id == Project.id)
-            .where(Project.workspace_id == user.workspace_id)
-            .where(
-                (Task.title.ilike(search_term)) | 
-                (Task.description.ilike(search_term))
-            )
-            .limit(20)
-        )
-        task_results = (await db.execute(task_query)).all()
-        
-        for task, project_name in task_results:
-            results['tasks'].append({
-                'id': task.id,
-                'title': task.title,
-                'description': task.description or '',
-                'status': task.status.value if task.status else 'todo',
-                'priority': task.priority.value if task.priority else 'medium',
-                'project_name': project_name or 'Unknown',
-                'project_id': task.project_id,
-            })
-        
-        # Search projects - use subquery for task count to avoid N+1
-        from sqlalchemy import func
-        task_count_subquery = (
-            select(func.count(Task.id))
-            .where(Task.project_id == Project.id)
-            .correlate(Project)
-            .scalar_subquery()
-        )
-        project_query = (
-            select(Project, task_count_subquery.label('task_count'))
-            .where(Project.workspace_id == user.workspace_id)
-            .where(
-                (Project.name.ilike(search_term)) | 
-                (Project.description.ilike(search_term))
-            )
-            .limit(20)
-        )
-        project_results = (await db.execute(project_query)).all()
-        
-        for project, task_count in project_results:
-            results['projects'].append({
-                'id': project.id,
-                'name': project.name,
-                'description': project.description or '',
-                'task_count': task_count or 0,
-            })
-        
-        # Search comments - join all related tables in single query
-        comment_query = (
-            select(
-                Comment,
-                Task.id.label('task_id'),
-                Task.title.label('task_title'),
-                User.full_name.label('author_full_name'),
-                User.username.label('author_username'),
-                Project.id.label('project_id'),
-                Project.name.label('project_name')
-            )
-            .join(Task, Comment.task_id == Task.id)
-            .join(Project, Task.project_id == Project.id)
-            .outerjoin(User, Comment.author_id == User.id)
-            .where(Project.workspace_id == user.workspace_id)
-            .where(Comment.content.ilike(search_term))
-            .limit(20)
-        )
-        comment_results = (await db.execute(comment_query)).all()
-        
-        for comment, task_id, task_title, author_full_name, author_username, project_id, project_name in comment_results:
-            results['comments'].append({
-                'id': comment.id,
-                'content': comment.content,
-                'created_at': comment.created_at,
-                'task_id': task_id,
-                'task_title': task_title or 'Unknown Task',
-                'author_name': author_full_name or author_username or 'Unknown',
-                'project_name': project_name or 'Unknown',
-                'project_id': project_id,
-            })
+    from app.core.search import search_workspace
+    results = await search_workspace(db, user, q)
     
     return templates.TemplateResponse('search/results.html', {
         'request': request,
@@ -868,6 +810,39 @@ async def web_search(
     })
 
 
+@router.get('/search/suggest')
+async def web_search_suggest(
+    request: Request,
+    q: str = Query(""),
+    db: AsyncSession = Depends(get_session)
+):
+    """Search-as-you-type suggestions for the header search box (JSON)"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user or not user.is_active:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    
+    from app.core.search import search_workspace
+    results = await search_workspace(db, user, q, per_kind=5)
+    
+    suggestions = []
+    for item in results['projects']:
+        suggestions.append({'type': 'project', 'label': item['name'], 'snippet': str(item['title_snippet'] or item['snippet']), 'url': item['url']})
+    for item in results['tasks']:
+        suggestions.append({'type': 'task', 'label': item['title'], 'snippet': str(item['title_snippet'] or item['snippet']), 'url': item['url']})
+    for item in results['tickets']:
+        suggestions.append({'type': 'ticket', 'label': f"{item['ticket_number']} {item['subject']}", 'snippet': str(item['snippet'] or item['title_snippet']), 'url': item['url']})
+    for item in results['comments']:
+        suggestions.append({'type': 'comment', 'label': item['task_title'], 'snippet': str(item['snippet']), 'url': item['url']})
+    for item in results['messages']:
+        suggestions.append({'type': 'message', 'label': item['chat_name'], 'snippet': str(item['snippet']), 'url': item['url']})
+    
+    return JSONResponse({'query': q, 'results': suggestions[:12]})
+
+
 # --------------------------
 # User Management (all users can view, only admins can create)
 # --------------------------
@@ -1004,7 +979,7 @@ async def web_admin_create_user_post(
     # Create new user
     new_user = User(
         username=username,
-        hashed_password=get_password_hash(password),
+        hashed_password=await get_password_hash_async(password),
         full_name=full_name,
         email=email,
         workspace_id=user.workspace_id,
@@ -1015,6 +990,7 @@ async def web_admin_create_user_post(
     )
     db.add(new_user)
     await db.commit()
+    invalidate_workspace_directory(user.workspace_id)
     await db.refresh(new_user)
     
     return templates.TemplateResponse(
@@ -1061,7 +1037,10 @@ async def web_admin_deactivate_user(
     
     # Deactivate the user
     target_user.is_active = False
+    revoke_user_tokens(target_user)
     await db.commit()
+    invalidate_workspace_directory(target_user.workspace_id)
+    clear_attachment_grants(target_user.id)
     
     return RedirectResponse('/web/admin/users', status_code=303)
 
@@ -1071,6 +1050,7 @@ async def web_admin_deactivate_user(
 @router.get('/admin/reports/user-activity', response_class=HTMLResponse)
 async def web_admin_user_activity_report(
     request: Request,
+    job: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_session),
 ):
     """Admin page to generate user activity reports"""
@@ -1095,12 +1075,18 @@ async def web_admin_user_activity_report(
         )
     ).scalars().all()
     
+    # Start a PDF worker now so the first report does not wait for it
+    warm_report_pool()
+    
     return templates.TemplateResponse(
         'admin/user_activity_report.html',
         {
             'request': request,
             'user': user,
             'users': users,
+            'job_id': job,
+            'export_datasets': EXPORT_DATASETS,
+            'parquet_available': parquet_available(),
         },
     )
 
@@ -1111,6 +1097,7 @@ async def web_admin_generate_user_activity_pdf(
     target_user_id: int,
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
+    background: bool = Query(False),
     db: AsyncSession = Depends(get_session),
 ):
     """Generate PDF report of user activity"""
@@ -1131,547 +1118,202 @@ async def web_admin_generate_user_activity_pdf(
     if not target_user or target_user.workspace_id != user.workspace_id:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Parse date range
+    # Parse date range (whole days, so repeat requests hit the report cache)
     if start_date:
         start_dt = datetime.strptime(start_date, '%Y-%m-%d')
     else:
-        start_dt = datetime.now() - timedelta(days=30)
+        start_dt = datetime.combine(date.today() - timedelta(days=30), time.min)
     
     if end_date:
         end_dt = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
     else:
-        end_dt = datetime.now() + timedelta(days=1)
+        end_dt = datetime.combine(date.today() + timedelta(days=1), time.min)
     
-    # Gather activity data
-    # 1. Tasks created
-    tasks_created = (await db.execute(
-        select(Task)
-        .where(Task.creator_id == target_user_id)
-        .where(Task.created_at >= start_dt)
-        .where(Task.created_at < end_dt)
-        .order_by(Task.created_at.desc())
-    )).scalars().all()
+    data = await collect_user_activity(db, target_user, start_dt, end_dt)
+    filename = f"user_activity_{target_user.username}_{start_dt.strftime('%Y%m%d')}_{end_dt.strftime('%Y%m%d')}.pdf"
+    key = report_cache_key(target_user_id, start_dt, end_dt, data)
     
-    # 2. Task assignments
-    task_assignments = (await db.execute(
-        select(Task, Assignment)
-        .join(Assignment, Task.id == Assignment.task_id)
-        .where(Assignment.assignee_id == target_user_id)
-        .where(Task.created_at >= start_dt)
-        .where(Task.created_at < end_dt)
-        .order_by(Task.created_at.desc())
-    )).all()
+    pdf = get_cached_report(key)
+    if pdf is None:
+        if background or is_large_report(data):
+            job_id = start_report_job(user_id, key, data, filename)
+            return RedirectResponse(f'/web/admin/reports/user-activity?job={job_id}', status_code=303)
+        pdf = await render_report(key, data)
     
-    # 3. Task edits
-    task_edits = (await db.execute(
-        select(TaskHistory)
-        .where(TaskHistory.editor_id == target_user_id)
-        .where(TaskHistory.created_at >= start_dt)
-        .where(TaskHistory.created_at < end_dt)
-        .order_by(TaskHistory.created_at.desc())
-    )).scalars().all()
+    return Response(
+        content=pdf,
+        media_type='application/pdf',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get('/admin/reports/jobs/{job_id}')
+async def web_admin_report_job_status(request: Request, job_id: str):
+    """Poll a background report job"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    job = get_report_job(job_id, user_id)
+    if job is None:
+        return JSONResponse({'error': 'Report not found'}, status_code=404)
+    return JSONResponse({
+        'status': job['status'],
+        'error': job['error'],
+        'filename': job['filename'],
+        'download_url': f'/web/admin/reports/jobs/{job_id}/download' if job['status'] == 'done' else None,
+    })
+
+
+@router.get('/admin/reports/jobs/{job_id}/download')
+async def web_admin_report_job_download(request: Request, job_id: str):
+    """Download the PDF produced by a background report job"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return RedirectResponse('/web/login', status_code=303)
+    job = get_report_job(job_id, user_id)
+    if job is None or job['status'] != 'done':
+        raise HTTPException(status_code=404, detail="Report not found")
+    return Response(
+        content=job['pdf'],
+        media_type='application/pdf',
+        headers={'Content-Disposition': f'attachment; filename="{job["filename"]}"'}
+    )
+
+
+@router.get('/admin/reports/ticket-sla', response_class=HTMLResponse)
+async def web_admin_ticket_sla_report(request: Request, db: AsyncSession = Depends(get_session)):
+    """Ticket response and resolution percentiles per assignee and category"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return RedirectResponse('/web/login', status_code=303)
     
-    # 4. Comments - Using text() to avoid Pydantic attribute access issues
-    from sqlalchemy import text
-    try:
-        comments_result = await db.execute(
-            text("""
-                SELECT id, task_id, author_id, content, created_at 
-                FROM comment 
-                WHERE author_id = :user_id 
-                AND created_at >= :start_dt 
-                AND created_at < :end_dt 
-                ORDER BY created_at DESC
-            """),
-            {"user_id": target_user_id, "start_dt": start_dt, "end_dt": end_dt}
-        )
-        comments = comments_result.fetchall()
-    except Exception as e:
-        logger.error(f"Error fetching comments: {e}")
-        comments = []
-    
-    # 5. Projects created
-    projects_created = (await db.execute(
-        select(Project)
-        .where(Project.owner_id == target_user_id)
-        .where(Project.created_at >= start_dt)
-        .where(Project.created_at < end_dt)
-        .order_by(Project.created_at.desc())
-    )).scalars().all()
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user or not user.is_active:
+        request.session.clear()
+        return RedirectResponse('/web/login', status_code=303)
     
-    # 6. Activities logged
-    activities = (await db.execute(
-        select(Activity)
-        .where(Activity.created_by == target_user_id)
-        .where(Activity.created_at >= start_dt)
-        .where(Activity.created_at < end_dt)
-        .order_by(Activity.created_at.desc())
-    )).scalars().all()
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    # 7. Tickets closed
-    from app.models.ticket import Ticket, TicketComment
-    tickets_closed = (await db.execute(
-        select(Ticket)
-        .where(Ticket.closed_by_id == target_user_id)
-        .where(Ticket.closed_at >= start_dt)
-        .where(Ticket.closed_at < end_dt)
-        .order_by(Ticket.closed_at.desc())
-    )).scalars().all()
+    directory = await get_workspace_directory(db, user.workspace_id)
     
-    # 8. Ticket comments - Using raw SQL to avoid Pydantic issues
-    try:
-        ticket_comments_result = await db.execute(
-            text("""
-                SELECT id, ticket_id, author_id, user_id, content, is_internal, created_at 
-                FROM ticketcomment 
-                WHERE (author_id = :user_id OR user_id = :user_id)
-                AND created_at >= :start_dt 
-                AND created_at < :end_dt 
-                ORDER BY created_at DESC
-            """),
-            {"user_id": target_user_id, "start_dt": start_dt, "end_dt": end_dt}
-        )
-        ticket_comments = ticket_comments_result.fetchall()
-    except Exception as e:
-        logger.error(f"Error fetching ticket comments: {e}")
-        ticket_comments = []
-    
-    # 9. Tickets assigned
-    tickets_assigned = (await db.execute(
-        select(Ticket)
-        .where(Ticket.assigned_to_id == target_user_id)
-        .where(Ticket.created_at >= start_dt)
-        .where(Ticket.created_at < end_dt)
-        .order_by(Ticket.created_at.desc())
-    )).scalars().all()
+    def label_assignees(rows):
+        for row in rows:
+            row['label'] = directory.label(row['group']) if row['group'] else 'Unassigned'
+        return sorted(rows, key=lambda r: r['label'].lower())
     
-    # Generate PDF
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-    from reportlab.lib import colors
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-    
-    # Create PDF in memory
-    import io
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    
-    # Container for PDF elements
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1F2937'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-    )
+    metrics = {}
+    for metric in ('first_response', 'resolution'):
+        metrics[metric] = {
+            'assignee': label_assignees(await ticket_sla_percentiles(db, user.workspace_id, metric, 'assignee')),
+            'category': await ticket_sla_percentiles(db, user.workspace_id, metric, 'category'),
+        }
     
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#374151'),
-        spaceAfter=12,
-        spaceBefore=20,
+    return templates.TemplateResponse(
+        'admin/ticket_sla_report.html',
+        {
+            'request': request,
+            'user': user,
+            'metrics': metrics,
+            'status_durations': await ticket_status_durations(db, user.workspace_id, 'category'),
+        },
     )
+
+
+async def _admin_user(request: Request, db: AsyncSession) -> Optional[User]:
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return None
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    return user if user and user.is_active and user.is_admin else None
+
+
+@router.get('/admin/perf', response_class=HTMLResponse)
+async def web_admin_perf(request: Request, db: AsyncSession = Depends(get_session)):
+    """Per-route latency, query counts, slow statements and N+1 suspects"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return RedirectResponse('/web/login', status_code=303)
+    user = await _admin_user(request, db)
+    if not user:
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    subheading_style = ParagraphStyle(
-        'CustomSubheading',
-        parent=styles['Heading3'],
-        fontSize=12,
-        textColor=colors.HexColor('#6B7280'),
-        spaceAfter=8,
+    return templates.TemplateResponse(
+        'admin/perf.html',
+        {
+            'request': request,
+            'user': user,
+            'profiling': profiling_summary(),
+            'hasher': password_hasher_stats(),
+            'page_cache': page_cache_stats(),
+            'loop_lag': loop_monitor.stats(),
+            'loop_stalls': list(reversed(loop_monitor.stalls)),
+        },
     )
+
+
+@router.get('/admin/perf/metrics')
+async def web_admin_perf_metrics(request: Request, db: AsyncSession = Depends(get_session)):
+    """Prometheus text export; a signed-in admin or ``Bearer $METRICS_TOKEN``"""
+    from app.core.config import get_settings
+    import hmac
     
-    # Title
-    elements.append(Paragraph(f"User Activity Report", title_style))
-    elements.append(Paragraph(f"{target_user.full_name or target_user.username}", heading_style))
-    elements.append(Paragraph(
-        f"Period: {start_dt.strftime('%B %d, %Y')} - {end_dt.strftime('%B %d, %Y')}",
-        subheading_style
-    ))
-    elements.append(Paragraph(
-        f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}",
-        subheading_style
-    ))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Summary section with enhanced metrics
-    elements.append(Paragraph("Activity Summary", heading_style))
-    summary_data = [
-        ['Activity Type', 'Count'],
-        ['Tasks Created', str(len(tasks_created))],
-        ['Task Assignments Received', str(len(task_assignments))],
-        ['Task Edits Made', str(len(task_edits))],
-        ['Task Comments Posted', str(len(comments))],
-        ['Projects Created', str(len(projects_created))],
-        ['Activities Logged (Calls/Emails/Meetings)', str(len(activities))],
-        ['Tickets Assigned', str(len(tickets_assigned))],
-        ['Ticket Comments Posted', str(len(ticket_comments))],
-        ['Tickets Closed', str(len(tickets_closed))],
-    ]
+    metrics_token = get_settings().metrics_token
+    authorization = request.headers.get('authorization', '')
+    token_ok = bool(metrics_token) and hmac.compare_digest(authorization, f'Bearer {metrics_token}')
+    if not token_ok and not await _admin_user(request, db):
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    summary_table = Table(summary_data, colWidths=[4*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    elements.append(summary_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # OVERDUE TASKS SECTION (Critical!)
-    from datetime import date as date_type
-    now = datetime.now()
-    now_date = now.date()
-    
-    # Helper function to handle both date and datetime
-    def is_overdue(due_date):
-        if not due_date:
-            return False
-        # Convert to date if it's a datetime
-        if isinstance(due_date, datetime):
-            due_date = due_date.date()
-        return due_date < now_date
-    
-    overdue_tasks = []
-    for task in tasks_created:
-        if task.due_date and is_overdue(task.due_date) and task.status.value not in ['completed', 'archived']:
-            overdue_tasks.append(task)
-    for task, assignment in task_assignments:
-        if task.due_date and is_overdue(task.due_date) and task.status.value not in ['completed', 'archived']:
-            if task not in overdue_tasks:
-                overdue_tasks.append(task)
-    
-    if overdue_tasks:
-        elements.append(Paragraph("⚠️ OVERDUE TASKS", heading_style))
-        overdue_data = [['Task Title', 'Due Date', 'Days Overdue', 'Priority', 'Status']]
-        for task in sorted(overdue_tasks, key=lambda t: t.due_date if isinstance(t.due_date, date_type) else t.due_date.date())[:15]:
-            task_due_date = task.due_date if isinstance(task.due_date, date_type) else task.due_date.date()
-            days_overdue = (now_date - task_due_date).days
-            overdue_data.append([
-                task.title[:40],
-                task_due_date.strftime('%Y-%m-%d'),
-                str(days_overdue),
-                task.priority.value.title(),
-                task.status.value.replace('_', ' ').title(),
-            ])
-        
-        overdue_table = Table(overdue_data, colWidths=[2.3*inch, 1*inch, 1.2*inch, 0.9*inch, 1*inch])
-        overdue_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#DC2626')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightpink, colors.mistyrose]),
-        ]))
-        elements.append(overdue_table)
-        elements.append(Spacer(1, 0.3*inch))
-    
-    # Tasks Created with enhanced details
-    elements.append(Paragraph("Tasks Created", heading_style))
-    if tasks_created:
-        task_data = [['Date Created', 'Title', 'Due Date', 'Priority', 'Status']]
-        for task in tasks_created[:25]:
-            due_str = task.due_date.strftime('%Y-%m-%d') if task.due_date else 'No due date'
-            if task.due_date and is_overdue(task.due_date) and task.status.value not in ['completed', 'archived']:
-                due_str += ' (OVERDUE)'
-            task_data.append([
-                task.created_at.strftime('%Y-%m-%d'),
-                task.title[:35],
-                due_str,
-                task.priority.value.title(),
-                task.status.value.replace('_', ' ').title(),
-            ])
-        
-        task_table = Table(task_data, colWidths=[1.1*inch, 2*inch, 1.3*inch, 0.9*inch, 1.1*inch])
-        task_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10B981')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ]))
-        elements.append(task_table)
-    else:
-        elements.append(Paragraph("No tasks created during this period.", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Task Assignments Received
-    elements.append(Paragraph("Task Assignments Received", heading_style))
-    if task_assignments:
-        assignment_data = [['Date', 'Title', 'Assigned By', 'Due Date', 'Status']]
-        for task, assignment in task_assignments[:20]:
-            # Task creator is the one who assigned it
-            assigner = (await db.execute(select(User).where(User.id == task.creator_id))).scalar_one_or_none()
-            assigner_name = assigner.full_name or assigner.username if assigner else 'Unknown'
-            due_str = task.due_date.strftime('%Y-%m-%d') if task.due_date else 'None'
-            if task.due_date and is_overdue(task.due_date) and task.status.value not in ['completed', 'archived']:
-                due_str += ' (LATE)'
-            assignment_data.append([
-                task.created_at.strftime('%Y-%m-%d'),
-                task.title[:30],
-                assigner_name[:15],
-                due_str,
-                task.status.value.replace('_', ' ').title(),
-            ])
-        
-        assignment_table = Table(assignment_data, colWidths=[1*inch, 1.8*inch, 1.2*inch, 1.2*inch, 1.2*inch])
-        assignment_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#6366F1')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ]))
-        elements.append(assignment_table)
-    else:
-        elements.append(Paragraph("No task assignments received during this period.", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Task Edits
-    elements.append(Paragraph("Recent Task Edits", heading_style))
-    if task_edits:
-        edit_data = [['Date', 'Task ID', 'Field Changed', 'Old Value', 'New Value']]
-        for edit in task_edits[:15]:  # Limit to first 15
-            edit_data.append([
-                edit.created_at.strftime('%Y-%m-%d %H:%M'),
-                str(edit.task_id),
-                edit.field.replace('_', ' ').title(),
-                (edit.old_value or 'None')[:20],
-                (edit.new_value or 'None')[:20],
-            ])
-        
-        edit_table = Table(edit_data, colWidths=[1.3*inch, 0.7*inch, 1.2*inch, 1.5*inch, 1.5*inch])
-        edit_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#F59E0B')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ]))
-        elements.append(edit_table)
-    else:
-        elements.append(Paragraph("No task edits made during this period.", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Comments
-    elements.append(Paragraph("Recent Comments", heading_style))
-    if comments:
-        comment_data = [['Date', 'Task ID', 'Comment']]
-        for comment in comments[:10]:  # Limit to first 10
-            # comment is a tuple: (id, task_id, author_id, content, created_at)
-            comment_id, task_id, author_id, content, created_at = comment
-            comment_data.append([
-                created_at.strftime('%Y-%m-%d %H:%M') if isinstance(created_at, datetime) else str(created_at)[:16],
-                str(task_id),
-                (content or '')[:60],
-            ])
-        
-        comment_table = Table(comment_data, colWidths=[1.5*inch, 0.8*inch, 4*inch])
-        comment_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#8B5CF6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ]))
-        elements.append(comment_table)
-    else:
-        elements.append(Paragraph("No comments posted during this period.", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
+    gauges = {f'crm_password_hasher_{k}': v for k, v in password_hasher_stats().items()}
+    gauges.update({f'crm_page_cache_{k}': v for k, v in page_cache_stats().items()})
+    gauges.update({f'crm_loop_lag_{k}': float(v) for k, v in loop_monitor.stats().items()})
+    return Response(render_prometheus(gauges), media_type='text/plain; version=0.0.4')
+
+
+@router.get('/admin/reports/export/{dataset}')
+async def web_admin_export_dataset(
+    request: Request,
+    dataset: str,
+    export_format: str = Query('csv', alias='format'),
+    columns: Optional[str] = Query(None),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    user: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_session),
+):
+    """Stream a workspace-wide dataset as CSV or Parquet"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return RedirectResponse('/web/login', status_code=303)
     
-    # Projects Created
-    elements.append(Paragraph("Projects Created", heading_style))
-    if projects_created:
-        from app.models.project_member import ProjectMember
-        project_data = [['Date', 'Project Name', 'Status', 'Members']]
-        for project in projects_created[:15]:
-            member_count = (await db.execute(
-                select(ProjectMember).where(ProjectMember.project_id == project.id)
-            )).scalars().all()
-            project_data.append([
-                project.created_at.strftime('%Y-%m-%d'),
-                project.name[:40],
-                project.status.value.title(),
-                str(len(member_count)),
-            ])
-        
-        project_table = Table(project_data, colWidths=[1.1*inch, 3*inch, 1.1*inch, 1.1*inch])
-        project_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#8B5CF6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lavender]),
-        ]))
-        elements.append(project_table)
-    else:
-        elements.append(Paragraph("No projects created during this period.", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Activities Logged (Calls, Emails, Meetings, Notes)
-    elements.append(Paragraph("Activities Logged (Calls, Emails, Meetings, Notes)", heading_style))
-    if activities:
-        activity_data = [['Date', 'Type', 'Subject', 'Related To']]
-        for activity in activities[:15]:
-            related = ''
-            if activity.project_id:
-                proj = (await db.execute(select(Project).where(Project.id == activity.project_id))).scalar_one_or_none()
-                related = f"Project: {proj.name[:20]}" if proj else 'Project'
-            elif activity.contact_id:
-                related = f'Contact ID: {activity.contact_id}'
-            
-            activity_data.append([
-                activity.created_at.strftime('%Y-%m-%d'),
-                activity.activity_type.replace('_', ' ').title(),
-                (activity.subject or '')[:35],
-                related[:25],
-            ])
-        
-        activity_table = Table(activity_data, colWidths=[1*inch, 1.1*inch, 2.5*inch, 1.7*inch])
-        activity_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#F59E0B')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgoldenrodyellow]),
-        ]))
-        elements.append(activity_table)
-    else:
-        elements.append(Paragraph("No activities logged during this period.", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Ticket Comments Posted
-    elements.append(Paragraph("Ticket Comments Posted", heading_style))
-    if ticket_comments:
-        tcomment_data = [['Date', 'Ticket ID', 'Comment Preview', 'Internal']]
-        for tc in ticket_comments[:15]:
-            # tc is a tuple: (id, ticket_id, author_id, user_id, content, is_internal, created_at)
-            tc_id, ticket_id, author_id, user_id, content, is_internal, created_at = tc
-            tcomment_data.append([
-                created_at.strftime('%Y-%m-%d') if isinstance(created_at, datetime) else str(created_at)[:10],
-                str(ticket_id),
-                (content or '')[:45],
-                'Yes' if is_internal else 'No',
-            ])
-        
-        tcomment_table = Table(tcomment_data, colWidths=[1.1*inch, 1*inch, 3*inch, 1.2*inch])
-        tcomment_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#06B6D4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightblue]),
-        ]))
-        elements.append(tcomment_table)
-    else:
-        elements.append(Paragraph("No ticket comments posted during this period.", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Tickets Assigned to User
-    elements.append(Paragraph("Tickets Assigned to User", heading_style))
-    if tickets_assigned:
-        tassigned_data = [['Date Assigned', 'Ticket #', 'Subject', 'Priority', 'Status']]
-        for ticket in tickets_assigned[:15]:
-            tassigned_data.append([
-                ticket.created_at.strftime('%Y-%m-%d'),
-                ticket.ticket_number,
-                ticket.subject[:35],
-                ticket.priority.title(),
-                ticket.status.title(),
-            ])
-        
-        tassigned_table = Table(tassigned_data, colWidths=[1.2*inch, 1.1*inch, 2.2*inch, 0.9*inch, 0.9*inch])
-        tassigned_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#14B8A6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ]))
-        elements.append(tassigned_table)
-    else:
-        elements.append(Paragraph("No tickets assigned to this user during this period.", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Tickets Closed
-    elements.append(Paragraph("Tickets Closed", heading_style))
-    if tickets_closed:
-        ticket_data = [['Date Closed', 'Ticket #', 'Subject', 'Priority']]
-        for ticket in tickets_closed[:20]:  # Limit to first 20
-            ticket_data.append([
-                ticket.closed_at.strftime('%Y-%m-%d %H:%M'),
-                ticket.ticket_number,
-                ticket.subject[:40],
-                ticket.priority.title(),
-            ])
-        
-        ticket_table = Table(ticket_data, colWidths=[1.5*inch, 1.3*inch, 2.5*inch, 1*inch])
-        ticket_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#EF4444')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ]))
-        elements.append(ticket_table)
-    else:
-        elements.append(Paragraph("No tickets closed during this period.", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
+    current_user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not current_user or not current_user.is_active:
+        request.session.clear()
+        return RedirectResponse('/web/login', status_code=303)
     
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    # Return PDF file
-    from fastapi.responses import StreamingResponse
-    filename = f"user_activity_{target_user.username}_{start_dt.strftime('%Y%m%d')}_{end_dt.strftime('%Y%m%d')}.pdf"
+    try:
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    
+    try:
+        body = stream_export(
+            dataset, current_user.workspace_id, export_format, columns, start_dt, end_dt, user_id=user,
+        )
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    suffix = f"_{start_dt.strftime('%Y%m%d')}" if start_dt else ''
+    filename = f"{dataset}{suffix}_{date.today().strftime('%Y%m%d')}.{export_format}"
+    media_type = 'text/csv; charset=utf-8' if export_format == 'csv' else 'application/vnd.apache.parquet'
     return StreamingResponse(
-        buffer,
-        media_type='application/pdf',
-        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        body,
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"', 'Cache-Control': 'no-store'},
     )
 
 
@@ -1705,6 +1347,7 @@ async def web_admin_activate_user(
     # Activate the user
     target_user.is_active = True
     await db.commit()
+    invalidate_workspace_directory(target_user.workspace_id)
     
     return RedirectResponse('/web/admin/users', status_code=303)
 
@@ -1742,7 +1385,10 @@ async def web_admin_toggle_admin(
     
     # Toggle admin status
     target_user.is_admin = not target_user.is_admin
+    # API tokens carry the role; make them sign in again for one with the new role
+    revoke_user_tokens(target_user)
     await db.commit()
+    invalidate_workspace_directory(target_user.workspace_id)
     
     return RedirectResponse('/web/admin/users', status_code=303)
 
@@ -1778,6 +1424,7 @@ async def web_admin_toggle_ticket_visibility(
     # Toggle ticket visibility
     target_user.can_see_all_tickets = not target_user.can_see_all_tickets
     await db.commit()
+    invalidate_workspace_directory(target_user.workspace_id)
     
     return RedirectResponse('/web/admin/users', status_code=303)
 
@@ -1814,8 +1461,11 @@ async def web_admin_delete_user(
         raise HTTPException(status_code=403, detail="User not in your workspace")
     
     # Hard delete: Remove user from database
+    revoke_user_tokens(target_user)
     await db.delete(target_user)
     await db.commit()
+    invalidate_workspace_directory(target_user.workspace_id)
+    clear_attachment_grants(target_user.id)
     
     return RedirectResponse('/web/admin/users', status_code=303)
 
@@ -1853,8 +1503,7 @@ async def web_admin_change_user_password(
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
     
     # Hash and update password
-    from app.core.security import get_password_hash
-    target_user.hashed_password = get_password_hash(new_password)
+    target_user.hashed_password = await get_password_hash_async(new_password)
     
     await db.commit()
     
@@ -1906,7 +1555,9 @@ async def web_admin_backups(request: Request, db: AsyncSession = Depends(get_ses
         'request': request,
         'user': user,
         'stats': stats,
-        'backups': backups
+        'backups': backups,
+        'progress': backup_manager.get_progress(),
+        'restore_status': backup_manager.get_restore_status()
     })
 
 
@@ -1924,13 +1575,26 @@ async def web_admin_backup_create(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     from app.core.backup import backup_manager
-    # Always create full backup with attachments
-    backup_file = backup_manager.create_backup(is_manual=True, include_attachments=True)
-    
-    if backup_file:
-        return RedirectResponse('/web/admin/backups?success=backup_created', status_code=303)
+    # Always create full backup with attachments; runs in a worker thread,
+    # progress is shown on the backups page
+    if backup_manager.start_backup_job(is_manual=True, include_attachments=True):
+        return RedirectResponse('/web/admin/backups?success=backup_started', status_code=303)
     else:
-        return RedirectResponse('/web/admin/backups?error=backup_failed', status_code=303)
+        return RedirectResponse('/web/admin/backups?error=backup_running', status_code=303)
+
+
+@router.get('/admin/backups/progress')
+async def web_admin_backup_progress(request: Request, db: AsyncSession = Depends(get_session)):
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user or not user.is_active or not user.is_admin:
+        return JSONResponse({'error': 'Admin access required'}, status_code=403)
+    
+    from app.core.backup import backup_manager
+    return JSONResponse(backup_manager.get_progress())
 
 
 @router.get('/admin/backups/download/{filename}')
@@ -1948,17 +1612,17 @@ async def web_admin_backup_download(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     from app.core.backup import backup_manager
-    from fastapi.responses import FileResponse
+    from app.core.file_streaming import ranged_file_response
     
     backup_path = backup_manager.backup_dir / filename
     if not backup_path.exists():
         raise HTTPException(status_code=404, detail="Backup file not found")
     
-    return FileResponse(
-        path=str(backup_path),
-        filename=filename,
-        media_type='application/octet-stream'
-    )
+    # Manifest-based backups are expanded into a self-contained zip for download
+    backup_path = await asyncio.to_thread(backup_manager.export_portable, backup_path)
+    
+    # Streamed in chunks; Range requests let large downloads resume
+    return ranged_file_response(request, backup_path, filename=filename)
 
 
 @router.post('/admin/backups/upload')
@@ -1975,22 +1639,112 @@ async def web_admin_backup_upload(
     if not user or not user.is_active or not user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    from app.core.backup import backup_manager
+    from app.core.backup import backup_manager, UPLOAD_CHUNK_SIZE
     
     # Validate file extension
     if not backup_file.filename.endswith(('.db', '.zip')):
         return RedirectResponse('/web/admin/backups?error=invalid_file', status_code=303)
     
-    # Read file content
-    content = await backup_file.read()
+    # Copy to disk chunk by chunk (plain form fallback for the chunked uploader)
+    upload_id = backup_manager.begin_upload(backup_file.filename)
+    try:
+        received = 0
+        while chunk := await backup_file.read(UPLOAD_CHUNK_SIZE):
+            received = await asyncio.to_thread(backup_manager.append_upload_chunk, upload_id, received, chunk)
+        saved_path, digest = await asyncio.to_thread(backup_manager.finish_upload, upload_id)
+    except ValueError:
+        backup_manager.abort_upload(upload_id)
+        return RedirectResponse('/web/admin/backups?error=upload_failed', status_code=303)
     
-    # Save the uploaded backup
-    saved_path = backup_manager.save_uploaded_backup(content, backup_file.filename)
+    return RedirectResponse(f'/web/admin/backups?success=backup_uploaded&sha256={digest}', status_code=303)
+
+
+@router.post('/admin/backups/upload/start')
+async def web_admin_backup_upload_start(
+    request: Request,
+    filename: str = Form(...),
+    db: AsyncSession = Depends(get_session)
+):
+    """Begin a chunked backup upload; the browser then PUTs chunks in order"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
     
-    if saved_path:
-        return RedirectResponse('/web/admin/backups?success=backup_uploaded', status_code=303)
-    else:
-        return RedirectResponse('/web/admin/backups?error=upload_failed', status_code=303)
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user or not user.is_active or not user.is_admin:
+        return JSONResponse({'error': 'Admin access required'}, status_code=403)
+    
+    from app.core.backup import backup_manager, UPLOAD_CHUNK_SIZE
+    try:
+        upload_id = backup_manager.begin_upload(filename)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    return JSONResponse({'upload_id': upload_id, 'chunk_size': UPLOAD_CHUNK_SIZE})
+
+
+@router.put('/admin/backups/upload/{upload_id}')
+async def web_admin_backup_upload_chunk(
+    request: Request,
+    upload_id: str,
+    offset: int = Query(...),
+    db: AsyncSession = Depends(get_session)
+):
+    """Append one chunk (raw request body) to an upload, verifying X-Chunk-SHA256 if sent"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user or not user.is_active or not user.is_admin:
+        return JSONResponse({'error': 'Admin access required'}, status_code=403)
+    
+    from app.core.backup import backup_manager, UPLOAD_CHUNK_SIZE
+    
+    # Read the body incrementally so an oversized chunk is rejected early
+    parts = []
+    size = 0
+    async for piece in request.stream():
+        size += len(piece)
+        if size > UPLOAD_CHUNK_SIZE:
+            return JSONResponse({'error': 'Chunk too large'}, status_code=413)
+        parts.append(piece)
+    
+    try:
+        received = await asyncio.to_thread(
+            backup_manager.append_upload_chunk, upload_id, offset, b''.join(parts),
+            request.headers.get('x-chunk-sha256')
+        )
+    except KeyError:
+        return JSONResponse({'error': 'Unknown upload'}, status_code=404)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=409)
+    return JSONResponse({'received': received})
+
+
+@router.post('/admin/backups/upload/{upload_id}/finish')
+async def web_admin_backup_upload_finish(
+    request: Request,
+    upload_id: str,
+    sha256: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_session)
+):
+    """Verify and store a completed chunked upload"""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user or not user.is_active or not user.is_admin:
+        return JSONResponse({'error': 'Admin access required'}, status_code=403)
+    
+    from app.core.backup import backup_manager
+    try:
+        saved_path, digest = await asyncio.to_thread(backup_manager.finish_upload, upload_id, sha256)
+    except KeyError:
+        return JSONResponse({'error': 'Unknown upload'}, status_code=404)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    return JSONResponse({'filename': saved_path.name, 'sha256': digest})
 
 
 @router.post('/admin/backups/restore')
@@ -2011,15 +1765,28 @@ async def web_admin_backup_restore(
     from pathlib import Path
     
     backup_path = backup_manager.backup_dir / backup_file
-    if not backup_path.exists():
+    if Path(backup_file).name != backup_file or not backup_path.exists():
         raise HTTPException(status_code=404, detail="Backup file not found")
     
-    success = backup_manager.restore_from_backup(backup_path)
-    
-    if success:
-        return RedirectResponse('/web/admin/backups?success=restore_complete', status_code=303)
+    # Restore runs in a worker thread; the page polls its status
+    if backup_manager.start_restore_job(backup_path):
+        return RedirectResponse('/web/admin/backups?success=restore_started', status_code=303)
     else:
-        return RedirectResponse('/web/admin/backups?error=restore_failed', status_code=303)
+        return RedirectResponse('/web/admin/backups?error=backup_running', status_code=303)
+
+
+@router.get('/admin/backups/restore/status')
+async def web_admin_backup_restore_status(request: Request, db: AsyncSession = Depends(get_session)):
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user or not user.is_active or not user.is_admin:
+        return JSONResponse({'error': 'Admin access required'}, status_code=403)
+    
+    from app.core.backup import backup_manager
+    return JSONResponse(backup_manager.get_restore_status())
 
 
 @router.post('/admin/backups/delete')
@@ -2038,7 +1805,7 @@ async def web_admin_backup_delete(
     
     from app.core.backup import backup_manager
     
-    success = backup_manager.delete_backup(backup_file)
+    success = await asyncio.to_thread(backup_manager.delete_backup, backup_file)
     
     if success:
         return RedirectResponse('/web/admin/backups?success=backup_deleted', status_code=303)
@@ -2443,8 +2210,7 @@ async def web_admin_comment_logs(request: Request, db: AsyncSession = Depends(ge
                 'modified': stat.st_mtime
             })
     
-    return enhanced_template_response('admin/comment_logs.html', {
-        'request': request,
+    return templates.TemplateResponse(request, 'admin/comment_logs.html', {
         'logs': logs,
         'user': user
     })
@@ -2727,6 +2493,7 @@ async def web_admin_site_settings_save(
             workspace.timezone = timezone
             
             await db.commit()
+            invalidate_workspace(workspace.id)
             request.session['success_message'] = 'Site settings saved successfully!'
         else:
             request.session['error_message'] = 'Workspace not found'
@@ -2762,22 +2529,20 @@ async def web_admin_site_settings_upload_logo(
             request.session['error_message'] = 'Invalid file type. Please upload PNG, JPG, GIF, or SVG.'
             return RedirectResponse('/web/admin/site-settings', status_code=303)
         
-        # Create uploads directory if it doesn't exist
-        import os
-        uploads_dir = os.path.join(os.getcwd(), 'app', 'uploads', 'branding')
-        os.makedirs(uploads_dir, exist_ok=True)
-        
         # Generate unique filename
+        import os
         import uuid
         from pathlib import Path
         file_extension = Path(logo.filename).suffix
         filename = f"logo_{uuid.uuid4().hex}{file_extension}"
-        file_path = os.path.join(uploads_dir, filename)
         
         # Save file
-        with open(file_path, 'wb') as f:
-            content = await logo.read()
-            f.write(content)
+        try:
+            stored = await save_upload(logo, 'branding', BRANDING_LOGO_MAX_SIZE, stored_name=filename)
+        except UploadTooLarge as e:
+            request.session['error_message'] = str(e)
+            return RedirectResponse('/web/admin/site-settings', status_code=303)
+        schedule_thumbnails(stored.path, stored.content_type)
         
         # Update workspace
         workspace = (await db.execute(
@@ -2790,9 +2555,11 @@ async def web_admin_site_settings_upload_logo(
                 old_path = os.path.join(os.getcwd(), 'app', workspace.logo_url.lstrip('/'))
                 if os.path.exists(old_path):
                     os.remove(old_path)
+                remove_thumbnails(Path(old_path))
             
-            workspace.logo_url = f"/uploads/branding/{filename}"
+            workspace.logo_url = stored.url
             await db.commit()
+            invalidate_workspace(workspace.id)
             request.session['success_message'] = 'Logo uploaded successfully!'
         
     except Exception as e:
@@ -2890,24 +2657,21 @@ async def web_my_tasks(
     tasks_stmt = tasks_stmt.order_by(Task.created_at.desc())
     tasks = (await db.execute(tasks_stmt)).scalars().all()
 
-    # Build assignees map {task_id: ["Name or Email", ...]}
+    # Build assignees map {task_id: ["Name or Email", ...]} from the cached user directory
+    directory = await get_workspace_directory(db, user.workspace_id)
+    task_ids = [t.id for t in tasks]
     assocs = (
         await db.execute(
-            select(Assignment.task_id, User.full_name, User.email)
-            .join(User, Assignment.assignee_id == User.id)
-            .join(Task, Assignment.task_id == Task.id)
-            .join(Project, Task.project_id == Project.id)
-            .where(Project.workspace_id == user.workspace_id)
+            select(Assignment.task_id, Assignment.assignee_id)
+            .where(Assignment.task_id.in_(task_ids) if task_ids else False)
         )
     ).all()
     assignees_map: dict[int, list[str]] = {}
-    for task_id_val, full_name, email in assocs:
-        label = (full_name or '').strip() or email
-        assignees_map.setdefault(task_id_val, []).append(label)
+    for task_id_val, assignee_id_val in assocs:
+        if assignee_id_val in directory.by_id:
+            assignees_map.setdefault(task_id_val, []).append(directory.label(assignee_id_val))
 
-    users = (
-        await db.execute(select(User).where(User.workspace_id == user.workspace_id, User.is_active == True).order_by(User.full_name, User.email))
-    ).scalars().all()
+    users = directory.active()
     projects = (
         await db.execute(select(Project).where(Project.workspace_id == user.workspace_id).order_by(Project.name))
     ).scalars().all()
@@ -2928,6 +2692,7 @@ async def web_my_tasks(
 # Projects (minimal to enable navigation)
 # --------------------------
 @router.get('/projects', response_class=HTMLResponse)
+@cached_page
 async def web_projects(request: Request, db: AsyncSession = Depends(get_session)):
     user_id = request.session.get('user_id')
     if not user_id:
@@ -3292,18 +3057,16 @@ async def web_project_members_remove(
 
 
 # Project detail + simple Kanban
-@router.get('/projects/{project_id}', response_class=HTMLResponse)
-async def web_project_detail(request: Request, project_id: int, db: AsyncSession = Depends(get_session)):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return RedirectResponse('/web/login', status_code=303)
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        request.session.clear()
-        return RedirectResponse('/web/login', status_code=303)
-    
-    result = await db.execute(select(Project).where(Project.id == project_id, Project.workspace_id == user.workspace_id))
-    project = result.scalar_one_or_none()
+KANBAN_COLUMN_PAGE_SIZE = 50
+KANBAN_STATUSES = (TaskStatus.todo, TaskStatus.in_progress, TaskStatus.blocked, TaskStatus.done)
+KANBAN_DESCRIPTION_PREVIEW = 280
+
+
+async def _get_board_project(db: AsyncSession, user: User, project_id: int) -> Project:
+    """Load a project for the board, enforcing workspace and membership access."""
+    project = (await db.execute(
+        select(Project).where(Project.id == project_id, Project.workspace_id == user.workspace_id)
+    )).scalar_one_or_none()
     if not project:
         raise HTTPException(status_code=404, detail='Project not found')
     
@@ -3311,79 +3074,168 @@ async def web_project_detail(request: Request, project_id: int, db: AsyncSession
     if not user.is_admin:
         from app.models.project_member import ProjectMember
         member = (await db.execute(
-            select(ProjectMember).where(
+            select(ProjectMember.id).where(
                 ProjectMember.project_id == project_id,
-                ProjectMember.user_id == user_id
+                ProjectMember.user_id == user.id
             )
         )).scalar_one_or_none()
         if not member:
             raise HTTPException(status_code=403, detail='You do not have access to this project')
-    # Fetch only non-archived tasks for board view (archived tasks go to the Done tab in tasks/list)
-    tasks_result = await db.execute(
-        select(Task).where(Task.project_id == project_id, Task.is_archived == False)
+    return project
+
+
+def _kanban_card_columns():
+    """Slim task projection for board cards (no full ORM rows)."""
+    from sqlalchemy import func
+    return (
+        Task.id, Task.title, Task.status, Task.priority, Task.due_date, Task.due_time,
+        func.substr(Task.description, 1, KANBAN_DESCRIPTION_PREVIEW).label('description'),
     )
-    tasks = tasks_result.scalars().all()
-    
-    # Organize tasks by status for kanban columns
-    columns = {
-        TaskStatus.todo: [],
-        TaskStatus.in_progress: [],
-        TaskStatus.blocked: [],
-        TaskStatus.done: []
-    }
-    for t in tasks:
-        if t.status in columns:
-            columns[t.status].append(t)
-    
-    # Build assignees map: {task_id: [(full_name, email), ...]}
+
+
+async def _subtask_counts(db: AsyncSession, task_ids: list[int]) -> dict[int, dict]:
+    """Subtask totals per task via a single GROUP BY: {task_id: {'total': x, 'completed': y}}."""
+    if not task_ids:
+        return {}
+    from sqlalchemy import case, func
+    from app.models.subtask import Subtask
+    rows = (await db.execute(
+        select(
+            Subtask.task_id,
+            func.count(Subtask.id),
+            func.sum(case((Subtask.is_completed == True, 1), else_=0)),
+        )
+        .where(Subtask.task_id.in_(task_ids))
+        .group_by(Subtask.task_id)
+    )).all()
+    return {task_id: {'total': total, 'completed': int(completed or 0)} for task_id, total, completed in rows}
+
+
+async def _kanban_card_context(db: AsyncSession, directory, cards) -> dict:
+    """Assignee labels and subtask counts for one batch of board cards."""
+    task_ids = [c.id for c in cards]
     assignees_map = {}
-    if tasks:
-        task_ids = [t.id for t in tasks]
+    if task_ids:
         assignments = (await db.execute(
-            select(Assignment.task_id, User.full_name, User.email)
-            .join(User, User.id == Assignment.assignee_id)
+            select(Assignment.task_id, Assignment.assignee_id)
             .where(Assignment.task_id.in_(task_ids))
         )).all()
-        for task_id, full_name, email in assignments:
-            if task_id not in assignees_map:
-                assignees_map[task_id] = []
-            assignees_map[task_id].append((full_name or email, email))
+        for task_id, assignee_id in assignments:
+            person = directory.get(assignee_id)
+            if person:
+                assignees_map.setdefault(task_id, []).append((person.display_name, person.email))
+    return {
+        'assignees_map': assignees_map,
+        'subtask_stats': await _subtask_counts(db, task_ids),
+    }
+
+
+@router.get('/projects/{project_id}', response_class=HTMLResponse)
+async def web_project_detail(request: Request, project_id: int, db: AsyncSession = Depends(get_session)):
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return RedirectResponse('/web/login', status_code=303)
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user:
+        request.session.clear()
+        return RedirectResponse('/web/login', status_code=303)
     
-    # Fetch subtasks for all tasks
-    from app.models.subtask import Subtask
-    subtasks_map = {}  # {task_id: [subtasks]}
-    subtask_stats = {}  # {task_id: {'total': x, 'completed': y}}
-    if tasks:
-        task_ids = [t.id for t in tasks]
-        subtasks = (await db.execute(
-            select(Subtask).where(Subtask.task_id.in_(task_ids)).order_by(Subtask.order)
-        )).scalars().all()
-        
-        for subtask in subtasks:
-            if subtask.task_id not in subtasks_map:
-                subtasks_map[subtask.task_id] = []
-                subtask_stats[subtask.task_id] = {'total': 0, 'completed': 0}
-            subtasks_map[subtask.task_id].append(subtask)
-            subtask_stats[subtask.task_id]['total'] += 1
-            if subtask.is_completed:
-                subtask_stats[subtask.task_id]['completed'] += 1
-    
-    # Fetch all active users in workspace for assignment dropdown
-    users = (await db.execute(select(User).where(User.workspace_id == user.workspace_id, User.is_active == True).order_by(User.full_name, User.email))).scalars().all()
+    project = await _get_board_project(db, user, project_id)
+    
+    # Only non-archived tasks are on the board (archived tasks go to the Done tab in tasks/list)
+    from sqlalchemy import func
+    board_filter = (Task.project_id == project_id, Task.is_archived == False)
+    column_totals = dict((await db.execute(
+        select(Task.status, func.count(Task.id)).where(*board_filter).group_by(Task.status)
+    )).all())
+    
+    # First page of every column in one query, ranked per status
+    ranked = (
+        select(*_kanban_card_columns(), func.row_number().over(partition_by=Task.status, order_by=Task.id).label('rn'))
+        .where(*board_filter)
+        .subquery()
+    )
+    cards = (await db.execute(
+        select(ranked).where(ranked.c.rn <= KANBAN_COLUMN_PAGE_SIZE).order_by(ranked.c.id)
+    )).all()
+    
+    # Organize cards by status for kanban columns
+    columns = {status: [] for status in KANBAN_STATUSES}
+    for card in cards:
+        if card.status in columns:
+            columns[card.status].append(card)
+    column_next = {
+        status: items[-1].id if column_totals.get(status, 0) > len(items) else None
+        for status, items in columns.items()
+    }
+    
+    directory = await get_workspace_directory(db, user.workspace_id)
+    card_context = await _kanban_card_context(db, directory, cards)
+    
+    # Active users in workspace for assignment dropdown
+    users = directory.active()
     return templates.TemplateResponse('projects/detail.html', {
         'request': request, 
         'project': project, 
-        'tasks': tasks, 
         'TaskStatus': TaskStatus, 
         'columns': columns,
-        'assignees_map': assignees_map,
-        'subtasks_map': subtasks_map,
-        'subtask_stats': subtask_stats,
+        'column_totals': column_totals,
+        'column_next': column_next,
+        **card_context,
         'users': users,
         'user': user
     })
 
 
+@router.get('/projects/{project_id}/board/{status_value}', response_class=HTMLResponse)
+async def web_project_board_column(
+    request: Request,
+    project_id: int,
+    status_value: str,
+    after: int = Query(0),
+    db: AsyncSession = Depends(get_session)
+):
+    """Next page of cards for one kanban column, rendered as an HTML fragment."""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return RedirectResponse('/web/login', status_code=303)
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user:
+        request.session.clear()
+        return RedirectResponse('/web/login', status_code=303)
+    
+    try:
+        status = TaskStatus(status_value)
+    except ValueError:
+        raise HTTPException(status_code=404, detail='Unknown column')
+    project = await _get_board_project(db, user, project_id)
+    
+    rows = (await db.execute(
+        select(*_kanban_card_columns())
+        .where(
+            Task.project_id == project.id,
+            Task.is_archived == False,
+            Task.status == status,
+            Task.id > after,
+        )
+        .order_by(Task.id)
+        .limit(KANBAN_COLUMN_PAGE_SIZE + 1)
+    )).all()
+    cards = rows[:KANBAN_COLUMN_PAGE_SIZE]
+    
+    directory = await get_workspace_directory(db, user.workspace_id)
+    return templates.TemplateResponse('projects/_board_cards.html', {
+        'request': request,
+        'project': project,
+        'column_key': status.value,
+        'items': cards,
+        'next_after': cards[-1].id if len(rows) > KANBAN_COLUMN_PAGE_SIZE else None,
+        **(await _kanban_card_context(db, directory, cards)),
+        'users': directory.active(),
+        'user': user
+    })
+
+
 # Tasks
 @router.post('/tasks/create')
 async def web_task_create(request: Request, db: AsyncSession = Depends(get_session)):
@@ -3484,6 +3336,7 @@ async def web_task_create(request: Request, db: AsyncSession = Depends(get_sessi
 
 
 @router.get('/tasks/list')
+@cached_page
 async def web_tasks_list(
     request: Request,
     tab: Optional[str] = Query(None),
@@ -3553,25 +3406,21 @@ async def web_tasks_list(
         tasks.append(task)
         project_names[task.id] = project_name
     
-    # Get assignees for all tasks
+    # Get assignees for all tasks, labelled from the cached user directory
+    directory = await get_workspace_directory(db, user.workspace_id)
     task_ids = [t.id for t in tasks]
     assocs = (await db.execute(
-        select(Assignment.task_id, User.full_name, User.email)
-        .join(User, Assignment.assignee_id == User.id)
+        select(Assignment.task_id, Assignment.assignee_id)
         .where(Assignment.task_id.in_(task_ids) if task_ids else False)
     )).all()
     
     assignees_map: dict[int, list[str]] = {}
-    for task_id_val, full_name, email in assocs:
-        label = (full_name or '').strip() or email
-        assignees_map.setdefault(task_id_val, []).append(label)
+    for task_id_val, assignee_id_val in assocs:
+        if assignee_id_val in directory.by_id:
+            assignees_map.setdefault(task_id_val, []).append(directory.label(assignee_id_val))
     
-    # Get all users and projects for filters
-    users = (await db.execute(
-        select(User)
-        .where(User.workspace_id == user.workspace_id, User.is_active == True)
-        .order_by(User.full_name, User.email)
-    )).scalars().all()
+    # Users and projects for filters
+    users = directory.active()
     
     # Get projects user has access to
     if user.is_admin:
@@ -3611,99 +3460,199 @@ async def web_tasks_list(
     })
 
 
-@router.get('/tasks/{task_id}')
-async def web_task_detail(request: Request, task_id: int, db: AsyncSession = Depends(get_session)):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return RedirectResponse('/web/login', status_code=303)
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        request.session.clear()
-        return RedirectResponse('/web/login', status_code=303)
-    
-    # Get task with project check
-    stmt = select(Task).join(Project, Task.project_id == Project.id).where(Task.id == task_id, Project.workspace_id == user.workspace_id)
-    result = await db.execute(stmt)
-    task = result.scalar_one_or_none()
-    if not task:
-        raise HTTPException(status_code=404, detail='Task not found')
-    
-    # Get project
-    project = (await db.execute(select(Project).where(Project.id == task.project_id))).scalar_one_or_none()
-    
-    # Get assignments
-    assignments = (await db.execute(
-        select(User)
-        .join(Assignment, User.id == Assignment.assignee_id)
-        .where(Assignment.task_id == task_id)
+TASK_COMMENTS_PAGE_SIZE = 30
+TASK_HISTORY_PAGE_SIZE = 50
+
+
+def _before_cursor(model, parent_column, parent_id: int, before: Optional[int]):
+    """Keyset filter for rows older than ``before`` in (created_at, id) descending order."""
+    from sqlalchemy import and_, or_
+    cursor_created_at = (
+        select(model.created_at)
+        .where(model.id == before, parent_column == parent_id)
+        .scalar_subquery()
+    )
+    return or_(
+        model.created_at < cursor_created_at,
+        and_(model.created_at == cursor_created_at, model.id < before)
+    )
+
+
+async def _task_comments_page(db: AsyncSession, directory, task_id: int, before: Optional[int] = None) -> dict:
+    """One page of task comments, newest first, with authors and attachments."""
+    stmt = select(Comment).where(Comment.task_id == task_id)
+    if before:
+        stmt = stmt.where(_before_cursor(Comment, Comment.task_id, task_id, before))
+    rows = (await db.execute(
+        stmt.order_by(Comment.created_at.desc(), Comment.id.desc()).limit(TASK_COMMENTS_PAGE_SIZE + 1)
     )).scalars().all()
+    page = rows[:TASK_COMMENTS_PAGE_SIZE]
     
-    # Get comments with authors
-    comments = (await db.execute(
-        select(Comment, User)
-        .join(User, Comment.author_id == User.id)
-        .where(Comment.task_id == task_id)
-        .order_by(Comment.created_at.desc())
-    )).all()
-    
-    # Get attachments for all comments
-    comment_ids = [c[0].id for c in comments]
+    authors = await resolve_users(db, directory, [c.author_id for c in page])
     attachments_by_comment = {}
-    if comment_ids:
+    if page:
         attachments = (await db.execute(
-            select(CommentAttachment).where(CommentAttachment.comment_id.in_(comment_ids))
+            select(CommentAttachment).where(CommentAttachment.comment_id.in_([c.id for c in page]))
         )).scalars().all()
         for attachment in attachments:
-            if attachment.comment_id not in attachments_by_comment:
-                attachments_by_comment[attachment.comment_id] = []
-            attachments_by_comment[attachment.comment_id].append(attachment)
+            attachments_by_comment.setdefault(attachment.comment_id, []).append(attachment)
     
-    # Check if user can comment (admin or assignee)
-    is_assignee = any(a.id == user_id for a in assignments)
-    can_comment = user.is_admin or is_assignee
+    return {
+        'comments': [(c, authors[c.author_id]) for c in page if c.author_id in authors],
+        'attachments_by_comment': attachments_by_comment,
+        'comments_next_before': page[-1].id if len(rows) > TASK_COMMENTS_PAGE_SIZE else None,
+    }
+
+
+async def _task_history_page(db: AsyncSession, directory, task_id: int, before: Optional[int] = None) -> dict:
+    """One page of task edit history, newest first, with editors."""
+    stmt = select(TaskHistory).where(TaskHistory.task_id == task_id)
+    if before:
+        stmt = stmt.where(_before_cursor(TaskHistory, TaskHistory.task_id, task_id, before))
+    rows = (await db.execute(
+        stmt.order_by(TaskHistory.created_at.desc(), TaskHistory.id.desc()).limit(TASK_HISTORY_PAGE_SIZE + 1)
+    )).scalars().all()
+    page = rows[:TASK_HISTORY_PAGE_SIZE]
+    editors = await resolve_users(db, directory, [h.editor_id for h in page])
+    return {
+        'history': [(h, editors[h.editor_id]) for h in page if h.editor_id in editors],
+        'history_next_before': page[-1].id if len(rows) > TASK_HISTORY_PAGE_SIZE else None,
+    }
+
+
+async def _load_task_detail(db: AsyncSession, user: User, task_id: int) -> Optional[dict]:
+    """
+    Gather everything the task detail page shows in a fixed number of queries.
     
-    # Get edit history
-    history = (await db.execute(
-        select(TaskHistory, User)
-        .join(User, TaskHistory.editor_id == User.id)
-        .where(TaskHistory.task_id == task_id)
-        .order_by(TaskHistory.created_at.desc())
-    )).all()
+    Task and project come from one join; assignees, subtasks and the comment
+    count are independent of each other and of the paged comment/history
+    reads. People are labelled from the cached workspace directory.
+    """
+    from sqlalchemy import func
+    from app.models.subtask import Subtask
+    
+    row = (await db.execute(
+        select(Task, Project)
+        .join(Project, Task.project_id == Project.id)
+        .where(Task.id == task_id, Project.workspace_id == user.workspace_id)
+    )).first()
+    if not row:
+        return None
+    task, project = row
     
-    # Get all active workspace users
-    users = (await db.execute(select(User).where(User.workspace_id == user.workspace_id, User.is_active == True).order_by(User.full_name, User.email))).scalars().all()
+    directory = await get_workspace_directory(db, user.workspace_id)
     
-    # Get subtasks ordered by their order field
-    from app.models.subtask import Subtask
+    assignee_ids = (await db.execute(
+        select(Assignment.assignee_id).where(Assignment.task_id == task_id)
+    )).scalars().all()
     subtasks = (await db.execute(
         select(Subtask).where(Subtask.task_id == task_id).order_by(Subtask.order)
     )).scalars().all()
+    comment_count = (await db.execute(
+        select(func.count(Comment.id)).where(Comment.task_id == task_id)
+    )).scalar_one()
+    
+    assignees = await resolve_users(db, directory, assignee_ids)
+    assignments = [assignees[aid] for aid in assignee_ids if aid in assignees]
     
-    # Calculate subtask completion stats
     total_subtasks = len(subtasks)
     completed_subtasks = sum(1 for st in subtasks if st.is_completed)
-    completion_percentage = int((completed_subtasks / total_subtasks) * 100) if total_subtasks > 0 else 0
     
-    return templates.TemplateResponse('tasks/detail.html', {
-        'request': request,
+    return {
         'task': task,
         'project': project,
         'assignments': assignments,
-        'comments': comments,
-        'attachments_by_comment': attachments_by_comment,
-        'can_comment': can_comment,
-        'history': history,
-        'users': users,
-        'user': user,
+        'comment_count': comment_count,
+        **(await _task_comments_page(db, directory, task_id)),
+        **(await _task_history_page(db, directory, task_id)),
+        'users': directory.active(),
         'subtasks': subtasks,
         'total_subtasks': total_subtasks,
         'completed_subtasks': completed_subtasks,
-        'completion_percentage': completion_percentage,
+        'completion_percentage': int((completed_subtasks / total_subtasks) * 100) if total_subtasks > 0 else 0,
+    }
+
+
+@router.get('/tasks/{task_id}')
+async def web_task_detail(request: Request, task_id: int, db: AsyncSession = Depends(get_session)):
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return RedirectResponse('/web/login', status_code=303)
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user:
+        request.session.clear()
+        return RedirectResponse('/web/login', status_code=303)
+    
+    context = await _load_task_detail(db, user, task_id)
+    if context is None:
+        raise HTTPException(status_code=404, detail='Task not found')
+    
+    # Check if user can comment (admin or assignee)
+    is_assignee = any(a.id == user_id for a in context['assignments'])
+    
+    return templates.TemplateResponse('tasks/detail.html', {
+        'request': request,
+        **context,
+        'can_comment': user.is_admin or is_assignee,
+        'user': user,
         'TaskStatus': TaskStatus,
         'TaskPriority': TaskPriority
     })
 
 
+async def _task_fragment_user(request: Request, db: AsyncSession, task_id: int):
+    """Session user for task "load more" fragments, or None if the task is not visible."""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return None
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user:
+        return None
+    visible = (await db.execute(
+        select(Task.id).join(Project, Task.project_id == Project.id)
+        .where(Task.id == task_id, Project.workspace_id == user.workspace_id)
+    )).scalar_one_or_none()
+    return user if visible else None
+
+
+@router.get('/tasks/{task_id}/comments', response_class=HTMLResponse)
+async def web_task_comments_page(
+    request: Request,
+    task_id: int,
+    before: int = Query(...),
+    db: AsyncSession = Depends(get_session)
+):
+    """Older task comments (HTML fragment) for the detail page's "load more"."""
+    user = await _task_fragment_user(request, db, task_id)
+    if not user:
+        raise HTTPException(status_code=404, detail='Task not found')
+    directory = await get_workspace_directory(db, user.workspace_id)
+    return templates.TemplateResponse('tasks/_comments.html', {
+        'request': request,
+        'task_id': task_id,
+        **(await _task_comments_page(db, directory, task_id, before)),
+    })
+
+
+@router.get('/tasks/{task_id}/history', response_class=HTMLResponse)
+async def web_task_history_page(
+    request: Request,
+    task_id: int,
+    before: int = Query(...),
+    db: AsyncSession = Depends(get_session)
+):
+    """Older task history entries (HTML fragment) for the detail page's "load more"."""
+    user = await _task_fragment_user(request, db, task_id)
+    if not user:
+        raise HTTPException(status_code=404, detail='Task not found')
+    directory = await get_workspace_directory(db, user.workspace_id)
+    return templates.TemplateResponse('tasks/_history.html', {
+        'request': request,
+        'task_id': task_id,
+        **(await _task_history_page(db, directory, task_id, before)),
+    })
+
+
 @router.post('/tasks/{task_id}/update')
 async def web_task_update(
     request: Request,
@@ -3806,6 +3755,43 @@ async def web_task_update(
     return RedirectResponse(f'/web/tasks/{task_id}', status_code=303)
 
 
+@router.get('/tasks/{task_id}/subtasks')
+async def web_task_subtasks(request: Request, task_id: int, db: AsyncSession = Depends(get_session)):
+    """Subtasks for one task, fetched lazily when a board card is expanded."""
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user:
+        return JSONResponse({'error': 'User not found'}, status_code=401)
+    
+    task_exists = (await db.execute(
+        select(Task.id).join(Project, Task.project_id == Project.id).where(
+            Task.id == task_id,
+            Project.workspace_id == user.workspace_id
+        )
+    )).scalar_one_or_none()
+    if not task_exists:
+        return JSONResponse({'error': 'Task not found'}, status_code=404)
+    
+    from app.models.subtask import Subtask
+    rows = (await db.execute(
+        select(Subtask.id, Subtask.title, Subtask.is_completed)
+        .where(Subtask.task_id == task_id)
+        .order_by(Subtask.order, Subtask.id)
+    )).all()
+    
+    return JSONResponse({
+        'subtasks': [
+            {'id': row.id, 'title': row.title, 'is_completed': bool(row.is_completed)}
+            for row in rows
+        ],
+        'total_subtasks': len(rows),
+        'completed_subtasks': sum(1 for row in rows if row.is_completed),
+    })
+
+
 @router.post('/tasks/{task_id}/subtasks')
 async def web_task_add_subtasks(
     request: Request,
@@ -3933,12 +3919,9 @@ async def web_task_toggle_subtask(
     await db.commit()
     
     # Calculate completion percentage
-    all_subtasks = (await db.execute(
-        select(Subtask).where(Subtask.task_id == task_id)
-    )).scalars().all()
-    
-    total = len(all_subtasks)
-    completed = sum(1 for st in all_subtasks if st.is_completed)
+    stats = (await _subtask_counts(db, [task_id])).get(task_id, {'total': 0, 'completed': 0})
+    total = stats['total']
+    completed = stats['completed']
     percentage = int((completed / total) * 100) if total > 0 else 0
     
     return JSONResponse({
@@ -4067,38 +4050,22 @@ async def web_task_add_comment(
     
     # Handle file attachments
     if files:
-        # Create uploads directory if it doesn't exist
-        upload_dir = BASE_DIR / 'uploads' / 'comments'
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
         for file in files:
             if file.filename:  # Only process if file was actually uploaded
-                # Read file content
-                content = await file.read()
-                
-                # Validate file size (max 10MB)
-                if len(content) > 10 * 1024 * 1024:
-                    raise HTTPException(status_code=400, detail=f'File {file.filename} is too large. Maximum size is 10MB.')
-                
-                # Generate unique filename
-                file_extension = os.path.splitext(file.filename)[1]
-                unique_filename = f"{uuid.uuid4()}{file_extension}"
-                file_path = upload_dir / unique_filename
-                
-                # Save file to disk
-                with open(file_path, 'wb') as f:
-                    f.write(content)
-                
-                # Store relative path from app directory
-                relative_path = f"app/uploads/comments/{unique_filename}"
+                # Stream into the shared blob store, rejecting files over 10MB as soon as they pass the limit
+                try:
+                    stored = await store_attachment(db, file, COMMENT_ATTACHMENT_MAX_SIZE)
+                except UploadTooLarge as e:
+                    raise HTTPException(status_code=400, detail=str(e))
                 
                 # Create attachment record
                 attachment = CommentAttachment(
                     comment_id=comment.id,
-                    filename=file.filename,
-                    file_path=relative_path,
-                    file_size=len(content),
-                    content_type=file.content_type or 'application/octet-stream',
+                    filename=stored.filename,
+                    file_path=stored.relative_path,
+                    file_size=stored.size,
+                    content_type=stored.content_type,
+                    content_hash=stored.sha256,
                     uploaded_by_id=user_id
                 )
                 db.add(attachment)
@@ -4107,107 +4074,76 @@ async def web_task_add_comment(
     return RedirectResponse(f'/web/tasks/{task_id}', status_code=303)
 
 
-@router.get('/attachments/{attachment_id}/preview')
-async def preview_comment_attachment(
-    request: Request,
-    attachment_id: int,
-    db: AsyncSession = Depends(get_session)
-):
+async def _comment_attachment_grant(request: Request, db: AsyncSession, attachment_id: int):
+    """Resolve a comment attachment the session user may read, or a login redirect"""
     user_id = request.session.get('user_id')
     if not user_id:
         return RedirectResponse('/web/login', status_code=303)
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
+    grant = get_grant('comment', user_id, attachment_id)
+    if grant is not None:
+        return grant
+    
+    workspace_id = (await db.execute(select(User.workspace_id).where(User.id == user_id))).scalar_one_or_none()
+    if workspace_id is None:
         request.session.clear()
         return RedirectResponse('/web/login', status_code=303)
     
     # Get attachment with permission check
-    attachment = (await db.execute(
-        select(CommentAttachment)
+    row = (await db.execute(
+        select(
+            CommentAttachment.file_path, CommentAttachment.filename,
+            CommentAttachment.content_type, CommentAttachment.content_hash,
+        )
         .join(Comment, CommentAttachment.comment_id == Comment.id)
         .join(Task, Comment.task_id == Task.id)
         .join(Project, Task.project_id == Project.id)
         .where(
             CommentAttachment.id == attachment_id,
-            Project.workspace_id == user.workspace_id
+            Project.workspace_id == workspace_id
         )
-    )).scalar_one_or_none()
+    )).one_or_none()
     
-    if not attachment:
+    if not row:
         raise HTTPException(status_code=404, detail='Attachment not found')
     
-    # Handle both absolute paths (old) and relative paths (new)
-    file_path = Path(attachment.file_path)
-    logger.debug(f"Attachment file_path from DB: {attachment.file_path}")
-    logger.debug(f"Is absolute: {file_path.is_absolute()}")
-    
-    if not file_path.is_absolute():
-        # Relative path - resolve from current working directory
-        file_path = Path.cwd() / file_path
-    
-    logger.debug(f"Resolved file_path: {file_path}")
-    logger.debug(f"File exists: {file_path.exists()}")
-    
-    if not file_path.exists():
-        logger.error(f"File not found: {file_path}")
-        raise HTTPException(status_code=404, detail=f'File not found on disk: {file_path}')
+    grant = make_grant(*row)
+    remember_grant('comment', user_id, attachment_id, grant)
+    return grant
+
+
+@router.get('/attachments/{attachment_id}/preview')
+async def preview_comment_attachment(
+    request: Request,
+    attachment_id: int,
+    size: Optional[ThumbnailSize] = None,
+    db: AsyncSession = Depends(get_session)
+):
+    grant = await _comment_attachment_grant(request, db, attachment_id)
+    if isinstance(grant, RedirectResponse):
+        return grant
+    if size:
+        grant = await thumbnail_grant(grant, size)
     
     # Serve file inline for preview with proper headers for PDF embedding
-    return FileResponse(
-        path=str(file_path),
-        media_type=attachment.content_type,
-        filename=attachment.filename,
-        headers={
-            'Content-Disposition': f'inline; filename="{attachment.filename}"',
-            'X-Content-Type-Options': 'nosniff',
-            'Content-Security-Policy': "frame-ancestors 'self'"
-        }
-    )
+    return attachment_response(request, grant, disposition='inline', headers={
+        'X-Content-Type-Options': 'nosniff',
+        'Content-Security-Policy': "frame-ancestors 'self'"
+    })
 
 
 @router.get('/attachments/{attachment_id}/download')
 async def download_comment_attachment(
     request: Request,
     attachment_id: int,
+    size: Optional[ThumbnailSize] = None,
     db: AsyncSession = Depends(get_session)
 ):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return RedirectResponse('/web/login', status_code=303)
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
-    if not user:
-        request.session.clear()
-        return RedirectResponse('/web/login', status_code=303)
-    
-    # Get attachment with permission check
-    attachment = (await db.execute(
-        select(CommentAttachment)
-        .join(Comment, CommentAttachment.comment_id == Comment.id)
-        .join(Task, Comment.task_id == Task.id)
-        .join(Project, Task.project_id == Project.id)
-        .where(
-            CommentAttachment.id == attachment_id,
-            Project.workspace_id == user.workspace_id
-        )
-    )).scalar_one_or_none()
-    
-    if not attachment:
-        raise HTTPException(status_code=404, detail='Attachment not found')
-    
-    # Handle both absolute paths (old) and relative paths (new)
-    file_path = Path(attachment.file_path)
-    if not file_path.is_absolute():
-        # Relative path - resolve from current working directory
-        file_path = Path.cwd() / file_path
-    
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail='File not found on disk')
-    
-    return FileResponse(
-        path=str(file_path),
-        filename=attachment.filename,
-        media_type=attachment.content_type
-    )
+    grant = await _comment_attachment_grant(request, db, attachment_id)
+    if isinstance(grant, RedirectResponse):
+        return grant
+    if size:
+        grant = await thumbnail_grant(grant, size)
+    return attachment_response(request, grant)
 
 
 @router.post('/tasks/{task_id}/status')
@@ -4403,6 +4339,7 @@ async def web_task_reopen(request: Request, task_id: int, db: AsyncSession = Dep
 
 # Meetings
 @router.get('/meetings')
+@cached_page
 async def web_meetings_list(request: Request, db: AsyncSession = Depends(get_session)):
     user_id = request.session.get('user_id')
     if not user_id:
@@ -4472,8 +4409,6 @@ async def web_meeting_create(
         if duration <= 0:
             # Return user to form with error message instead of HTTP exception
             from fastapi.responses import HTMLResponse
-            from fastapi.templating import Jinja2Templates
-            templates = Jinja2Templates(directory="app/templates")
             
             # Get users for the form
             users_result = await db.execute(
@@ -4686,6 +4621,7 @@ async def web_meeting_details(
 
 # Calendar
 @router.get('/calendar')
+@cached_page
 async def web_calendar(
     request: Request,
     year: Optional[int] = None,
@@ -4862,39 +4798,29 @@ async def web_calendar(
         )
     meetings = (await db.execute(meetings_stmt)).scalars().all()
     
-    # Get all workspace users for color legend (admin view)
-    workspace_users = []
-    if user.is_admin:
-        workspace_users_stmt = (
-            select(User)
-            .where(
-                User.workspace_id == user.workspace_id,
-                User.is_active == True
-            )
-            .order_by(User.full_name)
-        )
-        workspace_users = (await db.execute(workspace_users_stmt)).scalars().all()
+    # Workspace users come from the cached directory (colors, names)
+    directory = await get_workspace_directory(db, user.workspace_id)
+    
+    # All workspace users for color legend (admin view)
+    workspace_users = directory.active() if user.is_admin else []
     
     # Build a map of task/project IDs to their assigned users for color coding
     task_users = {}
-    for task in tasks:
-        # Get all users assigned to this task
-        task_assignments = (await db.execute(
-            select(User)
-            .join(Assignment, User.id == Assignment.assignee_id)
-            .where(Assignment.task_id == task.id)
-        )).scalars().all()
-        if task_assignments:
-            task_users[task.id] = list(task_assignments)  # Store all assigned users
-    
-    project_users = {}
-    for project in projects:
-        # Get project owner for color coding
-        project_owner = (await db.execute(
-            select(User).where(User.id == project.owner_id)
-        )).scalar_one_or_none()
-        if project_owner:
-            project_users[project.id] = project_owner
+    task_ids = [t.id for t in tasks]
+    assignment_rows = (await db.execute(
+        select(Assignment.task_id, Assignment.assignee_id)
+        .where(Assignment.task_id.in_(task_ids))
+    )).all() if task_ids else []
+    people = await resolve_users(
+        db, directory,
+        [assignee for _, assignee in assignment_rows] + [p.owner_id for p in projects]
+    )
+    for task_id_val, assignee_id_val in assignment_rows:
+        if assignee_id_val in people:
+            task_users.setdefault(task_id_val, []).append(people[assignee_id_val])
+    
+    # Project owner for color coding
+    project_users = {p.id: people[p.owner_id] for p in projects if p.owner_id in people}
     
     # Calculate navigation dates based on view
     if view == 'day':
@@ -4943,6 +4869,7 @@ async def web_calendar(
 # Tickets System
 # ====================================
 @router.get('/tickets', response_class=HTMLResponse)
+@cached_page
 async def web_tickets_list(request: Request, db: AsyncSession = Depends(get_session)):
     """List all tickets with filters"""
     user_id = request.session.get('user_id')
@@ -5043,10 +4970,8 @@ async def web_tickets_list(request: Request, db: AsyncSession = Depends(get_sess
             select(Project).where(Project.workspace_id == user.workspace_id)
         )).scalars().all()
     
-    # Get all users for assignment dropdown
-    users = (await db.execute(
-        select(User).where(User.workspace_id == user.workspace_id)
-    )).scalars().all()
+    # Users for assignment dropdown
+    users = (await get_workspace_directory(db, user.workspace_id)).users
     
     return templates.TemplateResponse('tickets/list.html', {
         'request': request,
@@ -5144,6 +5069,7 @@ async def web_tickets_create(
     )
     db.add(ticket)
     await db.flush()
+    record_ticket_created(db, ticket)
     
     # Create history entry
     history = TicketHistory(
@@ -5289,6 +5215,7 @@ async def web_tickets_guest_submit(
         )
         db.add(ticket)
         await db.flush()
+        record_ticket_created(db, ticket)
         
         # Create history entry
         history = TicketHistory(
@@ -5544,8 +5471,17 @@ async def web_tickets_archived(request: Request, db: AsyncSession = Depends(get_
     })
 
 
+TICKET_COMMENTS_PAGE_SIZE = 50
+TICKET_HISTORY_LIMIT = 100
+
+
 @router.get('/tickets/{ticket_id}', response_class=HTMLResponse)
-async def web_tickets_detail(request: Request, ticket_id: int, db: AsyncSession = Depends(get_session)):
+async def web_tickets_detail(
+    request: Request,
+    ticket_id: int,
+    before: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_session)
+):
     """View ticket details with comments and history"""
     user_id = request.session.get('user_id')
     if not user_id:
@@ -5558,86 +5494,73 @@ async def web_tickets_detail(request: Request, ticket_id: int, db: AsyncSession
     
     from app.models.ticket import Ticket, TicketComment, TicketAttachment, TicketHistory
     
-    # Get ticket
-    ticket = (await db.execute(
-        select(Ticket).where(
+    # Ticket and related project in one query
+    row = (await db.execute(
+        select(Ticket, Project)
+        .outerjoin(Project, Project.id == Ticket.related_project_id)
+        .where(
             Ticket.id == ticket_id,
             Ticket.workspace_id == user.workspace_id
         )
-    )).scalar_one_or_none()
+    )).first()
     
-    if not ticket:
+    if not row:
         return RedirectResponse('/web/tickets', status_code=303)
-    
-    # Get creator
-    creator = (await db.execute(select(User).where(User.id == ticket.created_by_id))).scalar_one_or_none()
-    
-    # Get assigned user
-    assigned_user = None
-    if ticket.assigned_to_id:
-        assigned_user = (await db.execute(select(User).where(User.id == ticket.assigned_to_id))).scalar_one_or_none()
-    
-    # Get comments
-    comments_result = await db.execute(
-        select(TicketComment)
-        .where(TicketComment.ticket_id == ticket_id)
-        .order_by(TicketComment.created_at.asc())
-    )
-    comments = comments_result.scalars().all()
-    
-    # Get comment authors
-    comment_authors = {}
-    for comment in comments:
-        # TicketComment uses `user_id` (nullable for guest comments)
-        if comment.user_id not in comment_authors:
-            author = (await db.execute(select(User).where(User.id == comment.user_id))).scalar_one_or_none() if comment.user_id else None
-            comment_authors[comment.user_id] = author
+    ticket, related_project = row
+    
+    # Comments: newest page first (keyset on created_at, id), shown oldest-to-newest.
+    # ?before=<comment_id> loads the page of older comments preceding that comment.
+    comments_stmt = select(TicketComment).where(TicketComment.ticket_id == ticket_id)
+    if before:
+        comments_stmt = comments_stmt.where(
+            _before_cursor(TicketComment, TicketComment.ticket_id, ticket_id, before)
+        )
+    comments = (await db.execute(
+        comments_stmt
+        .order_by(TicketComment.created_at.desc(), TicketComment.id.desc())
+        .limit(TICKET_COMMENTS_PAGE_SIZE + 1)
+    )).scalars().all()
+    has_older_comments = len(comments) > TICKET_COMMENTS_PAGE_SIZE
+    comments = list(reversed(comments[:TICKET_COMMENTS_PAGE_SIZE]))
     
     # Get attachments
     attachments = (await db.execute(
         select(TicketAttachment).where(TicketAttachment.ticket_id == ticket_id)
     )).scalars().all()
     
-    # Get history
+    # Get most recent history
     history = (await db.execute(
         select(TicketHistory)
         .where(TicketHistory.ticket_id == ticket_id)
         .order_by(TicketHistory.created_at.desc())
+        .limit(TICKET_HISTORY_LIMIT)
     )).scalars().all()
     
-    # Get all users for assignment
-    users = (await db.execute(
-        select(User).where(User.workspace_id == user.workspace_id)
-    )).scalars().all()
-    
-    # Get related project if exists
-    related_project = None
-    if ticket.related_project_id:
-        from app.models.project import Project
-        related_project = (await db.execute(
-            select(Project).where(Project.id == ticket.related_project_id)
-        )).scalar_one_or_none()
-    
-    # Get closed_by user if exists
-    closed_by_user = None
-    if ticket.closed_by_id:
-        closed_by_user = (await db.execute(
-            select(User).where(User.id == ticket.closed_by_id)
-        )).scalar_one_or_none()
+    # Creator, assignee, closer and comment authors resolved from the cached
+    # workspace directory (users outside it are fetched in a single IN query)
+    directory = await get_workspace_directory(db, user.workspace_id)
+    people = await resolve_users(
+        db, directory,
+        [ticket.created_by_id, ticket.assigned_to_id, ticket.closed_by_id, *(c.user_id for c in comments)]
+    )
+    comment_authors = {c.user_id: people.get(c.user_id) for c in comments}
     
     return templates.TemplateResponse('tickets/detail.html', {
         'request': request,
         'user': user,
         'ticket': ticket,
-        'creator': creator,
-        'assigned_user': assigned_user,
+        'creator': people.get(ticket.created_by_id),
+        'assigned_user': people.get(ticket.assigned_to_id),
         'comments': comments,
         'comment_authors': comment_authors,
+        'has_older_comments': has_older_comments,
+        'oldest_comment_id': comments[0].id if comments else None,
+        'is_comment_page': bool(before),
         'attachments': attachments,
         'history': history,
-        'users': users,
+        'users': directory.users,
         'related_project': related_project,
-        'closed_by_user': closed_by_user
+        'closed_by_user': people.get(ticket.closed_by_id)
     })
 
 
@@ -5754,6 +5677,7 @@ Thank you.
         is_internal=is_internal
     )
     db.add(comment)
+    await record_ticket_reply(db, ticket, user_id, is_internal)
     
     # Update ticket timestamp
     from datetime import datetime
@@ -5990,6 +5914,7 @@ async def web_tickets_update_status(
         # Auto-archive when closed
         ticket.is_archived = True
         ticket.archived_at = datetime.utcnow()
+    await record_ticket_status(db, ticket)
     
     # Add history
     history = TicketHistory(
@@ -6120,6 +6045,7 @@ async def web_tickets_assign(
     old_assigned = ticket.assigned_to_id
     ticket.assigned_to_id = assigned_to_id
     ticket.updated_at = datetime.utcnow()
+    await record_ticket_assignment(db, ticket)
     
     # Add history
     history = TicketHistory(
@@ -6194,12 +6120,8 @@ async def web_chats_list(request: Request, db: AsyncSession = Depends(get_sessio
     )
     chats = (await db.execute(stmt)).scalars().all()
     
-    # Get all active workspace users for creating new chats
-    users = (await db.execute(
-        select(User)
-        .where(User.workspace_id == user.workspace_id, User.id != user_id, User.is_active == True)
-        .order_by(User.full_name, User.email)
-    )).scalars().all()
+    # Active workspace users for creating new chats
+    users = (await get_workspace_directory(db, user.workspace_id)).active(exclude_id=user_id)
     
     return templates.TemplateResponse('chats/list.html', {
         'request': request,
@@ -6326,52 +6248,40 @@ async def web_chat_detail(request: Request, chat_id: int, db: AsyncSession = Dep
 async def download_chat_attachment(
     request: Request,
     attachment_id: int,
+    size: Optional[ThumbnailSize] = None,
     db: AsyncSession = Depends(get_session)
 ):
     user_id = request.session.get('user_id')
     if not user_id:
         return RedirectResponse('/web/login', status_code=303)
     
-    from app.models.chat import MessageAttachment
-    from fastapi.responses import FileResponse
-    import os
-    
-    # Get attachment
-    attachment = (await db.execute(
-        select(MessageAttachment).where(MessageAttachment.id == attachment_id)
-    )).scalar_one_or_none()
-    
-    if not attachment:
-        raise HTTPException(status_code=404, detail='Attachment not found')
-    
-    # Verify user has access to this chat
-    message = (await db.execute(select(Message).where(Message.id == attachment.message_id))).scalar_one_or_none()
-    if not message:
-        raise HTTPException(status_code=404, detail='Message not found')
-    
-    membership = (await db.execute(
-        select(ChatMember).where(
-            ChatMember.chat_id == message.chat_id,
-            ChatMember.user_id == user_id
-        )
-    )).scalar_one_or_none()
-    
-    if not membership:
-        raise HTTPException(status_code=403, detail='Access denied')
-    
-    # Handle both absolute paths (old) and relative paths (new)
-    file_path = Path(attachment.file_path)
-    if not file_path.is_absolute():
-        file_path = Path.cwd() / file_path
-    
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail='File not found on disk')
+    grant = get_grant('chat', user_id, attachment_id)
+    if grant is None:
+        from app.models.chat import MessageAttachment
+        
+        # Get attachment together with the user's membership of its chat
+        row = (await db.execute(
+            select(
+                MessageAttachment.file_path, MessageAttachment.filename,
+                MessageAttachment.mime_type, MessageAttachment.content_hash,
+                ChatMember.id,
+            )
+            .join(Message, MessageAttachment.message_id == Message.id)
+            .outerjoin(ChatMember, (ChatMember.chat_id == Message.chat_id) & (ChatMember.user_id == user_id))
+            .where(MessageAttachment.id == attachment_id)
+        )).first()
+        
+        if not row:
+            raise HTTPException(status_code=404, detail='Attachment not found')
+        if row[4] is None:
+            raise HTTPException(status_code=403, detail='Access denied')
+        
+        grant = make_grant(*row[:4])
+        remember_grant('chat', user_id, attachment_id, grant)
     
-    return FileResponse(
-        path=str(file_path),
-        filename=attachment.filename,
-        media_type=attachment.mime_type or 'application/octet-stream'
-    )
+    if size:
+        grant = await thumbnail_grant(grant, size)
+    return attachment_response(request, grant)
 
 
 @router.post('/chats/{chat_id}/messages')
@@ -6414,32 +6324,24 @@ async def web_chat_send_message(
     
     # Handle file attachments
     if attachments:
-        import uuid
-        from pathlib import Path
-        
-        upload_dir = Path('app/uploads/chat_messages')
-        upload_dir.mkdir(parents=True, exist_ok=True)
+        from app.models.chat import MessageAttachment
         
         for file in attachments:
             if file.filename:
-                # Generate unique filename
-                file_ext = Path(file.filename).suffix
-                unique_filename = f"{uuid.uuid4()}{file_ext}"
-                file_path = upload_dir / unique_filename
-                
-                # Save file
-                with open(file_path, 'wb') as f:
-                    content_bytes = await file.read()
-                    f.write(content_bytes)
+                try:
+                    stored = await store_attachment(db, file, CHAT_ATTACHMENT_MAX_SIZE)
+                except UploadTooLarge as e:
+                    await db.rollback()
+                    raise HTTPException(status_code=400, detail=str(e))
                 
                 # Create attachment record
-                from app.models.chat import MessageAttachment
                 attachment = MessageAttachment(
                     message_id=message.id,
-                    filename=file.filename,
-                    file_path=str(file_path),
-                    file_size=len(content_bytes),
-                    mime_type=file.content_type
+                    filename=stored.filename,
+                    file_path=stored.relative_path,
+                    file_size=stored.size,
+                    mime_type=file.content_type,
+                    content_hash=stored.sha256
                 )
                 db.add(attachment)
     
@@ -6609,7 +6511,7 @@ async def web_invite_user(
         username=username,
         email=email,
         full_name=full_name or '',
-        hashed_password=get_password_hash(temp_password),
+        hashed_password=await get_password_hash_async(temp_password),
         workspace_id=user.workspace_id,
         is_admin=is_admin,
         email_verified=True,  # OTP disabled
@@ -6617,6 +6519,7 @@ async def web_invite_user(
     )
     db.add(new_user)
     await db.commit()
+    invalidate_workspace_directory(user.workspace_id)
     
     # In a real app, you'd send an email with the temp password or invitation link
     # For now, we'll just show a success message
@@ -6659,7 +6562,10 @@ async def web_delete_user(
     
     # Deactivate user instead of deleting (preserves audit trail)
     user_to_delete.is_active = False
+    revoke_user_tokens(user_to_delete)
     await db.commit()
+    invalidate_workspace_directory(user_to_delete.workspace_id)
+    clear_attachment_grants(user_to_delete.id)
     
     return RedirectResponse('/web/users/new', status_code=303)
 
@@ -6700,7 +6606,8 @@ async def web_set_password(
         }, status_code=400)
     
     # Verify current password
-    if not verify_password(current_password, user.hashed_password):
+    valid, _ = await verify_password_async(current_password, user.hashed_password)
+    if not valid:
         return templates.TemplateResponse('auth/set_password.html', {
             'request': request,
             'token': None,
@@ -6708,7 +6615,7 @@ async def web_set_password(
         }, status_code=400)
     
     # Update password
-    user.hashed_password = get_password_hash(new_password)
+    user.hashed_password = await get_password_hash_async(new_password)
     await db.commit()
     
     # Auto-login after password change
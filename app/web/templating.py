@@ -0,0 +1,73 @@
+"""
+Jinja2 environment for the server-rendered web UI.
+
+Compiled templates are written to Jinja's filesystem bytecode cache (a
+private per-user temp directory), so a fresh worker loads them instead of
+parsing every template again, and templates are only re-checked on disk with
+TEMPLATE_AUTO_RELOAD=1 (for template development). Parts of the layout that
+depend on nothing but the workspace settings (branding styles, sidebar logo
+and title) are rendered once per workspace and settings version and reused
+across pages through ``cached_fragment``.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from markupsafe import Markup
+
+from app.core.config import get_settings
+from app.core.static_assets import static_url
+from app.core.workspace_context import workspace_settings_version
+
+TEMPLATES_DIR = Path(__file__).resolve().parents[1] / 'templates'
+FRAGMENT_CACHE_SIZE = 256
+
+_fragments: dict[tuple, Markup] = {}
+
+
+def _bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    # Without a directory Jinja uses _jinja2-cache-<uid> in the temp dir,
+    # created with mode 0700 and refused if another user owns it
+    try:
+        return FileSystemBytecodeCache()
+    except RuntimeError:
+        return None  # No usable temp dir: compile in memory as before
+
+
+env = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=True,
+    bytecode_cache=_bytecode_cache(),
+    auto_reload=get_settings().template_auto_reload,
+    cache_size=-1,  # Keep every compiled template; there are only a few hundred
+)
+
+
+def cached_fragment(name: str, workspace: Any = None) -> Markup:
+    """Render ``name`` with only ``workspace`` in its context, reusing the
+    output until the workspace settings change"""
+    workspace = workspace or None  # Undefined when the page has no workspace
+    workspace_id = getattr(workspace, 'id', None)
+    key = (name, workspace_id, workspace_settings_version(workspace_id) if workspace_id else 0)
+    html = _fragments.get(key)
+    if html is None:
+        html = Markup(env.get_template(name).render(workspace=workspace))
+        if len(_fragments) >= FRAGMENT_CACHE_SIZE:
+            _fragments.pop(next(iter(_fragments)))
+        _fragments[key] = html
+    return html
+
+
+def workspace_context(request: Request) -> dict:
+    """Expose the workspace resolved by WorkspaceMiddleware to every template"""
+    workspace = getattr(request.state, 'workspace', None)
+    return {'workspace': workspace} if workspace is not None else {}
+
+
+env.globals['cached_fragment'] = cached_fragment
+env.globals['static_url'] = static_url
+templates = Jinja2Templates(env=env, context_processors=[workspace_context])
@@ -0,0 +1,234 @@
+"""
+Synthetic data for the benchmarks.
+
+Fills a database with ``--workspaces`` workspaces, each with users, projects
+(every user a member), tasks with assignments and comments, tickets with
+comments, group chats with messages and per-user notifications. Dates are
+spread around today so calendar and "due soon" views have work to do. The
+same ``--seed`` always produces the same data.
+
+    python -m benchmarks.datagen --db /tmp/bench.db --workspaces 3 --tasks-per-project 50
+
+Every generated user can sign in with ``PASSWORD``; the first user of each
+workspace is an admin.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PASSWORD = "BenchPassw0rd"
+SEARCH_TERMS = ("invoice", "printer", "password", "network", "refund", "outage")
+WORDS = (
+    "update", "review", "client", "report", "deploy", "meeting", "budget", "design", "support",
+    "backup", "server", "contract", "follow", "call", "draft", "quarterly", "migration", "sync",
+) + SEARCH_TERMS
+
+
+@dataclass
+class DataSpec:
+    workspaces: int = 2
+    users_per_workspace: int = 15
+    projects_per_workspace: int = 8
+    tasks_per_project: int = 40
+    comments_per_task: int = 2
+    tickets_per_workspace: int = 200
+    comments_per_ticket: int = 2
+    chats_per_workspace: int = 4
+    messages_per_chat: int = 150
+    notifications_per_user: int = 30
+    seed: int = 1
+
+
+@dataclass
+class WorkspaceData:
+    id: int
+    usernames: list[str] = field(default_factory=list)
+    project_ids: list[int] = field(default_factory=list)
+    chat_ids: list[int] = field(default_factory=list)
+
+
+@dataclass
+class Dataset:
+    spec: DataSpec
+    workspaces: list[WorkspaceData] = field(default_factory=list)
+    rows: int = 0
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+async def generate(session_factory, spec: DataSpec) -> Dataset:
+    """Insert the synthetic data through ``session_factory`` (tables must exist)"""
+    from app.core.security import get_password_hash
+    from app.models import (
+        Assignment, Chat, ChatMember, Comment, Message, Notification, Project, ProjectMember,
+        Task, Ticket, TicketComment, User, Workspace,
+    )
+    from app.models.enums import TaskPriority, TaskStatus
+
+    rng = random.Random(spec.seed)
+    hashed = get_password_hash(PASSWORD)
+    today = date.today()
+    now = datetime.utcnow()
+    dataset = Dataset(spec=spec)
+
+    async with session_factory() as db:
+        for w in range(spec.workspaces):
+            workspace = Workspace(name=f"Bench {w + 1}")
+            db.add(workspace)
+            await db.flush()
+            data = WorkspaceData(id=workspace.id)
+
+            users = [
+                User(
+                    username=f"bench{w + 1}_{u + 1}", email=f"bench{w + 1}_{u + 1}@bench.example",
+                    full_name=f"Bench User {w + 1}.{u + 1}", hashed_password=hashed,
+                    workspace_id=workspace.id, is_admin=u == 0, profile_completed=True,
+                )
+                for u in range(spec.users_per_workspace)
+            ]
+            db.add_all(users)
+            await db.flush()
+            data.usernames = [u.username for u in users]
+            user_ids = [u.id for u in users]
+
+            projects = [
+                Project(
+                    name=f"{_sentence(rng, 2)} {p + 1}", description=_sentence(rng, 12),
+                    owner_id=user_ids[0], workspace_id=workspace.id,
+                    start_date=today - timedelta(days=rng.randint(0, 60)),
+                    due_date=today + timedelta(days=rng.randint(0, 90)),
+                )
+                for p in range(spec.projects_per_workspace)
+            ]
+            db.add_all(projects)
+            await db.flush()
+            data.project_ids = [p.id for p in projects]
+            db.add_all([
+                ProjectMember(project_id=project_id, user_id=user_id, assigned_by=user_ids[0])
+                for project_id in data.project_ids for user_id in user_ids
+            ])
+
+            tasks = []
+            for project_id in data.project_ids:
+                for _ in range(spec.tasks_per_project):
+                    start = today + timedelta(days=rng.randint(-30, 30))
+                    tasks.append(Task(
+                        title=_sentence(rng, 4), description=_sentence(rng, 25),
+                        status=rng.choice(list(TaskStatus)), priority=rng.choice(list(TaskPriority)),
+                        start_date=start, due_date=start + timedelta(days=rng.randint(0, 10)),
+                        project_id=project_id, creator_id=rng.choice(user_ids),
+                    ))
+            db.add_all(tasks)
+            await db.flush()
+            db.add_all([
+                Assignment(task_id=task.id, assignee_id=assignee)
+                for task in tasks for assignee in rng.sample(user_ids, min(2, len(user_ids)))
+            ])
+            db.add_all([
+                Comment(task_id=task.id, author_id=rng.choice(user_ids), content=_sentence(rng, 15))
+                for task in tasks for _ in range(spec.comments_per_task)
+            ])
+
+            tickets = []
+            for t in range(spec.tickets_per_workspace):
+                # The app numbers tickets by counting the workspace's tickets, but
+                # numbers are unique across workspaces: give later workspaces their
+                # own range so new tickets in the first one do not collide
+                ticket_number = w * 100000 + t + 1
+                is_guest = rng.random() < 0.4
+                tickets.append(Ticket(
+                    ticket_number=f"TKT-{today.year}-{ticket_number:05d}",
+                    subject=_sentence(rng, 5), description=_sentence(rng, 30),
+                    priority=rng.choice(("low", "medium", "high", "urgent")),
+                    status=rng.choice(("open", "in_progress", "waiting", "resolved", "closed")),
+                    category=rng.choice(("support", "bug", "feature", "billing", "general")),
+                    assigned_to_id=rng.choice(user_ids + [None]),
+                    created_by_id=None if is_guest else rng.choice(user_ids),
+                    workspace_id=workspace.id, is_guest=is_guest,
+                    guest_email=f"guest{ticket_number}@customer.example" if is_guest else None,
+                    created_at=now - timedelta(hours=rng.randint(1, 24 * 60)),
+                ))
+            db.add_all(tickets)
+            await db.flush()
+            db.add_all([
+                TicketComment(ticket_id=ticket.id, user_id=rng.choice(user_ids), content=_sentence(rng, 15))
+                for ticket in tickets for _ in range(spec.comments_per_ticket)
+            ])
+
+            chats = [
+                Chat(workspace_id=workspace.id, name=f"Team {c + 1}", is_group=True, created_by_id=user_ids[0])
+                for c in range(spec.chats_per_workspace)
+            ]
+            db.add_all(chats)
+            await db.flush()
+            data.chat_ids = [c.id for c in chats]
+            db.add_all([ChatMember(chat_id=chat_id, user_id=user_id) for chat_id in data.chat_ids for user_id in user_ids])
+            db.add_all([
+                Message(
+                    chat_id=chat_id, author_id=rng.choice(user_ids), content=_sentence(rng, 10),
+                    created_at=now - timedelta(minutes=spec.messages_per_chat - m),
+                )
+                for chat_id in data.chat_ids for m in range(spec.messages_per_chat)
+            ])
+
+            db.add_all([
+                Notification(
+                    user_id=user_id, type=rng.choice(("assignment", "comment", "message", "task")),
+                    message=_sentence(rng, 8), url=f"/web/projects/{rng.choice(data.project_ids)}",
+                    created_at=now - timedelta(minutes=rng.randint(1, 60 * 24 * 14)),
+                    read_at=now if rng.random() < 0.7 else None,
+                )
+                for user_id in user_ids for _ in range(spec.notifications_per_user)
+            ])
+            dataset.rows += (
+                1 + len(users) + len(projects) * (1 + len(users)) + len(tasks) * (3 + spec.comments_per_task)
+                + len(tickets) * (1 + spec.comments_per_ticket)
+                + len(chats) * (1 + len(users) + spec.messages_per_chat)
+                + len(users) * spec.notifications_per_user
+            )
+            dataset.workspaces.append(data)
+        await db.commit()
+    return dataset
+
+
+async def run(args) -> None:
+    from app.core.database import async_session_factory, ensure_initialized
+
+    await ensure_initialized()
+    spec = DataSpec(**{name: getattr(args, name) for name in DataSpec.__dataclass_fields__})
+    started = time.perf_counter()
+    dataset = await generate(async_session_factory, spec)
+    print(f"Inserted about {dataset.rows} rows in {time.perf_counter() - started:.1f}s into {args.db}")
+    for data in dataset.workspaces:
+        print(f"  workspace {data.id}: admin {data.usernames[0]} / {PASSWORD}")
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    for name, spec_field in DataSpec.__dataclass_fields__.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int, default=spec_field.default)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="SQLite file to create or fill")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(args.db).resolve()}"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Local IMAP server for the email-ingest benchmark.
+
+Speaks just enough IMAP4rev1 for ``EmailToTicketService.fetch_imap_emails``
+(LOGIN, SELECT, SEARCH UNSEEN, FETCH RFC822, STORE +FLAGS, CLOSE, LOGOUT)
+over plain TCP on 127.0.0.1, serving an in-memory mailbox. Any username and
+password are accepted.
+
+    with ImapStub() as imap:
+        imap.load(make_messages(50))
+        ...  # point EmailSettings at imap.host / imap.port, use_ssl=False
+"""
+from __future__ import annotations
+
+import re
+import socketserver
+import threading
+import uuid
+from email.message import EmailMessage
+from email.utils import format_datetime
+from datetime import datetime, timezone
+
+_COMMAND_RE = re.compile(rb'^(\S+) (\S+)(?: (.*))?$')
+
+
+def make_messages(count: int, to_address: str = "support@bench.example") -> list[bytes]:
+    """``count`` new-ticket emails from distinct senders"""
+    run = uuid.uuid4().hex[:8]
+    messages = []
+    for i in range(count):
+        msg = EmailMessage()
+        msg["From"] = f"Customer {i} <customer{i}.{run}@customer.example>"
+        msg["To"] = to_address
+        msg["Subject"] = f"Benchmark request {run}-{i}: printer offline"
+        msg["Message-ID"] = f"<{run}.{i}@customer.example>"
+        msg["Date"] = format_datetime(datetime.now(timezone.utc))
+        msg.set_content("Hello,\n\nThe printer on floor 2 is offline again since this morning.\n" * 5)
+        messages.append(bytes(msg))
+    return messages
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def reply(self, *lines: bytes) -> None:
+        self.wfile.write(b"".join(line + b"\r\n" for line in lines))
+
+    def handle(self) -> None:
+        mailbox = self.server.mailbox
+        self.reply(b"* OK [CAPABILITY IMAP4rev1] benchmark stub ready")
+        for raw in self.rfile:
+            match = _COMMAND_RE.match(raw.rstrip(b"\r\n"))
+            if not match:
+                continue
+            tag, command, argument = match.group(1), match.group(2).upper(), match.group(3) or b""
+            if command == b"CAPABILITY":
+                self.reply(b"* CAPABILITY IMAP4rev1", tag + b" OK CAPABILITY completed")
+            elif command == b"SELECT":
+                self.reply(b"* %d EXISTS" % len(mailbox.messages), b"* FLAGS (\\Seen)",
+                           tag + b" OK [READ-WRITE] SELECT completed")
+            elif command == b"SEARCH":
+                with mailbox.lock:
+                    unseen = [str(i + 1).encode() for i in range(len(mailbox.messages)) if i not in mailbox.seen]
+                self.reply(b" ".join([b"* SEARCH", *unseen]).rstrip(), tag + b" OK SEARCH completed")
+            elif command == b"FETCH":
+                number = int(argument.split()[0])
+                body = mailbox.messages[number - 1]
+                self.wfile.write(b"* %d FETCH (RFC822 {%d}\r\n" % (number, len(body)) + body + b")\r\n")
+                self.reply(tag + b" OK FETCH completed")
+            elif command == b"STORE":
+                number = int(argument.split()[0])
+                with mailbox.lock:
+                    mailbox.seen.add(number - 1)
+                self.reply(b"* %d FETCH (FLAGS (\\Seen))" % number, tag + b" OK STORE completed")
+            elif command == b"LOGOUT":
+                self.reply(b"* BYE logging out", tag + b" OK LOGOUT completed")
+                return
+            else:  # LOGIN, CLOSE, NOOP, ...
+                self.reply(tag + b" OK " + command + b" completed")
+
+
+class _Mailbox:
+    def __init__(self) -> None:
+        self.messages: list[bytes] = []
+        self.seen: set[int] = set()
+        self.lock = threading.Lock()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    mailbox: _Mailbox
+
+
+class ImapStub:
+    def __init__(self) -> None:
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.mailbox = _Mailbox()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="imap-stub", daemon=True)
+        self.host, self.port = self._server.server_address
+
+    def load(self, messages: list[bytes]) -> None:
+        """Replace the mailbox contents; every message starts unseen"""
+        mailbox = self._server.mailbox
+        with mailbox.lock:
+            mailbox.messages = list(messages)
+            mailbox.seen = set()
+
+    @property
+    def unseen(self) -> int:
+        mailbox = self._server.mailbox
+        return len(mailbox.messages) - len(mailbox.seen)
+
+    def __enter__(self) -> "ImapStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
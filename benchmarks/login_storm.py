@@ -0,0 +1,132 @@
+"""
+Login storm benchmark.
+
+Fires a burst of concurrent ``/web/login`` requests (as after a deploy, when
+every open browser signs in again) against an in-process app with a
+throwaway database, while a probe measures event-loop lag and the latency
+of ``/health``. Reports login latency, throughput, loop lag and the password
+hasher stats.
+
+    python -m benchmarks.login_storm --users 50 --logins 400 --concurrency 100
+    python -m benchmarks.login_storm --inline   # hash on the event loop, for comparison
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PASSWORD = "StormPassw0rd"
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+async def run(args) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.core import security
+    from app.core.database import async_session_factory, ensure_initialized
+    from app.main import app
+    from app.models.user import User
+    from app.models.workspace import Workspace
+
+    if args.inline:
+        # The old behaviour: hash on the event loop
+        async def inline(func, *func_args):
+            return func(*func_args)
+        security._run_hasher = inline
+
+    await ensure_initialized()
+    async with async_session_factory() as db:
+        workspace = Workspace(name="Storm")
+        db.add(workspace)
+        await db.flush()
+        hashed = security.get_password_hash(PASSWORD)
+        db.add_all([
+            User(username=f"storm{i}", hashed_password=hashed, workspace_id=workspace.id, profile_completed=True)
+            for i in range(args.users)
+        ])
+        await db.commit()
+
+    transport = ASGITransport(app=app)
+    login_times: list[float] = []
+    health_times: list[float] = []
+    lags: list[float] = []
+    failures = busy = 0
+    done = asyncio.Event()
+
+    async def probe_loop():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - started - 0.005)
+
+    async def probe_health():
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/health")
+                health_times.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def login(i: int):
+        nonlocal failures, busy
+        async with semaphore, AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            response = await client.post(
+                "/web/login", data={"username": f"storm{i % args.users}", "password": PASSWORD}
+            )
+            login_times.append(time.perf_counter() - started)
+            if response.status_code == 503:
+                busy += 1
+            elif response.status_code != 303:
+                failures += 1
+
+    probes = [asyncio.create_task(probe_loop()), asyncio.create_task(probe_health())]
+    started = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(args.logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*probes)
+
+    mode = "inline (event loop)" if args.inline else f"pool ({security.PASSWORD_HASH_WORKERS} threads)"
+    print(f"Hashing:            {mode}")
+    print(f"Logins:             {args.logins} ({failures} failed, {busy} turned away) at concurrency {args.concurrency}")
+    print(f"Throughput:         {args.logins / elapsed:.1f} logins/s over {elapsed:.2f}s")
+    print(f"Login latency:      p50 {percentile(login_times, 50) * 1000:.0f} ms, "
+          f"p95 {percentile(login_times, 95) * 1000:.0f} ms")
+    print(f"/health latency:    p50 {percentile(health_times, 50) * 1000:.1f} ms, "
+          f"p95 {percentile(health_times, 95) * 1000:.1f} ms, max {max(health_times, default=0) * 1000:.0f} ms")
+    print(f"Event-loop lag:     mean {statistics.fmean(lags or [0]) * 1000:.1f} ms, "
+          f"max {max(lags, default=0) * 1000:.0f} ms")
+    if not args.inline:
+        print(f"Hasher stats:       {security.password_hasher_stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop (behaviour before the pool)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Request throughput benchmark for the middleware stack.
+
+Drives ``/health`` and a signed-in page (``/web/projects``) with concurrent
+in-process clients for a fixed time and reports requests per second and
+latency. ``--legacy`` swaps in the previous ``BaseHTTPMiddleware``
+implementation of ``WorkspaceMiddleware`` (two queries and several debug
+prints per request, stdout discarded) for a before/after comparison.
+
+    python -m benchmarks.middleware_rps --seconds 5 --concurrency 10
+    python -m benchmarks.middleware_rps --legacy
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.login_storm import percentile  # noqa: E402
+
+PASSWORD = "BenchPassw0rd"
+
+
+def legacy_workspace_middleware():
+    """The workspace middleware as it was before the pure ASGI rewrite"""
+    from sqlalchemy import select
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    from app.core.database import get_session
+    from app.models.user import User
+    from app.models.workspace import Workspace
+
+    class LegacyWorkspaceMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            print(f"[DEBUG] WorkspaceMiddleware called for: {request.url.path}")
+            user_id = request.scope["session"].get('user_id') if "session" in request.scope else None
+            print(f"[DEBUG] Found user_id in session: {user_id}")
+            if user_id:
+                async for db in get_session():
+                    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+                    if user and user.workspace_id:
+                        workspace = (await db.execute(
+                            select(Workspace).where(Workspace.id == user.workspace_id)
+                        )).scalar_one_or_none()
+                        if workspace:
+                            request.state.workspace = workspace
+                            print(f"[DEBUG] Workspace SET: name={workspace.name}")
+                        break
+            return await call_next(request)
+
+    return LegacyWorkspaceMiddleware
+
+
+async def drive(client, path: str, seconds: float, concurrency: int) -> tuple[int, list[float]]:
+    latencies: list[float] = []
+    deadline = time.perf_counter() + seconds
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return errors, latencies
+
+
+async def run(args) -> None:
+    from httpx import ASGITransport, AsyncClient
+    from starlette.middleware import Middleware
+
+    from app.core.database import ensure_initialized
+    from app.main import WorkspaceMiddleware, app
+
+    if args.legacy:
+        app.user_middleware = [
+            Middleware(legacy_workspace_middleware()) if m.cls is WorkspaceMiddleware else m
+            for m in app.user_middleware
+        ]
+        app.middleware_stack = None
+
+    await ensure_initialized()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        response = await client.post(
+            "/web/signup", data={"username": "bench", "password": PASSWORD, "company_name": "Bench"}
+        )
+        assert response.status_code in (200, 303), response.text
+
+        print(f"Middleware:   {'legacy BaseHTTPMiddleware' if args.legacy else 'pure ASGI'}")
+        for path in ("/health", "/web/projects"):
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                await drive(client, path, 0.5, args.concurrency)  # Warm up caches and templates
+                errors, latencies = await drive(client, path, args.seconds, args.concurrency)
+            print(f"{path:<15} {len(latencies) / args.seconds:8.1f} req/s   "
+                  f"p50 {percentile(latencies, 50) * 1000:6.1f} ms   "
+                  f"p95 {percentile(latencies, 95) * 1000:6.1f} ms   ({errors} errors)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--legacy", action="store_true", help="use the BaseHTTPMiddleware version for comparison")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Benchmark suite for the web and API surfaces.
+
+Generates synthetic data (see ``benchmarks.datagen``) in a throwaway
+database, signs in a set of virtual users and runs scripted scenarios
+against the in-process app, one scenario at a time:
+
+    my_tasks              GET /web/my-tasks
+    kanban                GET /web/projects/{id}
+    calendar_month        GET /web/calendar?year=..&month=..
+    ticket_list           GET /web/tickets
+    ticket_search         GET /web/tickets?search=..
+    chat_polling          GET /web/chats/{id}
+    notification_polling  GET /web/notifications/unread
+    api_tasks             GET /api/tasks/ (bearer token)
+    email_ingest          EmailToTicketService against a local IMAP stub
+
+For each it reports p50/p95/p99 latency, throughput, database statements per
+request and process RSS. ``--save`` writes the results as JSON and
+``--compare`` checks a run against a saved baseline, exiting with status 1
+when p95 latency or queries per request regressed past ``--tolerance``.
+
+The page cache (``@cached_page``) is disabled unless ``--page-cache`` is
+given, so the numbers measure the handlers rather than cache hits.
+
+    python -m benchmarks.suite --requests 200 --concurrency 8 --save baseline.json
+    python -m benchmarks.suite --scenarios kanban,ticket_search --compare baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datagen import PASSWORD, SEARCH_TERMS, DataSpec, add_spec_arguments, generate  # noqa: E402
+from benchmarks.login_storm import percentile  # noqa: E402
+
+EMAIL_BATCH = 25
+# Ignore latency changes smaller than this when comparing with a baseline
+LATENCY_NOISE_MS = 2.0
+
+
+class VirtualUser:
+    def __init__(self, client, workspace, rng: random.Random):
+        self.client = client
+        self.workspace = workspace
+        self.rng = rng
+        self.api_headers: dict[str, str] = {}
+
+
+def _month_url(vu: VirtualUser) -> str:
+    today = date.today()
+    return f"/web/calendar?year={today.year}&month={today.month}&view=month"
+
+
+SCENARIOS = {
+    "my_tasks": lambda vu: "/web/my-tasks",
+    "kanban": lambda vu: f"/web/projects/{vu.rng.choice(vu.workspace.project_ids)}",
+    "calendar_month": _month_url,
+    "ticket_list": lambda vu: "/web/tickets",
+    "ticket_search": lambda vu: f"/web/tickets?search={vu.rng.choice(SEARCH_TERMS)}",
+    "chat_polling": lambda vu: f"/web/chats/{vu.rng.choice(vu.workspace.chat_ids)}",
+    "notification_polling": lambda vu: "/web/notifications/unread",
+    "api_tasks": lambda vu: "/api/tasks/",
+}
+ALL_SCENARIOS = (*SCENARIOS, "email_ingest")
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak size where /proc is not available)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class QueryCounter:
+    """Counts statements sent to the database"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args) -> None:
+        self.count += 1
+
+
+def summarize(latencies: list[float], errors: int, queries: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "queries_per_request": round(queries / len(latencies), 2) if latencies else 0.0,
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+async def run_http_scenario(name: str, users: list[VirtualUser], counter: QueryCounter, args) -> dict:
+    path_for = SCENARIOS[name]
+    latencies: list[float] = []
+    errors = 0
+    remaining = args.requests
+
+    async def worker(vu: VirtualUser, record: bool):
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            path = path_for(vu)
+            started = time.perf_counter()
+            response = await vu.client.get(path, headers=vu.api_headers if path.startswith("/api/") else None)
+            if record:
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+
+    remaining = min(args.requests, len(users) * 3)
+    await asyncio.gather(*(worker(vu, record=False) for vu in users))  # Warm up templates and caches
+    remaining = args.requests
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(vu, record=True) for vu in users))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, errors, counter.count - queries_before, elapsed)
+
+
+async def run_email_ingest(dataset, counter: QueryCounter, args) -> dict:
+    from app.core.database import async_session_factory
+    from app.core.email_to_ticket_v2 import process_workspace_emails
+    from app.models.email_settings import EmailSettings
+    from benchmarks.imap_stub import ImapStub, make_messages
+
+    workspace_id = dataset.workspaces[0].id
+    latencies: list[float] = []
+    errors = 0
+    with ImapStub() as imap:
+        async with async_session_factory() as db:
+            db.add(EmailSettings(
+                workspace_id=workspace_id, smtp_username="bench", smtp_password="bench",
+                smtp_from_email="support@bench.example", incoming_mail_type="IMAP",
+                incoming_mail_host=imap.host, incoming_mail_port=imap.port,
+                incoming_mail_username="bench", incoming_mail_password="bench", incoming_mail_use_ssl=False,
+            ))
+            await db.commit()
+
+        batches = max(1, args.requests // EMAIL_BATCH)
+        queries_before = counter.count
+        started = time.perf_counter()
+        for _ in range(batches):
+            imap.load(make_messages(EMAIL_BATCH))
+            batch_started = time.perf_counter()
+            # The service prints every message it processes
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                async with async_session_factory() as db:
+                    await process_workspace_emails(db, workspace_id)
+            # Per-message latency: a batch is one IMAP session
+            latencies += [(time.perf_counter() - batch_started) / EMAIL_BATCH] * EMAIL_BATCH
+            errors += imap.unseen
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, errors, counter.count - queries_before, elapsed)
+
+
+async def sign_in(transport, dataset, args) -> list[VirtualUser]:
+    from httpx import AsyncClient
+
+    rng = random.Random(args.seed)
+    users = []
+    for i in range(args.concurrency):
+        workspace = dataset.workspaces[i % len(dataset.workspaces)]
+        username = workspace.usernames[(i // len(dataset.workspaces)) % len(workspace.usernames)]
+        client = AsyncClient(transport=transport, base_url="http://bench")
+        response = await client.post("/web/login", data={"username": username, "password": PASSWORD})
+        assert response.status_code == 303, f"login failed for {username}: {response.status_code}"
+        response = await client.post(
+            "/api/auth/login", json={"email": f"{username}@bench.example", "password": PASSWORD}
+        )
+        assert response.status_code == 200, f"API login failed for {username}: {response.status_code}"
+        vu = VirtualUser(client, workspace, random.Random(rng.random()))
+        vu.api_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        users.append(vu)
+    return users
+
+
+async def run(args) -> dict:
+    from httpx import ASGITransport
+
+    from app.core import page_cache
+    from app.core.database import async_session_factory, engine, ensure_initialized
+    from app.main import app
+
+    if not args.page_cache:
+        page_cache.PAGE_CACHE_SIZE = 0
+
+    await ensure_initialized()
+    spec = DataSpec(**{name: getattr(args, name) for name in DataSpec.__dataclass_fields__})
+    started = time.perf_counter()
+    dataset = await generate(async_session_factory, spec)
+    print(f"Generated about {dataset.rows} rows in {time.perf_counter() - started:.1f}s "
+          f"({spec.workspaces} workspaces); RSS {rss_mb():.0f} MB")
+
+    counter = QueryCounter(engine.sync_engine)
+    users = await sign_in(ASGITransport(app=app), dataset, args)
+    results = {}
+    print(f"{'scenario':<22}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'RSS MB':>8}{'errors':>8}")
+    for name in args.scenarios:
+        if name == "email_ingest":
+            result = await run_email_ingest(dataset, counter, args)
+        else:
+            result = await run_http_scenario(name, users, counter, args)
+        results[name] = result
+        print(f"{name:<22}{result['rps']:>8.1f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+              f"{result['p99_ms']:>9.1f}{result['queries_per_request']:>9.1f}{result['rss_mb']:>8.0f}"
+              f"{result['errors']:>8}")
+    for vu in users:
+        await vu.client.aclose()
+
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "page_cache": args.page_cache,
+            "data": asdict(spec),
+        },
+        "scenarios": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print the change against ``baseline``; returns the regressions"""
+    regressions = []
+    print(f"\nCompared with baseline from {baseline['meta']['date']} (tolerance {tolerance:.0%}):")
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"  {name:<22} no baseline")
+            continue
+        notes = []
+        for metric, noise in (("p95_ms", LATENCY_NOISE_MS), ("queries_per_request", 0.0)):
+            old, new = base[metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            regressed = new > old * (1 + tolerance) and new - old > noise
+            notes.append(f"{metric} {old:g} -> {new:g} ({change:+.0%}){' REGRESSION' if regressed else ''}")
+            if regressed:
+                regressions.append(f"{name} {metric}")
+        print(f"  {name:<22} " + ", ".join(notes))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(ALL_SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(ALL_SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests (emails) per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="signed-in virtual users")
+    parser.add_argument("--page-cache", action="store_true", help="keep the rendered-page cache enabled")
+    parser.add_argument("--save", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression (0.2 = 20%%)")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(ALL_SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        results = asyncio.run(run(args))
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nSaved results to {args.save}")
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
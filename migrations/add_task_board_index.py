@@ -0,0 +1,32 @@
+"""
+Add composite index used by the project Kanban board.
+
+The board counts tasks per status and pages each column by id, filtered on
+project and archive state; this index covers both queries.
+"""
+import sqlite3
+
+conn = sqlite3.connect('data.db')
+cursor = conn.cursor()
+
+print("Adding Kanban board index to Task table...")
+
+try:
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_task_project_board "
+        "ON task (project_id, is_archived, status, id)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_subtask_task_id ON subtask (task_id)")
+    conn.commit()
+    print("  ✓ ix_task_project_board created")
+    print("  ✓ ix_subtask_task_id present")
+
+    print("\n✓ Migration completed successfully!")
+
+except Exception as e:
+    print(f"\nError during migration: {e}")
+    conn.rollback()
+    raise
+
+finally:
+    conn.close()
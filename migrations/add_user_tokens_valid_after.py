@@ -0,0 +1,47 @@
+"""
+Migration: Add tokens_valid_after to users
+API tokens issued before this time (epoch seconds) are refused, so revoking a
+user's tokens reaches every worker process
+"""
+
+import sqlite3
+from pathlib import Path
+
+def migrate():
+    """Add tokens_valid_after field to user table"""
+
+    db_path = Path(__file__).parent.parent / "data.db"
+
+    if not db_path.exists():
+        print(f"❌ Database not found at {db_path}")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        # Check if column already exists
+        cursor.execute("PRAGMA table_info(user)")
+        columns = [col[1] for col in cursor.fetchall()]
+
+        if 'tokens_valid_after' in columns:
+            print("✅ Column 'tokens_valid_after' already exists in user table")
+            return
+
+        cursor.execute("""
+            ALTER TABLE user
+            ADD COLUMN tokens_valid_after INTEGER
+        """)
+
+        conn.commit()
+        print("✅ Successfully added 'tokens_valid_after' column to user table")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error during migration: {e}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate()
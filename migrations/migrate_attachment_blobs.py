@@ -0,0 +1,123 @@
+"""
+Migration: Move attachments into the deduplicated blob store
+
+Adds the attachment_blob table and content_hash columns, then hashes every
+existing comment, chat and ticket attachment, stores each distinct file once
+under app/uploads/blobs/<aa>/<sha256> and points the rows at it. The original
+files are removed only after the database changes are committed.
+
+Run from the project root (paths in the database are relative to it).
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+from pathlib import Path
+
+ATTACHMENT_TABLES = ("comment_attachment", "messageattachment", "ticketattachment")
+BLOBS_DIR = Path("app/uploads/blobs")
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate():
+    db_path = Path("data.db")
+    if not db_path.exists():
+        print("❌ data.db not found, skipping attachment blob migration")
+        return
+
+    conn = sqlite3.connect(str(db_path))
+    cursor = conn.cursor()
+
+    print("Creating attachment_blob table...")
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS attachment_blob ("
+        " sha256 VARCHAR(64) NOT NULL PRIMARY KEY,"
+        " file_path VARCHAR NOT NULL,"
+        " size INTEGER NOT NULL,"
+        " ref_count INTEGER NOT NULL,"
+        " created_at DATETIME NOT NULL)"
+    )
+    print("  ✓ attachment_blob ready")
+
+    tables = []
+    for table in ATTACHMENT_TABLES:
+        columns = [row[1] for row in cursor.execute(f'PRAGMA table_info("{table}")')]
+        if not columns:
+            continue
+        if "content_hash" not in columns:
+            cursor.execute(f'ALTER TABLE "{table}" ADD COLUMN content_hash VARCHAR')
+            print(f"  ✓ Added {table}.content_hash")
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS ix_{table}_content_hash ON "{table}" (content_hash)')
+        tables.append(table)
+
+    digests = {}  # original path -> digest
+    originals = set()
+    stored = duplicates = missing = 0
+    for table in tables:
+        rows = cursor.execute(
+            f'SELECT id, file_path FROM "{table}" WHERE content_hash IS NULL'
+        ).fetchall()
+        for att_id, file_path in rows:
+            source = Path(file_path)
+            if file_path not in digests:
+                if not source.is_file():
+                    print(f"  ⚠ File not found: {file_path}")
+                    missing += 1
+                    continue
+                digest = sha256_file(source)
+                target = BLOBS_DIR / digest[:2] / digest
+                if target.exists():
+                    duplicates += 1
+                else:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(source, target)
+                    stored += 1
+                digests[file_path] = digest
+                cursor.execute(
+                    "INSERT OR IGNORE INTO attachment_blob (sha256, file_path, size, ref_count, created_at) "
+                    "VALUES (?, ?, ?, 0, datetime('now'))",
+                    (digest, f"app/uploads/blobs/{digest[:2]}/{digest}", target.stat().st_size),
+                )
+            digest = digests[file_path]
+            cursor.execute(
+                f'UPDATE "{table}" SET content_hash = ?, file_path = ? WHERE id = ?',
+                (digest, f"app/uploads/blobs/{digest[:2]}/{digest}", att_id),
+            )
+            if not source.resolve().is_relative_to(BLOBS_DIR.resolve()):
+                originals.add(source)
+
+    # Reference counts are recomputed from scratch so re-running is safe
+    counts = " + ".join(
+        f'(SELECT COUNT(*) FROM "{table}" WHERE content_hash = attachment_blob.sha256)' for table in tables
+    ) or "0"
+    cursor.execute(f"UPDATE attachment_blob SET ref_count = {counts}")
+
+    try:
+        conn.commit()
+    except Exception as e:
+        print(f"\nError during migration: {e}")
+        conn.rollback()
+        conn.close()
+        raise
+    conn.close()
+
+    freed = 0
+    for source in originals:
+        if source.exists():
+            freed += source.stat().st_size
+            os.remove(source)
+
+    print(f"  ✓ {stored} files stored, {duplicates} duplicates folded, {missing} missing")
+    print(f"  ✓ Removed {len(originals)} original files ({freed / (1024 * 1024):.1f} MB)")
+    print("\n✓ Migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,157 @@
+"""
+Migration: Backfill ticket SLA metrics
+
+Adds the ticket_metrics and ticket_metric_bucket tables, then replays the
+status history and comments of every ticket that has no metrics yet to fill
+in first response time, resolution time and time spent in each status.
+The percentile buckets are rebuilt from ticket_metrics, so re-running is
+safe. Historical timings are attributed to each ticket's current assignee.
+
+Run from the project root.
+"""
+import sqlite3
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.ticket_metrics import RESOLVED_STATUSES, STATUS_COLUMNS, bucket_for  # noqa: E402
+
+
+def parse(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def stored(value):
+    # Same text format SQLAlchemy uses for DATETIME columns on SQLite
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f') if value else None
+
+
+def seconds_between(start, end):
+    return max(0.0, (end - start).total_seconds())
+
+
+def migrate():
+    db_path = Path("data.db")
+    if not db_path.exists():
+        print("❌ data.db not found, skipping ticket metrics migration")
+        return
+
+    conn = sqlite3.connect(str(db_path))
+    cursor = conn.cursor()
+
+    print("Creating ticket metrics tables...")
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS ticket_metrics ("
+        " ticket_id INTEGER NOT NULL PRIMARY KEY REFERENCES ticket (id) ON DELETE CASCADE,"
+        " workspace_id INTEGER NOT NULL REFERENCES workspace (id),"
+        " assigned_to_id INTEGER REFERENCES user (id),"
+        " category VARCHAR NOT NULL,"
+        " created_at DATETIME NOT NULL,"
+        " status VARCHAR NOT NULL,"
+        " status_since DATETIME NOT NULL,"
+        " open_seconds FLOAT NOT NULL,"
+        " in_progress_seconds FLOAT NOT NULL,"
+        " waiting_seconds FLOAT NOT NULL,"
+        " resolved_seconds FLOAT NOT NULL,"
+        " first_response_at DATETIME,"
+        " first_response_seconds FLOAT,"
+        " resolved_at DATETIME,"
+        " resolution_seconds FLOAT)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_ticket_metrics_workspace_id ON ticket_metrics (workspace_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_ticket_metrics_assigned_to_id ON ticket_metrics (assigned_to_id)")
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS ticket_metric_bucket ("
+        " id INTEGER NOT NULL PRIMARY KEY,"
+        " workspace_id INTEGER NOT NULL REFERENCES workspace (id),"
+        " metric VARCHAR NOT NULL,"
+        " assigned_to_id INTEGER NOT NULL,"
+        " category VARCHAR NOT NULL,"
+        " bucket INTEGER NOT NULL,"
+        " count INTEGER NOT NULL,"
+        " UNIQUE (workspace_id, metric, assigned_to_id, category, bucket))"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_ticket_metric_bucket_workspace_id ON ticket_metric_bucket (workspace_id)")
+    print("  ✓ ticket_metrics and ticket_metric_bucket ready")
+
+    tickets = cursor.execute(
+        "SELECT id, workspace_id, assigned_to_id, category, created_at, status, resolved_at, closed_at "
+        "FROM ticket WHERE id NOT IN (SELECT ticket_id FROM ticket_metrics)"
+    ).fetchall()
+
+    status_changes = defaultdict(list)
+    for ticket_id, new_status, changed_at in cursor.execute(
+        "SELECT ticket_id, new_value, created_at FROM tickethistory "
+        "WHERE action = 'status_changed' ORDER BY ticket_id, created_at, id"
+    ):
+        status_changes[ticket_id].append((new_status, parse(changed_at)))
+
+    first_responses = dict(cursor.execute(
+        "SELECT c.ticket_id, MIN(c.created_at) FROM ticketcomment c JOIN ticket t ON t.id = c.ticket_id "
+        "WHERE c.user_id IS NOT NULL AND c.is_internal = 0 AND c.user_id != COALESCE(t.created_by_id, 0) "
+        "GROUP BY c.ticket_id"
+    ).fetchall())
+
+    for (ticket_id, workspace_id, assigned_to_id, category, created_at,
+         current_status, resolved_at, closed_at) in tickets:
+        created = parse(created_at)
+        durations = dict.fromkeys(STATUS_COLUMNS, 0.0)
+        status, since, resolved = 'open', created, None
+        for new_status, changed_at in status_changes.get(ticket_id, []):
+            if status in durations:
+                durations[status] += seconds_between(since, changed_at)
+            status, since = new_status, changed_at
+            if status in RESOLVED_STATUSES and resolved is None:
+                resolved = changed_at
+        if resolved is None:
+            resolved = min((parse(v) for v in (resolved_at, closed_at) if v), default=None)
+        responded = parse(first_responses.get(ticket_id))
+
+        cursor.execute(
+            "INSERT INTO ticket_metrics (ticket_id, workspace_id, assigned_to_id, category, created_at, status,"
+            " status_since, open_seconds, in_progress_seconds, waiting_seconds, resolved_seconds,"
+            " first_response_at, first_response_seconds, resolved_at, resolution_seconds)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                ticket_id, workspace_id, assigned_to_id, category or 'general', stored(created),
+                current_status or status, stored(since), *durations.values(),
+                stored(responded), seconds_between(created, responded) if responded else None,
+                stored(resolved), seconds_between(created, resolved) if resolved else None,
+            ),
+        )
+    print(f"  ✓ Backfilled metrics for {len(tickets)} tickets")
+
+    # Rebuild the percentile buckets from scratch
+    buckets = Counter()
+    for workspace_id, assigned_to_id, category, first_response, resolution in cursor.execute(
+        "SELECT workspace_id, assigned_to_id, category, first_response_seconds, resolution_seconds FROM ticket_metrics"
+    ).fetchall():
+        for metric, seconds in (('first_response', first_response), ('resolution', resolution)):
+            if seconds is not None:
+                buckets[(workspace_id, metric, assigned_to_id or 0, category, bucket_for(seconds))] += 1
+    cursor.execute("DELETE FROM ticket_metric_bucket")
+    cursor.executemany(
+        "INSERT INTO ticket_metric_bucket (workspace_id, metric, assigned_to_id, category, bucket, count)"
+        " VALUES (?, ?, ?, ?, ?, ?)",
+        [(*key, count) for key, count in buckets.items()],
+    )
+    print(f"  ✓ Rebuilt {len(buckets)} percentile buckets")
+
+    try:
+        conn.commit()
+    except Exception as e:
+        print(f"\nError during migration: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    print("\n✓ Migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
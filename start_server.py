@@ -5,6 +5,8 @@ making it accessible from other machines on the same network or data center.
 """
 import sys
 import os
+import threading
+import time
 from pathlib import Path
 
 # Add the project root to Python path
@@ -15,15 +17,27 @@ from app.core.network import get_local_ip, get_all_local_ips, get_public_ip
 from app.core.backup import backup_manager
 
 
+def _print_public_ip(port):
+    public_ip = get_public_ip()
+    print(f"\n[PUBLIC ACCESS] http://{public_ip}:{port}\n", flush=True)
+
+
 def start_server(host=None, port=8000, use_public_ip=True):
     """
     Start the uvicorn server with automatic IP detection and database backup.
     
+    The startup backup and attachment scan run in the background once the
+    server is up (STARTUP_MAINTENANCE), and the public IP is looked up while
+    the server starts, so neither delays binding the port.
+    
     Args:
         host: IP address to bind to. If None, will auto-detect.
         port: Port to bind to. Default is 8000.
         use_public_ip: If True, detects and displays public IP. Server binds to 0.0.0.0 for public access.
     """
+    # Must be set before the settings are first read
+    os.environ.setdefault("STARTUP_MAINTENANCE", "1")
+    
     import uvicorn
     import asyncio
     from app.core.database import init_models
@@ -41,36 +55,23 @@ def start_server(host=None, port=8000, use_public_ip=True):
     else:
         # Check database integrity and restore from backup if corrupted
         print("[*] Checking database integrity...")
+        started = time.perf_counter()
         if backup_manager.check_and_restore_on_startup():
-            print("[+] Database is ready")
-            # Create an initial backup with attachments
-            print("[*] Creating startup backup...")
-            backup_manager.create_backup(include_attachments=True)
+            print(f"[+] Database is ready ({time.perf_counter() - started:.1f}s)")
+            print("[*] Startup backup and attachment scan will run in the background")
         else:
             print("[!] Failed to restore database. Server may not start properly.")
             return
     
-    # Run attachment scanner to fix broken paths
-    print("[*] Scanning for attachments...")
-    try:
-        from app.core.attachment_scanner import run_attachment_scan
-        results = run_attachment_scan(db_path='data.db', fix_paths=True)
-        if results['fixed'] > 0:
-            print(f"[+] Fixed {results['fixed']} broken attachment paths")
-        if results['missing'] > 0:
-            print(f"[!] Warning: {results['missing']} attachments have missing files")
-        print(f"[+] Attachment scan complete ({results['ok']} OK, {results['scanned']} total)")
-    except Exception as e:
-        print(f"[!] Attachment scan failed: {e}")
-    
     # Detect IP if not provided
     if host is None:
         if use_public_ip:
             # For public access, we need to bind to 0.0.0.0 (all interfaces)
-            # but display the public IP for access
-            public_ip = get_public_ip()
+            # but display the public IP for access. Looking it up can take
+            # seconds, so it is printed once known instead of holding up startup
+            threading.Thread(target=_print_public_ip, args=(port,), name="public-ip", daemon=True).start()
             host = '0.0.0.0'  # Bind to all interfaces
-            display_ip = public_ip
+            display_ip = None
         else:
             # For local network only
             host = get_local_ip()
@@ -85,9 +86,9 @@ def start_server(host=None, port=8000, use_public_ip=True):
     print(f"Port: {port}")
     
     if use_public_ip and host == '0.0.0.0':
-        print(f"\n[PUBLIC ACCESS]")
-        print(f"   http://{display_ip}:{port}")
-        print(f"\n[LOCAL ACCESS]")
+        print("\n[PUBLIC ACCESS]")
+        print(f"   {'(detecting public IP...)' if display_ip is None else f'http://{display_ip}:{port}'}")
+        print("\n[LOCAL ACCESS]")
         local_ip = get_local_ip()
         print(f"   http://{local_ip}:{port}")
         print(f"   http://localhost:{port}")
@@ -0,0 +1,79 @@
+import sys
+import uuid
+from dataclasses import dataclass
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from app.core import database, page_cache
+from app.core.config import get_settings
+from app.core.database import async_session_factory, engine, ensure_initialized
+from app.core.loop_monitor import LoopMonitor
+from app.core.security import get_password_hash
+from app.main import app
+from app.models import User, Workspace
+
+PASSWORD = "Passw0rd!"
+
+
+@dataclass
+class WebUser:
+    client: AsyncClient
+    username: str
+    user_id: int
+    workspace_id: int
+
+
+@pytest.fixture(autouse=True, scope="session")
+def page_versions_dir(tmp_path_factory):
+    """Keep the page cache's shared version files out of the working tree"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(page_cache, "PAGE_VERSIONS_DIR", tmp_path_factory.mktemp("page_versions"))
+        yield
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def fail_on_blocking_calls(request):
+    """With LOOP_MONITOR_STRICT=1, fail async tests that block the event loop
+    for longer than LOOP_LAG_THRESHOLD_MS"""
+    settings = get_settings()
+    if not settings.loop_monitor_strict or request.node.get_closest_marker("asyncio") is None:
+        yield
+        return
+    monitor = LoopMonitor(threshold=settings.loop_lag_threshold_ms / 1000, strict=True)
+    monitor.start()
+    try:
+        yield
+    finally:
+        await monitor.stop()
+    monitor.check()
+
+
+@pytest_asyncio.fixture
+async def admin_web(monkeypatch):
+    """A web client signed in as the admin of a fresh workspace"""
+    # test_auth_signup replaces app.core.database with a fresh module; the
+    # app's lazy imports must keep using the engine this client signs in with
+    monkeypatch.setitem(sys.modules, "app.core.database", database)
+    await ensure_initialized()
+    name = f"admin_{uuid.uuid4().hex[:8]}"
+    async with async_session_factory() as db:
+        workspace = Workspace(name=f"Workspace {name}")
+        db.add(workspace)
+        await db.flush()
+        user = User(
+            username=name, email=f"{name}@example.com", hashed_password=get_password_hash(PASSWORD),
+            workspace_id=workspace.id, is_admin=True, profile_completed=True,
+        )
+        db.add(user)
+        await db.commit()
+        web_user = WebUser(client=None, username=name, user_id=user.id, workspace_id=workspace.id)  # type: ignore[arg-type]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        r = await client.post("/web/login", data={"username": name, "password": PASSWORD})
+        assert r.status_code == 303, r.text
+        web_user.client = client
+        yield web_user
+    # Pooled aiosqlite connections belong to this test's event loop
+    await engine.dispose()
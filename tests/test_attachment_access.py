@@ -0,0 +1,74 @@
+import hashlib
+
+import pytest
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from app.core.attachment_access import attachment_response, make_grant
+from app.core.compression import TextGZipMiddleware
+
+
+def _app(grant):
+    app = FastAPI()
+
+    @app.get("/file")
+    async def file(request: Request):
+        return attachment_response(request, grant)
+
+    app.add_middleware(TextGZipMiddleware, minimum_size=100)
+    return app
+
+
+def test_etag_does_not_reveal_the_content_hash(tmp_path):
+    digest = hashlib.sha256(b"data").hexdigest()
+    grant = make_grant(str(tmp_path / "f"), "f.txt", "text/plain", digest)
+    assert grant.etag.startswith('"') and digest not in grant.etag
+    assert make_grant(str(tmp_path / "g"), "g.txt", None, digest).etag == grant.etag
+    assert make_grant(str(tmp_path / "f"), "f.txt", None, None).etag is None
+
+
+@pytest.mark.asyncio
+async def test_conditional_and_ranged_requests(tmp_path):
+    content = bytes(range(256)) * 8
+    path = tmp_path / "blob"
+    path.write_bytes(content)
+    grant = make_grant(str(path), "data.bin", "application/octet-stream", hashlib.sha256(content).hexdigest())
+
+    async with AsyncClient(transport=ASGITransport(app=_app(grant)), base_url="http://test") as client:
+        r = await client.get("/file")
+        assert r.status_code == 200 and r.content == content
+        assert r.headers["etag"] == grant.etag
+        assert r.headers["accept-ranges"] == "bytes"
+
+        r = await client.get("/file", headers={"If-None-Match": grant.etag})
+        assert r.status_code == 304 and r.content == b""
+
+        r = await client.get("/file", headers={"Range": "bytes=10-19"})
+        assert r.status_code == 206 and r.content == content[10:20]
+        assert r.headers["content-range"] == f"bytes 10-19/{len(content)}"
+
+        r = await client.get("/file", headers={"Range": "bytes=5000-"})
+        assert r.status_code == 416
+
+        # A stale If-Range validator gets the whole file
+        r = await client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert r.status_code == 200 and len(r.content) == len(content)
+
+
+@pytest.mark.asyncio
+async def test_gzipped_text_gets_a_weak_etag(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello world\n" * 200)
+    grant = make_grant(str(path), "notes.txt", "text/plain", hashlib.sha256(b"notes").hexdigest())
+
+    async with AsyncClient(transport=ASGITransport(app=_app(grant)), base_url="http://test") as client:
+        r = await client.get("/file", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.headers["etag"] == f"W/{grant.etag}"
+        assert r.text == "hello world\n" * 200
+
+        r = await client.get("/file", headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["etag"]})
+        assert r.status_code == 304
+
+        r = await client.get("/file", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in r.headers and r.headers["etag"] == grant.etag
@@ -0,0 +1,127 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import SQLModel
+
+from app.core import attachment_store
+from app.core.attachment_store import (
+    BLOBS_DIR,
+    _add_reference,
+    collect_attachment_garbage,
+)
+from app.core.database import upsert_insert
+from app.core.email_ticket import EmailTicketService
+from app.main import app
+from app.models import Ticket, TicketAttachment, User, Workspace
+from app.models.attachment_blob import AttachmentBlob
+
+
+@pytest.mark.asyncio
+async def test_blobs_are_not_public():
+    digest = uuid.uuid4().hex * 2
+    blob = BLOBS_DIR / digest[:2] / digest
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    blob.write_bytes(b"private")
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            for path in (f"/uploads/blobs/{digest[:2]}/{digest}", f"/uploads/Blobs/{digest[:2]}/{digest}",
+                         f"/uploads/x/../blobs/{digest[:2]}/{digest}"):
+                r = await client.get(path)
+                assert r.status_code == 404, path
+    finally:
+        blob.unlink()
+
+
+async def _store_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'store.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_references_are_counted_per_upload(tmp_path):
+    engine = await _store_engine(tmp_path)
+    async with AsyncSession(engine) as db:
+        await _add_reference(db, "ab" * 32, "app/uploads/blobs/ab/x", 10)
+        await _add_reference(db, "ab" * 32, "app/uploads/blobs/ab/x", 10)
+        await db.commit()
+        blob = await db.get(AttachmentBlob, "ab" * 32)
+        assert blob.ref_count == 2
+    await engine.dispose()
+
+
+def test_upsert_compiles_for_postgresql():
+    db = SimpleNamespace(bind=SimpleNamespace(dialect=SimpleNamespace(name="postgresql")))
+    stmt = upsert_insert(db, AttachmentBlob).values(sha256="x", file_path="p", size=1, ref_count=1)
+    stmt = stmt.on_conflict_do_update(index_elements=[AttachmentBlob.sha256], set_={"ref_count": 2})
+    assert "ON CONFLICT (sha256) DO UPDATE" in str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_email_attachments_go_through_the_blob_store(tmp_path):
+    engine = await _store_engine(tmp_path)
+    content = uuid.uuid4().bytes * 64
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        ws = Workspace(name="Acme")
+        db.add(ws)
+        await db.flush()
+        agent = User(username="agent", hashed_password="x", workspace_id=ws.id)
+        db.add(agent)
+        await db.commit()
+
+        service = EmailTicketService("imap.example", "support@example.com", "x", ws.id, default_assigned_to=agent.id)
+        attachment = {"filename": "log.txt", "content_type": "text/plain", "content": content}
+        ticket = await service.create_ticket_from_email(
+            db, "Printer", "It is broken", "Guest", "guest@example.com", attachments=[attachment, attachment],
+        )
+
+        rows = (await db.execute(select(TicketAttachment).where(TicketAttachment.ticket_id == ticket.id))).scalars().all()
+        assert len(rows) == 2 and rows[0].file_path == rows[1].file_path
+        assert rows[0].uploaded_by_id == agent.id and rows[0].mime_type == "text/plain"
+        blob = await db.get(AttachmentBlob, rows[0].content_hash)
+        assert blob.ref_count == 2
+    path = BLOBS_DIR / blob.sha256[:2] / blob.sha256
+    try:
+        assert path.read_bytes() == content
+    finally:
+        path.unlink()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_garbage_collection_recounts_and_keeps_referenced_blobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(attachment_store, "BLOBS_DIR", tmp_path / "blobs")
+    monkeypatch.setattr(attachment_store, "ATTACHMENT_GC_GRACE_SECONDS", 0)
+    kept, dropped, stray = "aa" * 32, "bb" * 32, "cc" * 32
+    for digest in (kept, dropped, stray):
+        path = tmp_path / "blobs" / digest[:2] / digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(digest.encode())
+
+    engine = await _store_engine(tmp_path)
+    async with AsyncSession(engine) as db:
+        ws = Workspace(name="Acme")
+        db.add(ws)
+        await db.flush()
+        agent = User(username="agent", hashed_password="x", workspace_id=ws.id)
+        ticket = Ticket(ticket_number="TKT-1", subject="Printer", workspace_id=ws.id)
+        db.add_all([agent, ticket])
+        await db.flush()
+        db.add(TicketAttachment(ticket_id=ticket.id, filename="a.txt", file_path="p", file_size=64,
+                                content_hash=kept, uploaded_by_id=agent.id))
+        # Referenced once, but the row holding the reference is gone (e.g. cascade)
+        await _add_reference(db, kept, "p", 64)
+        await _add_reference(db, dropped, "p", 64)
+        await db.commit()
+
+        assert await collect_attachment_garbage(db) == (2, 128)
+        assert sorted(p.name for p in (tmp_path / "blobs").glob("??/*")) == [kept]
+        assert (await db.get(AttachmentBlob, kept)).ref_count == 1
+        assert await db.get(AttachmentBlob, dropped) is None
+    await engine.dispose()
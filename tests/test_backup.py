@@ -0,0 +1,119 @@
+import hashlib
+import itertools
+import json
+import shutil
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from app.core.backup import DatabaseBackup
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+@pytest.fixture
+def manager(tmp_path):
+    db_path = tmp_path / "data.db"
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("CREATE TABLE user (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("INSERT INTO user (name) VALUES ('original')")
+        conn.commit()
+    backups = DatabaseBackup(db_path=str(db_path), backup_dir=str(tmp_path / "backups"))
+    backups.uploads_dir = tmp_path / "uploads"
+    (backups.uploads_dir / "comments").mkdir(parents=True)
+    (backups.uploads_dir / "comments" / "a.txt").write_text("attachment a")
+    # Distinct names even for backups taken within the same second
+    counter = itertools.count(1)
+    backups.get_backup_filename = lambda **kwargs: f"backup_MANUAL_20240101_{next(counter):06d}.zip"
+    return backups
+
+
+def _refcount(manager, text: str) -> int:
+    row = manager.blobs.lookup(_digest(text))
+    return row[2] if row else 0
+
+
+def _set_user_name(manager, name: str) -> None:
+    with closing(sqlite3.connect(manager.db_path)) as conn:
+        conn.execute("UPDATE user SET name = ?", (name,))
+        conn.commit()
+
+
+def _user_name(manager) -> str:
+    with closing(sqlite3.connect(manager.db_path)) as conn:
+        return conn.execute("SELECT name FROM user").fetchone()[0]
+
+
+def test_backups_hold_and_release_their_blobs(manager):
+    first = manager.create_backup(is_manual=True)
+    second = manager.create_backup(is_manual=True)
+    assert _refcount(manager, "attachment a") == 2
+
+    assert manager.delete_backup(first.name)
+    assert _refcount(manager, "attachment a") == 1
+    assert manager.delete_backup(second.name)
+    assert manager.blobs.lookup(_digest("attachment a")) is None
+
+
+def test_uploaded_manifest_archive_does_not_release_references(manager):
+    backup = manager.create_backup(is_manual=True)
+    uploaded = manager.backup_dir / "backup_UPLOADED_20240101_000000.zip"
+    shutil.copy(backup, uploaded)
+
+    assert manager.delete_backup(uploaded.name)
+    assert _refcount(manager, "attachment a") == 1
+    assert manager.restore_from_backup(backup)
+
+
+def test_backups_deleted_outside_the_app_are_released(manager):
+    manager.create_backup(is_manual=True).unlink()
+    manager._release_missing_holders()
+    assert _refcount(manager, "attachment a") == 0
+
+
+def test_restore_with_missing_blobs_changes_nothing(manager):
+    backup = manager.create_backup(is_manual=True)
+    _set_user_name(manager, "changed")
+    for blob in (manager.backup_dir / "blobs").glob("??/*"):
+        blob.unlink()
+
+    assert not manager.restore_from_backup(backup)
+    assert _user_name(manager) == "changed"
+    assert not list(manager.backup_dir.glob("corrupted_*"))
+
+
+def test_restore_keeps_the_newest_uploads_manifests(manager):
+    manager.max_corrupted_manifests = 1
+    backup = manager.create_backup(is_manual=True)
+    (manager.uploads_dir / "comments" / "b.txt").write_text("attachment b")
+    manager.blobs.add_file(manager.uploads_dir / "comments" / "b.txt")
+    old_manifest = manager.backup_dir / "corrupted_uploads_20000101_000000.json"
+    old_manifest.write_text(json.dumps({"files": {"comments/b.txt": {"sha256": _digest("attachment b")}}}))
+    manager.blobs.hold(old_manifest.name, [_digest("attachment b")])
+    _set_user_name(manager, "changed")
+    (manager.uploads_dir / "comments" / "a.txt").unlink()
+
+    assert manager.restore_from_backup(backup)
+    assert _user_name(manager) == "original"
+    assert (manager.uploads_dir / "comments" / "a.txt").read_text() == "attachment a"
+    # The new manifest holds b.txt; the pruned one released its reference
+    assert not old_manifest.exists()
+    assert len(list(manager.backup_dir.glob("corrupted_uploads_*.json"))) == 1
+    assert _refcount(manager, "attachment b") == 1
+
+
+def test_existing_index_adopts_legacy_holders(manager):
+    backup = manager.create_backup(is_manual=True)
+    shutil.copy(backup, manager.backup_dir / "backup_UPLOADED_20240101_000000.zip")
+    # An index written before references were recorded per backup
+    with closing(sqlite3.connect(manager.backup_dir / "blobs" / "index.db")) as conn:
+        conn.execute("DROP TABLE holder_blob")
+        conn.execute("UPDATE blob SET refcount = 7")
+        conn.commit()
+
+    reopened = DatabaseBackup(db_path=str(manager.db_path), backup_dir=str(manager.backup_dir))
+    assert reopened.blobs.holders() == {backup.name}
+    assert _refcount(reopened, "attachment a") == 1
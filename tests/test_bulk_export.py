@@ -0,0 +1,100 @@
+import csv
+import io
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.core.bulk_export import DATASETS
+from app.core.database import async_session_factory
+from app.models import Project, Task, Workspace
+from app.models.ticket import Ticket, TicketComment
+
+EXPORT_URL = "/web/admin/reports/export"
+
+
+async def _seed(admin_web) -> None:
+    async with async_session_factory() as db:
+        other = Workspace(name="Other workspace")
+        db.add(other)
+        await db.flush()
+        mine = Project(name="Website", owner_id=admin_web.user_id, workspace_id=admin_web.workspace_id)
+        theirs = Project(name="Elsewhere", owner_id=admin_web.user_id, workspace_id=other.id)
+        db.add_all([mine, theirs])
+        await db.flush()
+        for day, title in ((1, "Draft, \"v1\""), (5, "Review"), (9, "Launch")):
+            db.add(Task(title=title, project_id=mine.id, creator_id=admin_web.user_id,
+                        created_at=datetime(2024, 3, day, 12)))
+        db.add(Task(title="Not mine", project_id=theirs.id, creator_id=admin_web.user_id,
+                    created_at=datetime(2024, 3, 5, 12)))
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_csv_export_is_scoped_and_filtered(admin_web):
+    await _seed(admin_web)
+    r = await admin_web.client.get(
+        f"{EXPORT_URL}/tasks",
+        params={"columns": "title,project", "start_date": "2024-03-01", "end_date": "2024-03-05"},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert r.headers["content-disposition"].startswith('attachment; filename="tasks_20240301_')
+    rows = list(csv.reader(io.StringIO(r.content.decode("utf-8-sig"))))
+    assert rows == [["title", "project"], ['Draft, "v1"', "Website"], ["Review", "Website"]]
+
+
+@pytest.mark.asyncio
+async def test_parquet_export(admin_web):
+    pq = pytest.importorskip("pyarrow.parquet")
+    await _seed(admin_web)
+    r = await admin_web.client.get(f"{EXPORT_URL}/tasks", params={"format": "parquet", "columns": "title,created_at"})
+    assert r.status_code == 200
+    table = pq.read_table(io.BytesIO(r.content))
+    assert table.column_names == ["title", "created_at"]
+    assert table.column("title").to_pylist() == ['Draft, "v1"', "Review", "Launch"]
+    assert table.column("created_at").to_pylist()[0] == datetime(2024, 3, 1, 12)
+
+
+@pytest.mark.asyncio
+async def test_ticket_timings_ignore_internal_notes(admin_web):
+    async with async_session_factory() as db:
+        ticket = Ticket(ticket_number=f"TKT-{uuid.uuid4().hex[:8]}", subject="Printer",
+                        workspace_id=admin_web.workspace_id, created_at=datetime(2024, 3, 1, 12), resolved_at=datetime(2024, 3, 1, 14))
+        db.add(ticket)
+        await db.flush()
+        db.add_all([
+            TicketComment(ticket_id=ticket.id, user_id=admin_web.user_id, content="Checking logs",
+                          is_internal=True, created_at=datetime(2024, 3, 1, 12, 5)),
+            TicketComment(ticket_id=ticket.id, user_id=admin_web.user_id, content="On it",
+                          created_at=datetime(2024, 3, 1, 12, 30)),
+        ])
+        await db.commit()
+
+    r = await admin_web.client.get(
+        f"{EXPORT_URL}/tickets", params={"columns": "first_response_minutes,resolution_minutes"},
+    )
+    assert r.status_code == 200
+    rows = list(csv.reader(io.StringIO(r.content.decode("utf-8-sig"))))
+    assert rows == [["first_response_minutes", "resolution_minutes"], ["30.0", "120.0"]]
+
+
+def test_ticket_timings_compile_for_postgresql():
+    column = DATASETS["tickets"].columns["resolution_minutes"].expr
+    sql = str(select(column).compile(dialect=postgresql.dialect()))
+    assert "EXTRACT(EPOCH FROM" in sql
+    assert "julianday" not in sql
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path, params", [
+    ("reports", {}),
+    ("tasks", {"columns": "title,password"}),
+    ("tasks", {"format": "xlsx"}),
+    ("tasks", {"start_date": "01/03/2024"}),
+])
+async def test_bad_export_requests_are_rejected(admin_web, path, params):
+    r = await admin_web.client.get(f"{EXPORT_URL}/{path}", params=params)
+    assert r.status_code == 400
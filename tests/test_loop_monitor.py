@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.loop_monitor import BlockingCallDetected, LoopMonitor
+
+
+def _block_the_loop(seconds: float = 0.3) -> None:
+    time.sleep(seconds)
+
+
+async def _monitored(work) -> LoopMonitor:
+    monitor = LoopMonitor(threshold=0.1, interval=0.01, strict=True)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    await work()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    return monitor
+
+
+# Plain tests running their own loop, so the strict-mode fixture in
+# conftest.py does not also catch the deliberate stall
+
+
+def test_blocking_call_is_reported_with_its_stack():
+    async def blocking():
+        _block_the_loop()
+
+    monitor = asyncio.run(_monitored(blocking))
+    assert monitor.stats()["stalls"] == 1 and monitor.stats()["max_ms"] >= 200
+    assert monitor.stalls[0]["lag_ms"] >= 200
+    with pytest.raises(BlockingCallDetected, match="_block_the_loop"):
+        monitor.check()
+    # Violations are reported once
+    monitor.check()
+
+
+def test_stall_just_over_the_threshold_has_a_stack():
+    async def blocking():
+        _block_the_loop(0.13)
+
+    monitor = asyncio.run(_monitored(blocking))
+    assert len(monitor.stalls) == 1
+    assert "_block_the_loop" in monitor.stalls[0]["stack"]
+    with pytest.raises(BlockingCallDetected):
+        monitor.check()
+
+
+def test_garbage_collection_pauses_are_exempt():
+    monitor = LoopMonitor(threshold=0.1, interval=0.01, strict=True)
+
+    async def collecting():
+        # What gc.callbacks report around a long collection on the loop thread
+        monitor._on_gc("start", {})
+        _block_the_loop()
+        monitor._on_gc("stop", {})
+
+    async def run():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await collecting()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(run())
+    assert len(monitor.stalls) == 1 and monitor.stalls[0]["gc_ms"] >= 200
+    monitor.check()
+
+
+def test_awaiting_does_not_count_as_blocking():
+    async def cooperative():
+        await asyncio.sleep(0.3)
+        await asyncio.to_thread(_block_the_loop)
+
+    monitor = asyncio.run(_monitored(cooperative))
+    assert monitor.stats()["stalls"] == 0
+    monitor.check()
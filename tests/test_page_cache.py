@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import text
+
+from app.core import page_cache
+from app.core.database import async_session_factory
+from app.core.page_cache import page_cache_stats
+from app.models import Project, Workspace
+
+
+@pytest.fixture(autouse=True)
+def fixed_time_bucket(monkeypatch):
+    # ETags also change every PAGE_CACHE_MAX_AGE_SECONDS; keep that out of the way
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_MAX_AGE_SECONDS", 10**9)
+
+
+async def _add_project(name: str, owner_id: int, workspace_id: int) -> None:
+    async with async_session_factory() as db:
+        db.add(Project(name=name, owner_id=owner_id, workspace_id=workspace_id))
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_repeat_requests_are_answered_from_the_cache(admin_web):
+    client = admin_web.client
+    first = await client.get("/web/projects")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+
+    hits = page_cache_stats()["hits"]
+    again = await client.get("/web/projects")
+    assert again.content == first.content and again.headers["etag"] == etag
+    assert page_cache_stats()["hits"] == hits + 1
+
+    r = await client.get("/web/projects", headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b""
+
+    # Another query string is another page
+    r = await client.get("/web/projects?view=all")
+    assert r.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_commits_move_only_their_workspace(admin_web):
+    client = admin_web.client
+    etag = (await client.get("/web/projects")).headers["etag"]
+
+    async with async_session_factory() as db:
+        other = Workspace(name="Other workspace")
+        db.add(other)
+        await db.commit()
+        other_id = other.id
+    await _add_project("Elsewhere", admin_web.user_id, other_id)
+    assert (await client.get("/web/projects", headers={"If-None-Match": etag})).status_code == 304
+
+    await _add_project("Cache busting", admin_web.user_id, admin_web.workspace_id)
+    r = await client.get("/web/projects", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    assert "Cache busting" in r.text
+
+
+@pytest.mark.asyncio
+async def test_writes_from_other_workers_and_raw_sql_invalidate(admin_web):
+    client = admin_web.client
+    etag = (await client.get("/web/projects")).headers["etag"]
+
+    # Another worker process bumping the shared version file
+    page_cache._version_file(admin_web.workspace_id).write_text("from-another-worker")
+    r = await client.get("/web/projects", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    etag = r.headers["etag"]
+
+    async with async_session_factory() as db:
+        await db.execute(text("UPDATE project SET description = 'raw' WHERE workspace_id = :ws"),
+                         {"ws": admin_web.workspace_id})
+        await db.execute(text("SELECT 1"))
+        await db.commit()
+    r = await client.get("/web/projects", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    etag = r.headers["etag"]
+
+    async with async_session_factory() as db:
+        await db.execute(text("SELECT COUNT(*) FROM project"))
+        await db.commit()
+    assert (await client.get("/web/projects", headers={"If-None-Match": etag})).status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_pages_are_not_cached_without_shared_versions(admin_web, tmp_path, monkeypatch):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setattr(page_cache, "PAGE_VERSIONS_DIR", blocker / "page_versions")
+    monkeypatch.setattr(page_cache, "_versions_available", True)
+
+    page_cache.bump_data_version(admin_web.workspace_id)
+    r = await admin_web.client.get("/web/projects")
+    assert r.status_code == 200 and "etag" not in r.headers
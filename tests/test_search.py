@@ -0,0 +1,118 @@
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import SQLModel
+
+from app import models  # noqa: F401
+from app.core.search import ensure_search_index, parse_terms, render_snippet, search_workspace
+from app.models import (
+    Chat,
+    ChatMember,
+    Comment,
+    Message,
+    Project,
+    ProjectMember,
+    Task,
+    Ticket,
+    TicketComment,
+    User,
+    Workspace,
+)
+
+
+def test_parse_terms_strips_punctuation():
+    assert parse_terms('  "Invoice"  TKT-2024-00001!') == ["invoice", "tkt", "2024", "00001"]
+    assert parse_terms("") == []
+
+
+def test_whitespace_only_snippets_render_empty():
+    assert render_snippet("  \n ") == ""
+    assert render_snippet(" <b>a</b> ") == "&lt;b&gt;a&lt;/b&gt;"
+
+
+@pytest.mark.asyncio
+async def test_search_index_sync_and_visibility(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'search_{uuid.uuid4().hex[:8]}.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(ensure_search_index)
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        ws = Workspace(name="Acme")
+        db.add(ws)
+        await db.flush()
+        admin = User(username="admin", hashed_password="x", workspace_id=ws.id, is_admin=True)
+        member = User(username="member", hashed_password="x", workspace_id=ws.id)
+        outsider = User(username="outsider", hashed_password="x", workspace_id=ws.id)
+        db.add_all([admin, member, outsider])
+        await db.flush()
+
+        project = Project(name="Website relaunch", owner_id=admin.id, workspace_id=ws.id)
+        db.add(project)
+        await db.flush()
+        db.add(ProjectMember(project_id=project.id, user_id=member.id))
+        task = Task(title="Migrate invoices", description="Move billing data", project_id=project.id, creator_id=admin.id)
+        db.add(task)
+        await db.flush()
+        db.add(Comment(task_id=task.id, author_id=member.id, content="Invoice export is flaky"))
+
+        ticket = Ticket(ticket_number="TKT-2024-00001", subject="Printer jammed", workspace_id=ws.id)
+        db.add(ticket)
+        await db.flush()
+        db.add(TicketComment(ticket_id=ticket.id, content="Replaced the invoice tray"))
+
+        chat = Chat(workspace_id=ws.id, name="Ops", created_by_id=admin.id)
+        db.add(chat)
+        await db.flush()
+        db.add(ChatMember(chat_id=chat.id, user_id=admin.id))
+        db.add(Message(chat_id=chat.id, author_id=admin.id, content="Invoices are done"))
+        await db.commit()
+
+        # Prefix match across every source type for the admin
+        results = await search_workspace(db, admin, "invo")
+        assert [t["id"] for t in results["tasks"]] == [task.id]
+        assert len(results["comments"]) == 1
+        assert results["tickets"][0]["matched_comment"] is True
+        assert len(results["messages"]) == 1
+        assert "<mark>" in str(results["comments"][0]["snippet"])
+
+        # Project members see project content but not other people's chats or tickets
+        results = await search_workspace(db, member, "invo")
+        assert len(results["tasks"]) == 1 and len(results["comments"]) == 1
+        assert results["tickets"] == [] and results["messages"] == []
+
+        # Non-members see nothing from the project
+        results = await search_workspace(db, outsider, "invoice")
+        assert all(not items for items in results.values())
+
+        # Updates and deletes are picked up by the triggers
+        task.title = "Archive receipts"
+        await db.commit()
+        results = await search_workspace(db, admin, "receipts")
+        assert [t["id"] for t in results["tasks"]] == [task.id]
+
+        ticket.assigned_to_id = outsider.id
+        await db.commit()
+        results = await search_workspace(db, outsider, "TKT-2024-00001")
+        assert [t["id"] for t in results["tickets"]] == [ticket.id]
+
+        await db.delete(task)
+        await db.commit()
+        results = await search_workspace(db, admin, "receipts")
+        assert results["tasks"] == []
+
+        # A ticket matching in its subject and in comments is listed once
+        db.add_all([TicketComment(ticket_id=ticket.id, content="Printer works again"),
+                    TicketComment(ticket_id=ticket.id, content="Printer toner low")])
+        await db.commit()
+        results = await search_workspace(db, admin, "printer")
+        assert [t["id"] for t in results["tickets"]] == [ticket.id]
+
+        # Archived tickets are hidden, like on the ticket list
+        ticket.is_archived = True
+        await db.commit()
+        results = await search_workspace(db, admin, "printer")
+        assert results["tickets"] == []
+
+    await engine.dispose()
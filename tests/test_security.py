@@ -0,0 +1,141 @@
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+from jose import jwt
+from passlib.hash import pbkdf2_sha256
+from sqlalchemy import delete, update
+
+from app.core import security
+from app.core.config import get_settings
+from app.core.database import async_session_factory
+from app.core.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    create_refresh_token,
+    get_password_hash_async,
+    revoke_user_tokens,
+    token_revoked,
+    verify_access_token,
+    verify_password_async,
+)
+from app.models import User
+
+
+@pytest.mark.asyncio
+async def test_hasher_pool_verifies_and_upgrades_hashes():
+    current = await get_password_hash_async("Secret1")
+    assert await verify_password_async("Secret1", current) == (True, None)
+    assert await verify_password_async("Wrong1", current) == (False, None)
+
+    outdated = pbkdf2_sha256.using(rounds=1000).hash("Secret1")
+    valid, new_hash = await verify_password_async("Secret1", outdated)
+    assert valid and new_hash and security.pwd_context.verify("Secret1", new_hash)
+    assert not security.pwd_context.needs_update(new_hash)
+
+
+@pytest.mark.asyncio
+async def test_hasher_pool_turns_requests_away_when_full(monkeypatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_MAX_PENDING", 0)
+    rejected = security.password_hasher_stats()["rejected"]
+    with pytest.raises(PasswordHasherBusy):
+        await get_password_hash_async("Secret1")
+    assert security.password_hasher_stats()["rejected"] == rejected + 1
+
+
+@pytest.mark.asyncio
+async def test_busy_hasher_answers_sign_in_with_503(admin_web, monkeypatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_MAX_PENDING", 0)
+    r = await admin_web.client.post("/web/login", data={"username": admin_web.username, "password": "Passw0rd!"})
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "2"
+
+
+@pytest.fixture
+def token_state(monkeypatch):
+    monkeypatch.setattr(security, "_verified_tokens", OrderedDict())
+    monkeypatch.setattr(security, "_token_states", {})
+
+
+def _token_issued_at(subject: int, iat: float) -> str:
+    settings = get_settings()
+    claims = {"sub": str(subject), "type": "access", "iat": int(iat), "exp": int(iat) + 600}
+    return jwt.encode(claims, settings.secret_key, algorithm=settings.algorithm)
+
+
+def test_access_token_carries_workspace_and_role(token_state):
+    claims = verify_access_token(create_access_token(7, workspace_id=3, is_admin=True))
+    assert (claims["sub"], claims["ws"], claims["adm"], claims["type"]) == ("7", 3, True, "access")
+    assert verify_access_token(create_refresh_token(7)) is None
+    assert verify_access_token("not-a-token") is None
+
+
+def test_verified_tokens_are_cached_with_lru_eviction(token_state, monkeypatch):
+    monkeypatch.setattr(security, "ACCESS_TOKEN_CACHE_SIZE", 2)
+    decoded = []
+    decode_token = security.decode_token
+    monkeypatch.setattr(security, "decode_token", lambda token: decoded.append(token) or decode_token(token))
+    first, second, third = (create_access_token(user_id) for user_id in (1, 2, 3))
+
+    verify_access_token(first)
+    verify_access_token(second)
+    verify_access_token(first)
+    assert decoded == [first, second]
+    # The least recently used token (second) makes room for the third
+    verify_access_token(third)
+    assert list(security._verified_tokens) == [first, third]
+
+    security._verified_tokens[first]["exp"] = time.time() - 1
+    assert verify_access_token(first) is None
+    assert first not in security._verified_tokens
+
+
+def test_revocation_compares_whole_seconds(token_state):
+    user = SimpleNamespace(id=7, is_active=True, tokens_valid_after=None)
+    revoke_user_tokens(user)
+    revoked_at = user.tokens_valid_after
+    assert isinstance(revoked_at, int)
+
+    assert token_revoked(jwt.get_unverified_claims(_token_issued_at(7, revoked_at - 1)))
+    # A sign-in within the same second as the revocation is accepted
+    assert not token_revoked(jwt.get_unverified_claims(_token_issued_at(7, revoked_at)))
+    assert not token_revoked(jwt.get_unverified_claims(_token_issued_at(8, revoked_at - 1)))
+
+    user.is_active = False
+    revoke_user_tokens(user)
+    assert token_revoked(jwt.get_unverified_claims(_token_issued_at(7, revoked_at + 60)))
+
+
+async def _update_user(user_id: int, **values) -> None:
+    # Stands in for another worker: only the database changes
+    async with async_session_factory() as db:
+        if values:
+            await db.execute(update(User).where(User.id == user_id).values(**values))
+        else:
+            await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_revocations_on_other_workers_reach_the_api(admin_web, token_state, monkeypatch):
+    token = create_access_token(admin_web.user_id, admin_web.workspace_id)
+    headers = {"Authorization": f"Bearer {token}"}
+    r = await admin_web.client.get("/api/users/me", headers=headers)
+    assert r.status_code == 200 and r.json()["id"] == admin_web.user_id
+
+    await _update_user(admin_web.user_id, tokens_valid_after=jwt.get_unverified_claims(token)["iat"] + 1)
+    # Trusted until the state read by this worker is older than the TTL
+    assert (await admin_web.client.get("/api/users/me", headers=headers)).status_code == 200
+    monkeypatch.setattr(security, "TOKEN_STATE_TTL_SECONDS", -1)
+    assert (await admin_web.client.get("/api/users/me", headers=headers)).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_deleted_user_is_refused_by_the_api(admin_web, token_state, monkeypatch):
+    monkeypatch.setattr(security, "TOKEN_STATE_TTL_SECONDS", -1)
+    headers = {"Authorization": f"Bearer {create_access_token(admin_web.user_id, admin_web.workspace_id)}"}
+    assert (await admin_web.client.get("/api/projects/", headers=headers)).status_code == 200
+
+    await _update_user(admin_web.user_id)
+    assert (await admin_web.client.get("/api/projects/", headers=headers)).status_code == 401
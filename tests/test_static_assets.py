@@ -0,0 +1,26 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.static_assets import get_asset, static_url
+from app.main import app
+
+
+@pytest.mark.asyncio
+async def test_each_encoding_has_its_own_etag():
+    asset = get_asset("js/calls.js")
+    assert asset is not None and asset.gzip is not None
+    url = static_url("js/calls.js")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        plain = await client.get(url, headers={"Accept-Encoding": "identity"})
+        gzipped = await client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in plain.headers
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert plain.headers["etag"] == f'"{asset.fingerprint}"'
+        assert gzipped.headers["etag"] == f'"{asset.fingerprint}-gzip"'
+
+        # A validator for the plain body does not revalidate the gzipped one
+        r = await client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]})
+        assert r.status_code == 200 and r.headers["etag"] == gzipped.headers["etag"]
+        r = await client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]})
+        assert r.status_code == 304
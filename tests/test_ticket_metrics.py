@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import SQLModel
+
+from app import models  # noqa: F401
+from app.core.ticket_metrics import (
+    bucket_for,
+    record_ticket_created,
+    record_ticket_reply,
+    record_ticket_status,
+    ticket_sla_percentiles,
+    ticket_status_durations,
+)
+from app.models import Ticket, User, Workspace
+
+
+def test_bucket_bounds_are_inclusive():
+    assert bucket_for(0) == 0
+    assert bucket_for(60) == 0
+    assert bucket_for(61) == 1
+    assert bucket_for(10 ** 9) == 16
+
+
+@pytest.mark.asyncio
+async def test_timings_are_recorded_as_tickets_change(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        ws = Workspace(name="Acme")
+        db.add(ws)
+        await db.flush()
+        agent = User(username="agent", hashed_password="x", workspace_id=ws.id)
+        db.add(agent)
+        await db.flush()
+        ticket = Ticket(ticket_number="TKT-1", subject="Printer", workspace_id=ws.id,
+                        category="support", assigned_to_id=agent.id)
+        db.add(ticket)
+        await db.flush()
+
+        created = datetime(2024, 1, 1, 9, 0)
+        record_ticket_created(db, ticket, at=created)
+        # The submitter's own follow-up (a guest here) is not a response
+        await record_ticket_reply(db, ticket, None, False, at=created + timedelta(minutes=1))
+        await record_ticket_reply(db, ticket, agent.id, True, at=created + timedelta(minutes=2))
+        await record_ticket_reply(db, ticket, agent.id, False, at=created + timedelta(minutes=10))
+        ticket.status = "in_progress"
+        await record_ticket_status(db, ticket, at=created + timedelta(hours=1))
+        ticket.status = "resolved"
+        await record_ticket_status(db, ticket, at=created + timedelta(hours=3))
+        await db.commit()
+
+        [first_response] = await ticket_sla_percentiles(db, ws.id, "first_response")
+        assert first_response["group"] == agent.id and first_response["count"] == 1
+        assert 5 * 60 <= first_response["p50"] <= 15 * 60
+        [resolution] = await ticket_sla_percentiles(db, ws.id, "resolution", group_by="category")
+        assert resolution["group"] == "support"
+        assert 2 * 3600 <= resolution["p95"] <= 4 * 3600
+
+        [durations] = await ticket_status_durations(db, ws.id)
+        assert durations["open"] == 3600
+        assert durations["in_progress"] == 2 * 3600
+    await engine.dispose()
@@ -0,0 +1,48 @@
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.core import uploads
+from app.core.uploads import UploadTooLarge, save_upload
+
+
+class _FailingReader(io.BytesIO):
+    def read(self, size=-1):
+        if self.tell():
+            raise ConnectionResetError("client went away")
+        return super().read(size)
+
+
+@pytest.fixture
+def uploads_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOADS_DIR", tmp_path)
+    monkeypatch.setattr(uploads, "UPLOAD_READ_CHUNK_SIZE", 16)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_save_upload_streams_and_hashes(uploads_dir):
+    content = b"x" * 100
+    stored = await save_upload(UploadFile(io.BytesIO(content), filename="Report.PDF"), "comments", 1000)
+
+    assert stored.path.read_bytes() == content
+    assert stored.path.suffix == ".pdf" and stored.size == 100
+    assert stored.sha256 == hashlib.sha256(content).hexdigest()
+    assert stored.relative_path == f"app/uploads/comments/{stored.path.name}"
+    assert stored.url == f"/uploads/comments/{stored.path.name}"
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_leaves_nothing_behind(uploads_dir):
+    with pytest.raises(UploadTooLarge):
+        await save_upload(UploadFile(io.BytesIO(b"x" * 100), filename="big.bin"), "comments", 50, stored_name="big.bin")
+    assert list((uploads_dir / "comments").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_interrupted_upload_leaves_nothing_behind(uploads_dir):
+    with pytest.raises(ConnectionResetError):
+        await save_upload(UploadFile(_FailingReader(b"x" * 100), filename="a.txt"), "comments", 1000)
+    assert list((uploads_dir / "comments").iterdir()) == []
@@ -0,0 +1,51 @@
+import uuid
+from collections import deque
+from datetime import datetime
+
+import pytest
+from sqlmodel import select
+
+from app.core.database import async_session_factory
+from app.core.loop_monitor import loop_monitor
+from app.models.ticket import Ticket, TicketComment
+
+
+@pytest.mark.asyncio
+async def test_admin_comment_logs_page(admin_web):
+    r = await admin_web.client.get("/web/admin/email-settings/comment-logs")
+    assert r.status_code == 200, r.text
+
+
+@pytest.mark.asyncio
+async def test_ticket_comments_page_back_by_keyset(admin_web):
+    created = datetime(2024, 1, 1, 9, 0)
+    async with async_session_factory() as db:
+        ticket = Ticket(ticket_number=f"TKT-{uuid.uuid4().hex[:8]}", subject="Printer", workspace_id=admin_web.workspace_id)
+        db.add(ticket)
+        await db.flush()
+        # Equal timestamps exercise the id tie-break
+        for i in range(55):
+            db.add(TicketComment(ticket_id=ticket.id, content=f"note-{i:03d}", created_at=created))
+        await db.commit()
+        comment_ids = (await db.execute(
+            select(TicketComment.id).where(TicketComment.ticket_id == ticket.id).order_by(TicketComment.id)
+        )).scalars().all()
+
+    r = await admin_web.client.get(f"/web/tickets/{ticket.id}")
+    assert r.status_code == 200
+    assert "note-005" in r.text and "note-054" in r.text and "note-004" not in r.text
+
+    r = await admin_web.client.get(f"/web/tickets/{ticket.id}?before={comment_ids[5]}")
+    assert r.status_code == 200
+    assert "note-000" in r.text and "note-004" in r.text and "note-005" not in r.text
+
+
+@pytest.mark.asyncio
+async def test_perf_page_lists_loop_stalls(admin_web, monkeypatch):
+    monkeypatch.setattr(loop_monitor, "stalls", deque([
+        {"at": datetime(2024, 1, 1), "lag_ms": 180.0, "gc_ms": 150.0, "task": None,
+         "where": "app/core/slow.py:1 in work", "stack": None},
+    ]))
+    r = await admin_web.client.get("/web/admin/perf")
+    assert r.status_code == 200
+    assert "app/core/slow.py:1 in work" in r.text and "garbage collection" in r.text